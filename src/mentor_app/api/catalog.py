@@ -0,0 +1,76 @@
+"""Course catalog export and import API endpoints."""
+
+import gzip
+import hmac
+import os
+import tempfile
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from mentor_app.api.progress import clear_content_caches
+from mentor_app.infrastructure.catalog import MEDIA_TYPE, CatalogTransfer
+from mentor_app.infrastructure.database import DatabaseService
+
+router = APIRouter(prefix="/api/v1", tags=["catalog"])
+
+SPOOL_MEMORY_BYTES = 8 * 1024 * 1024  # larger uploads spill to a temporary file
+
+# Response models
+class ImportCatalogResponse(BaseModel):
+    courses: int
+    modules: int
+    lessons: int
+    lesson_bodies: int
+
+# Initialize services
+db_service = DatabaseService()
+catalog = CatalogTransfer(db_service)
+
+
+def _require_admin(admin_key: Optional[str]):
+    """Only holders of ADMIN_API_KEY may overwrite existing content, answer keys included."""
+    expected = os.getenv("ADMIN_API_KEY")
+    if not expected or not admin_key or not hmac.compare_digest(admin_key.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Replacing existing records requires the admin key (X-Admin-Key)")
+
+
+@router.get("/catalog/export")
+def export_catalog(course_id: Optional[list[str]] = Query(None)):
+    """Stream all courses, or the given ones, with their modules and lessons as gzip-compressed NDJSON."""
+    return StreamingResponse(
+        catalog.export_catalog(course_id),
+        media_type=MEDIA_TYPE,
+        headers={"Content-Disposition": 'attachment; filename="catalog.ndjson.gz"'}
+    )
+
+
+@router.post("/catalog/import", response_model=ImportCatalogResponse)
+async def import_catalog(
+    request: Request,
+    replace: bool = Query(False),
+    admin_key: Optional[str] = Header(None, alias="X-Admin-Key")
+):
+    """Load a catalog export sent as the request body; existing records are kept unless an admin sets ``replace``."""
+    if replace:
+        _require_admin(admin_key)
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES) as upload:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+        try:
+            counts = await run_in_threadpool(catalog.import_catalog, upload, replace)
+        except (ValueError, EOFError, gzip.BadGzipFile) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid catalog: {str(e)}")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to import catalog: {str(e)}")
+    if replace:
+        # Replaced lessons and modules may come with new answer keys and test cases
+        clear_content_caches()
+
+    return ImportCatalogResponse(
+        courses=counts["course"], modules=counts["module"], lessons=counts["lesson"], lesson_bodies=counts["lesson_body"]
+    )
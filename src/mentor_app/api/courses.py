@@ -1,14 +1,22 @@
 """Course API endpoints."""
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+import json
+import uuid
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
-from mentor_app.models import UserContext, Module
+from mentor_app.models import UserContext, Module, KnowledgeProfile
+from mentor_app.api.navigation import coordinator
+from mentor_app.api.progress import clear_content_caches, event_writer
 from mentor_app.mentor.mentor_service import MentorService
 from mentor_app.infrastructure.database import DatabaseService
-from mentor_app.infrastructure.repositories import LessonRepository
+from mentor_app.infrastructure.llm_client import LLMUnavailableError
+from mentor_app.infrastructure.repositories import LessonRepository, ProgressRepository
+from mentor_app.infrastructure.scheduler import RequestClass, run_generation
+from mentor_app.infrastructure.tokens import GenerationBudgetExceeded
 
 router = APIRouter(prefix="/api/v1", tags=["courses"])
 
@@ -18,6 +26,13 @@ class CreateCourseRequest(BaseModel):
     user_instructions: Optional[str] = None
     user_context: Optional[UserContext] = None
 
+class CreateAdaptiveCourseRequest(BaseModel):
+    profile: KnowledgeProfile
+
+class BatchCreateCoursesRequest(BaseModel):
+    items: list[CreateCourseRequest] = Field(..., min_length=1, max_length=1000)
+    concurrency: int = Field(8, ge=1, le=32)  # parallel syllabus generations
+
 # Response models
 class CourseResponse(BaseModel):
     id: str
@@ -31,17 +46,36 @@ class CourseResponse(BaseModel):
 class CourseDetailResponse(CourseResponse):
     progress: Optional[dict] = None
 
+class UsageResponse(BaseModel):
+    course_id: str
+    calls: int
+    prompt_tokens: int
+    completion_tokens: int
+    llm_seconds: float
+    usage: list[dict]  # per module ("" for the syllabus) and task
+
 # Initialize services
 db_service = DatabaseService()
 mentor_service = MentorService(db_service)
 lesson_repo = LessonRepository(db_service)
+progress_repo = ProgressRepository(db_service)
+
+def scheduling_tenant(http_request: Request) -> Optional[str]:
+    """Tenant a generation request is scheduled for: the client's address, not a header it could rotate.
+
+    Behind a reverse proxy, uvicorn's ``--proxy-headers`` puts the forwarded
+    client address here when the proxy is trusted.
+    """
+    return http_request.client.host if http_request.client else None
 
 @router.post("/courses", response_model=CourseResponse, status_code=201)
-async def create_course(request: CreateCourseRequest):
+async def create_course(request: CreateCourseRequest, http_request: Request):
     """Create a new course with syllabus generation."""
     try:
-        # Generate course plan using mentor service
-        course_plan, course_id = mentor_service.create_course_syllabus(
+        # Generate course plan using mentor service; a learner is waiting, so it is scheduled as interactive
+        course_plan, course_id = await run_generation(
+            RequestClass("interactive", scheduling_tenant(http_request)),
+            mentor_service.create_course_syllabus,
             topic=request.topic,
             user_instructions=request.user_instructions,
             user_context=request.user_context
@@ -57,12 +91,88 @@ async def create_course(request: CreateCourseRequest):
             created_at=datetime.now().isoformat() + "Z"
         )
         
+    except GenerationBudgetExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create course: {str(e)}")
 
+@router.post("/courses/adaptive", response_model=CourseResponse, status_code=201)
+async def create_adaptive_course(request: CreateAdaptiveCourseRequest, http_request: Request):
+    """Create a course personalized to a knowledge profile from a cached course template."""
+    try:
+        course_plan, course_id = await run_generation(
+            RequestClass("interactive", scheduling_tenant(http_request)), mentor_service.create_adaptive_course, request.profile
+        )
+
+        return CourseResponse(
+            id=course_id,
+            course_title=course_plan.course_title,
+            estimated_duration=course_plan.estimated_duration,
+            difficulty_level=course_plan.difficulty_level,
+            prerequisites=course_plan.prerequisites,
+            modules=course_plan.modules,
+            created_at=datetime.now().isoformat() + "Z"
+        )
+        
+    except GenerationBudgetExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create adaptive course: {str(e)}")
+
+@router.post("/courses/batch")
+async def create_courses_batch(request: BatchCreateCoursesRequest, http_request: Request):
+    """Create many courses at once, streaming per-item results as NDJSON.
+
+    Syllabi are generated with bounded concurrency and each result line
+    (``generated`` or ``error``) is streamed as soon as it finishes. All
+    generated courses are then persisted in one transaction, reported by a
+    final ``summary`` line; course ids are only durable once it reports success.
+    Generation is scheduled as the client's bulk work, behind interactive requests.
+    """
+    tenant = scheduling_tenant(http_request)
+
+    async def results():
+        created = []
+        async for index, course_plan, usage, error in mentor_service.generate_course_syllabi(request.items, request.concurrency, tenant=tenant):
+            if error is not None:
+                yield json.dumps({"index": index, "status": "error", "error": str(error)}) + "\n"
+                continue
+
+            course_id = str(uuid.uuid4())
+            created.append((course_id, course_plan, usage))
+            course = CourseResponse(
+                id=course_id,
+                course_title=course_plan.course_title,
+                estimated_duration=course_plan.estimated_duration,
+                difficulty_level=course_plan.difficulty_level,
+                prerequisites=course_plan.prerequisites,
+                modules=course_plan.modules,
+                created_at=datetime.now().isoformat() + "Z"
+            )
+            yield json.dumps({"index": index, "status": "generated", "course": course.dict()}) + "\n"
+
+        summary = {"status": "summary", "generated": len(created), "failed": len(request.items) - len(created)}
+        try:
+            if created:
+                await run_generation(RequestClass("bulk", tenant), mentor_service.save_course_plans, created)
+            summary["persisted"] = len(created)
+        except Exception as e:
+            summary.update(persisted=0, error=f"Failed to persist courses: {str(e)}")
+        yield json.dumps(summary) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @router.get("/courses/{course_id}", response_model=CourseDetailResponse)
-async def get_course(course_id: str):
-    """Retrieve course details and complete structure including lessons if generated."""
+async def get_course(course_id: str, user_id: Optional[str] = Header(None, alias="X-User-Id")):
+    """Retrieve course details and complete structure including lessons if generated.
+
+    When ``X-User-Id`` is sent, ``progress`` is read from the user's
+    materialized course aggregate.
+    """
     try:
         # Get course from repository
         course = mentor_service.course_repo.get_course(course_id)
@@ -100,6 +210,10 @@ async def get_course(course_id: str):
             
             modules_with_lessons.append(Module(**module_dict))
         
+        course_progress = progress_repo.get_course_progress(user_id, course_id) if user_id else None
+        completed_modules = course_progress.completed_modules if course_progress else 0
+        total_modules = len(modules_with_lessons)
+        
         return CourseDetailResponse(
             id=course.id,
             course_title=course.course_title,
@@ -109,9 +223,9 @@ async def get_course(course_id: str):
             modules=modules_with_lessons,
             created_at=course.created_at.isoformat() + "Z",
             progress={
-                "completed_modules": 0,
-                "total_modules": len(modules_with_lessons),
-                "completion_percentage": 0
+                "completed_modules": completed_modules,
+                "total_modules": total_modules,
+                "completion_percentage": round(100 * completed_modules / total_modules) if total_modules else 0
             }
         )
         
@@ -119,3 +233,52 @@ async def get_course(course_id: str):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve course: {str(e)}")
+
+@router.get("/courses/{course_id}/usage", response_model=UsageResponse)
+async def get_course_usage(course_id: str):
+    """Report the LLM calls and tokens spent generating a course and its modules."""
+    try:
+        rows = mentor_service.usage_repo.get_usage(course_id)
+        if not rows and not mentor_service.course_repo.get_course(course_id):
+            raise HTTPException(status_code=404, detail=f"Course with id '{course_id}' not found")
+
+        usage = [
+            {
+                "module_id": row.module_id,
+                "task": row.task,
+                "calls": row.calls,
+                "prompt_tokens": row.prompt_tokens,
+                "completion_tokens": row.completion_tokens,
+                "llm_seconds": round(row.llm_seconds, 3)
+            }
+            for row in rows
+        ]
+        return UsageResponse(
+            course_id=course_id,
+            calls=sum(row["calls"] for row in usage),
+            prompt_tokens=sum(row["prompt_tokens"] for row in usage),
+            completion_tokens=sum(row["completion_tokens"] for row in usage),
+            llm_seconds=round(sum(row.llm_seconds for row in rows), 3),
+            usage=usage
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve usage: {str(e)}")
+
+@router.delete("/courses/{course_id}", status_code=204)
+async def delete_course(course_id: str):
+    """Delete a course with its modules and lessons; lesson bodies other courses share are kept."""
+    try:
+        if not mentor_service.course_repo.delete_course(course_id):
+            raise HTTPException(status_code=404, detail=f"Course with id '{course_id}' not found")
+        coordinator.path_index.invalidate(course_id)
+        event_writer.discard_course(course_id)
+        clear_content_caches()
+        return Response(status_code=204)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to delete course: {str(e)}")
@@ -0,0 +1,82 @@
+"""Lesson API endpoints."""
+
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+from mentor_app.builder.quiz_factory import without_answers
+from mentor_app.builder.renderer import render_lesson
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.models import Lesson
+from mentor_app.infrastructure.repositories import LessonRepository
+
+router = APIRouter(prefix="/api/v1", tags=["lessons"])
+
+ContentFormat = Literal["markdown", "html", "both"]
+
+# Response models
+class LessonResponse(BaseModel):
+    id: str
+    title: str
+    type: str
+    content_markdown: Optional[str] = None
+    content_html: Optional[str] = None
+    toc: Optional[list[dict]] = None
+    key_concepts: list[str]
+    difficulty: str
+    code_examples: list[dict]
+    interactive_elements: list[dict]
+    practice_tasks: list[dict]
+    assessment: Optional[dict] = None  # questions without answer keys
+    estimated_duration: int
+
+# Initialize services
+db_service = DatabaseService()
+lesson_repo = LessonRepository(db_service)
+
+
+def lesson_to_dict(lesson: Lesson, content_format: ContentFormat = "markdown") -> dict:
+    """Convert a stored lesson to its response dict in the requested content format."""
+    body = lesson.body or lesson  # lessons saved before shared bodies carry their content inline
+    lesson_dict = {
+        "id": lesson.id,
+        "title": lesson.title,
+        "type": lesson.type,
+        "key_concepts": lesson.key_concepts,
+        "difficulty": lesson.difficulty,
+        "code_examples": body.code_examples or [],
+        "interactive_elements": lesson.interactive_elements or [],
+        "practice_tasks": lesson.practice_tasks or [],
+        "estimated_duration": lesson.estimated_duration or 0,
+        "assessment": without_answers(lesson.assessment) if lesson.assessment else None
+    }
+
+    if content_format in ("markdown", "both"):
+        lesson_dict["content_markdown"] = body.content_markdown or ""
+
+    if content_format in ("html", "both"):
+        content_html, toc = body.content_html, body.toc
+        if content_html is None:
+            # Lessons saved before HTML was precompiled
+            content_html, toc = render_lesson(body.content_markdown or "")
+        lesson_dict["content_html"] = content_html
+        lesson_dict["toc"] = toc or []
+
+    return lesson_dict
+
+
+@router.get("/lessons/{lesson_id}", response_model=LessonResponse, response_model_exclude_none=True)
+async def get_lesson(lesson_id: str, format: ContentFormat = Query("markdown")):
+    """Retrieve lesson content as markdown, precompiled HTML, or both."""
+    try:
+        lesson = lesson_repo.get_lesson(lesson_id)
+        if not lesson:
+            raise HTTPException(status_code=404, detail=f"Lesson with id '{lesson_id}' not found")
+
+        return LessonResponse(**lesson_to_dict(lesson, format))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve lesson: {str(e)}")
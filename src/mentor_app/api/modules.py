@@ -1,13 +1,19 @@
 """Module API endpoints."""
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 from pydantic import BaseModel
 from typing import Optional
 
-from mentor_app.models import UserContext
+from mentor_app.builder.quiz_factory import without_answers
 from mentor_app.mentor.mentor_service import MentorService
 from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.llm_client import LLMUnavailableError
 from mentor_app.infrastructure.repositories import LessonRepository
+from mentor_app.infrastructure.scheduler import RequestClass, run_generation
+from mentor_app.infrastructure.tokens import GenerationBudgetExceeded
+from mentor_app.api.lessons import ContentFormat, lesson_to_dict
+from mentor_app.api.courses import scheduling_tenant
+from mentor_app.api.navigation import coordinator, default_user_context
 
 router = APIRouter(prefix="/api/v1", tags=["modules"])
 
@@ -27,23 +33,25 @@ mentor_service = MentorService(db_service)
 lesson_repo = LessonRepository(db_service)
 
 @router.post("/courses/{course_id}/modules/{module_id}", response_model=ModuleResponse, status_code=201)
-async def create_module(course_id: str, module_id: str):
+async def create_module(course_id: str, module_id: str, http_request: Request):
     """Generate detailed content for a module from its outline."""
     try:
-        # Create dummy user context (will be loaded from DB in future)
-        user_context = UserContext(
-            skill_level="intermediate",
-            learning_style="hands-on",
-            time_commitment=8,
-            prior_knowledge=["basic programming", "databases"]
-        )
+        user_context = default_user_context()
+        
+        request_class = RequestClass("interactive", scheduling_tenant(http_request))
+        # A prefetch may already be generating this module; join it instead of starting over
+        await run_generation(request_class, coordinator.prefetcher.wait, course_id, module_id)
         
         # Create module content using mentor service
-        module_content, content_id = mentor_service.create_module(
+        module_content, content_id = await run_generation(
+            request_class,
+            mentor_service.create_module,
             course_id=course_id,
             module_id=module_id,
             user_context=user_context
         )
+        # New lessons shift the course's learning path
+        coordinator.path_index.invalidate(course_id)
         
         # Convert lessons to response format
         lessons_response = []
@@ -58,7 +66,8 @@ async def create_module(course_id: str, module_id: str):
                 "code_examples": [ex.dict() for ex in lesson.code_examples],
                 "interactive_elements": [ie.dict() for ie in lesson.interactive_elements],
                 "practice_tasks": [pt.dict() for pt in lesson.practice_tasks],
-                "estimated_duration": lesson.estimated_duration
+                "estimated_duration": lesson.estimated_duration,
+                "assessment": without_answers(lesson.assessment.dict()) if lesson.assessment else None
             }
             lessons_response.append(lesson_dict)
         
@@ -69,15 +78,23 @@ async def create_module(course_id: str, module_id: str):
             learning_objectives=module_content.learning_objectives,
             estimated_duration=module_content.estimated_duration,
             lessons=lessons_response,
-            module_assessment=module_content.module_assessment.dict() if module_content.module_assessment else None
+            module_assessment=without_answers(module_content.module_assessment.dict()) if module_content.module_assessment else None
         )
         
+    except GenerationBudgetExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create module: {str(e)}")
 
 @router.get("/modules/{module_id}", response_model=ModuleResponse)
-async def get_module(module_id: str):
-    """Retrieve complete module content including all lessons."""
+async def get_module(module_id: str, format: ContentFormat = Query("markdown")):
+    """Retrieve complete module content including all lessons.
+
+    ``format`` selects lesson content as markdown, precompiled HTML (with a
+    heading index), or both.
+    """
     try:
         # Get module from repository
         module = mentor_service.module_repo.get_module(module_id)
@@ -88,21 +105,7 @@ async def get_module(module_id: str):
         lessons = lesson_repo.get_lessons_by_module(module_id)
         
         # Convert lessons to response format
-        lessons_response = []
-        for lesson in lessons:
-            lesson_dict = {
-                "id": lesson.id,
-                "title": lesson.title,
-                "type": lesson.type,
-                "content_markdown": lesson.content_markdown or "",
-                "key_concepts": lesson.key_concepts,
-                "difficulty": lesson.difficulty,
-                "code_examples": lesson.code_examples or [],
-                "interactive_elements": lesson.interactive_elements or [],
-                "practice_tasks": lesson.practice_tasks or [],
-                "estimated_duration": lesson.estimated_duration or 0
-            }
-            lessons_response.append(lesson_dict)
+        lessons_response = [lesson_to_dict(lesson, format) for lesson in lessons]
         
         return ModuleResponse(
             module_id=module.id,
@@ -111,7 +114,7 @@ async def get_module(module_id: str):
             learning_objectives=module.learning_objectives,
             estimated_duration=module.estimated_duration,
             lessons=lessons_response,
-            module_assessment=None  # TODO: Add assessment retrieval if needed
+            module_assessment=without_answers(module.assessment) if module.assessment else None
         )
         
     except HTTPException:
@@ -0,0 +1,107 @@
+"""Learning-path navigation API endpoints."""
+
+from functools import partial
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from pydantic import BaseModel
+
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.repositories import CourseRepository, ModuleRepository, ProgressRepository
+from mentor_app.mentor.coordinator import MentorCoordinator
+from mentor_app.mentor.learning_path import LearningPathIndex
+from mentor_app.mentor.mentor_service import MentorService
+from mentor_app.mentor.prefetch import ModulePrefetcher
+from mentor_app.models import UserContext
+
+router = APIRouter(prefix="/api/v1", tags=["navigation"])
+
+# Response models
+class NextModuleResponse(BaseModel):
+    module_id: str
+    is_available: bool
+    prerequisites_met: bool
+    dependencies_completed: list[str]
+
+class NextLessonResponse(BaseModel):
+    course_id: str
+    module_id: str
+    lesson_id: Optional[str] = None
+    is_available: bool
+
+def default_user_context() -> UserContext:
+    """Learner context modules are generated for (will be loaded from DB in future).
+
+    Prefetched and on-demand generations must use the same one: it is part of
+    the lesson body hash, so a prefetched module is only reused if they match.
+    """
+    return UserContext(
+        skill_level="intermediate",
+        learning_style="hands-on",
+        time_commitment=8,
+        prior_knowledge=["basic programming", "databases"]
+    )
+
+
+# Initialize services
+db_service = DatabaseService()
+module_repo = ModuleRepository(db_service)
+course_repo = CourseRepository(db_service)
+mentor_service = MentorService(db_service)
+path_index = LearningPathIndex(course_repo)
+prefetcher = ModulePrefetcher(
+    partial(mentor_service.create_module, user_context=default_user_context()),
+    on_generated=path_index.invalidate
+)
+coordinator = MentorCoordinator(
+    mentor_service.architect,
+    course_repo,
+    progress_repo=ProgressRepository(db_service),
+    path_index=path_index,
+    prefetcher=prefetcher
+)
+
+
+@router.get("/courses/{course_id}/next-module", response_model=NextModuleResponse)
+async def get_next_module(course_id: str, user_id: str = Header(..., alias="X-User-Id")):
+    """Get the next module based on dependencies and progress."""
+    try:
+        next_module = coordinator.get_next_module(user_id, course_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if next_module is None:
+        return Response(status_code=204)
+    return next_module
+
+
+@router.get("/courses/{course_id}/next-lesson", response_model=NextLessonResponse)
+async def get_next_lesson(course_id: str, user_id: str = Header(..., alias="X-User-Id")):
+    """Get the next lesson along the course's learning path."""
+    try:
+        next_lesson = coordinator.get_next_lesson(user_id, course_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if next_lesson is None:
+        return Response(status_code=204)
+    return next_lesson
+
+
+@router.get("/modules/{module_id}/next-lesson", response_model=NextLessonResponse)
+async def get_next_lesson_in_module(
+    module_id: str,
+    course_id: Optional[str] = Query(None),
+    user_id: str = Header(..., alias="X-User-Id")
+):
+    """Get the next lesson in the module sequence."""
+    if course_id is None:
+        module = module_repo.get_module(module_id)
+        if not module:
+            raise HTTPException(status_code=404, detail=f"Module with id '{module_id}' not found")
+        course_id = module.course_id
+    try:
+        next_lesson = coordinator.get_next_lesson_in_module(user_id, module_id, course_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if next_lesson is None:
+        return Response(status_code=204)
+    return next_lesson
@@ -0,0 +1,316 @@
+"""Progress tracking API endpoints."""
+
+import asyncio
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from pydantic import BaseModel, Field
+
+from mentor_app.auditor.analytics import AnalyticsEngine
+from mentor_app.api.navigation import coordinator
+from mentor_app.auditor.progress_aggregator import ProgressAggregator
+from mentor_app.auditor.review_scheduler import ReviewScheduler
+from mentor_app.builder.grader import GRADABLE_TASK_TYPES, get_practice_grader
+from mentor_app.builder.models import Assessment, GradingQueueFull, PracticeTask
+from mentor_app.builder.quiz_factory import grade_assessment
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.event_writer import EventBufferFull, ProgressEventWriter
+from mentor_app.infrastructure.repositories import (
+    LessonRepository, MasteryRepository, ModuleRepository, ProgressRepository
+)
+
+router = APIRouter(prefix="/api/v1", tags=["progress"])
+
+# Request models
+class TaskResult(BaseModel):
+    task_id: str
+    user_solution: str
+    passed: bool
+    score: int
+
+class CompletePracticeRequest(BaseModel):
+    task_results: list[TaskResult]
+
+class TaskSubmission(BaseModel):
+    task_id: str
+    code: str = Field(..., max_length=100_000)
+
+class SubmitPracticeRequest(BaseModel):
+    submissions: list[TaskSubmission] = Field(..., min_length=1, max_length=20)
+
+class AssessmentAnswer(BaseModel):
+    question_id: str
+    answer: str
+
+class SubmitAssessmentRequest(BaseModel):
+    answers: list[AssessmentAnswer]
+
+# Response models
+class TheoryCompleteResponse(BaseModel):
+    lesson_id: str
+    theory_read: bool
+    completed_at: str
+
+class PracticeCompleteResponse(BaseModel):
+    lesson_id: str
+    practice_completed: bool
+    overall_score: int
+    completed_at: str
+
+class PracticeSubmitResponse(PracticeCompleteResponse):
+    results: list[dict]
+
+class AssessmentSubmitResponse(BaseModel):
+    lesson_id: str
+    assessment_submitted: bool
+    score: Optional[int] = None
+    passed: Optional[bool] = None
+    feedback: list[dict] = []
+    submitted_at: str
+
+class ModuleAssessmentSubmitResponse(BaseModel):
+    module_id: str
+    course_id: str
+    assessment_submitted: bool
+    score: Optional[int] = None
+    passed: Optional[bool] = None
+    feedback: list[dict] = []
+    submitted_at: str
+
+class ReviewItemResponse(BaseModel):
+    topic: str
+    due_at: Optional[str] = None
+
+# Initialize services
+db_service = DatabaseService()
+lesson_repo = LessonRepository(db_service)
+module_repo = ModuleRepository(db_service)
+progress_repo = ProgressRepository(db_service)
+aggregator = ProgressAggregator(db_service)
+review_scheduler = ReviewScheduler(db_service)
+analytics = AnalyticsEngine(mastery_repo=MasteryRepository(db_service), review_scheduler=review_scheduler)
+
+
+def _apply_events(session, events):
+    """Update derived progress data in the event-ingestion transaction."""
+    aggregator.apply_events(session, events)
+    review_scheduler.apply_events(session, events)
+    analytics.apply_events(session, events)
+
+
+event_writer = ProgressEventWriter(progress_repo, after_insert=_apply_events)
+coordinator.event_writer = event_writer
+
+
+@lru_cache(maxsize=100_000)
+def _lesson_location(lesson_id: str, course_id: Optional[str]) -> tuple[str, str]:
+    """Resolve (course_id, module_id) once per lesson instead of once per event."""
+    location = lesson_repo.get_lesson_location(lesson_id, course_id)
+    if location is None:
+        # Raising keeps misses out of the cache, so lessons generated later resolve
+        raise HTTPException(status_code=404, detail=f"Lesson with id '{lesson_id}' not found")
+    return location
+
+
+@lru_cache(maxsize=100_000)
+def _lesson_assessment(lesson_id: str, course_id: str, module_id: str) -> Optional[Assessment]:
+    """Load a lesson's answer key once; cleared when its course is deleted or replaced by an import."""
+    return lesson_repo.get_lesson_assessment(lesson_id, course_id, module_id)
+
+
+@lru_cache(maxsize=10_000)
+def _module_assessment(module_id: str, course_id: Optional[str]) -> tuple[str, Assessment]:
+    """Load a module's (course_id, answer key) once; misses raise, so modules generated later resolve."""
+    found = module_repo.get_module_assessment(module_id, course_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail=f"Module with id '{module_id}' not found")
+    if found[1] is None:
+        raise HTTPException(status_code=404, detail=f"Module '{module_id}' has no assessment")
+    return found
+
+
+@lru_cache(maxsize=100_000)
+def _practice_tasks(lesson_id: str, course_id: str, module_id: str) -> dict[str, PracticeTask]:
+    """Load a lesson's test cases once; cleared when its course is deleted or replaced by an import."""
+    return {task.id: task for task in lesson_repo.get_practice_tasks(lesson_id, course_id, module_id)}
+
+
+def clear_content_caches():
+    """Forget cached lesson locations and answer keys after courses are deleted or replaced."""
+    for cache in (_lesson_location, _lesson_assessment, _module_assessment, _practice_tasks):
+        cache.cache_clear()
+
+
+def _record_event(*args, **kwargs):
+    """Buffer a progress event, answering 503 while the database is too far behind to take more."""
+    try:
+        return event_writer.record(*args, **kwargs)
+    except EventBufferFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+
+def _timestamp(created_at) -> str:
+    return created_at.isoformat() + "Z"
+
+
+@router.post("/lessons/{lesson_id}/theory/complete", response_model=TheoryCompleteResponse)
+async def complete_theory(
+    lesson_id: str,
+    course_id: Optional[str] = Query(None),
+    user_id: str = Header(..., alias="X-User-Id")
+):
+    """Mark the theory portion of a lesson as read."""
+    lesson_course_id, module_id = _lesson_location(lesson_id, course_id)
+    completed_at = _record_event(user_id, lesson_course_id, module_id, lesson_id, "theory_read")
+    coordinator.mark_lesson_completed(user_id, lesson_course_id, module_id, lesson_id)
+    return TheoryCompleteResponse(lesson_id=lesson_id, theory_read=True, completed_at=_timestamp(completed_at))
+
+
+@router.post("/lessons/{lesson_id}/practice/complete", response_model=PracticeCompleteResponse)
+async def complete_practice(
+    lesson_id: str,
+    request: CompletePracticeRequest,
+    course_id: Optional[str] = Query(None),
+    user_id: str = Header(..., alias="X-User-Id")
+):
+    """Record practice task results for a lesson."""
+    lesson_course_id, module_id = _lesson_location(lesson_id, course_id)
+    return PracticeCompleteResponse(
+        **_record_practice(user_id, lesson_course_id, module_id, lesson_id, request.task_results)
+    )
+
+
+@router.post("/lessons/{lesson_id}/practice/submit", response_model=PracticeSubmitResponse)
+async def submit_practice(
+    lesson_id: str,
+    request: SubmitPracticeRequest,
+    course_id: Optional[str] = Query(None),
+    user_id: str = Header(..., alias="X-User-Id")
+):
+    """Grade practice code against each task's test cases and record the results."""
+    lesson_course_id, module_id = _lesson_location(lesson_id, course_id)
+    tasks = _practice_tasks(lesson_id, lesson_course_id, module_id)
+    for submission in request.submissions:
+        task = tasks.get(submission.task_id)
+        if task is None:
+            raise HTTPException(status_code=404, detail=f"Practice task '{submission.task_id}' not found in lesson '{lesson_id}'")
+        if task.task_type not in GRADABLE_TASK_TYPES:
+            raise HTTPException(status_code=422, detail=f"Practice task '{task.id}' cannot be graded automatically")
+
+    grader = get_practice_grader()
+    futures = []
+    try:
+        for submission in request.submissions:
+            futures.append(grader.submit(tasks[submission.task_id], submission.code))
+    except GradingQueueFull as e:
+        for future in futures:
+            future.cancel()
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    grades = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+
+    task_results = [
+        TaskResult(task_id=grade["task_id"], user_solution=submission.code, passed=grade["passed"], score=grade["score"])
+        for submission, grade in zip(request.submissions, grades)
+    ]
+    return PracticeSubmitResponse(
+        **_record_practice(user_id, lesson_course_id, module_id, lesson_id, task_results),
+        results=grades
+    )
+
+
+def _record_practice(user_id: str, course_id: str, module_id: str, lesson_id: str, results: list[TaskResult]) -> dict:
+    """Record practice results as one progress event and complete the lesson if every task passed."""
+    overall_score = round(sum(result.score for result in results) / len(results)) if results else 0
+    practice_completed = bool(results) and all(result.passed for result in results)
+
+    completed_at = _record_event(
+        user_id, course_id, module_id, lesson_id, "practice_completed",
+        score=overall_score,
+        payload={"passed": practice_completed, "task_results": [result.dict() for result in results]}
+    )
+    if practice_completed:
+        coordinator.mark_lesson_completed(user_id, course_id, module_id, lesson_id)
+    return {
+        "lesson_id": lesson_id,
+        "practice_completed": practice_completed,
+        "overall_score": overall_score,
+        "completed_at": _timestamp(completed_at)
+    }
+
+
+@router.post("/lessons/{lesson_id}/assessment/submit", response_model=AssessmentSubmitResponse)
+async def submit_assessment(
+    lesson_id: str,
+    request: SubmitAssessmentRequest,
+    course_id: Optional[str] = Query(None),
+    user_id: str = Header(..., alias="X-User-Id")
+):
+    """Record assessment answers for a lesson, grading them against its answer key."""
+    lesson_course_id, module_id = _lesson_location(lesson_id, course_id)
+    payload = {"answers": [answer.dict() for answer in request.answers]}
+    grade = {"score": None, "passed": None, "feedback": []}
+    assessment = _lesson_assessment(lesson_id, lesson_course_id, module_id)
+    if assessment is not None:
+        grade = grade_assessment(assessment, {answer.question_id: answer.answer for answer in request.answers})
+        if grade["passed"] is not None:
+            payload["passed"] = grade["passed"]
+
+    submitted_at = _record_event(
+        user_id, lesson_course_id, module_id, lesson_id, "assessment_submitted",
+        score=grade["score"],
+        payload=payload
+    )
+    # Ungraded submissions still complete the lesson
+    if grade["passed"] is not False:
+        coordinator.mark_lesson_completed(user_id, lesson_course_id, module_id, lesson_id)
+    return AssessmentSubmitResponse(
+        lesson_id=lesson_id,
+        assessment_submitted=True,
+        score=grade["score"],
+        passed=grade["passed"],
+        feedback=grade["feedback"],
+        submitted_at=_timestamp(submitted_at)
+    )
+
+
+@router.post("/modules/{module_id}/assessment/submit", response_model=ModuleAssessmentSubmitResponse)
+async def submit_module_assessment(
+    module_id: str,
+    request: SubmitAssessmentRequest,
+    course_id: Optional[str] = Query(None),
+    user_id: str = Header(..., alias="X-User-Id")
+):
+    """Grade answers to a module's assessment against its answer key and record them."""
+    module_course_id, assessment = _module_assessment(module_id, course_id)
+    grade = grade_assessment(assessment, {answer.question_id: answer.answer for answer in request.answers})
+    payload = {"answers": [answer.dict() for answer in request.answers]}
+    if grade["passed"] is not None:
+        payload["passed"] = grade["passed"]
+
+    submitted_at = _record_event(
+        user_id, module_course_id, module_id, "", "module_assessment_submitted",
+        score=grade["score"],
+        payload=payload
+    )
+    return ModuleAssessmentSubmitResponse(
+        module_id=module_id,
+        course_id=module_course_id,
+        assessment_submitted=True,
+        score=grade["score"],
+        passed=grade["passed"],
+        feedback=grade["feedback"],
+        submitted_at=_timestamp(submitted_at)
+    )
+
+
+@router.get("/reviews", response_model=list[ReviewItemResponse])
+async def get_reviews(
+    limit: int = Query(10, ge=1, le=100),
+    user_id: str = Header(..., alias="X-User-Id")
+):
+    """Get topics the learner should review now."""
+    try:
+        return analytics.recommend_review(user_id, limit=limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load reviews: {str(e)}")
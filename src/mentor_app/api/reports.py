@@ -0,0 +1,55 @@
+"""Dashboard and report API endpoints."""
+
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from mentor_app.auditor.reporter import ReportGenerator
+from mentor_app.infrastructure.database import DatabaseService
+
+router = APIRouter(prefix="/api/v1", tags=["reports"])
+
+ReportFormat = Literal["csv", "arrow"]
+
+# Initialize services
+db_service = DatabaseService()
+report_generator = ReportGenerator(db_service)
+
+
+@router.get("/users/{user_id}/dashboard")
+async def get_user_dashboard(user_id: str):
+    """Get a learner's dashboard from the latest precomputed snapshot."""
+    try:
+        return report_generator.get_dashboard_data(user_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load dashboard: {str(e)}")
+
+
+@router.get("/courses/{course_id}/dashboard")
+async def get_course_dashboard(course_id: str):
+    """Get the cohort dashboard for a course from the latest precomputed snapshot."""
+    try:
+        return report_generator.get_cohort_dashboard(course_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load course dashboard: {str(e)}")
+
+
+@router.get("/courses/{course_id}/report")
+def export_course_report(course_id: str, format: ReportFormat = Query("csv")):
+    """Stream per-learner, per-module progress for a course."""
+    if format == "arrow":
+        try:
+            chunks = report_generator.export_cohort_arrow(course_id)
+        except RuntimeError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+        media_type, extension = "application/vnd.apache.arrow.stream", "arrow"
+    else:
+        chunks = report_generator.export_cohort_csv(course_id)
+        media_type, extension = "text/csv", "csv"
+
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{course_id}-report.{extension}"'}
+    )
@@ -0,0 +1,54 @@
+"""Lesson search API endpoints."""
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.search import LessonSearchIndex
+
+router = APIRouter(prefix="/api/v1", tags=["search"])
+
+# Response models
+class SearchHit(BaseModel):
+    course_id: str
+    module_id: str
+    lesson_id: str
+    title: str
+    key_concepts: list[str]
+    snippet: Optional[str] = None  # body excerpt with matches wrapped in **
+    rank: float
+
+class SearchResponse(BaseModel):
+    query: str
+    results: list[SearchHit]
+    limit: int
+    offset: int
+    has_more: bool
+
+# Initialize services
+db_service = DatabaseService()
+search_index = LessonSearchIndex(db_service)
+
+
+@router.get("/search", response_model=SearchResponse)
+async def search_lessons(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    course_id: Optional[str] = Query(None)
+):
+    """Full-text search over lesson titles, key concepts and content, best matches first."""
+    try:
+        hits, has_more = search_index.search(q, limit=limit, offset=offset, course_id=course_id)
+        return SearchResponse(
+            query=q,
+            results=[SearchHit(**hit) for hit in hits],
+            limit=limit,
+            offset=offset,
+            has_more=has_more
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search lessons: {str(e)}")
@@ -0,0 +1,113 @@
+"""Generation trace API endpoints."""
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.repositories import TraceRepository
+
+router = APIRouter(prefix="/api/v1", tags=["traces"])
+
+# Response models
+class SpanResponse(BaseModel):
+    span_id: int
+    parent_id: Optional[int] = None  # None for stages directly under the run
+    name: str
+    start_offset_seconds: float
+    duration_seconds: float
+    outcome: str
+    error: Optional[str] = None
+    attributes: dict
+
+class TraceSummary(BaseModel):
+    id: str
+    operation: str
+    course_id: Optional[str] = None
+    module_id: Optional[str] = None
+    outcome: str
+    error: Optional[str] = None
+    started_at: datetime
+    duration_seconds: float
+    llm_calls: int
+    prompt_tokens: int
+    completion_tokens: int
+    attributes: dict
+
+class TraceResponse(TraceSummary):
+    spans: list[SpanResponse]
+    profile: Optional[str] = None  # cProfile report, for sampled runs only
+
+class TraceListResponse(BaseModel):
+    traces: list[TraceSummary]
+    limit: int
+    offset: int
+
+# Initialize services
+db_service = DatabaseService()
+trace_repo = TraceRepository(db_service)
+
+
+def trace_summary(trace) -> dict:
+    return {
+        "id": trace.id,
+        "operation": trace.operation,
+        "course_id": trace.course_id,
+        "module_id": trace.module_id,
+        "outcome": trace.outcome,
+        "error": trace.error,
+        "started_at": trace.started_at,
+        "duration_seconds": round(trace.duration_seconds, 3),
+        "llm_calls": trace.llm_calls,
+        "prompt_tokens": trace.prompt_tokens,
+        "completion_tokens": trace.completion_tokens,
+        "attributes": trace.attributes or {}
+    }
+
+
+@router.get("/traces", response_model=TraceListResponse)
+async def list_traces(
+    course_id: Optional[str] = Query(None),
+    module_id: Optional[str] = Query(None),
+    operation: Optional[str] = Query(None),
+    outcome: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """List recorded generation runs, newest first."""
+    try:
+        traces = trace_repo.list_traces(course_id, module_id, operation, outcome, limit, offset)
+        return TraceListResponse(traces=[trace_summary(trace) for trace in traces], limit=limit, offset=offset)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list traces: {str(e)}")
+
+@router.get("/traces/{trace_id}", response_model=TraceResponse)
+async def get_trace(trace_id: str):
+    """Get a generation run with the timings, token counts and outcome of each of its stages."""
+    try:
+        trace = trace_repo.get_trace(trace_id)
+        if trace is None:
+            raise HTTPException(status_code=404, detail=f"Trace with id '{trace_id}' not found")
+
+        spans = [
+            SpanResponse(
+                span_id=span.span_id,
+                parent_id=span.parent_id,
+                name=span.name,
+                start_offset_seconds=round(span.start_offset_seconds, 3),
+                duration_seconds=round(span.duration_seconds, 3),
+                outcome=span.outcome,
+                error=span.error,
+                attributes=span.attributes or {}
+            )
+            for span in trace.spans
+        ]
+        return TraceResponse(**trace_summary(trace), spans=spans, profile=trace.profile)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve trace: {str(e)}")
@@ -0,0 +1,137 @@
+"""Adaptive course derivation: shared course templates plus per-learner overlays."""
+
+import hashlib
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from mentor_app.architect.service import ArchitectService
+from mentor_app.infrastructure.shared_state import SharedStateBackend, get_state_backend
+from mentor_app.mentor.learning_path import topological_order
+from mentor_app.models import CoursePlan, KnowledgeProfile, Module, UserContext
+
+TEMPLATE_TTL = 7 * 24 * 3600
+SKIP_CONFIDENCE = 4  # confidence at or above which a module is skipped
+REMEDIATION_CONFIDENCE = 2  # confidence at or below which a module is reinforced
+MIN_TOPIC_MATCH = 0.5  # share of a topic's words a module must mention to cover it
+
+_STOPWORDS = {"and", "the", "for", "with", "from", "into", "using", "basic", "basics", "introduction", "advanced"}
+
+
+def _words(text: str) -> Set[str]:
+    return {word for word in re.findall(r"[a-z0-9#+]+", text.lower()) if len(word) > 2 and word not in _STOPWORDS}
+
+
+def template_key(topic: str, user_level: str) -> str:
+    """Cache key shared by every learner asking for the same topic at the same level."""
+    return f"{' '.join(topic.lower().split())}|{user_level.lower()}"
+
+
+class AdaptiveArchitect:
+    """Derives personalized courses from one cached template per topic and level.
+
+    The template syllabus is generated once and shared through the state
+    backend. Each learner's ``KnowledgeProfile`` is then applied locally:
+    modules covering confident topics are marked skipped, weak ones are marked
+    for remediation and moved as early as their dependencies allow. Only weak
+    topics that no template module covers go to the LLM, as bridge modules,
+    which are cached per set of missing topics.
+    """
+
+    def __init__(
+        self,
+        architect: Optional[ArchitectService] = None,
+        state_backend: Optional[SharedStateBackend] = None,
+        template_ttl: float = TEMPLATE_TTL
+    ):
+        self.architect = architect or ArchitectService()
+        self.state_backend = state_backend or get_state_backend()
+        self.template_ttl = template_ttl
+
+    def get_template(self, topic: str, user_level: str) -> CoursePlan:
+        """Get the base course for a topic and level, generating it on the first request only."""
+        data = self.state_backend.get_or_compute(
+            f"course_template:{template_key(topic, user_level)}",
+            lambda: self.architect.create_syllabus(
+                topic,
+                user_context=UserContext(
+                    skill_level=user_level, learning_style="hands-on", time_commitment=5, prior_knowledge=[]
+                )
+            ).dict(),
+            ttl=self.template_ttl
+        )
+        return CoursePlan(**data)
+
+    def derive_course(self, profile: KnowledgeProfile) -> CoursePlan:
+        """Build a learner's course variant from the shared template and their profile."""
+        template = self.get_template(profile.target_skill, profile.user_level)
+        confidences, gaps = self._score_modules(template, profile)
+
+        modules = []
+        for module in template.modules:
+            confidence = confidences.get(module.id)
+            modules.append(module.copy(update={
+                "is_skipped": confidence is not None and confidence >= SKIP_CONFIDENCE,
+                "is_remediation": confidence is not None and confidence <= REMEDIATION_CONFIDENCE
+            }))
+        if gaps:
+            modules = self._bridge_modules(profile, template, gaps) + modules
+
+        position = {module.id: index for index, module in enumerate(modules)}
+        by_id = {module.id: module for module in modules}
+        order = topological_order(
+            [(module.id, module.dependencies) for module in modules],
+            priority=lambda module_id: (self._rank(by_id[module_id]), position[module_id])
+        )
+        ordered = [by_id[module_id] for module_id in order]
+        return template.copy(update={
+            "modules": ordered,
+            "estimated_duration": sum(module.estimated_duration for module in ordered if not module.is_skipped)
+        })
+
+    def _score_modules(self, template: CoursePlan, profile: KnowledgeProfile) -> Tuple[Dict[str, float], List[str]]:
+        """Return per-module confidence (match-weighted mean) and weak topics no module covers."""
+        module_words = {
+            module.id: _words(" ".join([module.title, module.description, *module.learning_objectives]))
+            for module in template.modules
+        }
+        weighted = {}
+        gaps = []
+        for point in profile.known_topics:
+            topic_words = _words(point.topic)
+            if not topic_words:
+                continue
+            covered = False
+            for module_id, words in module_words.items():
+                match = len(topic_words & words) / len(topic_words)
+                if match >= MIN_TOPIC_MATCH:
+                    covered = True
+                    total, weight = weighted.get(module_id, (0.0, 0.0))
+                    weighted[module_id] = (total + match * point.confidence, weight + match)
+            if not covered and point.confidence <= REMEDIATION_CONFIDENCE:
+                gaps.append(" ".join(point.topic.lower().split()))
+        return {module_id: total / weight for module_id, (total, weight) in weighted.items()}, sorted(set(gaps))
+
+    def _bridge_modules(self, profile: KnowledgeProfile, template: CoursePlan, gaps: List[str]) -> List[Module]:
+        digest = hashlib.sha256("\n".join(gaps).encode()).hexdigest()[:16]
+        data = self.state_backend.get_or_compute(
+            f"course_bridge:{template_key(profile.target_skill, profile.user_level)}:{digest}",
+            lambda: [module.dict() for module in self.architect.generate_bridge_modules(template, gaps)],
+            ttl=self.template_ttl
+        )
+        # Bridges stand alone and come before the template modules
+        return [
+            Module(**{**module_data, "id": f"bridge_{index}", "dependencies": [], "is_remediation": True})
+            for index, module_data in enumerate(data, 1)
+        ]
+
+    def _rank(self, module: Module) -> int:
+        # Bridges fill gaps the rest of the course assumes, so they go first; skipped
+        # modules only need a mastery check, and weak areas come before the remaining
+        # modules where dependencies allow
+        if module.id.startswith("bridge_"):
+            return 0
+        if module.is_skipped:
+            return 1
+        if module.is_remediation:
+            return 2
+        return 3
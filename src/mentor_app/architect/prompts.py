@@ -77,3 +77,35 @@ Return as JSON with this exact structure:
     ]
 }}
 """
+
+BRIDGE_MODULE_PROMPT = """
+You are an expert curriculum architect. A learner is about to take this existing course:
+
+Course: {course_title}
+Difficulty: {difficulty_level}
+Existing Modules: {module_titles}
+
+The learner is weak in these topics, which the course does not cover:
+{gap_topics}
+
+Requirements:
+- Create 1-3 short bridge modules that cover only these topics
+- Each module should take 1-5 hours
+- Include 2-4 measurable learning objectives per module
+- Do not repeat content from the existing modules
+- DO NOT include lessons - only module structure
+
+Return as JSON with this exact structure:
+{{
+    "modules": [
+        {{
+            "id": "bridge_1",
+            "title": "...",
+            "description": "...",
+            "learning_objectives": ["...", "..."],
+            "estimated_duration": 0,
+            "dependencies": []
+        }}
+    ]
+}}
+"""
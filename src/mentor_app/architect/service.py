@@ -1,28 +1,26 @@
 """Main Architect service for course planning."""
 
 import json
-import os
 import sys
-from typing import Optional
+from typing import List, Optional
 from pathlib import Path
 
 # Add the src directory to Python path for imports
 src_path = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(src_path))
 
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 
 from mentor_app.models import CoursePlan, UserContext, Module, CourseContext
-from mentor_app.architect.prompts import SYLLABUS_PROMPT, MODULE_STRUCTURE_PROMPT
+from mentor_app.architect.prompts import SYLLABUS_PROMPT, MODULE_STRUCTURE_PROMPT, BRIDGE_MODULE_PROMPT
+from mentor_app.infrastructure.metrics import track_llm_call
+from mentor_app.infrastructure.routing import get_model_router, model_for_task
+from mentor_app.infrastructure.tokens import fit_prompt
+from mentor_app.infrastructure.tracing import span
 
 class ArchitectService:
     def __init__(self, llm_client=None):
-        self.llm_client = llm_client or ChatOpenAI(
-            model="gpt-5.2",  # Using GPT-4o as GPT-5.2 is not available
-            api_key=os.getenv("OPENAI_API_KEY"),
-            temperature=0.7
-        )
+        self.llm_client = llm_client or get_model_router()
     
     def create_syllabus(
         self, 
@@ -31,7 +29,7 @@ class ArchitectService:
         user_context: Optional[UserContext] = None
     ) -> CoursePlan:
         """Generate a structured course plan for the given topic."""
-        prompt = SYLLABUS_PROMPT.format(
+        fields = dict(
             topic=topic,
             skill_level=user_context.skill_level if user_context else "beginner",
             learning_style=user_context.learning_style if user_context else "hands-on",
@@ -39,24 +37,33 @@ class ArchitectService:
             prior_knowledge=", ".join(user_context.prior_knowledge) if user_context and user_context.prior_knowledge else "None",
             user_instructions=user_instructions or "No special instructions"
         )
+        # Long free-form context is shortened to fit the budget, prior knowledge first
+        prompt = fit_prompt(
+            "syllabus", lambda f: SYLLABUS_PROMPT.format(**f), fields,
+            optional={"prior_knowledge": "None", "user_instructions": "No special instructions"}
+        )
         
-        response = self.llm_client.invoke([HumanMessage(content=prompt)])
+        with track_llm_call("architect", "syllabus", prompt) as call:
+            response = model_for_task(self.llm_client, "syllabus").invoke([HumanMessage(content=prompt)])
+            call.record_response(response)
         
-        try:
-            # Extract JSON from markdown code blocks if present
-            content = response.content.strip()
-            if content.startswith('```json'):
-                content = content[7:]  # Remove ```json
-            if content.startswith('```'):
-                content = content[3:]   # Remove ```
-            if content.endswith('```'):
-                content = content[:-3]  # Remove closing ```
+        with span("parse", task="syllabus"):
+            try:
+                # Extract JSON from markdown code blocks if present
+                content = response.content.strip()
+                if content.startswith('```json'):
+                    content = content[7:]  # Remove ```json
+                if content.startswith('```'):
+                    content = content[3:]   # Remove ```
+                if content.endswith('```'):
+                    content = content[:-3]  # Remove closing ```
             
-            course_data = json.loads(content.strip())
-            return CoursePlan(**course_data)
-        except (json.JSONDecodeError, ValueError) as e:
-            print(f"Raw response: {response.content}")
-            raise ValueError(f"Failed to parse LLM response: {e}")
+                course_data = json.loads(content.strip())
+                return CoursePlan(**course_data)
+            except (json.JSONDecodeError, ValueError) as e:
+                call.record_error()
+                print(f"Raw response: {response.content}")
+                raise ValueError(f"Failed to parse LLM response: {e}")
     
     def generate_module_structure(
         self,
@@ -76,23 +83,61 @@ class ArchitectService:
             topic_domain=course_context.topic_domain
         )
         
-        response = self.llm_client.invoke([HumanMessage(content=prompt)])
+        with track_llm_call("architect", "module_structure", prompt) as call:
+            response = model_for_task(self.llm_client, "module_structure").invoke([HumanMessage(content=prompt)])
+            call.record_response(response)
+        
+        with span("parse", task="module_structure"):
+            try:
+                # Extract JSON from markdown code blocks if present
+                content = response.content.strip()
+                if content.startswith('```json'):
+                    content = content[7:]  # Remove ```json
+                if content.startswith('```'):
+                    content = content[3:]   # Remove ```
+                if content.endswith('```'):
+                    content = content[:-3]  # Remove closing ```
+            
+                module_data = json.loads(content.strip())
+                return Module(**module_data)
+            except (json.JSONDecodeError, ValueError) as e:
+                call.record_error()
+                print(f"Raw response: {response.content}")
+                raise ValueError(f"Failed to parse LLM response: {e}")
+
+    def generate_bridge_modules(self, course_plan: CoursePlan, gap_topics: List[str]) -> List[Module]:
+        """Generate modules covering topics the course is missing."""
+        fields = dict(
+            course_title=course_plan.course_title,
+            difficulty_level=course_plan.difficulty_level,
+            module_titles=json.dumps([module.title for module in course_plan.modules]),
+            gap_topics="\n".join(f"- {topic}" for topic in gap_topics)
+        )
+        prompt = fit_prompt(
+            "bridge_modules", lambda f: BRIDGE_MODULE_PROMPT.format(**f), fields, optional={"module_titles": "[]"}
+        )
+        
+        with track_llm_call("architect", "bridge_modules", prompt) as call:
+            response = model_for_task(self.llm_client, "bridge_modules").invoke([HumanMessage(content=prompt)])
+            call.record_response(response)
         
-        try:
-            # Extract JSON from markdown code blocks if present
-            content = response.content.strip()
-            if content.startswith('```json'):
-                content = content[7:]  # Remove ```json
-            if content.startswith('```'):
-                content = content[3:]   # Remove ```
-            if content.endswith('```'):
-                content = content[:-3]  # Remove closing ```
+        with span("parse", task="bridge_modules"):
+            try:
+                # Extract JSON from markdown code blocks if present
+                content = response.content.strip()
+                if content.startswith('```json'):
+                    content = content[7:]  # Remove ```json
+                if content.startswith('```'):
+                    content = content[3:]   # Remove ```
+                if content.endswith('```'):
+                    content = content[:-3]  # Remove closing ```
             
-            module_data = json.loads(content.strip())
-            return Module(**module_data)
-        except (json.JSONDecodeError, ValueError) as e:
-            print(f"Raw response: {response.content}")
-            raise ValueError(f"Failed to parse LLM response: {e}")
+                bridge_data = json.loads(content.strip())
+                return [Module(**module_data) for module_data in bridge_data["modules"]]
+            except (json.JSONDecodeError, KeyError, ValueError) as e:
+                call.record_error()
+                print(f"Raw response: {response.content}")
+                raise ValueError(f"Failed to parse LLM response: {e}")
 
 def main():
     """Test function for the Architect service."""
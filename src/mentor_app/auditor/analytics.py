@@ -1,14 +1,298 @@
+#!/usr/bin/env python3
 """Analytics logic for mastery calculation."""
 
+import argparse
+from datetime import datetime
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.models import Lesson, TopicMastery
+from mentor_app.infrastructure.repositories import MasteryRepository, ProgressRepository, upsert
+
+if TYPE_CHECKING:
+    from mentor_app.auditor.review_scheduler import ReviewScheduler
+
+WEAK_MASTERY_THRESHOLD = 0.6
+SCORED_EVENT_TYPES = {"practice_completed", "assessment_submitted"}
+
+
+def normalize_topic(topic: str) -> str:
+    return " ".join(topic.lower().split())
+
+
+def scored_topics(session, events: List[dict]) -> List[Tuple[str, str, int, datetime]]:
+    """Expand a batch's scored events into (user_id, topic, score, created_at), one per lesson key concept."""
+    scored = [e for e in events if e["event_type"] in SCORED_EVENT_TYPES and e.get("score") is not None]
+    if not scored:
+        return []
+    concepts = {
+        (row.course_id, row.module_id, row.id): {normalize_topic(topic) for topic in row.key_concepts or []}
+        for row in session.query(Lesson.course_id, Lesson.module_id, Lesson.id, Lesson.key_concepts).filter(
+            Lesson.id.in_({e["lesson_id"] for e in scored})
+        )
+    }
+    return [
+        (e["user_id"], topic, e["score"], e.get("created_at") or datetime.utcnow())
+        for e in scored
+        for topic in sorted(concepts.get((e["course_id"], e["module_id"], e["lesson_id"]), ()))
+    ]
+
+
+class MasteryTable:
+    """Mastery for every (user, topic) pair with evidence, stored column-wise."""
+
+    def __init__(self, users: np.ndarray, topics: np.ndarray, user_index: np.ndarray,
+                 topic_index: np.ndarray, mastery: np.ndarray, observations: np.ndarray):
+        self.users = users
+        self.topics = topics
+        self.user_index = user_index
+        self.topic_index = topic_index
+        self.mastery = mastery
+        self.observations = observations
+
+    def __len__(self) -> int:
+        return len(self.mastery)
+
+    def get(self, user_id: str, topic: str) -> Optional[float]:
+        """Look up one pair (binary search over the sorted labels)."""
+        topic = normalize_topic(topic)
+        u = np.searchsorted(self.users, user_id)
+        t = np.searchsorted(self.topics, topic)
+        if u >= len(self.users) or self.users[u] != user_id or t >= len(self.topics) or self.topics[t] != topic:
+            return None
+        # Pairs are sorted by (user, topic), so their combined key is sorted too
+        keys = self.user_index * len(self.topics) + self.topic_index
+        position = np.searchsorted(keys, u * len(self.topics) + t)
+        if position < len(keys) and keys[position] == u * len(self.topics) + t:
+            return float(self.mastery[position])
+        return None
+
+    def to_dense(self, default: float = np.nan) -> np.ndarray:
+        """Return a users x topics matrix; only sensible for small cohorts."""
+        dense = np.full((len(self.users), len(self.topics)), default)
+        dense[self.user_index, self.topic_index] = self.mastery
+        return dense
+
+    def to_rows(self) -> List[dict]:
+        updated_at = datetime.utcnow()
+        return [
+            {
+                "user_id": user_id,
+                "topic": topic,
+                "mastery": mastery,
+                "observations": observations,
+                "updated_at": updated_at
+            }
+            for user_id, topic, mastery, observations in zip(
+                self.users[self.user_index].tolist(),
+                self.topics[self.topic_index].tolist(),
+                self.mastery.tolist(),
+                self.observations.tolist()
+            )
+        ]
+
+
 class AnalyticsEngine:
+    """Bayesian Knowledge Tracing over scored practice and assessment events.
+
+    Each (user, topic) pair keeps the probability that the topic is learned.
+    A score in [0, 100] is soft evidence: the posterior is the score-weighted
+    mix of the "answered correctly" and "answered incorrectly" updates, after
+    which the learner may transition to learned with probability ``p_learn``.
+    """
+
+    def __init__(
+        self,
+        progress_repo: Optional[ProgressRepository] = None,
+        mastery_repo: Optional[MasteryRepository] = None,
+        review_scheduler: Optional["ReviewScheduler"] = None,
+        p_init: float = 0.2,
+        p_learn: float = 0.15,
+        p_slip: float = 0.1,
+        p_guess: float = 0.2
+    ):
+        self.progress_repo = progress_repo
+        self.mastery_repo = mastery_repo
+        self.review_scheduler = review_scheduler
+        self.p_init = p_init
+        self.p_learn = p_learn
+        self.p_slip = p_slip
+        self.p_guess = p_guess
+
     def calculate_mastery(self, user_id: str, topic: str) -> float:
         """Calculate user's mastery level for a topic."""
-        pass
-    
-    def identify_weak_areas(self, user_id: str) -> list:
-        """Identify areas where user is struggling."""
-        pass
-    
-    def recommend_review(self, user_id: str) -> list:
-        """Recommend topics for review."""
-        pass
+        topic = normalize_topic(topic)
+        if self.mastery_repo:
+            stored = self.mastery_repo.get_mastery(user_id, topic)
+            if stored:
+                return stored.mastery
+        if self.progress_repo:
+            table = self.score_events(self._expand(self.progress_repo.iter_scored_events(user_id)))
+            value = table.get(user_id, topic)
+            if value is not None:
+                return value
+        return self.p_init
+
+    def score_events(self, events: tuple) -> MasteryTable:
+        """Score every (user, topic) pair from chronological event arrays in one vectorized pass.
+
+        ``events`` is ``(user_ids, topics, scores)``: equal-length sequences
+        ordered by time, scores in [0, 100]. Pairs are independent, so the k-th
+        observation of every pair is applied in one array operation; the Python
+        loop runs once per observation depth, not once per event.
+        """
+        # Fixed-width unicode labels sort in C, far faster than object arrays
+        user_ids, topics = np.asarray(events[0], dtype=str), np.asarray(events[1], dtype=str)
+        scores = np.asarray(events[2], dtype=np.float64)
+        if len(scores) == 0:
+            empty = np.array([], dtype=np.int64)
+            return MasteryTable(np.array([], dtype=str), np.array([], dtype=str), empty, empty,
+                                np.array([], dtype=np.float64), empty)
+
+        users, user_index = np.unique(user_ids, return_inverse=True)
+        topic_labels, topic_index = np.unique(topics, return_inverse=True)
+        pair_keys = user_index.astype(np.int64) * len(topic_labels) + topic_index
+        pairs, pair_index = np.unique(pair_keys, return_inverse=True)
+        evidence = np.clip(scores.astype(np.float64) / 100.0, 0.0, 1.0)
+
+        # Position of each event within its pair's history (stable sort keeps time order)
+        by_pair = np.argsort(pair_index, kind="stable")
+        sorted_pairs = pair_index[by_pair]
+        observations = np.bincount(sorted_pairs, minlength=len(pairs))
+        starts = np.concatenate(([0], np.cumsum(observations)[:-1]))
+        depth = np.arange(len(sorted_pairs)) - starts[sorted_pairs]
+
+        # Group events by depth so each step touches a contiguous slice
+        by_depth = np.argsort(depth, kind="stable")
+        depth_pairs = sorted_pairs[by_depth]
+        depth_evidence = evidence[by_pair][by_depth]
+        bounds = np.searchsorted(depth[by_depth], np.arange(depth.max() + 2))
+
+        mastery = np.full(len(pairs), self.p_init)
+        for step in range(len(bounds) - 1):
+            idx = depth_pairs[bounds[step]:bounds[step + 1]]
+            mastery[idx] = self._bkt_update(mastery[idx], depth_evidence[bounds[step]:bounds[step + 1]])
+
+        return MasteryTable(
+            users, topic_labels,
+            (pairs // len(topic_labels)).astype(np.int64),
+            (pairs % len(topic_labels)).astype(np.int64),
+            mastery, observations
+        )
+
+    def recompute_all(self) -> MasteryTable:
+        """Rebuild mastery for all users from the full event history and store it."""
+        table = self.score_events(self._expand(self.progress_repo.iter_scored_events()))
+        if self.mastery_repo and len(table):
+            self.mastery_repo.save_mastery(table.to_rows())
+        return table
+
+    def update_mastery(self, user_id: str, topics: Iterable[str], score: int) -> dict:
+        """Apply one new scored event incrementally and store the updated pairs."""
+        rows = []
+        for topic in {normalize_topic(topic) for topic in topics}:
+            stored = self.mastery_repo.get_mastery(user_id, topic) if self.mastery_repo else None
+            prior = {"mastery": stored.mastery, "observations": stored.observations} if stored else None
+            rows.append(self._observe(prior, user_id, topic, score))
+        if self.mastery_repo and rows:
+            self.mastery_repo.save_mastery(rows)
+        return {row["topic"]: row["mastery"] for row in rows}
+
+    def apply_events(self, session, events: List[dict]):
+        """Update mastery for the key concepts of every scored lesson in an ingested batch.
+
+        Runs inside the event-ingestion transaction. Missing pairs are inserted
+        at the prior first, so concurrent batches for the same pair wait on its
+        row lock instead of both starting from the prior.
+        """
+        observations = scored_topics(session, events)
+        if not observations:
+            return
+
+        pairs = {(user_id, topic) for user_id, topic, _, _ in observations}
+        upsert(
+            session, TopicMastery,
+            [{"user_id": user_id, "topic": topic, "mastery": self.p_init, "observations": 0,
+              "updated_at": datetime.utcnow()} for user_id, topic in pairs],
+            index_elements=["user_id", "topic"]
+        )
+        rows = {
+            (row.user_id, row.topic): {"mastery": row.mastery, "observations": row.observations}
+            for row in session.query(TopicMastery).filter(
+                TopicMastery.user_id.in_({user_id for user_id, _ in pairs}),
+                TopicMastery.topic.in_({topic for _, topic in pairs})
+            ).with_for_update()
+            if (row.user_id, row.topic) in pairs
+        }
+        for user_id, topic, score, _ in observations:
+            rows[(user_id, topic)] = self._observe(rows.get((user_id, topic)), user_id, topic, score)
+        upsert(
+            session, TopicMastery, list(rows.values()),
+            index_elements=["user_id", "topic"],
+            update_columns=["mastery", "observations", "updated_at"]
+        )
+
+    def identify_weak_areas(self, user_id: str, threshold: float = WEAK_MASTERY_THRESHOLD) -> list:
+        """Identify areas where user is struggling, weakest first."""
+        if not self.mastery_repo:
+            return []
+        weak = [
+            {"topic": row.topic, "mastery": row.mastery, "observations": row.observations}
+            for row in self.mastery_repo.get_user_mastery(user_id)
+            if row.mastery < threshold
+        ]
+        return sorted(weak, key=lambda area: area["mastery"])
+
+    def recommend_review(self, user_id: str, limit: int = 10) -> list:
+        """Recommend topics for review: due spaced-repetition items, then weak areas."""
+        due = self.review_scheduler.due_items(user_id, limit=limit) if self.review_scheduler else []
+        scheduled = {item["topic"] for item in due}
+        weak = [area for area in self.identify_weak_areas(user_id) if area["topic"] not in scheduled]
+        return due + [{"topic": area["topic"], "due_at": None} for area in weak[:limit - len(due)]]
+
+    def _observe(self, stored: Optional[dict], user_id: str, topic: str, score: int) -> dict:
+        """Row for a pair after one more scored observation."""
+        prior = stored["mastery"] if stored else self.p_init
+        return {
+            "user_id": user_id,
+            "topic": topic,
+            "mastery": float(self._bkt_update(np.float64(prior), min(max(score / 100.0, 0.0), 1.0))),
+            "observations": (stored["observations"] if stored else 0) + 1,
+            "updated_at": datetime.utcnow()
+        }
+
+    def _bkt_update(self, prior, evidence):
+        """One BKT observation + learning step; works on scalars and arrays."""
+        correct = prior * (1 - self.p_slip)
+        p_correct = correct + (1 - prior) * self.p_guess
+        wrong = prior * self.p_slip
+        p_wrong = wrong + (1 - prior) * (1 - self.p_guess)
+        posterior = evidence * (correct / p_correct) + (1 - evidence) * (wrong / p_wrong)
+        return posterior + (1 - posterior) * self.p_learn
+
+    def _expand(self, scored_events: Iterable[tuple]) -> tuple:
+        """Turn (user_id, key_concepts, score) rows into one event per topic."""
+        user_ids, topics, scores = [], [], []
+        for user_id, key_concepts, score in scored_events:
+            for topic in key_concepts:
+                user_ids.append(user_id)
+                topics.append(normalize_topic(topic))
+                scores.append(score)
+        return user_ids, topics, scores
+
+
+def main():
+    """Rebuild topic mastery for every learner from the scored event log."""
+    argparse.ArgumentParser(description=main.__doc__).parse_args()
+    db_service = DatabaseService()
+    table = AnalyticsEngine(ProgressRepository(db_service), MasteryRepository(db_service)).recompute_all()
+    print(f"Recomputed mastery for {len(table)} (user, topic) pairs")
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Incrementally maintained per-user course and module progress aggregates."""
+
+import argparse
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.models import Lesson, UserCourseProgress, UserModuleProgress
+from mentor_app.infrastructure.repositories import ProgressRepository, upsert
+
+ModuleKey = Tuple[str, str, str]  # (user_id, course_id, module_id)
+
+
+def is_completion_event(event: dict) -> bool:
+    """Whether an event completes its lesson."""
+    payload = event.get("payload") or {}
+    if event["event_type"] in ("theory_read", "lesson_completed"):
+        return True
+    if event["event_type"] == "practice_completed":
+        return bool(payload.get("passed"))
+    if event["event_type"] == "assessment_submitted":
+        # Ungraded submissions count as completed
+        return payload.get("passed", True) is not False
+    return False
+
+
+def collect_completions(events: Iterable[dict]) -> Dict[ModuleKey, Set[str]]:
+    """Group completed lesson ids by (user, course, module)."""
+    completions = defaultdict(set)
+    for event in events:
+        if is_completion_event(event):
+            completions[(event["user_id"], event["course_id"], event["module_id"])].add(event["lesson_id"])
+    return completions
+
+
+class ProgressAggregator:
+    """Folds progress events into user_module_progress and user_course_progress.
+
+    ``apply_events`` runs inside the event-ingestion transaction, so reading a
+    learner's progress is a primary-key lookup instead of a scan of lessons
+    and events. ``rebuild`` recomputes everything from the raw event log.
+    """
+
+    def __init__(self, db_service: DatabaseService):
+        self.db_service = db_service
+        self.progress_repo = ProgressRepository(db_service)
+
+    def apply_events(self, session, events: List[dict]):
+        """Update aggregates for a batch of newly inserted events.
+
+        Module rows a batch touches are created empty first if missing, so
+        that concurrent batches for the same module serialize on its row lock
+        (neither sees "no row yet" and counts the same lessons); course totals
+        are incremented in place.
+        """
+        completions = collect_completions(events)
+        if not completions:
+            return
+
+        now = datetime.utcnow()
+        upsert(
+            session, UserModuleProgress, [self._module_row(key, set(), False, now) for key in completions],
+            index_elements=["user_id", "course_id", "module_id"]
+        )
+        existing = {
+            (row.user_id, row.course_id, row.module_id): row
+            for row in session.query(UserModuleProgress).filter(
+                UserModuleProgress.user_id.in_({key[0] for key in completions}),
+                UserModuleProgress.course_id.in_({key[1] for key in completions})
+            ).with_for_update()
+        }
+        lesson_totals = self._lesson_totals(session, {key[1] for key in completions})
+
+        module_rows = []
+        course_deltas = defaultdict(lambda: [0, 0])  # (user_id, course_id) -> [lessons, modules]
+        for key, lesson_ids in completions.items():
+            row = existing.get(key)
+            done = set(row.completed_lesson_ids) if row else set()
+            new_lessons = lesson_ids - done
+            if not new_lessons:
+                continue
+            done |= new_lessons
+            completed = self._module_completed(done, lesson_totals.get(key[1:], 0))
+            module_rows.append(self._module_row(key, done, completed, now))
+            delta = course_deltas[key[:2]]
+            delta[0] += len(new_lessons)
+            delta[1] += int(completed and not (row and row.completed))
+
+        if module_rows:
+            self._write_module_rows(session, module_rows)
+            upsert(
+                session, UserCourseProgress,
+                [
+                    {
+                        "user_id": user_id,
+                        "course_id": course_id,
+                        "completed_lessons": lessons,
+                        "completed_modules": modules,
+                        "updated_at": now
+                    }
+                    for (user_id, course_id), (lessons, modules) in course_deltas.items()
+                ],
+                index_elements=["user_id", "course_id"],
+                update_columns=["updated_at"],
+                update=lambda excluded: {
+                    "completed_lessons": UserCourseProgress.completed_lessons + excluded.completed_lessons,
+                    "completed_modules": UserCourseProgress.completed_modules + excluded.completed_modules
+                }
+            )
+
+    def rebuild(self, user_id: Optional[str] = None, apply: bool = True) -> List[str]:
+        """Recompute aggregates from the event log.
+
+        Returns a description of every stored aggregate that disagreed with the
+        recomputed one; with ``apply`` the stored aggregates are replaced.
+        """
+        completions = collect_completions(self.progress_repo.iter_events(user_id))
+        now = datetime.utcnow()
+
+        with self.db_service.get_session() as session:
+            lesson_totals = self._lesson_totals(session, {key[1] for key in completions})
+            module_rows, course_rows = [], {}
+            for key, done in completions.items():
+                completed = self._module_completed(done, lesson_totals.get(key[1:], 0))
+                module_rows.append(self._module_row(key, done, completed, now))
+                course = course_rows.setdefault(key[:2], {
+                    "user_id": key[0], "course_id": key[1],
+                    "completed_lessons": 0, "completed_modules": 0, "updated_at": now
+                })
+                course["completed_lessons"] += len(done)
+                course["completed_modules"] += int(completed)
+
+            mismatches = self._diff(session, user_id, module_rows, list(course_rows.values()))
+
+            if apply:
+                for model in (UserModuleProgress, UserCourseProgress):
+                    query = session.query(model)
+                    if user_id:
+                        query = query.filter(model.user_id == user_id)
+                    query.delete(synchronize_session=False)
+                if module_rows:
+                    self._write_module_rows(session, module_rows)
+                    session.bulk_insert_mappings(UserCourseProgress, list(course_rows.values()))
+                session.commit()
+        return mismatches
+
+    def _lesson_totals(self, session, course_ids: Set[str]) -> Dict[Tuple[str, str], int]:
+        if not course_ids:
+            return {}
+        rows = session.query(Lesson.course_id, Lesson.module_id, func.count()).filter(
+            Lesson.course_id.in_(course_ids)
+        ).group_by(Lesson.course_id, Lesson.module_id)
+        return {(course_id, module_id): count for course_id, module_id, count in rows}
+
+    def _module_completed(self, done: Set[str], total_lessons: int) -> bool:
+        # Modules without generated lessons cannot be completed yet
+        return total_lessons > 0 and len(done) >= total_lessons
+
+    def _module_row(self, key: ModuleKey, done: Set[str], completed: bool, now: datetime) -> dict:
+        return {
+            "user_id": key[0],
+            "course_id": key[1],
+            "module_id": key[2],
+            "completed_lesson_ids": sorted(done),
+            "completed_lessons": len(done),
+            "completed": completed,
+            "updated_at": now
+        }
+
+    def _write_module_rows(self, session, rows: List[dict]):
+        upsert(
+            session, UserModuleProgress, rows,
+            index_elements=["user_id", "course_id", "module_id"],
+            update_columns=["completed_lesson_ids", "completed_lessons", "completed", "updated_at"]
+        )
+
+    def _diff(self, session, user_id: Optional[str], module_rows: List[dict], course_rows: List[dict]) -> List[str]:
+        mismatches = []
+        for model, rows, key_columns, value_columns in (
+            (UserModuleProgress, module_rows, ("user_id", "course_id", "module_id"), ("completed_lessons", "completed")),
+            (UserCourseProgress, course_rows, ("user_id", "course_id"), ("completed_lessons", "completed_modules")),
+        ):
+            query = session.query(model)
+            if user_id:
+                query = query.filter(model.user_id == user_id)
+            stored = {
+                tuple(getattr(row, column) for column in key_columns): {column: getattr(row, column) for column in value_columns}
+                for row in query
+            }
+            for row in rows:
+                key = tuple(row[column] for column in key_columns)
+                expected = {column: row[column] for column in value_columns}
+                actual = stored.pop(key, None)
+                if actual != expected:
+                    mismatches.append(f"{model.__tablename__} {key}: stored {actual}, expected {expected}")
+            mismatches.extend(f"{model.__tablename__} {key}: stored {actual}, expected None" for key, actual in stored.items())
+        return mismatches
+
+
+def main():
+    """Check or rebuild progress aggregates from the event log."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--user", help="only rebuild this user's aggregates")
+    parser.add_argument("--check", action="store_true", help="report mismatches without writing")
+    args = parser.parse_args()
+
+    mismatches = ProgressAggregator(DatabaseService()).rebuild(args.user, apply=not args.check)
+    for mismatch in mismatches:
+        print(mismatch)
+    print(f"{'Found' if args.check else 'Fixed'} {len(mismatches)} mismatched aggregates")
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    main()
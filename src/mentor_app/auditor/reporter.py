@@ -1,10 +1,220 @@
 """Dashboard data generation and reporting."""
 
+import csv
+import io
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.repositories import ProgressRepository, ReportRepository
+from mentor_app.infrastructure.shared_state import SharedStateBackend, get_state_backend
+
+SNAPSHOT_TTL = 3600  # snapshots outlive several refresh intervals so readers never wait
+TOPICS_PER_DASHBOARD = 5
+
+COHORT_COLUMNS = [
+    "user_id", "module_id", "module_title", "completed_lessons",
+    "total_lessons", "completed", "updated_at"
+]
+
+
 class ReportGenerator:
+    """Serves dashboards from precomputed snapshots and streams cohort exports.
+
+    ``refresh_snapshots`` rebuilds every learner's dashboard in chunks of
+    users (a few grouped queries per chunk) and stores them in the shared
+    state backend, so ``get_dashboard_data`` is a single key lookup. Cohort
+    exports walk the database with server-side cursors and yield encoded
+    chunks, keeping memory flat regardless of cohort size.
+    """
+
+    def __init__(
+        self,
+        db_service: DatabaseService,
+        state_backend: Optional[SharedStateBackend] = None,
+        refresh_interval: float = 300
+    ):
+        self.report_repo = ReportRepository(db_service)
+        self.progress_repo = ProgressRepository(db_service)
+        self.state_backend = state_backend or get_state_backend()
+        self.refresh_interval = refresh_interval
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
     def generate_progress_report(self, user_id: str) -> dict:
         """Generate comprehensive progress report."""
-        pass
-    
+        dashboard = self._build_dashboards([user_id]).get(user_id) or self._empty_dashboard(user_id)
+        for course in dashboard["courses"]:
+            course["modules"] = [
+                {
+                    "module_id": module.module_id,
+                    "completed_lessons": module.completed_lessons,
+                    "completed": module.completed
+                }
+                for module in self.progress_repo.get_module_progress(user_id, course["course_id"])
+            ]
+        return dashboard
+
     def get_dashboard_data(self, user_id: str) -> dict:
-        """Get data for user dashboard."""
-        pass
+        """Get data for user dashboard from the latest snapshot."""
+        return self.state_backend.get_or_compute(
+            f"dashboard:{user_id}",
+            lambda: self._build_dashboards([user_id]).get(user_id) or self._empty_dashboard(user_id),
+            ttl=SNAPSHOT_TTL
+        )
+
+    def get_cohort_dashboard(self, course_id: str) -> dict:
+        """Get the cohort-wide dashboard for a course from its snapshot."""
+        return self.state_backend.get_or_compute(
+            f"cohort_dashboard:{course_id}",
+            lambda: self._build_cohort_dashboard(course_id),
+            ttl=SNAPSHOT_TTL
+        )
+
+    def refresh_snapshots(self, batch_size: int = 1000) -> int:
+        """Precompute learner and cohort dashboard snapshots; returns users refreshed."""
+        refreshed = 0
+        for user_ids in self.report_repo.iter_user_ids(batch_size):
+            for user_id, dashboard in self._build_dashboards(user_ids).items():
+                self.state_backend.set(f"dashboard:{user_id}", dashboard, ttl=SNAPSHOT_TTL)
+            refreshed += len(user_ids)
+        for course_id in self.report_repo.get_course_ids():
+            self.state_backend.set(
+                f"cohort_dashboard:{course_id}", self._build_cohort_dashboard(course_id), ttl=SNAPSHOT_TTL
+            )
+        return refreshed
+
+    def start_periodic_refresh(self):
+        """Refresh snapshots every ``refresh_interval`` seconds in a background thread.
+
+        Every worker may start a refresher; a shared lock lets only one of them
+        do the work per interval.
+        """
+        if self._refresher is None:
+            self._refresher = threading.Thread(target=self._refresh_loop, daemon=True)
+            self._refresher.start()
+
+    def stop_periodic_refresh(self):
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join()
+
+    def export_cohort_csv(self, course_id: str) -> Iterator[bytes]:
+        """Stream a course's per-learner, per-module progress as CSV."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(COHORT_COLUMNS)
+        for index, row in enumerate(self.report_repo.iter_cohort_rows(course_id), 1):
+            writer.writerow(row[:-1] + (row[-1].isoformat(),))
+            if index % 1000 == 0:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode()
+
+    def export_cohort_arrow(self, course_id: str, batch_size: int = 10_000) -> Iterator[bytes]:
+        """Stream the cohort report as an Arrow IPC stream, one record batch at a time."""
+        # Import eagerly so a missing extra fails before any bytes are streamed
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise RuntimeError("Arrow export requires pyarrow (pip install mentor-app[reports])")
+        return self._arrow_batches(pa, course_id, batch_size)
+
+    def _arrow_batches(self, pa, course_id: str, batch_size: int) -> Iterator[bytes]:
+        schema = pa.schema([
+            ("user_id", pa.string()),
+            ("module_id", pa.string()),
+            ("module_title", pa.string()),
+            ("completed_lessons", pa.int32()),
+            ("total_lessons", pa.int32()),
+            ("completed", pa.bool_()),
+            ("updated_at", pa.timestamp("us")),
+        ])
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, schema) as writer:
+            columns = [[] for _ in COHORT_COLUMNS]
+            for row in self.report_repo.iter_cohort_rows(course_id, batch_size):
+                for column, value in zip(columns, row):
+                    column.append(value)
+                if len(columns[0]) == batch_size:
+                    writer.write_batch(pa.record_batch(columns, schema=schema))
+                    columns = [[] for _ in COHORT_COLUMNS]
+                    yield self._drain(sink)
+            if columns[0]:
+                writer.write_batch(pa.record_batch(columns, schema=schema))
+        yield self._drain(sink)
+
+    def _build_dashboards(self, user_ids: List[str]) -> dict:
+        generated_at = datetime.utcnow().isoformat() + "Z"
+        dashboards = {}
+        for user_id, course_id, title, completed_lessons, completed_modules, total_modules in (
+            self.report_repo.get_course_progress_for_users(user_ids)
+        ):
+            dashboard = dashboards.setdefault(user_id, self._empty_dashboard(user_id, generated_at))
+            dashboard["courses"].append({
+                "course_id": course_id,
+                "course_title": title,
+                "completed_lessons": completed_lessons,
+                "completed_modules": completed_modules,
+                "total_modules": total_modules,
+                "completion_percentage": round(100 * completed_modules / total_modules) if total_modules else 0
+            })
+
+        mastery = defaultdict(list)
+        for row in self.report_repo.get_mastery_for_users(user_ids):
+            mastery[row.user_id].append({"topic": row.topic, "mastery": round(row.mastery, 3)})
+        for user_id, topics in mastery.items():
+            topics.sort(key=lambda topic: topic["mastery"])
+            dashboard = dashboards.setdefault(user_id, self._empty_dashboard(user_id, generated_at))
+            dashboard["weakest_topics"] = topics[:TOPICS_PER_DASHBOARD]
+            dashboard["strongest_topics"] = topics[::-1][:TOPICS_PER_DASHBOARD]
+        return dashboards
+
+    def _build_cohort_dashboard(self, course_id: str) -> dict:
+        modules = self.report_repo.get_cohort_modules(course_id)
+        completion = self.report_repo.get_cohort_completion(course_id)
+        total_modules = len(modules)
+        percentages = [100 * completed / total_modules for completed in completion] if total_modules else []
+        return {
+            "course_id": course_id,
+            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "learners": len(completion),
+            "completed_learners": sum(1 for completed in completion if total_modules and completed >= total_modules),
+            "average_completion": round(sum(percentages) / len(percentages)) if percentages else 0,
+            "modules": [
+                {
+                    "module_id": module_id,
+                    "title": title,
+                    "learners_started": started,
+                    "learners_completed": finished
+                }
+                for module_id, title, started, finished in modules
+            ]
+        }
+
+    def _empty_dashboard(self, user_id: str, generated_at: Optional[str] = None) -> dict:
+        return {
+            "user_id": user_id,
+            "generated_at": generated_at or datetime.utcnow().isoformat() + "Z",
+            "courses": [],
+            "weakest_topics": [],
+            "strongest_topics": []
+        }
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            if not self.state_backend.add("reports:refresh", True, ttl=self.refresh_interval):
+                continue
+            try:
+                self.refresh_snapshots()
+            except Exception as e:
+                print(f"Dashboard snapshot refresh failed: {e}")
+
+    def _drain(self, sink: io.BytesIO) -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
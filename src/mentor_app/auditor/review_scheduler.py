@@ -0,0 +1,122 @@
+"""Spaced-repetition review scheduling over lesson key concepts."""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from mentor_app.auditor.analytics import scored_topics
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.models import ReviewItem
+from mentor_app.infrastructure.repositories import ReviewRepository, upsert
+
+MIN_EASINESS = 1.3
+
+
+def quality_from_score(score: int) -> int:
+    """Map a 0-100 score to SM-2 recall quality 0-5."""
+    return min(max(round(score / 20), 0), 5)
+
+
+def sm2_step(easiness: float, interval_days: int, repetitions: int, quality: int) -> Tuple[float, int, int]:
+    """Apply one SM-2 review; returns (easiness, interval_days, repetitions)."""
+    if quality < 3:
+        repetitions, interval_days = 0, 1
+    else:
+        repetitions += 1
+        if repetitions == 1:
+            interval_days = 1
+        elif repetitions == 2:
+            interval_days = 6
+        else:
+            interval_days = round(interval_days * easiness)
+    easiness += 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    return max(easiness, MIN_EASINESS), interval_days, repetitions
+
+
+class ReviewScheduler:
+    """SM-2 scheduler fed by scored progress events.
+
+    ``apply_events`` runs inside the event-ingestion transaction and updates
+    the ``review_items`` table, which is the only copy of the schedule: every
+    worker process reads what is due from it, so none serves a stale one.
+    """
+
+    def __init__(self, db_service: DatabaseService):
+        self.review_repo = ReviewRepository(db_service)
+
+    def apply_events(self, session, events: List[dict]):
+        """Reschedule the key concepts of every scored lesson in a batch.
+
+        Missing items are inserted fresh first, so concurrent first reviews of
+        the same topic wait on its row lock instead of both inserting it.
+        """
+        reviews = scored_topics(session, events)
+        if not reviews:
+            return
+
+        first_reviewed = {}
+        for user_id, topic, _, reviewed_at in reviews:
+            first_reviewed.setdefault((user_id, topic), reviewed_at)
+        upsert(
+            session, ReviewItem,
+            [self._fresh_item(user_id, topic, reviewed_at) for (user_id, topic), reviewed_at in first_reviewed.items()],
+            index_elements=["user_id", "topic"]
+        )
+        pairs = set(first_reviewed)
+        items: Dict[Tuple[str, str], dict] = {
+            (row.user_id, row.topic): {column: getattr(row, column) for column in ReviewItem.__table__.columns.keys()}
+            for row in session.query(ReviewItem).filter(
+                ReviewItem.user_id.in_({user_id for user_id, _ in pairs}),
+                ReviewItem.topic.in_({topic for _, topic in pairs})
+            ).with_for_update()
+            if (row.user_id, row.topic) in pairs
+        }
+        for user_id, topic, score, reviewed_at in reviews:
+            items[(user_id, topic)] = self._review(items[(user_id, topic)], score, reviewed_at)
+
+        upsert(
+            session, ReviewItem, list(items.values()),
+            index_elements=["user_id", "topic"],
+            update_columns=["easiness", "interval_days", "repetitions", "lapses", "due_at", "last_reviewed_at"]
+        )
+
+    def due_items(self, user_id: str, now: Optional[datetime] = None, limit: int = 10) -> List[dict]:
+        """Topics due for review by ``now``, most overdue first."""
+        due = self.review_repo.get_due(user_id, now or datetime.utcnow(), limit)
+        return [{"topic": topic, "due_at": due_at.isoformat() + "Z"} for topic, due_at in due]
+
+    def due_today(self, now: Optional[datetime] = None) -> Iterator[Tuple[str, List[str]]]:
+        """Stream (user_id, topics) for every user with reviews due by the end of today (UTC)."""
+        now = now or datetime.utcnow()
+        end_of_day = datetime(now.year, now.month, now.day) + timedelta(days=1)
+        current_user, topics = None, []
+        for user_id, topic, _ in self.review_repo.iter_due(end_of_day):
+            if user_id != current_user:
+                if topics:
+                    yield current_user, topics
+                current_user, topics = user_id, []
+            topics.append(topic)
+        if topics:
+            yield current_user, topics
+
+    @staticmethod
+    def _fresh_item(user_id: str, topic: str, reviewed_at: datetime) -> dict:
+        """A never-reviewed item, as inserted before its first review is applied."""
+        return {
+            "user_id": user_id, "topic": topic, "easiness": 2.5, "interval_days": 0,
+            "repetitions": 0, "lapses": 0, "due_at": reviewed_at, "last_reviewed_at": reviewed_at
+        }
+
+    def _review(self, item: dict, score: int, reviewed_at: datetime) -> dict:
+        quality = quality_from_score(score)
+        easiness, interval_days, repetitions = sm2_step(
+            item["easiness"], item["interval_days"], item["repetitions"], quality
+        )
+        return {
+            **item,
+            "easiness": easiness,
+            "interval_days": interval_days,
+            "repetitions": repetitions,
+            "lapses": item["lapses"] + int(quality < 3 and item["repetitions"] > 0),
+            "due_at": reviewed_at + timedelta(days=interval_days),
+            "last_reviewed_at": reviewed_at
+        }
@@ -0,0 +1 @@
+"""Benchmarks and load-testing harnesses for LearnSmith."""
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Throughput benchmark for practice grading.
+
+Submits a classroom-sized burst of solutions to one practice task at once and
+reports submissions per second and latency percentiles for the warm worker
+pool used by the API. ``--cold`` also runs the same burst with a fresh
+interpreter per test case, the cost the pool avoids.
+
+Example:
+    python -m mentor_app.benchmarks.grading --submissions 300 --tests 5 --workers 4 --cold
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from mentor_app.benchmarks.loadtest import _percentile
+from mentor_app.builder.grader import PracticeGrader
+from mentor_app.builder.models import GradingQueueFull, PracticeTask, TestCase
+from mentor_app.builder.sandbox import CodeSandbox
+
+SOLUTION = "numbers = [int(x) for x in input().split()]\nprint(sum(n * n for n in numbers))\n"
+
+
+def build_task(tests: int) -> PracticeTask:
+    cases = []
+    for i in range(tests):
+        numbers = list(range(i, i + 50))
+        cases.append(TestCase(
+            input_data=" ".join(map(str, numbers)),
+            expected_output=str(sum(n * n for n in numbers)),
+            description=f"case {i + 1}"
+        ))
+    return PracticeTask(
+        id="bench", title="Sum of squares", description="Print the sum of squares of the input numbers",
+        task_type="coding", starter_code=None, solution=SOLUTION, test_cases=cases, hints=[]
+    )
+
+
+def run_warm(task: PracticeTask, submissions: int, workers: int, max_pending: int) -> dict:
+    grader = PracticeGrader(CodeSandbox(workers=workers, timeout=5.0), max_pending=max_pending)
+    started = time.perf_counter()
+    grader.start()
+    warm_up = time.perf_counter() - started
+
+    start = time.perf_counter()
+    futures, rejected = [], 0
+    for _ in range(submissions):
+        submitted = time.perf_counter()
+        try:
+            future = grader.submit(task, SOLUTION)
+        except GradingQueueFull:
+            rejected += 1
+            continue
+        futures.append((submitted, future))
+    latencies, failed = [], 0
+    for submitted, future in futures:
+        result = future.result()
+        latencies.append(time.perf_counter() - submitted)  # upper bound: futures are awaited in order
+        failed += not result["passed"]
+    elapsed = time.perf_counter() - start
+    grader.close()
+    return _summary("warm pool", latencies, elapsed, failed, rejected, warm_up)
+
+
+def run_cold(task: PracticeTask, submissions: int, workers: int) -> dict:
+    def grade(submitted: float) -> tuple:
+        passed = True
+        for test in task.test_cases:
+            process = subprocess.run(
+                [sys.executable, "-I", "-c", SOLUTION], input=test.input_data,
+                capture_output=True, text=True, timeout=5
+            )
+            passed &= process.stdout.strip() == test.expected_output.strip()
+        return time.perf_counter() - submitted, passed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(grade, [time.perf_counter() for _ in range(submissions)]))
+    elapsed = time.perf_counter() - start
+    return _summary("fresh interpreter per test", [r[0] for r in results], elapsed, sum(not r[1] for r in results), 0, 0.0)
+
+
+def _summary(mode: str, latencies: List[float], elapsed: float, failed: int, rejected: int, warm_up: float) -> dict:
+    latencies = sorted(latencies) or [0.0]
+    return {
+        "mode": mode,
+        "graded": len(latencies),
+        "failed": failed,
+        "rejected": rejected,
+        "warm_up_s": warm_up,
+        "elapsed_s": elapsed,
+        "throughput_sps": len(latencies) / elapsed,
+        "p50_ms": 1000 * _percentile(latencies, 50),
+        "p95_ms": 1000 * _percentile(latencies, 95),
+        "p99_ms": 1000 * _percentile(latencies, 99),
+    }
+
+
+def print_report(reports: List[dict]):
+    print(f"\n{'mode':<28}{'graded':>8}{'fail':>6}{'rej':>6}{'subs/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for report in reports:
+        print(
+            f"{report['mode']:<28}{report['graded']:>8}{report['failed']:>6}{report['rejected']:>6}"
+            f"{report['throughput_sps']:>9.1f}{report['p50_ms']:>8.0f}ms{report['p95_ms']:>8.0f}ms{report['p99_ms']:>8.0f}ms"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=200, help="submissions in the burst")
+    parser.add_argument("--tests", type=int, default=5, help="test cases per task")
+    parser.add_argument("--workers", type=int, default=4, help="sandbox worker processes")
+    parser.add_argument("--max-pending", type=int, default=1000, help="grading queue bound; extra submissions are rejected")
+    parser.add_argument("--cold", action="store_true", help="also benchmark a fresh interpreter per test case")
+    args = parser.parse_args(argv)
+
+    task = build_task(args.tests)
+    reports = [run_warm(task, args.submissions, args.workers, args.max_pending)]
+    if args.cold:
+        reports.append(run_cold(task, args.submissions, args.workers))
+    print_report(reports)
+    print(f"\nWarm pool start-up: {reports[0]['warm_up_s'] * 1000:.0f}ms for {args.workers} workers")
+    return 1 if any(report["failed"] for report in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""Local load test for the FastAPI app with a stub LLM.
+
+Starts ``mentor_app.main`` under uvicorn against a throwaway database (SQLite by
+default) with every LLM call answered by ``StubChatModel``, then drives mixed
+traffic and reports throughput, error rate and latency percentiles per endpoint.
+
+Example:
+    python -m mentor_app.benchmarks.loadtest --duration 30 --concurrency 16 \\
+        --mix create_course=1,create_module=2,get_course=10,get_module=10 \\
+        --save-baseline baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_MIX = "create_course=1,create_module=2,get_course=10,get_module=10"
+TOPICS = ["Advanced SQL", "Python Basics", "Data Modeling", "Web APIs", "Statistics"]
+
+
+class LoadTestState:
+    """Tracks courses and modules created during the run so GETs hit real data."""
+
+    def __init__(self):
+        self.courses: List[str] = []
+        self.pending_modules: List[tuple] = []  # (course_id, module_id) without content yet
+        self.generated_modules: List[str] = []
+
+    def add_course(self, course: dict):
+        self.courses.append(course["id"])
+        self.pending_modules.extend((course["id"], module["id"]) for module in course["modules"])
+
+
+class LatencyRecorder:
+    """Collects per-endpoint latencies and error counts."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, seconds: float, ok: bool):
+        self.latencies[endpoint].append(seconds)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        report = {}
+        for endpoint, samples in sorted(self.latencies.items()):
+            samples = sorted(samples)
+            report[endpoint] = {
+                "requests": len(samples),
+                "errors": self.errors[endpoint],
+                "error_rate": self.errors[endpoint] / len(samples),
+                "throughput_rps": len(samples) / elapsed,
+                "mean_ms": 1000 * sum(samples) / len(samples),
+                "p50_ms": 1000 * _percentile(samples, 50),
+                "p95_ms": 1000 * _percentile(samples, 95),
+                "p99_ms": 1000 * _percentile(samples, 99),
+            }
+        return report
+
+
+def _percentile(sorted_samples: List[float], pct: float) -> float:
+    index = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse ``name=weight,...`` into a weight mapping."""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}'. Choose from {', '.join(OPERATIONS)}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+async def create_course(client, state: LoadTestState) -> tuple:
+    response = await client.post("/api/v1/courses", json={"topic": random.choice(TOPICS)})
+    if response.status_code == 201:
+        state.add_course(response.json())
+    return "POST /courses", response.status_code == 201
+
+
+async def create_module(client, state: LoadTestState) -> tuple:
+    if not state.pending_modules:
+        return await create_course(client, state)
+    course_id, module_id = state.pending_modules.pop(random.randrange(len(state.pending_modules)))
+    response = await client.post(f"/api/v1/courses/{course_id}/modules/{module_id}")
+    if response.status_code == 201:
+        state.generated_modules.append(module_id)
+    return "POST /courses/{id}/modules/{id}", response.status_code == 201
+
+
+async def get_course(client, state: LoadTestState) -> tuple:
+    if not state.courses:
+        return await create_course(client, state)
+    response = await client.get(f"/api/v1/courses/{random.choice(state.courses)}")
+    return "GET /courses/{id}", response.status_code == 200
+
+
+async def get_module(client, state: LoadTestState) -> tuple:
+    if not state.generated_modules:
+        return await create_module(client, state)
+    response = await client.get(f"/api/v1/modules/{random.choice(state.generated_modules)}")
+    return "GET /modules/{id}", response.status_code == 200
+
+
+OPERATIONS = {
+    "create_course": create_course,
+    "create_module": create_module,
+    "get_course": get_course,
+    "get_module": get_module,
+}
+
+
+async def drive(base_url: str, weights: Dict[str, float], concurrency: int, duration: float, seed_courses: int) -> tuple:
+    """Run ``concurrency`` workers issuing weighted random requests for ``duration`` seconds."""
+    import httpx
+
+    state = LoadTestState()
+    recorder = LatencyRecorder()
+    names, ratios = list(weights), list(weights.values())
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        for _ in range(seed_courses):
+            await create_course(client, state)
+
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                operation = OPERATIONS[random.choices(names, ratios)[0]]
+                start = time.perf_counter()
+                try:
+                    endpoint, ok = await operation(client, state)
+                except Exception:
+                    endpoint, ok = operation.__name__, False
+                recorder.record(endpoint, time.perf_counter() - start, ok)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return recorder.summary(elapsed), elapsed
+
+
+def start_app(database_url: str, llm_latency: float):
+    """Start the app in a background uvicorn server wired to the stub LLM."""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("OPENAI_API_KEY", "stub-key")
+
+    import uvicorn
+    from mentor_app.api import courses, modules, navigation
+    from mentor_app.benchmarks.stub_llm import StubChatModel
+    from mentor_app.main import app
+    from mentor_app.mentor.mentor_service import MentorService
+
+    # Replace every service that generates content, including the one behind
+    # navigation's prefetcher, so no request reaches a real provider
+    stub = StubChatModel(latency=llm_latency)
+    for api_module in (courses, modules, navigation):
+        api_module.mentor_service = MentorService(api_module.db_service, llm_client=stub)
+    navigation.prefetcher.create_module = navigation.mentor_service.create_module
+    navigation.coordinator.architect = navigation.mentor_service.architect
+    courses.db_service.create_tables()
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn failed to start")
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+def compare_to_baseline(report: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Return human-readable regressions of p95 latency or throughput beyond the threshold."""
+    regressions = []
+    for endpoint, current in report["endpoints"].items():
+        previous = baseline["endpoints"].get(endpoint)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{endpoint}: p95 {previous['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - max_regression):
+            regressions.append(
+                f"{endpoint}: throughput {previous['throughput_rps']:.1f} -> {current['throughput_rps']:.1f} req/s"
+            )
+    return regressions
+
+
+def print_report(report: dict):
+    print(f"\n{'endpoint':<34}{'reqs':>7}{'err%':>7}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for endpoint, stats in report["endpoints"].items():
+        print(
+            f"{endpoint:<34}{stats['requests']:>7}{100 * stats['error_rate']:>6.1f}%"
+            f"{stats['throughput_rps']:>9.1f}{stats['p50_ms']:>8.1f}ms{stats['p95_ms']:>7.1f}ms{stats['p99_ms']:>7.1f}ms"
+        )
+    print(f"\nTotal: {report['total_requests']} requests in {report['elapsed_s']:.1f}s "
+          f"({report['total_requests'] / report['elapsed_s']:.1f} req/s)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=20, help="seconds of measured traffic")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent client workers")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation weights, e.g. get_course=10,create_course=1")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="simulated seconds per LLM call")
+    parser.add_argument("--seed-courses", type=int, default=3, help="courses created before measuring")
+    parser.add_argument("--database-url", help="database to run against (default: temporary SQLite file)")
+    parser.add_argument("--save-baseline", type=Path, help="write the report to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="compare against a previously saved report")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed relative regression (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    weights = parse_mix(args.mix)
+    tmpdir = tempfile.TemporaryDirectory()
+    database_url = args.database_url or f"sqlite:///{tmpdir.name}/loadtest.db"
+
+    server, thread, base_url = start_app(database_url, args.llm_latency)
+    try:
+        endpoints, elapsed = asyncio.run(
+            drive(base_url, weights, args.concurrency, args.duration, args.seed_courses)
+        )
+    finally:
+        server.should_exit = True
+        thread.join()
+        tmpdir.cleanup()
+
+    report = {
+        "config": {
+            "duration": args.duration,
+            "concurrency": args.concurrency,
+            "mix": weights,
+            "llm_latency": args.llm_latency,
+        },
+        "elapsed_s": elapsed,
+        "total_requests": sum(stats["requests"] for stats in endpoints.values()),
+        "endpoints": endpoints,
+    }
+    print_report(report)
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(report, indent=2))
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        regressions = compare_to_baseline(report, json.loads(args.baseline.read_text()), args.max_regression)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Query benchmark for full-text lesson search.
+
+Bulk-loads a synthetic corpus of lessons (Zipf-distributed vocabulary, so
+some terms are common and most are rare) into a throwaway SQLite database or
+``--database-url``, builds the search index, then times ranked searches
+through ``LessonSearchIndex`` against the ``LIKE`` scan search would need
+without it. Reports queries per second and latency percentiles for each.
+
+Example:
+    python -m mentor_app.benchmarks.search --lessons 1000000 --queries 200 --scan-queries 10
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+from sqlalchemy import insert, text
+
+from mentor_app.benchmarks.loadtest import _percentile
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.models import Course, Lesson, Module
+from mentor_app.infrastructure.search import LessonSearchIndex
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "si", "po", "da", "ve", "zu", "ho", "gri", "bel", "tor", "an"]
+LESSONS_PER_MODULE = 10
+BATCH_SIZE = 5000
+
+
+def build_vocabulary(size: int, rng: random.Random) -> List[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def generate_lessons(count: int, body_words: int, seed: int):
+    """Yield batches of lesson rows for one synthetic course."""
+    rng = random.Random(seed)
+    vocabulary = build_vocabulary(20000, rng)
+    cumulative, total = [], 0.0
+    for rank in range(1, len(vocabulary) + 1):
+        total += 1.0 / rank
+        cumulative.append(total)
+
+    def words(k: int) -> List[str]:
+        return rng.choices(vocabulary, cum_weights=cumulative, k=k)
+
+    batch = []
+    for i in range(count):
+        batch.append({
+            "id": f"lesson_{i % LESSONS_PER_MODULE + 1}",
+            "module_id": f"module_{i // LESSONS_PER_MODULE + 1}",
+            "course_id": "bench",
+            "title": " ".join(words(4)).capitalize(),
+            "type": "theory",
+            "key_concepts": words(3),
+            "difficulty": "medium",
+            "content_markdown": " ".join(words(body_words)),
+            "estimated_duration": 10,
+        })
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_corpus(db_service: DatabaseService, lessons: int, body_words: int, seed: int) -> float:
+    """Insert the corpus, then index it in one pass; returns seconds spent indexing."""
+    modules = (lessons + LESSONS_PER_MODULE - 1) // LESSONS_PER_MODULE
+    with db_service.get_session() as session:
+        session.execute(insert(Course), [{
+            "id": "bench", "course_title": "Search benchmark", "estimated_duration": 0,
+            "difficulty_level": "intermediate", "prerequisites": []
+        }])
+        session.execute(insert(Module), [
+            {"id": f"module_{m + 1}", "course_id": "bench", "title": f"Module {m + 1}", "description": "",
+             "learning_objectives": [], "estimated_duration": 0, "dependencies": []}
+            for m in range(modules)
+        ])
+        loaded = 0
+        for batch in generate_lessons(lessons, body_words, seed):
+            session.execute(insert(Lesson), batch)
+            loaded += len(batch)
+            print(f"\rloaded {loaded}/{lessons} lessons", end="", flush=True)
+        session.commit()
+    print()
+
+    start = time.perf_counter()
+    LessonSearchIndex(db_service).rebuild()
+    return time.perf_counter() - start
+
+
+def sample_queries(db_service: DatabaseService, count: int, seed: int) -> List[str]:
+    """Pick one- and two-term queries from words in stored titles."""
+    rng = random.Random(seed + 1)
+    with db_service.get_session() as session:
+        titles = [row.title for row in session.execute(text("SELECT title FROM lessons LIMIT 2000"))]
+    terms = [word.lower() for title in titles for word in title.split()]
+    return [" ".join(rng.sample(terms, rng.choice((1, 2)))) for _ in range(count)]
+
+
+def run_index(index: LessonSearchIndex, queries: List[str], limit: int) -> dict:
+    latencies, hits = [], 0
+    start = time.perf_counter()
+    for query in queries:
+        began = time.perf_counter()
+        results, _ = index.search(query, limit=limit)
+        latencies.append(time.perf_counter() - began)
+        hits += len(results)
+    return _summary("full-text index", latencies, time.perf_counter() - start, hits)
+
+
+def run_scan(db_service: DatabaseService, queries: List[str], limit: int) -> dict:
+    """Substring scan ranking title matches first, the closest equivalent without an index."""
+    latencies, hits = [], 0
+    start = time.perf_counter()
+    with db_service.get_session() as session:
+        for query in queries:
+            conditions = " AND ".join(
+                f"(lower(title) LIKE :t{i} OR lower(content_markdown) LIKE :t{i})" for i in range(len(query.split()))
+            )
+            params = {f"t{i}": f"%{term}%" for i, term in enumerate(query.split())}
+            began = time.perf_counter()
+            rows = session.execute(text(
+                f"SELECT course_id, module_id, id, title FROM lessons WHERE {conditions} "
+                "ORDER BY CASE WHEN lower(title) LIKE :t0 THEN 0 ELSE 1 END, module_id, id LIMIT :limit"
+            ), {**params, "limit": limit}).all()
+            latencies.append(time.perf_counter() - began)
+            hits += len(rows)
+    return _summary("LIKE scan", latencies, time.perf_counter() - start, hits)
+
+
+def _summary(mode: str, latencies: List[float], elapsed: float, hits: int) -> dict:
+    latencies = sorted(latencies) or [0.0]
+    return {
+        "mode": mode,
+        "queries": len(latencies),
+        "hits": hits,
+        "throughput_qps": len(latencies) / elapsed,
+        "p50_ms": 1000 * _percentile(latencies, 50),
+        "p95_ms": 1000 * _percentile(latencies, 95),
+        "p99_ms": 1000 * _percentile(latencies, 99),
+    }
+
+
+def print_report(reports: List[dict]):
+    print(f"\n{'mode':<18}{'queries':>8}{'hits':>8}{'q/s':>10}{'p50':>11}{'p95':>11}{'p99':>11}")
+    for report in reports:
+        print(
+            f"{report['mode']:<18}{report['queries']:>8}{report['hits']:>8}{report['throughput_qps']:>10.1f}"
+            f"{report['p50_ms']:>9.1f}ms{report['p95_ms']:>9.1f}ms{report['p99_ms']:>9.1f}ms"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lessons", type=int, default=1_000_000, help="lessons in the synthetic corpus")
+    parser.add_argument("--body-words", type=int, default=120, help="words per lesson body")
+    parser.add_argument("--queries", type=int, default=200, help="searches through the index")
+    parser.add_argument("--scan-queries", type=int, default=10, help="searches through the LIKE scan (0 to skip)")
+    parser.add_argument("--limit", type=int, default=20, help="page size")
+    parser.add_argument("--database-url", help="empty database to load (default: a temporary SQLite file)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    workdir = None
+    database_url = args.database_url
+    if database_url is None:
+        workdir = tempfile.TemporaryDirectory(prefix="search-bench-")
+        database_url = f"sqlite:///{os.path.join(workdir.name, 'search.db')}"
+
+    db_service = DatabaseService(database_url)
+    db_service.create_tables()
+    start = time.perf_counter()
+    index_s = load_corpus(db_service, args.lessons, args.body_words, args.seed)
+    print(f"Loaded and indexed {args.lessons} lessons in {time.perf_counter() - start:.1f}s (indexing {index_s:.1f}s)")
+
+    queries = sample_queries(db_service, args.queries, args.seed)
+    reports = [run_index(LessonSearchIndex(db_service), queries, args.limit)]
+    if args.scan_queries:
+        reports.append(run_scan(db_service, queries[:args.scan_queries], args.limit))
+    print_report(reports)
+
+    if workdir is not None:
+        db_service.engine.dispose()
+        workdir.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Deterministic stand-in for the chat model used by the architect and builder."""
+
+import json
+import re
+import threading
+import time
+from typing import List
+
+from langchain_core.messages import AIMessage
+
+
+class StubChatModel:
+    """Answers architect and builder prompts with canned, well-formed output.
+
+    Mimics the ``invoke(messages)`` interface of a LangChain chat model and
+    sleeps for ``latency`` seconds per call to emulate provider round trips.
+    """
+
+    def __init__(self, latency: float = 0.0, modules_per_course: int = 4, lessons_per_module: int = 3):
+        self.latency = latency
+        self.modules_per_course = modules_per_course
+        self.lessons_per_module = lessons_per_module
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, messages: List, **kwargs) -> AIMessage:
+        """Return a canned response for the prompt in the last message."""
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        prompt = messages[-1].content
+        if "Create a structured learning path" in prompt:
+            content = json.dumps(self._syllabus(prompt))
+        elif "Create detailed lesson structure" in prompt:
+            content = json.dumps(self._module_structure(prompt))
+        elif "Create assessment questions" in prompt:
+            content = json.dumps(self._quiz(prompt))
+        elif "short bridge modules" in prompt:
+            content = json.dumps(self._bridge_modules(prompt))
+        else:
+            content = self._lesson(prompt)
+
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": len(prompt) // 4,
+                "output_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4,
+            },
+        )
+
+    def _syllabus(self, prompt: str) -> dict:
+        topic = _field(prompt, r"learning path for the topic: (.+)", "Stub Topic")
+        modules = [
+            {
+                "id": f"module_{i}",
+                "title": f"{topic} part {i}",
+                "description": f"Part {i} of {topic}",
+                "learning_objectives": [f"Objective {i}.{j}" for j in range(1, 4)],
+                "estimated_duration": 5,
+                "dependencies": [f"module_{i - 1}"] if i > 1 else [],
+            }
+            for i in range(1, self.modules_per_course + 1)
+        ]
+        return {
+            "course_title": topic,
+            "estimated_duration": 5 * self.modules_per_course,
+            "difficulty_level": "intermediate",
+            "prerequisites": [],
+            "modules": modules,
+        }
+
+    def _module_structure(self, prompt: str) -> dict:
+        structure = json.loads(prompt[prompt.index("{", prompt.index("Return as JSON")):])
+        lesson_types = ["theory", "practice", "assessment"]
+        structure["lessons"] = [
+            {
+                "id": f"lesson_{i}",
+                "title": f"{structure['title']} lesson {i}",
+                "type": lesson_types[(i - 1) % len(lesson_types)],
+                "key_concepts": [f"concept {i}a", f"concept {i}b"],
+                "difficulty": "medium",
+            }
+            for i in range(1, self.lessons_per_module + 1)
+        ]
+        return structure
+
+    def _bridge_modules(self, prompt: str) -> dict:
+        topics = re.findall(r"^- (.+)$", prompt[prompt.index("does not cover:"):prompt.index("Requirements:")], re.M)
+        return {
+            "modules": [
+                {
+                    "id": f"bridge_{i}",
+                    "title": f"Bridge: {topic}",
+                    "description": f"Catch-up module on {topic}",
+                    "learning_objectives": [f"Understand {topic}"],
+                    "estimated_duration": 2,
+                    "dependencies": [],
+                }
+                for i, topic in enumerate(topics, 1)
+            ]
+        }
+
+    def _quiz(self, prompt: str) -> dict:
+        per_concept = int(_field(prompt, r"Write (\d+) questions", "2"))
+        concepts = re.findall(r"^- (.+)$", prompt[prompt.index("for each of these concepts:"):prompt.index("Requirements:")], re.M)
+        return {
+            "questions": [
+                {
+                    "concept": concept,
+                    "type": "multiple_choice",
+                    "question_text": f"Stub question {i} on {concept}?",
+                    "options": [f"{concept} option {n}" for n in "abcd"],
+                    "correct_answer": f"{concept} option a",
+                    "explanation": "Stub explanation.",
+                    "points": 1,
+                }
+                for concept in concepts
+                for i in range(1, per_concept + 1)
+            ]
+        }
+
+    def _lesson(self, prompt: str) -> str:
+        title = _field(prompt, r"- Title: (.+)", "Lesson")
+        return (
+            f"# {title}\n\n"
+            + "Stub lesson content for load testing. " * 40
+            + "\n\n```python\nprint('hello')\n```\n\n## Summary\n\n- Key takeaway\n"
+        )
+
+
+def _field(prompt: str, pattern: str, default: str) -> str:
+    match = re.search(pattern, prompt)
+    return match.group(1).strip() if match else default
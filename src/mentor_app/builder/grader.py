@@ -0,0 +1,107 @@
+"""Grading of practice task submissions against their test cases."""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from mentor_app.builder.models import GradingQueueFull, PracticeTask
+from mentor_app.builder.sandbox import CodeSandbox
+from mentor_app.infrastructure.metrics import PRACTICE_GRADING, PRACTICE_GRADING_DURATION
+
+GRADABLE_TASK_TYPES = {"coding"}
+
+
+def _normalize_output(output: str) -> str:
+    return "\n".join(line.rstrip() for line in output.strip().splitlines())
+
+
+class PracticeGrader:
+    """Runs learner submissions against a task's test cases in the code sandbox.
+
+    A submission is one sandbox job: the code runs once per test case in a
+    fresh isolated process, with the case's ``input_data`` as stdin, and
+    passes the case when its stdout matches ``expected_output`` (ignoring
+    trailing whitespace). Submissions
+    wait in a queue for a free worker; once ``max_pending`` are queued or
+    running, new ones are rejected with ``GradingQueueFull`` so callers can
+    ask clients to retry instead of piling up latency.
+    """
+
+    def __init__(self, sandbox: Optional[CodeSandbox] = None, max_pending: int = 256, test_timeout: float = 2.0):
+        self.sandbox = sandbox or CodeSandbox(
+            workers=int(os.getenv("GRADER_WORKERS", "4")),
+            timeout=test_timeout,
+            cpu_seconds=test_timeout
+        )
+        self.max_pending = max_pending
+        self.test_timeout = test_timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.sandbox.workers, thread_name_prefix="practice-grader")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Pre-fork the worker pool so the first submissions do not pay interpreter start-up."""
+        self.sandbox.warm_up()
+
+    def submit(self, task: PracticeTask, code: str) -> Future:
+        """Queue a submission; the future resolves to the grade. Raises GradingQueueFull when saturated."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                PRACTICE_GRADING.labels("rejected").inc()
+                raise GradingQueueFull(f"{self._pending} submissions are already waiting to be graded")
+            self._pending += 1
+        try:
+            future = self._executor.submit(self.grade, task, code, time.perf_counter())
+        except RuntimeError:
+            self._done()
+            raise
+        future.add_done_callback(lambda _: self._done())
+        return future
+
+    def grade(self, task: PracticeTask, code: str, queued_at: Optional[float] = None) -> dict:
+        """Grade a submission synchronously."""
+        queued_at = queued_at or time.perf_counter()
+        runs = self.sandbox.run(code, [test.input_data for test in task.test_cases], self.test_timeout) if task.test_cases else []
+
+        tests = []
+        for test, run in zip(task.test_cases, runs):
+            passed = run["ok"] and _normalize_output(run["output"]) == _normalize_output(test.expected_output)
+            tests.append({
+                "description": test.description,
+                "passed": passed,
+                "expected_output": test.expected_output,
+                "output": run["output"],
+                "error": run["error"]
+            })
+        passed_tests = sum(test["passed"] for test in tests)
+        score = round(100 * passed_tests / len(tests)) if tests else 0
+        passed = bool(tests) and passed_tests == len(tests)
+
+        PRACTICE_GRADING.labels("passed" if passed else "failed").inc()
+        PRACTICE_GRADING_DURATION.observe(time.perf_counter() - queued_at)
+        return {"task_id": task.id, "passed": passed, "score": score, "tests": tests}
+
+    def close(self):
+        """Drop queued submissions and stop the worker pool."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.sandbox.close()
+
+    def _done(self):
+        with self._lock:
+            self._pending -= 1
+
+
+_grader: Optional[PracticeGrader] = None
+_grader_lock = threading.Lock()
+
+
+def get_practice_grader() -> PracticeGrader:
+    """Return the process-wide grader, creating its sandbox on first use rather than at import."""
+    global _grader
+    if _grader is None:
+        with _grader_lock:
+            if _grader is None:
+                _grader = PracticeGrader()
+    return _grader
@@ -40,6 +40,7 @@ class CodeExample(BaseModel):
     code: str
     explanation: str
     is_runnable: bool
+    error: Optional[str] = None
 
 
 class InteractiveElement(BaseModel):
@@ -73,6 +74,7 @@ class Question(BaseModel):
     correct_answer: str
     explanation: str
     points: int
+    concept: Optional[str] = None
 
 
 class Assessment(BaseModel):
@@ -94,6 +96,8 @@ class LessonContent(BaseModel):
     interactive_elements: List[InteractiveElement]
     practice_tasks: List[PracticeTask]
     estimated_duration: int
+    assessment: Optional[Assessment] = None
+    body_hash: Optional[str] = None  # shared lesson body the content is stored as
 
 
 class ModuleContent(BaseModel):
@@ -109,9 +113,17 @@ class ContentGenerationError(Exception):
     pass
 
 
+class GenerationCancelled(ContentGenerationError):
+    pass
+
+
 class CodeValidationError(Exception):
     pass
 
 
+class GradingQueueFull(Exception):
+    pass
+
+
 class InvalidModuleError(Exception):
     pass
@@ -1,9 +1,228 @@
 """Quiz and assessment generation."""
 
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional
+
+from langchain_core.messages import HumanMessage
+
+from mentor_app.builder.models import Assessment, Question
+from mentor_app.infrastructure.metrics import track_llm_call
+from mentor_app.infrastructure.routing import model_for_task
+from mentor_app.infrastructure.tracing import span
+
+# Question types graded by comparing the answer with the key; anything else is left for review
+AUTO_GRADED_TYPES = {"multiple_choice", "true_false", "exact"}
+
+QUIZ_PROMPT = """
+Create assessment questions for a {difficulty} lesson titled "{lesson_title}".
+
+Write {questions_per_concept} questions for each of these concepts:
+{concepts}
+
+Requirements:
+- Use only "multiple_choice" (exactly 4 options) or "exact" (a short answer that can be checked by string comparison: a keyword, number or code token)
+- For multiple choice, correct_answer must be the full text of the correct option
+- Explain why the answer is correct
+- Test understanding, not recall of wording
+
+Return as JSON with this exact structure:
+{{
+    "questions": [
+        {{
+            "concept": "one of the concepts above",
+            "type": "multiple_choice|exact",
+            "question_text": "...",
+            "options": ["...", "...", "...", "..."],
+            "correct_answer": "...",
+            "explanation": "...",
+            "points": 1
+        }}
+    ]
+}}
+"""
+
+
+def normalize_concept(concept: str) -> str:
+    return " ".join(concept.lower().split())
+
+
+def _normalize_answer(answer: str) -> str:
+    return " ".join(answer.strip().lower().split()).rstrip(".")
+
+
+def question_id(concept: str, difficulty: str, question_text: str) -> str:
+    """Content-addressed id, so the same generated question is banked once."""
+    digest = hashlib.sha256(f"{concept}|{difficulty}|{_normalize_answer(question_text)}".encode()).hexdigest()
+    return f"q_{digest[:16]}"
+
+
+def _option_index(question: Question, answer: str) -> Optional[int]:
+    """Resolve an answer given as option text, letter ("B") or 1-based number to an option index."""
+    if not question.options:
+        return None
+    normalized = _normalize_answer(answer)
+    for index, option in enumerate(question.options):
+        if _normalize_answer(option) == normalized:
+            return index
+    match = re.fullmatch(r"\(?([a-z]|\d+)[).:]?", normalized)
+    if match:
+        token = match.group(1)
+        index = ord(token) - ord("a") if token.isalpha() else int(token) - 1
+        if 0 <= index < len(question.options):
+            return index
+    return None
+
+
+def is_correct(question: Question, answer: str) -> bool:
+    """Deterministically check an answer against a question's key."""
+    if question.type == "multiple_choice":
+        expected = _option_index(question, question.correct_answer)
+        if expected is not None:
+            return _option_index(question, answer) == expected
+    return _normalize_answer(answer) == _normalize_answer(question.correct_answer)
+
+
+def without_answers(assessment: dict) -> dict:
+    """Copy of a stored assessment that is safe to show learners before they submit."""
+    return {
+        **assessment,
+        "questions": [
+            {key: value for key, value in question.items() if key not in ("correct_answer", "explanation")}
+            for question in assessment["questions"]
+        ]
+    }
+
+
+def grade_assessment(assessment: Assessment, answers: Dict[str, str]) -> dict:
+    """Grade answers (question_id -> answer) locally; no LLM call is made.
+
+    Returns the percentage score over auto-graded questions, whether it meets
+    the passing score, and per-question feedback. ``score`` and ``passed`` are
+    None when the assessment has no auto-graded questions.
+    """
+    earned = possible = 0
+    feedback = []
+    for question in assessment.questions:
+        if question.type not in AUTO_GRADED_TYPES:
+            feedback.append({"question_id": question.id, "graded": False})
+            continue
+        correct = question.id in answers and is_correct(question, answers[question.id])
+        possible += question.points
+        earned += question.points if correct else 0
+        feedback.append({
+            "question_id": question.id,
+            "graded": True,
+            "correct": correct,
+            "correct_answer": question.correct_answer,
+            "explanation": question.explanation
+        })
+    if not possible:
+        return {"score": None, "passed": None, "feedback": feedback}
+    score = round(100 * earned / possible)
+    return {"score": score, "passed": score >= assessment.passing_score, "feedback": feedback}
+
+
 class QuizFactory:
-    def __init__(self, llm_client):
+    """Assembles quizzes from a question bank keyed by concept and difficulty.
+
+    The LLM is only asked for concepts that have fewer than the wanted number
+    of banked questions at the lesson's difficulty, in one call per quiz; the
+    new questions are banked for every later quiz on those concepts.
+    """
+
+    def __init__(self, llm_client, question_bank=None, questions_per_concept: int = 2, passing_score: int = 70):
         self.llm_client = llm_client
-    
-    def create_quiz(self, lesson_content: str, difficulty: str = "medium") -> dict:
-        """Generate quiz questions for lesson content."""
-        pass
+        self.question_bank = question_bank  # QuestionBankRepository; without it every quiz is generated
+        self.questions_per_concept = questions_per_concept
+        self.passing_score = passing_score
+
+    def create_quiz(self, quiz_id: str, title: str, concepts: List[str], difficulty: str = "medium") -> Assessment:
+        """Build an assessment covering ``concepts``, generating only what the bank lacks."""
+        concepts = list(dict.fromkeys(normalize_concept(concept) for concept in concepts if concept.strip()))
+        difficulty = difficulty.lower()
+        banked = self._banked_questions(concepts, difficulty)
+
+        missing = [concept for concept in concepts if len(banked.get(concept, [])) < self.questions_per_concept]
+        if missing:
+            generated = self._generate_questions(title, missing, difficulty)
+            if self.question_bank is not None and generated:
+                self.question_bank.save_questions([
+                    {**question.dict(), "difficulty": difficulty} for question in generated
+                ])
+            for question in generated:
+                questions = banked.setdefault(question.concept, [])
+                if question.id not in {banked_question.id for banked_question in questions}:
+                    questions.append(question)
+
+        questions = [
+            question
+            for concept in concepts
+            for question in banked.get(concept, [])[:self.questions_per_concept]
+        ]
+        return Assessment(id=quiz_id, title=title, questions=questions, passing_score=self.passing_score)
+
+    def _banked_questions(self, concepts: List[str], difficulty: str) -> Dict[str, List[Question]]:
+        if self.question_bank is None or not concepts:
+            return {}
+        banked = {}
+        for item in self.question_bank.get_questions(concepts, difficulty):
+            banked.setdefault(item.concept, []).append(Question(
+                id=item.id,
+                type=item.type,
+                question_text=item.question_text,
+                options=item.options,
+                correct_answer=item.correct_answer,
+                explanation=item.explanation,
+                points=item.points,
+                concept=item.concept
+            ))
+        return banked
+
+    def _generate_questions(self, lesson_title: str, concepts: List[str], difficulty: str) -> List[Question]:
+        prompt = QUIZ_PROMPT.format(
+            difficulty=difficulty,
+            lesson_title=lesson_title,
+            questions_per_concept=self.questions_per_concept,
+            concepts="\n".join(f"- {concept}" for concept in concepts)
+        )
+
+        with track_llm_call("builder", "quiz", prompt) as call:
+            response = model_for_task(self.llm_client, "quiz").invoke([HumanMessage(content=prompt)])
+            call.record_response(response)
+
+        with span("parse", task="quiz"):
+            try:
+                # Extract JSON from markdown code blocks if present
+                content = response.content.strip()
+                if content.startswith('```json'):
+                    content = content[7:]
+                if content.startswith('```'):
+                    content = content[3:]
+                if content.endswith('```'):
+                    content = content[:-3]
+
+                questions = []
+                for question_data in json.loads(content.strip())["questions"]:
+                    concept = normalize_concept(question_data.get("concept") or "")
+                    if concept not in concepts:
+                        continue  # the bank is keyed by concept, so unattributed questions are dropped
+                    if question_data.get("type") not in AUTO_GRADED_TYPES:
+                        continue
+                    questions.append(Question(
+                        id=question_id(concept, difficulty, question_data["question_text"]),
+                        type=question_data["type"],
+                        question_text=question_data["question_text"],
+                        options=question_data.get("options") if question_data["type"] == "multiple_choice" else None,
+                        correct_answer=str(question_data["correct_answer"]),
+                        explanation=question_data.get("explanation", ""),
+                        points=int(question_data.get("points", 1)),
+                        concept=concept
+                    ))
+                # Drop repeats so one bank insert never touches the same id twice
+                return list({question.id: question for question in questions}.values())
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+                call.record_error()
+                print(f"Raw response: {response.content}")
+                raise ValueError(f"Failed to parse LLM response: {e}")
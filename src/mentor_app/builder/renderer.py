@@ -0,0 +1,41 @@
+"""Render lesson markdown to sanitized HTML and a table of contents."""
+
+import re
+from typing import List, Tuple
+
+from markdown_it import MarkdownIt
+
+# html=False escapes any raw HTML the LLM emits, and markdown-it refuses
+# javascript:/vbscript:/file: links, so the output is safe to serve as-is.
+_markdown = MarkdownIt("commonmark", {"html": False}).enable(["table", "strikethrough"])
+
+
+def render_lesson(content_markdown: str) -> Tuple[str, List[dict]]:
+    """Render markdown to HTML with anchored headings and return (html, toc)."""
+    tokens = _markdown.parse(content_markdown or "")
+    toc = []
+    used_anchors = set()
+
+    for index, token in enumerate(tokens):
+        if token.type != "heading_open":
+            continue
+        title = tokens[index + 1].content
+        anchor = _unique_anchor(_slugify(title), used_anchors)
+        token.attrSet("id", anchor)
+        toc.append({"level": int(token.tag[1]), "title": title, "anchor": anchor})
+
+    return _markdown.renderer.render(tokens, _markdown.options, {}), toc
+
+
+def _slugify(text: str) -> str:
+    slug = re.sub(r"[^\w\s-]", "", text.lower()).strip()
+    return re.sub(r"[\s_-]+", "-", slug) or "section"
+
+
+def _unique_anchor(slug: str, used: set) -> str:
+    anchor, suffix = slug, 1
+    while anchor in used:
+        suffix += 1
+        anchor = f"{slug}-{suffix}"
+    used.add(anchor)
+    return anchor
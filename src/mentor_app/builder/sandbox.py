@@ -0,0 +1,411 @@
+"""Code example extraction and sandboxed execution."""
+
+import json
+import os
+import queue
+import select
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+from markdown_it import MarkdownIt
+
+from mentor_app.builder.models import CodeExample
+from mentor_app.infrastructure.metrics import CODE_EXAMPLE_VALIDATION
+
+PYTHON_LANGUAGES = {"python", "python3", "py"}
+MAX_EXPLANATION_LENGTH = 300
+ISOLATION_LEVELS = {"strict", "best-effort"}
+TEMPLATE_GRACE_SECONDS = 5.0
+
+_markdown = MarkdownIt("commonmark")
+
+# The template process each worker runs. It never executes untrusted code
+# itself: for every input it forks a fresh child from its clean state, so
+# nothing one run does (patched modules, leftover files, stray processes) is
+# seen by the next. Job and result lines travel over private copies of
+# stdin/stdout that the child closes before running the code; the child only
+# gets the input as stdin and files for its stdout and stderr, and the
+# template derives the result from those and the exit status.
+#
+# Before running the code the child moves to its own process group, drops to
+# the sandbox uid, enters an empty network namespace and takes CPU, memory,
+# file-size and process limits (RLIMIT_NPROC of 1: it cannot fork). With
+# "strict" isolation it refuses to run if any of that is unavailable. When the
+# run exits or times out the template kills its whole process group.
+_WORKER = r"""
+import ctypes, json, os, resource, select, shutil, signal, sys, tempfile, time, traceback
+jobs = os.fdopen(os.dup(0), "r")
+results = os.fdopen(os.dup(1), "w")
+devnull = os.open(os.devnull, os.O_RDWR)
+for fd in (0, 1, 2):
+    os.dup2(devnull, fd)
+settings = json.loads(sys.argv[1])
+libc = ctypes.CDLL(None, use_errno=True)
+CLONE_NEWUSER, CLONE_NEWNET = 0x10000000, 0x40000000
+PR_SET_PDEATHSIG, PR_SET_NO_NEW_PRIVS = 1, 38
+running = None
+
+def kill_group(pid):
+    for kill in (os.killpg, os.kill):
+        try:
+            kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+def stop(signum, frame):
+    if running is not None:
+        kill_group(running)
+    os._exit(1)
+
+signal.signal(signal.SIGTERM, stop)
+
+def isolate():
+    missing = []
+    root = os.geteuid() == 0
+    if libc.unshare(CLONE_NEWNET if root else CLONE_NEWUSER | CLONE_NEWNET) != 0:
+        missing.append("network namespace (" + os.strerror(ctypes.get_errno()) + ")")
+    memory = settings["memory_bytes"]
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (settings["max_output_bytes"], settings["max_output_bytes"]))
+    resource.setrlimit(resource.RLIMIT_CPU, (settings["cpu_seconds"], settings["cpu_seconds"] + 1))
+    resource.setrlimit(resource.RLIMIT_NPROC, (1, 1))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    libc.prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0)
+    if root:
+        os.setgroups([])
+        os.setgid(settings["gid"])
+        os.setuid(settings["uid"])
+    else:
+        missing.append("separate uid (the sandbox is not running as root)")
+    libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL, 0, 0, 0)  # after setuid, which clears it
+    return missing
+
+def child(code, streams, run_dir):
+    try:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        os.setpgid(0, 0)
+        for target, fd in enumerate(streams):
+            os.dup2(fd, target)
+        os.closerange(3, resource.getrlimit(resource.RLIMIT_NOFILE)[0])
+        os.chdir(run_dir)
+        missing = isolate()
+        if missing and settings["isolation"] == "strict":
+            os.write(2, ("Sandbox isolation unavailable: " + ", ".join(missing)).encode())
+            os._exit(126)
+    except BaseException as e:
+        os.write(2, ("Sandbox setup failed: " + repr(e)).encode())
+        os._exit(126)
+    status = 1
+    try:
+        exec(compile(code, "<submission>", "exec"), {"__name__": "__main__"})
+        status = 0
+    except SystemExit as e:
+        if e.code in (None, 0):
+            status = 0
+        else:
+            sys.stderr.write(f"SystemExit: {e.code}\n")
+    except BaseException as e:
+        sys.stderr.write("".join(traceback.format_exception_only(type(e), e)))
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except BaseException:
+                pass
+    os._exit(status)
+
+def wait(pid, timeout):
+    # Poll without reaping, so the run's process group id cannot be reused before it is killed
+    deadline = time.monotonic() + timeout
+    try:
+        pidfd = os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        pidfd = None
+    try:
+        while os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if pidfd is not None:
+                select.select([pidfd], [], [], remaining)
+            else:
+                time.sleep(min(remaining, 0.002))
+        return True
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+def read(path, limit):
+    with open(path, "rb") as f:
+        return f.read(limit).decode("utf-8", "replace")
+
+def run(code, stdin, timeout):
+    global running
+    run_dir = tempfile.mkdtemp(dir=".")
+    try:
+        if os.geteuid() == 0:
+            os.chown(run_dir, settings["uid"], settings["gid"])
+        paths = [os.path.join(run_dir, name) for name in (".stdin", ".stdout", ".stderr")]
+        with open(paths[0], "w") as f:
+            f.write(stdin)
+        streams = [os.open(paths[0], os.O_RDONLY)]
+        streams += [os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600) for path in paths[1:]]
+        pid = os.fork()
+        if pid == 0:
+            child(code, streams, run_dir)
+        running = pid
+        try:
+            os.setpgid(pid, pid)
+        except OSError:
+            pass
+        for fd in streams:
+            os.close(fd)
+        exited = wait(pid, timeout)
+        kill_group(pid)
+        _, status = os.waitpid(pid, 0)
+        running = None
+        output = read(paths[1], settings["max_output_bytes"])[:settings["max_output_chars"]]
+        error = read(paths[2], settings["max_output_bytes"]).strip()[-500:] or None
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    if not exited:
+        return {"ok": False, "output": output, "error": f"Timed out after {timeout:g}s", "timeout": True}
+    if os.WIFSIGNALED(status):
+        return {"ok": False, "output": output, "error": "Exceeded the sandbox resource limits"}
+    exit_code = os.WEXITSTATUS(status)
+    if exit_code != 0:
+        return {"ok": False, "output": output, "error": error or f"Exited with status {exit_code}"}
+    return {"ok": True, "output": output, "error": None}
+
+for line in jobs:
+    job = json.loads(line)
+    runs = [run(job["code"], stdin, job["timeout"]) for stdin in job["inputs"]]
+    results.write(json.dumps({"runs": runs}) + "\n")
+    results.flush()
+"""
+
+
+def extract_code_examples(content_markdown: str) -> List[CodeExample]:
+    """Parse fenced code blocks into code examples, explained by the paragraph before each.
+
+    Python examples are marked runnable until validation says otherwise.
+    """
+    examples = []
+    explanation = ""
+    for token in _markdown.parse(content_markdown or ""):
+        if token.type == "inline":
+            explanation = token.content
+        elif token.type == "fence" and token.content.strip():
+            language = (token.info.split() or ["text"])[0].lower()
+            examples.append(CodeExample(
+                language=language,
+                code=token.content,
+                explanation=explanation[:MAX_EXPLANATION_LENGTH],
+                is_runnable=language in PYTHON_LANGUAGES
+            ))
+            explanation = ""
+    return examples
+
+
+class _Worker:
+    """One warm template process that runs jobs sequentially, each input in a fresh child."""
+
+    def __init__(self, sandbox: "CodeSandbox"):
+        settings = {
+            "isolation": sandbox.isolation,
+            "uid": sandbox.uid,
+            "gid": sandbox.gid,
+            "cpu_seconds": max(1, round(sandbox.cpu_seconds)),
+            "memory_bytes": sandbox.memory_mb * 1024 * 1024,
+            "max_output_bytes": sandbox.max_output_bytes,
+            "max_output_chars": sandbox.max_output_chars,
+        }
+        self.process = subprocess.Popen(
+            [sys.executable, "-I", "-c", _WORKER, json.dumps(settings)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=sandbox.workdir,
+            env={"PATH": os.environ.get("PATH", ""), "PYTHONDONTWRITEBYTECODE": "1"},
+            start_new_session=True,
+            text=True
+        )
+
+    def run(self, code: str, inputs: List[str], timeout: float) -> dict:
+        self.process.stdin.write(json.dumps({"code": code, "inputs": inputs, "timeout": timeout}) + "\n")
+        self.process.stdin.flush()
+        # The template enforces the per-input timeout; this only guards against the template hanging
+        ready, _, _ = select.select([self.process.stdout], [], [], timeout * max(1, len(inputs)) + TEMPLATE_GRACE_SECONDS)
+        if not ready:
+            return {"error": f"Timed out after {timeout:g}s", "timeout": True}
+        line = self.process.stdout.readline()
+        if not line:
+            return {"error": "Sandbox worker exited", "crashed": True}
+        return json.loads(line)
+
+    def kill(self):
+        # The template kills the run in progress on SIGTERM
+        self.process.terminate()
+        try:
+            self.process.wait(TEMPLATE_GRACE_SECONDS)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+class CodeSandbox:
+    """Runs untrusted Python code in fresh, isolated processes forked from a warm pool.
+
+    Each worker is a template interpreter (``python -I``, empty environment,
+    scratch directory) that forks a new child for every input, so no state
+    survives from one run to the next. A child runs in its own process group
+    as the unprivileged ``uid``/``gid`` (default ``nobody``), without network
+    access (an empty network namespace), without the ability to start
+    processes (``RLIMIT_NPROC``) and with CPU time, memory and file-size
+    limits; its process group is killed when it exits or times out.
+
+    Dropping the uid needs the app to run as root (e.g. in its container);
+    with ``isolation="strict"`` (the default, or ``CODE_SANDBOX_ISOLATION``)
+    a run that cannot be fully isolated fails instead of running the code.
+    ``"best-effort"`` runs it with whatever isolation is available and is
+    meant for development machines only. The sandbox needs a POSIX system.
+    Workers start on first use or on ``warm_up``; a worker that crashes or
+    hangs is replaced.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        timeout: float = 5.0,
+        cpu_seconds: float = 5.0,
+        memory_mb: int = 512,
+        max_output_bytes: int = 1 << 20,
+        max_output_chars: int = 64 * 1024,
+        isolation: Optional[str] = None,
+        uid: int = 65534,
+        gid: int = 65534
+    ):
+        self.workers = workers
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.max_output_bytes = max_output_bytes  # files written by the code, including its stdout
+        self.max_output_chars = max_output_chars  # captured stdout per run
+        self.isolation = isolation or os.getenv("CODE_SANDBOX_ISOLATION", "strict")
+        if self.isolation not in ISOLATION_LEVELS:
+            raise ValueError(f"Unknown sandbox isolation '{self.isolation}'")
+        self.uid = uid
+        self.gid = gid
+        self.workdir = tempfile.mkdtemp(prefix="code-sandbox-")
+        os.chmod(self.workdir, 0o711)  # runs reach their own directory inside it after dropping the uid
+
+        self._idle = queue.LifoQueue()
+        self._all: List[_Worker] = []
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="code-sandbox")
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def run(self, code: str, inputs: List[str], timeout: Optional[float] = None) -> List[dict]:
+        """Run code once per stdin input, each in a fresh process; blocks until done.
+
+        Returns one ``{"ok", "output", "error"}`` dict per input; runs that
+        hit their timeout also carry ``"timeout": True``.
+        """
+        if os.name != "posix":
+            return [{"ok": False, "output": "", "error": "The code sandbox needs a POSIX system"} for _ in inputs]
+        worker = self._checkout()
+        result = {"error": "Sandbox worker failed", "crashed": True}
+        try:
+            result = worker.run(code, inputs, timeout or self.timeout)
+        except (OSError, ValueError) as e:
+            result = {"error": f"Sandbox worker failed: {e}", "crashed": True}
+        finally:
+            self._checkin(worker, healthy="runs" in result)
+        if "runs" in result:
+            return result["runs"]
+        return [{"ok": False, "output": "", "error": result["error"], "timeout": bool(result.get("timeout"))} for _ in inputs]
+
+    def submit(self, example: CodeExample) -> Future:
+        """Validate an example in the background; the future resolves to the checked example."""
+        if not example.is_runnable:
+            future = Future()
+            future.set_result(example)
+            return future
+        return self._executor.submit(self.validate, example)
+
+    def validate(self, example: CodeExample) -> CodeExample:
+        """Run a Python example; a failure marks it not runnable and records the error."""
+        try:
+            compile(example.code, "<example>", "exec")
+        except (SyntaxError, ValueError) as e:
+            CODE_EXAMPLE_VALIDATION.labels("failed").inc()
+            return example.copy(update={"is_runnable": False, "error": f"{type(e).__name__}: {e}"})
+
+        (result,) = self.run(example.code, [""])
+        outcome = "passed" if result["ok"] else "timeout" if result.get("timeout") else "failed"
+        CODE_EXAMPLE_VALIDATION.labels(outcome).inc()
+        if result["ok"]:
+            return example
+        return example.copy(update={"is_runnable": False, "error": result["error"]})
+
+    def validate_all(self, examples: List[CodeExample]) -> List[CodeExample]:
+        """Validate examples concurrently, preserving their order."""
+        return [future.result() for future in [self.submit(example) for example in examples]]
+
+    def warm_up(self):
+        """Start all worker processes ahead of the first job."""
+        workers = []
+        for _ in range(self.workers - len(self._all)):
+            workers.append(self._checkout())
+        for worker in workers:
+            self._checkin(worker, healthy=True)
+
+    def close(self):
+        """Stop accepting jobs and kill all workers."""
+        with self._lock:
+            self._closed = True
+            workers, self._all = self._all, []
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for worker in workers:
+            worker.kill()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def _checkout(self) -> _Worker:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Code sandbox is closed")
+            worker = _Worker(self)
+            self._all.append(worker)
+            return worker
+
+    def _checkin(self, worker: _Worker, healthy: bool):
+        if healthy and not self._closed:
+            self._idle.put(worker)
+            return
+        with self._lock:
+            if worker in self._all:
+                self._all.remove(worker)
+        worker.kill()
+
+
+_sandbox: Optional[CodeSandbox] = None
+_sandbox_lock = threading.Lock()
+
+
+def get_code_sandbox() -> CodeSandbox:
+    """Return the process-wide sandbox shared by all content generators."""
+    global _sandbox
+    if _sandbox is None:
+        with _sandbox_lock:
+            if _sandbox is None:
+                _sandbox = CodeSandbox(workers=int(os.getenv("CODE_SANDBOX_WORKERS", "4")))
+    return _sandbox
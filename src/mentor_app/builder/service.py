@@ -1,7 +1,9 @@
 """Main Builder service for content generation."""
 
-import os
+import hashlib
+import json
 import sys
+import threading
 from typing import Optional
 from pathlib import Path
 
@@ -9,54 +11,171 @@ from pathlib import Path
 src_path = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(src_path))
 
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 
 from mentor_app.models import Module, CourseContext, UserContext
 from mentor_app.architect.service import ArchitectService
 from mentor_app.builder.models import (
-    ModuleContent, LessonContent,
-    ContentGenerationError, InvalidModuleError
+    Assessment, ModuleContent, LessonContent,
+    ContentGenerationError, GenerationCancelled, InvalidModuleError
 )
+from mentor_app.builder.quiz_factory import QuizFactory, normalize_concept
+from mentor_app.builder.sandbox import CodeSandbox, extract_code_examples, get_code_sandbox
+from mentor_app.infrastructure.llm_client import LLMUnavailableError
+from mentor_app.infrastructure.metrics import LESSON_BODY_LOOKUPS, track_llm_call
+from mentor_app.infrastructure.routing import get_model_router, model_for_task
+from mentor_app.infrastructure.tokens import GenerationBudgetExceeded, fit_prompt
+from mentor_app.infrastructure.tracing import span
+
+LESSON_BODY_VERSION = 1  # bump when lesson prompts change, so bodies from older prompts are not reused
+
+
+def lesson_body_hash(lesson_outline, course_context: CourseContext, user_context: Optional[UserContext]) -> str:
+    """Content address of a lesson body: everything in its prompt except course title and ids, normalized.
+
+    Lessons with the same title, type, concepts and difficulty, generated
+    for the same domain, instructions and learner profile, share one body
+    whichever course they belong to.
+    """
+    key = {
+        "version": LESSON_BODY_VERSION,
+        "title": normalize_concept(lesson_outline.title),
+        "type": lesson_outline.type.lower(),
+        "key_concepts": sorted({normalize_concept(concept) for concept in lesson_outline.key_concepts}),
+        "difficulty": lesson_outline.difficulty.lower(),
+        "domain": normalize_concept(course_context.topic_domain),
+        "course_difficulty": course_context.difficulty_level.lower(),
+        "instructions": normalize_concept(course_context.user_instructions or ""),
+        "user": [
+            user_context.skill_level.lower(),
+            user_context.learning_style.lower(),
+            sorted({normalize_concept(topic) for topic in user_context.prior_knowledge})
+        ] if user_context else None
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
 
 
 class ContentGenerator:
-    def __init__(self, llm_client=None):
-        self.llm_client = llm_client or ChatOpenAI(
-            model="gpt-4o",
-            api_key=os.getenv("OPENAI_API_KEY"),
-            temperature=0.7
-        )
-        self.architect = ArchitectService()
+    def __init__(self, llm_client=None, question_bank=None, sandbox: Optional[CodeSandbox] = None, lesson_bodies=None):
+        self.llm_client = llm_client or get_model_router()
+        self.architect = ArchitectService(self.llm_client)
+        self.quiz_factory = QuizFactory(self.llm_client, question_bank)
+        self.sandbox = sandbox or get_code_sandbox()
+        self.lesson_bodies = lesson_bodies  # LessonBodyRepository; without it every lesson is generated
 
     def generate_module_content(
         self,
         module: Module,
         course_context: CourseContext,
-        user_context: Optional[UserContext] = None
+        user_context: Optional[UserContext] = None,
+        cancel_event: Optional[threading.Event] = None
     ) -> ModuleContent:
-        """Generate detailed content for a module from its outline."""
+        """Generate detailed content for a module from its outline.
+        
+        Setting ``cancel_event`` stops generation before the next lesson.
+        """
         try:
             self._validate_module(module)
             
             lessons = []
+            validations = []
             for lesson_outline in module.lessons:
-                lesson_content = self._generate_lesson_content(
-                    lesson_outline, course_context, user_context
-                )
+                if cancel_event is not None and cancel_event.is_set():
+                    raise GenerationCancelled(f"Generation of module {module.id} was cancelled")
+                with span("lesson", lesson_id=lesson_outline.id, type=lesson_outline.type) as lesson_span:
+                    body_hash = lesson_body_hash(lesson_outline, course_context, user_context)
+                    lesson_content = self._stored_lesson_content(lesson_outline, body_hash)
+                    lesson_span.set(body="reused" if lesson_content is not None else "generated")
+                    if lesson_content is None:
+                        lesson_content = self._generate_lesson_content(
+                            lesson_outline, course_context, user_context
+                        )
+                        lesson_content.body_hash = body_hash
+                        # Examples run in the sandbox while the next lesson is generated
+                        validations.append([self.sandbox.submit(example) for example in lesson_content.code_examples])
+                    else:
+                        validations.append(None)  # validated before the body was stored
+                    if lesson_outline.type == "assessment":
+                        lesson_content.assessment = self._create_quiz(
+                            lesson_outline.id, lesson_outline.title, lesson_outline.key_concepts, lesson_outline.difficulty
+                        )
                 lessons.append(lesson_content)
             
+            with span("validate_examples", examples=sum(len(futures or ()) for futures in validations)):
+                for lesson_content, futures in zip(lessons, validations):
+                    if futures is not None:
+                        lesson_content.code_examples = [future.result() for future in futures]
+            
+            with span("module_quiz"):
+                module_assessment = self._create_module_quiz(module, lessons)
+            
             return ModuleContent(
                 title=module.title,
                 description=module.description,
                 learning_objectives=module.learning_objectives,
                 estimated_duration=module.estimated_duration,
-                lessons=lessons
+                lessons=lessons,
+                module_assessment=module_assessment
             )
             
+        except (GenerationCancelled, GenerationBudgetExceeded, LLMUnavailableError):
+            raise
         except Exception as e:
             raise ContentGenerationError(f"Failed to generate module content: {str(e)}")
 
+    def _stored_lesson_content(self, lesson_outline, body_hash: str) -> Optional[LessonContent]:
+        """Build the lesson from a stored body with the same hash, or None if it has to be generated."""
+        if self.lesson_bodies is None:
+            return None
+        body = self.lesson_bodies.get_body(body_hash)
+        LESSON_BODY_LOOKUPS.labels("hit" if body is not None else "miss").inc()
+        if body is None:
+            return None
+        return LessonContent(
+            id=lesson_outline.id,
+            title=lesson_outline.title,
+            type=lesson_outline.type,
+            content_markdown=body.content_markdown,
+            key_concepts=lesson_outline.key_concepts,
+            difficulty=lesson_outline.difficulty,
+            code_examples=body.code_examples or [],
+            interactive_elements=[],
+            practice_tasks=[],
+            estimated_duration=self._estimate_duration(body.content_markdown, lesson_outline.type),
+            body_hash=body_hash
+        )
+
+    def _create_quiz(self, quiz_id: str, title: str, concepts, difficulty: str) -> Optional[Assessment]:
+        """Assemble a quiz from the question bank; a failed quiz leaves the content ungraded."""
+        try:
+            assessment = self.quiz_factory.create_quiz(quiz_id, title, concepts, difficulty)
+        except Exception as e:
+            print(f"Quiz generation for {quiz_id} failed: {e}")
+            return None
+        return assessment if assessment.questions else None
+
+    def _create_module_quiz(self, module: Module, lessons) -> Optional[Assessment]:
+        """Quiz every concept of the module at its lesson's difficulty.
+
+        Concepts already quizzed by assessment lessons come straight from the bank.
+        """
+        concepts_by_difficulty = {}
+        for lesson in lessons:
+            concepts_by_difficulty.setdefault(lesson.difficulty, []).extend(lesson.key_concepts)
+        questions = []
+        for difficulty, concepts in concepts_by_difficulty.items():
+            quiz = self._create_quiz(f"{module.id}_assessment", f"{module.title} assessment", concepts, difficulty)
+            if quiz is not None:
+                questions.extend(quiz.questions)
+        if not questions:
+            return None
+        return Assessment(
+            id=f"{module.id}_assessment",
+            title=f"{module.title} assessment",
+            questions=questions,
+            passing_score=self.quiz_factory.passing_score
+        )
+
     def _validate_module(self, module: Module):
         """Validate module structure."""
         if not module.lessons:
@@ -73,21 +192,44 @@ class ContentGenerator:
         prompt = self._build_lesson_prompt(lesson_outline, course_context, user_context)
         
         try:
-            response = self.llm_client.invoke([HumanMessage(content=prompt)])
-            return self._parse_ai_response(response.content, lesson_outline)
+            with track_llm_call("builder", lesson_outline.type, prompt) as call:
+                response = model_for_task(self.llm_client, lesson_outline.type).invoke([HumanMessage(content=prompt)])
+                call.record_response(response)
+            with span("parse", task=lesson_outline.type):
+                return self._parse_ai_response(response.content, lesson_outline)
+        except (GenerationBudgetExceeded, LLMUnavailableError):
+            raise
         except Exception as e:
             raise ContentGenerationError(f"Failed to generate lesson {lesson_outline.id}: {str(e)}")
 
     def _build_lesson_prompt(self, lesson_outline, course_context: CourseContext, user_context: Optional[UserContext]) -> str:
-        """Build comprehensive prompt for AI lesson generation."""
-        
+        """Build comprehensive prompt for AI lesson generation, shortening optional context to its budget."""
+        fields = {
+            "user_instructions": course_context.user_instructions or "None",
+            "prior_knowledge": ", ".join(user_context.prior_knowledge) if user_context else ""
+        }
+        return fit_prompt(
+            lesson_outline.type,
+            lambda f: self._render_lesson_prompt(lesson_outline, course_context, user_context, **f),
+            fields,
+            optional={"prior_knowledge": "None", "user_instructions": "None"}
+        )
+
+    def _render_lesson_prompt(
+        self,
+        lesson_outline,
+        course_context: CourseContext,
+        user_context: Optional[UserContext],
+        user_instructions: str,
+        prior_knowledge: str
+    ) -> str:
         user_info = ""
         if user_context:
             user_info = f"""
 User Context:
 - Skill Level: {user_context.skill_level}
 - Learning Style: {user_context.learning_style}
-- Prior Knowledge: {', '.join(user_context.prior_knowledge)}
+- Prior Knowledge: {prior_knowledge}
 """
 
         lesson_instructions = self._get_lesson_type_instructions(lesson_outline.type)
@@ -98,7 +240,7 @@ Course Context:
 - Course: {course_context.course_title}
 - Domain: {course_context.topic_domain}
 - Difficulty: {course_context.difficulty_level}
-- Special Instructions: {course_context.user_instructions or 'None'}
+- Special Instructions: {user_instructions}
 
 {user_info}
 
@@ -156,7 +298,7 @@ Generate the complete lesson content now."""
             content_markdown=ai_response,
             key_concepts=lesson_outline.key_concepts,
             difficulty=lesson_outline.difficulty,
-            code_examples=[],  # Extracted from content if present
+            code_examples=extract_code_examples(ai_response),  # validated in the sandbox afterwards
             interactive_elements=[],  # Generated separately if needed
             practice_tasks=[],  # Extracted from content if present
             estimated_duration=self._estimate_duration(ai_response, lesson_outline.type)
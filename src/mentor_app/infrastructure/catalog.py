@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""Bulk export and import of course catalogs (courses, modules and lessons)."""
+
+import argparse
+import gzip
+import json
+import sys
+import time
+import zlib
+from datetime import datetime
+from typing import BinaryIO, Iterator, List, Optional
+
+from sqlalchemy import DateTime, select, tuple_
+
+from .database import DatabaseService
+from .models import Course, Lesson, LessonBody, Module
+from .repositories import LessonBodyRepository, upsert
+from .search import LessonSearchIndex
+
+CATALOG_FORMAT = "mentor-catalog"
+CATALOG_VERSION = 2  # 2 added shared lesson bodies
+SUPPORTED_VERSIONS = {1, 2}
+MEDIA_TYPE = "application/x-ndjson+gzip"
+
+# Parents first, so an import can insert records in file order
+TABLES = {"course": Course, "module": Module, "lesson_body": LessonBody, "lesson": Lesson}
+DERIVED_COLUMNS = {"search_vector", "ref_count"}  # rebuilt by the importing database
+
+
+def _columns(model) -> list:
+    return [column for column in model.__table__.columns if column.name not in DERIVED_COLUMNS]
+
+
+def _datetime_columns(model) -> set:
+    return {column.name for column in _columns(model) if isinstance(column.type, DateTime)}
+
+
+class CatalogTransfer:
+    """Streams course catalogs to and from gzip-compressed NDJSON.
+
+    An export is a header line followed by one ``{"type", "row"}`` record
+    per course, module, shared lesson body and lesson, written table by
+    table so parents always precede their children. Both directions walk the
+    data in fixed-size batches (server-side cursors out, multi-row inserts
+    in), so memory stays flat however large the catalog is. An import runs
+    in one transaction that also indexes the imported courses' lessons for
+    search, then recounts lesson body references.
+    """
+
+    def __init__(self, db_service: DatabaseService, search_index: Optional[LessonSearchIndex] = None):
+        self.db_service = db_service
+        self.search_index = search_index or LessonSearchIndex(db_service)
+        self.lesson_bodies = LessonBodyRepository(db_service)
+
+    def export_catalog(self, course_ids: Optional[List[str]] = None, batch_size: int = 1000) -> Iterator[bytes]:
+        """Yield the compressed export of all courses, or only ``course_ids``, in chunks."""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+        buffer = []
+        header = {"type": "header", "format": CATALOG_FORMAT, "version": CATALOG_VERSION,
+                  "exported_at": datetime.utcnow().isoformat()}
+        buffer.append(json.dumps(header))
+        for record in self._iter_records(course_ids, batch_size):
+            buffer.append(json.dumps(record, separators=(",", ":")))
+            if len(buffer) >= batch_size:
+                chunk = compressor.compress(("\n".join(buffer) + "\n").encode())
+                buffer = []
+                if chunk:
+                    yield chunk
+        yield compressor.compress(("\n".join(buffer) + "\n").encode()) + compressor.flush()
+
+    def import_catalog(self, source: BinaryIO, replace: bool = False, batch_size: int = 1000) -> dict:
+        """Load an export from a binary file object; returns the number of records written per type.
+
+        Records whose keys already exist are skipped (and not counted), or
+        overwritten when ``replace`` is set. Raises ValueError for anything
+        but a catalog export.
+        """
+        counts = {name: 0 for name in TABLES}
+        imported_courses, unindexed_courses = set(), set()
+        self.search_index.ensure_schema()
+        with gzip.open(source, "rt", encoding="utf-8") as lines, self.db_service.get_session() as session:
+            self._check_header(next(lines, ""))
+
+            def write(record_type: str, rows: List[dict]):
+                if replace:
+                    # Overwritten lessons, and lessons whose shared body is overwritten, leave the index first
+                    courses = self._affected_courses(session, record_type, rows) - unindexed_courses
+                    for course_id in courses:
+                        self.search_index.unindex_course(session, course_id)
+                    unindexed_courses.update(courses)
+                written = self._write_batch(session, record_type, rows, replace)
+                counts[record_type] += len(written)
+                if record_type == "lesson":
+                    imported_courses.update(course_id for _, _, course_id in written)
+
+            batch, batch_type = [], None
+            for line in lines:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                record_type = record.get("type")
+                if record_type not in TABLES or not isinstance(record.get("row"), dict):
+                    raise ValueError(f"Invalid catalog record of type {record_type!r}")
+                if batch and (record_type != batch_type or len(batch) >= batch_size):
+                    write(batch_type, batch)
+                    batch = []
+                batch_type = record_type
+                batch.append(record["row"])
+            if batch:
+                write(batch_type, batch)
+            self.search_index.index_courses(session, imported_courses | unindexed_courses, refresh=replace)
+            session.commit()
+
+        if counts["lesson"] or counts["lesson_body"]:
+            self.lesson_bodies.recount()
+        return counts
+
+    def _iter_records(self, course_ids: Optional[List[str]], batch_size: int) -> Iterator[dict]:
+        with self.db_service.get_session() as session:
+            for record_type, model in TABLES.items():
+                columns = _columns(model)
+                datetimes = _datetime_columns(model)
+                query = select(*columns).order_by(*model.__table__.primary_key.columns)
+                if course_ids is not None:
+                    query = query.where(self._course_filter(model, course_ids))
+                rows = session.execute(query.execution_options(stream_results=True, yield_per=batch_size))
+                for row in rows:
+                    yield {"type": record_type, "row": {
+                        column.name: value.isoformat() if column.name in datetimes and value else value
+                        for column, value in zip(columns, row)
+                    }}
+
+    @staticmethod
+    def _course_filter(model, course_ids: List[str]):
+        if model is Course:
+            return Course.id.in_(course_ids)
+        if model is LessonBody:
+            # Bodies shared with other courses are exported with each course using them
+            return LessonBody.hash.in_(select(Lesson.body_hash).where(Lesson.course_id.in_(course_ids)))
+        return model.__table__.c.course_id.in_(course_ids)
+
+    @staticmethod
+    def _affected_courses(session, record_type: str, rows: List[dict]) -> set:
+        """Courses with stored lessons that writing ``rows`` would change."""
+        if record_type == "lesson":
+            keys = [(row.get("id"), row.get("module_id"), row.get("course_id")) for row in rows]
+            criteria = tuple_(Lesson.id, Lesson.module_id, Lesson.course_id).in_(keys)
+        elif record_type == "lesson_body":
+            criteria = Lesson.body_hash.in_([row.get("hash") for row in rows])
+        else:
+            return set()
+        return set(session.execute(select(Lesson.course_id).where(criteria).distinct()).scalars())
+
+    def _write_batch(self, session, record_type: str, rows: List[dict], replace: bool) -> List[tuple]:
+        """Write a batch of rows; returns the primary keys of those inserted or overwritten."""
+        model = TABLES[record_type]
+        datetimes = _datetime_columns(model)
+        for row in rows:
+            for name in datetimes & row.keys():
+                if row[name]:
+                    row[name] = datetime.fromisoformat(row[name])
+        keys = [column.name for column in model.__table__.primary_key.columns]
+        updates = [column.name for column in _columns(model) if column.name not in keys] if replace else []
+        return upsert(session, model, rows, index_elements=keys, update_columns=updates, returning=True)
+
+    @staticmethod
+    def _check_header(line: str):
+        try:
+            header = json.loads(line)
+        except json.JSONDecodeError:
+            header = None
+        if not isinstance(header, dict) or header.get("format") != CATALOG_FORMAT:
+            raise ValueError("Not a course catalog export")
+        if header.get("version") not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported catalog version: {header.get('version')}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Export or import a course catalog."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="write the catalog to a .ndjson.gz file ('-' for stdout)")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--course", action="append", dest="course_ids", help="only export this course (repeatable)")
+    import_parser = commands.add_parser("import", help="load a .ndjson.gz export ('-' for stdin)")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--replace", action="store_true", help="overwrite courses, modules and lessons that already exist")
+    args = parser.parse_args(argv)
+
+    transfer = CatalogTransfer(DatabaseService())
+    start = time.perf_counter()
+    if args.command == "export":
+        target = sys.stdout.buffer if args.path == "-" else open(args.path, "wb")
+        with target:
+            size = 0
+            for chunk in transfer.export_catalog(args.course_ids):
+                target.write(chunk)
+                size += len(chunk)
+        print(f"Exported {size / 1e6:.1f} MB in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    else:
+        source = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+        with source:
+            counts = transfer.import_catalog(source, replace=args.replace)
+        print(
+            f"Imported {counts['course']} courses, {counts['module']} modules, {counts['lesson']} lessons "
+            f"and {counts['lesson_body']} lesson bodies "
+            f"in {time.perf_counter() - start:.1f}s",
+            file=sys.stderr
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    sys.exit(main())
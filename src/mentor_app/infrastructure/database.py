@@ -4,6 +4,7 @@ import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from .models import Base
+from .metrics import instrument_engine
 
 
 class DatabaseService:
@@ -13,12 +14,17 @@ class DatabaseService:
             f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
         )
         self.engine = create_engine(self.database_url)
+        instrument_engine(self.engine)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
 
     def get_session(self):
         """Get database session."""
         return self.SessionLocal()
     
+    def create_tables(self):
+        """Create all database tables (local/test databases; production uses migrations)."""
+        Base.metadata.create_all(bind=self.engine)
+    
     def drop_tables(self):
         """Drop all database tables."""
         Base.metadata.drop_all(bind=self.engine)
@@ -0,0 +1,176 @@
+"""Buffered, bulk-flushing writer for append-only progress events."""
+
+import threading
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from .repositories import ProgressRepository
+
+# Marking theory as read (or a lesson as completed) is idempotent, so repeats inside one buffer window
+# (double clicks, client retries) collapse into a single event.
+IDEMPOTENT_EVENT_TYPES = {"theory_read", "lesson_completed"}
+
+# Errors an event will hit on every retry (e.g. it references a course that was deleted), as opposed
+# to the database being down
+PERMANENT_ERRORS = (IntegrityError, DataError)
+
+
+class EventBufferFull(Exception):
+    """The database is not keeping up and the event buffer is at its limit."""
+
+
+class ProgressEventWriter:
+    """Collects progress events in memory and writes them with one INSERT per batch.
+
+    A batch is flushed by a background thread when ``max_batch`` events are
+    buffered or every ``flush_interval`` seconds, whichever comes first, so
+    callers never wait on the database. When it falls behind (or is down) and
+    ``max_pending`` events are buffered, new events are refused with
+    EventBufferFull instead of growing memory, until the backlog is written.
+
+    When a batch fails its events are retried one by one, so a single event
+    that can never be written is dropped instead of holding back the rest.
+    """
+
+    def __init__(
+        self,
+        progress_repo: ProgressRepository,
+        max_batch: int = 1000,
+        flush_interval: float = 0.5,
+        max_pending: int = 100_000,
+        after_insert: Optional[Callable] = None
+    ):
+        self.progress_repo = progress_repo
+        self.after_insert = after_insert  # called as after_insert(session, batch) in the insert transaction
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._buffer = []
+        self._seen = set()  # keys of idempotent events buffered or being written
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    def record(
+        self,
+        user_id: str,
+        course_id: str,
+        module_id: str,
+        lesson_id: str,
+        event_type: str,
+        score: Optional[int] = None,
+        payload: Optional[dict] = None
+    ) -> datetime:
+        """Buffer one event and return its timestamp; raises EventBufferFull when the buffer is at its limit."""
+        created_at = datetime.utcnow()
+        event = {
+            "user_id": user_id,
+            "course_id": course_id,
+            "module_id": module_id,
+            "lesson_id": lesson_id,
+            "event_type": event_type,
+            "score": score,
+            "payload": payload,
+            "created_at": created_at
+        }
+        with self._lock:
+            if event_type in IDEMPOTENT_EVENT_TYPES:
+                key = (user_id, course_id, lesson_id, event_type)
+                if key in self._seen:
+                    return created_at
+            if len(self._buffer) >= self.max_pending:
+                raise EventBufferFull(f"{len(self._buffer)} progress events are waiting to be written")
+            if event_type in IDEMPOTENT_EVENT_TYPES:
+                self._seen.add(key)
+            self._buffer.append(event)
+            pending = len(self._buffer)
+
+        self._ensure_flusher()
+        if pending >= self.max_batch:
+            self._wakeup.set()
+        return created_at
+
+    def flush(self) -> int:
+        """Write all buffered events in batches of ``max_batch``; returns events written."""
+        with self._flush_lock:
+            with self._lock:
+                events, self._buffer = self._buffer, []
+
+            written = done = 0
+            try:
+                for start in range(0, len(events), self.max_batch):
+                    batch = events[start:start + self.max_batch]
+                    try:
+                        written += self.progress_repo.append_events(batch, self.after_insert)
+                    except Exception:
+                        # Find the bad event(s); anything but a permanent error stops the flush
+                        for event in batch:
+                            try:
+                                written += self.progress_repo.append_events([event], self.after_insert)
+                            except PERMANENT_ERRORS as e:
+                                print(f"Failed to write progress event, dropping it: {event}: {e}")
+                            done += 1
+                            self._forget([event])
+                        continue
+                    done += len(batch)
+                    self._forget(batch)
+            except Exception:
+                # Put unwritten events back in front so ordering is preserved; their keys stay
+                # in _seen, so a client retry still collapses into them
+                with self._lock:
+                    self._buffer = events[done:] + self._buffer
+                raise
+            return written
+
+    def discard_course(self, course_id: str) -> int:
+        """Drop buffered events of a deleted course so they do not recreate its progress; returns events dropped."""
+        with self._lock:
+            dropped = [event for event in self._buffer if event["course_id"] == course_id]
+            if not dropped:
+                return 0
+            self._buffer = [event for event in self._buffer if event["course_id"] != course_id]
+        self._forget(dropped)
+        return len(dropped)
+
+    def pending(self) -> int:
+        """Number of events buffered but not yet written."""
+        with self._lock:
+            return len(self._buffer)
+
+    def close(self):
+        """Stop the background flusher and write everything still buffered."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+    def _forget(self, events):
+        """Let idempotent events that have left the buffer be recorded again."""
+        with self._lock:
+            for event in events:
+                if event["event_type"] in IDEMPOTENT_EVENT_TYPES:
+                    self._seen.discard(
+                        (event["user_id"], event["course_id"], event["lesson_id"], event["event_type"])
+                    )
+
+    def _ensure_flusher(self):
+        if self._flusher is None:
+            with self._lock:
+                if self._flusher is None and not self._stop.is_set():
+                    self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+                    self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Progress event flush failed: {e}")
@@ -1,20 +1,307 @@
-"""LLM client wrapper for OpenAI/Claude/Gemini."""
+"""LLM client wrapper for OpenAI/Claude/Gemini with failover between providers."""
 
-import openai
+import json
 import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.messages import HumanMessage
+
+from .metrics import LLM_PROVIDER_CALLS, LLM_PROVIDER_CIRCUIT_OPEN
+from .tracing import span
+
+
+class LLMUnavailableError(Exception):
+    """Every configured provider failed or is cooling down."""
+
+
+class CircuitBreaker:
+    """Stops calls to a provider after repeated failures, then probes it again.
+
+    ``failure_threshold`` consecutive failures (errors, or calls slower than
+    ``slow_call_seconds``) open the circuit for ``reset_after`` seconds; a
+    rate-limit response opens it at once, for the provider's Retry-After
+    when given. Once the wait is over a single trial call is let through:
+    success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 30.0, slow_call_seconds: Optional[float] = None):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.slow_call_seconds = slow_call_seconds
+        self.failures = 0
+        self.open_until = 0.0
+        self._trial_in_flight = False
+        self._trial_thread: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.open_until > 0
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now; claims the trial slot when half-open."""
+        with self._lock:
+            if not self.is_open:
+                return True
+            if time.monotonic() < self.open_until or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            self._trial_thread = threading.get_ident()
+            return True
+
+    def record_success(self, seconds: float) -> bool:
+        """Record a completed call; returns False if it was slow enough to count as a failure."""
+        if self.slow_call_seconds is not None and seconds > self.slow_call_seconds:
+            self.record_failure()
+            return False
+        with self._lock:
+            self.failures = 0
+            self.open_until = 0.0
+            self._trial_in_flight = False
+        return True
+
+    def record_failure(self, cooldown: Optional[float] = None):
+        """Record a failed call; ``cooldown`` opens the circuit immediately for that long."""
+        with self._lock:
+            self.failures += 1
+            if cooldown is not None or self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.open_until = time.monotonic() + (cooldown if cooldown is not None else self.reset_after)
+            self._trial_in_flight = False
+
+    def abandon(self):
+        """Give up the trial slot this thread claimed if its call ended without a verdict (e.g. it was interrupted)."""
+        with self._lock:
+            if self._trial_in_flight and self._trial_thread == threading.get_ident():
+                self._trial_in_flight = False
+
+
+class LLMProvider:
+    """One LLM backend: builds chat models for it and tracks its health.
+
+    ``factory(model, temperature, max_tokens)`` returns an object with a
+    LangChain-style ``invoke(messages)``. Models requested by name are
+    translated through ``models``; names the provider does not recognise
+    (by ``model_prefixes``) fall back to ``default_model``, so a request for
+    an OpenAI model can still be served by another vendor.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable,
+        default_model: str,
+        model_prefixes: Tuple[str, ...] = (),
+        models: Optional[Dict[str, str]] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.name = name
+        self.factory = factory
+        self.default_model = default_model
+        self.model_prefixes = model_prefixes
+        self.models = models or {}
+        self.breaker = breaker or CircuitBreaker()
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def resolve_model(self, model: Optional[str]) -> str:
+        if model in self.models:
+            return self.models[model]
+        if model and model.startswith(self.model_prefixes):
+            return model
+        return self.default_model
+
+    def invoke(self, messages: List, model: Optional[str] = None, temperature: float = 0.7, max_tokens: Optional[int] = None):
+        key = (self.resolve_model(model), temperature, max_tokens)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self.factory(*key)
+            client = self._clients[key]
+        return client.invoke(messages)
+
+
+def _status(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return status if isinstance(status, int) else None
+
+
+def _is_provider_failure(error: Exception) -> bool:
+    """Whether ``error`` says the provider is unhealthy (server error, timeout, lost connection, rate limit).
+
+    Anything else, such as a rejected request or a bug in our own code,
+    would fail the same way on every provider and is not the provider's fault.
+    """
+    status = _status(error)
+    if status is not None and (status >= 500 or status == 429):
+        return True
+    name = type(error).__name__
+    return (
+        isinstance(error, (TimeoutError, ConnectionError))
+        or any(marker in name for marker in ("Timeout", "Connection", "RateLimit", "ResourceExhausted", "DeadlineExceeded"))
+    )
+
+
+def _rate_limit_cooldown(error: Exception, default: float) -> Optional[float]:
+    """Seconds to back off if ``error`` is a rate-limit response (its Retry-After, else ``default``), otherwise None."""
+    if _status(error) != 429 and "RateLimit" not in type(error).__name__ and "ResourceExhausted" not in type(error).__name__:
+        return None
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return default
+
 
 class LLMClient:
-    def __init__(self):
-        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
-    def generate_response(self, prompt: str, model: str = "gpt-4") -> str:
+    """Sends chat requests to the first healthy provider, failing over in order.
+
+    A provider that fails with a server error, timeout, lost connection or
+    rate limit is recorded on its circuit breaker and the same request goes
+    to the next one, so an outage or rate-limit window on one vendor costs a
+    single failed call per request until its circuit opens, after which it
+    is skipped without waiting. Other errors (e.g. a rejected request) are
+    raised as they are, without failing over or counting against the provider.
+    """
+
+    def __init__(self, providers: Optional[List[LLMProvider]] = None):
+        self.providers = providers if providers is not None else providers_from_env()
+        if not self.providers:
+            raise ValueError("No LLM providers configured")
+
+    def invoke(self, messages: List, model: Optional[str] = None, temperature: float = 0.7, max_tokens: Optional[int] = None):
+        """Return the first provider's response, as a LangChain AIMessage."""
+        last_error = None
+        for provider in self.providers:
+            if not provider.breaker.allow():
+                LLM_PROVIDER_CALLS.labels(provider.name, "skipped").inc()
+                continue
+            start = time.perf_counter()
+            try:
+                # Failed attempts stay visible in the trace as error spans before the one that answered
+                with span("llm_provider", provider=provider.name, model=provider.resolve_model(model)) as attempt:
+                    response = provider.invoke(messages, model, temperature, max_tokens)
+            except Exception as e:
+                if not _is_provider_failure(e):
+                    raise
+                cooldown = _rate_limit_cooldown(e, provider.breaker.reset_after)
+                provider.breaker.record_failure(cooldown)
+                LLM_PROVIDER_CALLS.labels(provider.name, "rate_limited" if cooldown is not None else "error").inc()
+                last_error = e
+            else:
+                healthy = provider.breaker.record_success(time.perf_counter() - start)
+                LLM_PROVIDER_CALLS.labels(provider.name, "success" if healthy else "slow").inc()
+                if not healthy:
+                    attempt.outcome = "slow"
+                return response
+            finally:
+                provider.breaker.abandon()
+                LLM_PROVIDER_CIRCUIT_OPEN.labels(provider.name).set(int(provider.breaker.is_open))
+        if last_error is None:
+            raise LLMUnavailableError("All LLM providers are cooling down after failures")
+        raise LLMUnavailableError(f"All LLM providers failed, last error: {last_error}") from last_error
+
+    def bind(self, model: Optional[str] = None, temperature: float = 0.7, max_tokens: Optional[int] = None) -> "BoundLLM":
+        """A chat-model-like view of this client with fixed model and parameters."""
+        return BoundLLM(self, model, temperature, max_tokens)
+
+    def generate_response(self, prompt: str, model: Optional[str] = None) -> str:
         """Generate response from LLM."""
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.choices[0].message.content
-    
-    def generate_json_response(self, prompt: str, model: str = "gpt-4") -> dict:
+        return self.invoke([HumanMessage(content=prompt)], model).content
+
+    def generate_json_response(self, prompt: str, model: Optional[str] = None) -> dict:
         """Generate structured JSON response."""
-        pass
+        from .routing import strip_code_fence
+
+        return json.loads(strip_code_fence(self.generate_response(prompt, model)))
+
+
+class BoundLLM:
+    """``LLMClient`` with fixed model parameters, invoked like a LangChain chat model."""
+
+    def __init__(self, client: LLMClient, model: Optional[str], temperature: float, max_tokens: Optional[int]):
+        self.client = client
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+    def invoke(self, messages: List, **kwargs):
+        return self.client.invoke(messages, self.model, self.temperature, self.max_tokens)
+
+
+def _breaker() -> CircuitBreaker:
+    slow = os.getenv("LLM_SLOW_CALL_SECONDS")
+    return CircuitBreaker(
+        failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+        reset_after=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30")),
+        slow_call_seconds=float(slow) if slow else None
+    )
+
+
+def openai_provider() -> LLMProvider:
+    def factory(model, temperature, max_tokens):
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(
+            model=model, api_key=os.getenv("OPENAI_API_KEY"), temperature=temperature, max_tokens=max_tokens,
+            timeout=float(os.getenv("LLM_REQUEST_TIMEOUT", "120")), max_retries=1  # fail over instead of retrying
+        )
+
+    return LLMProvider("openai", factory, os.getenv("OPENAI_MODEL", "gpt-4o"), ("gpt-", "o1", "o3", "o4"), breaker=_breaker())
+
+
+def anthropic_provider() -> LLMProvider:
+    def factory(model, temperature, max_tokens):
+        try:
+            from langchain_anthropic import ChatAnthropic
+        except ImportError as e:
+            raise ImportError("The anthropic provider needs langchain-anthropic: pip install -e .[anthropic]") from e
+
+        return ChatAnthropic(
+            model=model, api_key=os.getenv("ANTHROPIC_API_KEY"), temperature=temperature, max_tokens=max_tokens or 4096,
+            timeout=float(os.getenv("LLM_REQUEST_TIMEOUT", "120")), max_retries=1
+        )
+
+    return LLMProvider("anthropic", factory, os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-5"), ("claude-",), breaker=_breaker())
+
+
+def gemini_provider() -> LLMProvider:
+    def factory(model, temperature, max_tokens):
+        try:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+        except ImportError as e:
+            raise ImportError("The gemini provider needs langchain-google-genai: pip install -e .[gemini]") from e
+
+        return ChatGoogleGenerativeAI(
+            model=model, google_api_key=os.getenv("GOOGLE_API_KEY"), temperature=temperature,
+            max_output_tokens=max_tokens, timeout=float(os.getenv("LLM_REQUEST_TIMEOUT", "120")), max_retries=1
+        )
+
+    return LLMProvider("gemini", factory, os.getenv("GEMINI_MODEL", "gemini-2.5-flash"), ("gemini-",), breaker=_breaker())
+
+
+PROVIDERS = {"openai": openai_provider, "anthropic": anthropic_provider, "gemini": gemini_provider}
+
+
+def providers_from_env() -> List[LLMProvider]:
+    """Providers named in LLM_PROVIDERS (comma-separated, in failover order; default "openai")."""
+    names = [name.strip() for name in os.getenv("LLM_PROVIDERS", "openai").split(",") if name.strip()]
+    unknown = [name for name in names if name not in PROVIDERS]
+    if unknown:
+        raise ValueError(f"Unknown LLM providers: {', '.join(unknown)}")
+    return [PROVIDERS[name]() for name in names]
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """Return the process-wide client, so provider health is shared by every service."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = LLMClient()
+    return _client
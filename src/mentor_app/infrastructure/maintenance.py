@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Periodic storage maintenance, meant to be run from cron or a job scheduler."""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from .database import DatabaseService
+from .repositories import LessonBodyRepository, TraceRepository
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Collect unreferenced lesson bodies, repair their reference counts or prune old generation traces."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("collect-bodies", help="delete lesson bodies no lesson references any more")
+    commands.add_parser("recount-bodies", help="recompute lesson body reference counts from the lessons table")
+    prune_parser = commands.add_parser("prune-traces", help="delete generation traces older than the retention period")
+    prune_parser.add_argument(
+        "--days", type=float, default=float(os.getenv("TRACE_RETENTION_DAYS", "30")),
+        help="keep traces from this many days (default: TRACE_RETENTION_DAYS or 30)"
+    )
+    args = parser.parse_args(argv)
+
+    db_service = DatabaseService()
+    if args.command == "prune-traces":
+        deleted = TraceRepository(db_service).prune(datetime.utcnow() - timedelta(days=args.days))
+        print(f"Deleted {deleted} generation traces older than {args.days:g} days", file=sys.stderr)
+        return 0
+    lesson_bodies = LessonBodyRepository(db_service)
+    if args.command == "collect-bodies":
+        print(f"Deleted {lesson_bodies.collect_garbage()} unreferenced lesson bodies", file=sys.stderr)
+    else:
+        print(f"Recounted references on {lesson_bodies.recount()} lesson bodies", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    sys.exit(main())
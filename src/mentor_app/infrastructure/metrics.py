@@ -0,0 +1,252 @@
+"""Prometheus metrics for HTTP requests, LLM calls and database queries."""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from sqlalchemy import event
+
+from .tokens import current_usage, get_budget, get_token_counter
+from .tracing import span
+
+# LLM generations take seconds to minutes, HTTP and DB calls take milliseconds,
+# so each family gets buckets that resolve its own range.
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+LLM_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120, 180, 300)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=HTTP_BUCKETS,
+)
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds",
+    "LLM call latency by calling service and task (syllabus, module_structure or lesson type)",
+    ["service", "task"],
+    buckets=LLM_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "LLM tokens consumed by calling service, task, token kind and source (reported by the provider or estimated)",
+    ["service", "task", "kind", "source"],
+)
+LLM_ERRORS = Counter(
+    "llm_errors_total",
+    "Failed LLM calls, including responses that could not be parsed",
+    ["service", "task"],
+)
+LLM_HEDGES = Counter(
+    "llm_hedged_requests_total",
+    "Hedged LLM calls by task and outcome (sent, primary_won, hedge_won)",
+    ["task", "outcome"],
+)
+LLM_PROVIDER_CALLS = Counter(
+    "llm_provider_requests_total",
+    "LLM requests per provider by outcome (success, slow, error, rate_limited, skipped)",
+    ["provider", "outcome"],
+)
+LLM_PROVIDER_CIRCUIT_OPEN = Gauge(
+    "llm_provider_circuit_open",
+    "1 while a provider's circuit breaker is open and calls fail over to the next provider",
+    ["provider"],
+    multiprocess_mode="max",
+)
+LLM_SCHEDULER_QUEUE_DEPTH = Gauge(
+    "llm_scheduler_queue_depth",
+    "LLM calls waiting for a generation slot by priority (interactive, bulk, prefetch)",
+    ["priority"],
+    multiprocess_mode="livesum",
+)
+LLM_SCHEDULER_RUNNING = Gauge(
+    "llm_scheduler_running",
+    "LLM calls holding a generation slot by priority",
+    ["priority"],
+    multiprocess_mode="livesum",
+)
+LLM_SCHEDULER_WAIT = Histogram(
+    "llm_scheduler_wait_seconds",
+    "Time LLM calls spend queued for a generation slot by priority",
+    ["priority"],
+    buckets=HTTP_BUCKETS,
+)
+LESSON_BODY_LOOKUPS = Counter(
+    "lesson_body_lookups_total",
+    "Lesson body store lookups before generation (hit: stored body reused, miss: lesson generated)",
+    ["outcome"],
+)
+MODULE_PREFETCH = Counter(
+    "module_prefetch_total",
+    "Speculative module generations by outcome (started, completed, joined: a learner waited on it, cancelled, failed, over_budget)",
+    ["outcome"],
+)
+CODE_EXAMPLE_VALIDATION = Counter(
+    "code_example_validation_total",
+    "Sandboxed runs of generated code examples by outcome (passed, failed, timeout)",
+    ["outcome"],
+)
+PRACTICE_GRADING_DURATION = Histogram(
+    "practice_grading_duration_seconds",
+    "Time from queueing a practice submission to its graded result",
+    buckets=HTTP_BUCKETS,
+)
+PRACTICE_GRADING = Counter(
+    "practice_grading_total",
+    "Practice submissions by outcome (passed, failed, rejected)",
+    ["outcome"],
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time by statement type",
+    ["operation"],
+    buckets=DB_BUCKETS,
+)
+
+_DB_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+class LLMCallTimer:
+    """Collects latency and token usage for one LLM call."""
+
+    def __init__(self, service: str, task: str, prompt_tokens: int = 0):
+        self.service = service
+        self.task = task
+        self.prompt_tokens = prompt_tokens  # estimated until the response reports usage
+        self.completion_tokens = 0
+
+    def record_response(self, response) -> None:
+        """Record token usage reported on a LangChain AIMessage, estimating it if absent."""
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            self.prompt_tokens = usage.get("input_tokens", 0)
+            self.completion_tokens = usage.get("output_tokens", 0)
+            source = "reported"
+        else:
+            self.completion_tokens = get_token_counter().count(getattr(response, "content", None))
+            source = "estimated"
+        LLM_TOKENS.labels(self.service, self.task, "prompt", source).inc(self.prompt_tokens)
+        LLM_TOKENS.labels(self.service, self.task, "completion", source).inc(self.completion_tokens)
+
+    def record_error(self) -> None:
+        """Count a failure that happened after the call returned (e.g. parsing)."""
+        LLM_ERRORS.labels(self.service, self.task).inc()
+
+
+@contextmanager
+def track_llm_call(service: str, task: str, prompt: Optional[str] = None):
+    """Time an LLM call and count it as an error if it raises.
+
+    Passing the ``prompt`` checks the call against the ceilings of the
+    current usage scope before it is made (raising GenerationBudgetExceeded)
+    and accounts its tokens to that scope afterwards. The call then waits for
+    a slot from the generation scheduler under the current request class;
+    queueing is not counted as call latency. Inside a generation trace the
+    call is recorded as an ``llm_call`` span with its token counts.
+    """
+    from .scheduler import current_request_class, get_generation_scheduler
+
+    with span("llm_call", service=service, task=task) as call_span:
+        usage = current_usage()
+        prompt_tokens = get_token_counter().count(prompt) if prompt is not None else 0
+        if usage is not None and prompt is not None:
+            usage.reserve(task, prompt_tokens)
+        request_class = current_request_class()
+        # Calls are weighted by their expected size, so fair shares are shares of tokens
+        cost = prompt_tokens + get_budget(task).max_response_tokens
+        with get_generation_scheduler().slot(request_class.priority, request_class.tenant, cost) as queued:
+            call_span.set(priority=request_class.priority, queued_seconds=round(queued, 3))
+            timer = LLMCallTimer(service, task, prompt_tokens)
+            start = time.perf_counter()
+            try:
+                yield timer
+            except Exception:
+                timer.record_error()
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                LLM_REQUEST_DURATION.labels(service, task).observe(elapsed)
+                if usage is not None:
+                    usage.record(task, timer.prompt_tokens, timer.completion_tokens, elapsed)
+                call_span.set(prompt_tokens=timer.prompt_tokens, completion_tokens=timer.completion_tokens)
+
+
+def instrument_engine(engine) -> None:
+    """Attach query timing listeners to a SQLAlchemy engine."""
+    if getattr(engine, "_metrics_instrumented", False):
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        DB_QUERY_DURATION.labels(_statement_operation(statement)).observe(time.perf_counter() - start)
+
+    engine._metrics_instrumented = True
+
+
+def _statement_operation(statement: str) -> str:
+    """Return the leading SQL keyword, bucketing anything unusual as OTHER."""
+    keyword = statement.lstrip()[:6].upper()
+    return keyword if keyword in _DB_OPERATIONS else "OTHER"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template.
+
+    Uses the matched route path (e.g. ``/api/v1/courses/{course_id}``) as the
+    label so that ids never explode metric cardinality.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status["code"]),
+            ).observe(time.perf_counter() - start)
+
+
+def render_metrics(registry: Optional[CollectorRegistry] = None) -> tuple[bytes, str]:
+    """Render metrics in the Prometheus text format.
+
+    When ``PROMETHEUS_MULTIPROC_DIR`` is set (multi-worker deployments), the
+    values written by every worker process are aggregated.
+    """
+    if registry is None and os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry or REGISTRY), CONTENT_TYPE_LATEST
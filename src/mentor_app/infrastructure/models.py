@@ -1,8 +1,9 @@
 """Database models for PostgreSQL persistence."""
 
-from sqlalchemy import Column, String, Integer, Text, JSON, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, String, Integer, BigInteger, Text, JSON, DateTime, ForeignKey, ForeignKeyConstraint, Boolean, Index, Float
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 
 Base = declarative_base()
@@ -16,6 +17,7 @@ class Course(Base):
     estimated_duration = Column(Integer, nullable=False)
     difficulty_level = Column(String, nullable=False)
     prerequisites = Column(JSON, nullable=False)
+    learning_path = Column(JSON)  # LearningPath.to_dict(), rebuilt whenever modules or lessons are saved
     created_at = Column(DateTime, default=datetime.utcnow)
     
     modules = relationship("Module", back_populates="course", cascade="all, delete-orphan")
@@ -24,13 +26,17 @@ class Course(Base):
 class Module(Base):
     __tablename__ = "modules"
     
+    # Module ids come from the LLM ("module_1", ...) and are only unique per course
     id = Column(String, primary_key=True)
-    course_id = Column(String, ForeignKey("courses.id"), nullable=False)
+    course_id = Column(String, ForeignKey("courses.id"), primary_key=True)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=False)
     learning_objectives = Column(JSON, nullable=False)
     estimated_duration = Column(Integer, nullable=False)
     dependencies = Column(JSON, nullable=False)
+    is_skipped = Column(Boolean, nullable=False, default=False)
+    is_remediation = Column(Boolean, nullable=False, default=False)
+    assessment = Column(JSON)  # Assessment assembled from the question bank
     created_at = Column(DateTime, default=datetime.utcnow)
     
     course = relationship("Course", back_populates="modules")
@@ -39,19 +45,199 @@ class Module(Base):
 
 class Lesson(Base):
     __tablename__ = "lessons"
+    __table_args__ = (
+        ForeignKeyConstraint(["module_id", "course_id"], ["modules.id", "modules.course_id"]),
+        Index("idx_lessons_search_vector", "search_vector", postgresql_using="gin").ddl_if(dialect="postgresql"),
+        Index("idx_lessons_body_hash", "body_hash"),
+    )
     
     id = Column(String, primary_key=True)
-    module_id = Column(String, ForeignKey("modules.id"), nullable=False)
-    course_id = Column(String, ForeignKey("courses.id"), nullable=False)
+    module_id = Column(String, primary_key=True)
+    course_id = Column(String, ForeignKey("courses.id"), primary_key=True)
     title = Column(String, nullable=False)
     type = Column(String, nullable=False)
     key_concepts = Column(JSON, nullable=False)
     difficulty = Column(String, nullable=False)
+    # Shared body; the inline content columns below are only set on lessons stored without one
+    body_hash = Column(String, ForeignKey("lesson_bodies.hash"))
     content_markdown = Column(Text)
+    content_html = Column(Text)  # rendered once at save time from content_markdown
+    toc = Column(JSON)
     estimated_duration = Column(Integer)
     code_examples = Column(JSON)
     interactive_elements = Column(JSON)
     practice_tasks = Column(JSON)
+    assessment = Column(JSON)  # Assessment with answer keys, graded locally on submit
+    # Maintained by LessonSearchIndex; SQLite indexes lessons in an FTS5 table instead
+    search_vector = deferred(Column(TSVECTOR().with_variant(Text, "sqlite")))
     created_at = Column(DateTime, default=datetime.utcnow)
     
     module = relationship("Module", back_populates="lessons")
+    body = relationship("LessonBody", lazy="joined")
+
+
+class LessonBody(Base):
+    """Generated lesson content, stored once per normalized outline and generation context."""
+    __tablename__ = "lesson_bodies"
+    
+    hash = Column(String, primary_key=True)  # sha256 of the normalized outline and context
+    content_markdown = Column(Text, nullable=False)
+    content_html = Column(Text)
+    toc = Column(JSON)
+    code_examples = Column(JSON)  # validated in the sandbox before the body is stored
+    ref_count = Column(Integer, nullable=False, default=0)  # lessons referencing the body
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class QuestionBankItem(Base):
+    """Generated quiz question, reused by every quiz on the same concept and difficulty."""
+    __tablename__ = "question_bank"
+    __table_args__ = (
+        Index("idx_question_bank_concept_difficulty", "concept", "difficulty"),
+    )
+    
+    id = Column(String, primary_key=True)  # content hash, so regenerated duplicates collapse
+    concept = Column(String, nullable=False)  # normalized lesson key concept
+    difficulty = Column(String, nullable=False)
+    type = Column(String, nullable=False)
+    question_text = Column(Text, nullable=False)
+    options = Column(JSON)
+    correct_answer = Column(Text, nullable=False)
+    explanation = Column(Text, nullable=False)
+    points = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class LLMUsage(Base):
+    """LLM calls and tokens spent generating a course (module_id "") or one of its modules, per task."""
+    __tablename__ = "llm_usage"
+    
+    course_id = Column(String, primary_key=True)
+    module_id = Column(String, primary_key=True)
+    task = Column(String, primary_key=True)  # track_llm_call task, e.g. "syllabus" or "theory"
+    calls = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(BigInteger, nullable=False, default=0)
+    completion_tokens = Column(BigInteger, nullable=False, default=0)
+    llm_seconds = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class GenerationTrace(Base):
+    """One recorded generation run (e.g. create_module) with its totals and optional CPU profile."""
+    __tablename__ = "generation_traces"
+    __table_args__ = (
+        Index("idx_generation_traces_course_started", "course_id", "started_at"),
+        Index("idx_generation_traces_started", "started_at"),
+    )
+    
+    id = Column(String, primary_key=True)
+    operation = Column(String, nullable=False)
+    course_id = Column(String)
+    module_id = Column(String)
+    outcome = Column(String, nullable=False)  # ok or error
+    error = Column(Text)
+    started_at = Column(DateTime, nullable=False)
+    duration_seconds = Column(Float, nullable=False)
+    llm_calls = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(BigInteger, nullable=False, default=0)
+    completion_tokens = Column(BigInteger, nullable=False, default=0)
+    attributes = Column(JSON)
+    profile = deferred(Column(Text))  # pstats report, for sampled runs only
+    
+    spans = relationship("GenerationSpan", order_by="GenerationSpan.span_id")
+
+
+class GenerationSpan(Base):
+    """One stage of a traced run; ``parent_id`` is None for stages directly under the run."""
+    __tablename__ = "generation_spans"
+    
+    trace_id = Column(String, ForeignKey("generation_traces.id", ondelete="CASCADE"), primary_key=True)
+    span_id = Column(Integer, primary_key=True)
+    parent_id = Column(Integer)
+    name = Column(String, nullable=False)  # e.g. llm_call, parse, lesson, persist
+    start_offset_seconds = Column(Float, nullable=False)
+    duration_seconds = Column(Float, nullable=False)
+    outcome = Column(String, nullable=False)
+    error = Column(Text)
+    attributes = Column(JSON)
+
+
+class LessonProgress(Base):
+    __tablename__ = "lesson_progress"
+    
+    user_id = Column(String, primary_key=True)
+    course_id = Column(String, primary_key=True)
+    lesson_id = Column(String, primary_key=True)
+    completed = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ProgressEvent(Base):
+    """Append-only log of learner actions; never updated in place."""
+    __tablename__ = "progress_events"
+    __table_args__ = (
+        Index("idx_progress_events_user_course", "user_id", "course_id"),
+        Index("idx_progress_events_lesson", "lesson_id"),
+    )
+    
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    user_id = Column(String, nullable=False)
+    course_id = Column(String, nullable=False)
+    module_id = Column(String, nullable=False)
+    lesson_id = Column(String, nullable=False)  # "" for module-level events
+    event_type = Column(String, nullable=False)  # "theory_read", "lesson_completed", "practice_completed", "assessment_submitted", "module_assessment_submitted"
+    score = Column(Integer)
+    payload = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class TopicMastery(Base):
+    __tablename__ = "topic_mastery"
+    
+    user_id = Column(String, primary_key=True)
+    topic = Column(String, primary_key=True)  # normalized lesson key concept
+    mastery = Column(Float, nullable=False)  # probability the topic is learned
+    observations = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class UserModuleProgress(Base):
+    """Materialized per-module progress, maintained incrementally from progress events."""
+    __tablename__ = "user_module_progress"
+    
+    user_id = Column(String, primary_key=True)
+    course_id = Column(String, primary_key=True)
+    module_id = Column(String, primary_key=True)
+    completed_lesson_ids = Column(JSON, nullable=False)  # makes repeated completion events idempotent
+    completed_lessons = Column(Integer, nullable=False, default=0)
+    completed = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class UserCourseProgress(Base):
+    """Materialized per-course progress, maintained incrementally from progress events."""
+    __tablename__ = "user_course_progress"
+    
+    user_id = Column(String, primary_key=True)
+    course_id = Column(String, primary_key=True)
+    completed_lessons = Column(Integer, nullable=False, default=0)
+    completed_modules = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ReviewItem(Base):
+    """Spaced-repetition schedule for one topic a user has practiced (SM-2)."""
+    __tablename__ = "review_items"
+    __table_args__ = (
+        Index("idx_review_items_due_at", "due_at"),
+        Index("idx_review_items_user_due", "user_id", "due_at"),
+    )
+    
+    user_id = Column(String, primary_key=True)
+    topic = Column(String, primary_key=True)  # normalized lesson key concept
+    easiness = Column(Float, nullable=False, default=2.5)
+    interval_days = Column(Integer, nullable=False, default=0)
+    repetitions = Column(Integer, nullable=False, default=0)
+    lapses = Column(Integer, nullable=False, default=0)
+    due_at = Column(DateTime, nullable=False)
+    last_reviewed_at = Column(DateTime, nullable=False)
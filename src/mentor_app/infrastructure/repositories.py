@@ -1,63 +1,270 @@
 """Repository services for data persistence."""
 
 import uuid
-from typing import List, Optional
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional
 from mentor_app.models import CoursePlan, Module as PydanticModule
-from mentor_app.builder.models import ModuleContent, LessonContent
-from .models import Course, Module, Lesson
+from mentor_app.builder.models import Assessment, ModuleContent, LessonContent, PracticeTask
+from mentor_app.builder.renderer import render_lesson
+from mentor_app.mentor.learning_path import LearningPath
+from sqlalchemy import Integer, bindparam, cast, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import selectinload, undefer
+from .models import (
+    Course, Module, GenerationSpan, GenerationTrace, Lesson, LessonBody, LessonProgress, LLMUsage, ProgressEvent,
+    QuestionBankItem, ReviewItem, TopicMastery, UserCourseProgress, UserModuleProgress
+)
 from .models import Module as DBModule
 from .database import DatabaseService
+from .search import LessonSearchIndex
+from .tokens import RequestUsage
+from .tracing import Trace
+
+
+def upsert(session, model, rows: List[dict], index_elements: List[str], update_columns: List[str] = (),
+           update: Optional[Callable] = None, returning: bool = False) -> Optional[List[tuple]]:
+    """Insert rows, updating existing ones on primary/unique key conflicts (PostgreSQL and SQLite).
+
+    ``update_columns`` are overwritten with the incoming values; ``update``
+    receives the ``excluded`` (incoming) row and returns extra SET expressions,
+    e.g. to increment a counter instead of replacing it. With neither,
+    conflicting rows are left untouched. With ``returning``, the primary keys
+    of the rows inserted or updated (not of those left untouched) are returned.
+    """
+    dialect = session.get_bind().dialect.name
+    # Rows are bound as executemany parameters rather than inlined with .values(),
+    # so the statement compiles once and is cached however many rows there are
+    if dialect == "postgresql":
+        stmt = postgresql.insert(model.__table__)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(model.__table__)
+    else:
+        raise NotImplementedError(f"Upsert is not supported for dialect '{dialect}'")
+    set_ = {column: stmt.excluded[column] for column in update_columns}
+    if update:
+        set_.update(update(stmt.excluded))
+    if set_:
+        stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+    if returning:
+        return [tuple(row) for row in session.execute(stmt.returning(*model.__table__.primary_key.columns), rows)]
+    session.execute(stmt, rows)
+
+
+def acquire_lesson_bodies(session, body_hashes: List[str], new_bodies: List[dict] = ()):
+    """Take one reference per entry of ``body_hashes`` on stored lesson bodies, storing ``new_bodies`` first.
+
+    A new body that another writer stored concurrently is kept as it is.
+    """
+    if new_bodies:
+        upsert(session, LessonBody, [{**body, "ref_count": 0} for body in new_bodies], index_elements=["hash"])
+    _adjust_references(session, Counter(body_hashes))
+
+
+def release_lesson_bodies(session, *criteria) -> int:
+    """Drop the body references held by lessons matching ``criteria``, before those lessons are deleted.
+
+    Bodies left without references stay stored (and reusable) until
+    ``LessonBodyRepository.collect_garbage`` removes them.
+    """
+    references = dict(session.query(Lesson.body_hash, func.count()).filter(
+        Lesson.body_hash.isnot(None), *criteria
+    ).group_by(Lesson.body_hash).all())
+    _adjust_references(session, {body_hash: -count for body_hash, count in references.items()})
+    return sum(references.values())
+
+
+def _adjust_references(session, deltas: dict):
+    if not deltas:
+        return
+    bodies = LessonBody.__table__
+    session.execute(
+        bodies.update().where(bodies.c.hash == bindparam("body_hash")).values(
+            ref_count=bodies.c.ref_count + bindparam("delta")
+        ),
+        [{"body_hash": body_hash, "delta": delta} for body_hash, delta in deltas.items()]
+    )
+
+
+def build_learning_path(session, course_id: str) -> LearningPath:
+    """Build a course's learning path from its stored modules and lessons; skipped modules are left out."""
+    modules = session.query(Module.id, Module.dependencies).filter(
+        Module.course_id == course_id,
+        Module.is_skipped.is_(False)
+    ).order_by(Module.created_at, Module.id).all()
+    lessons_by_module = {}
+    for module_id, lesson_id in session.query(Lesson.module_id, Lesson.id).filter(
+        Lesson.course_id == course_id
+    ).order_by(Lesson.created_at, Lesson.id):
+        lessons_by_module.setdefault(module_id, []).append(lesson_id)
+    return LearningPath.build(course_id, [tuple(module) for module in modules], lessons_by_module)
 
 
 class CourseRepository:
     def __init__(self, db_service: DatabaseService):
         self.db_service = db_service
+        self.search_index = LessonSearchIndex(db_service)
     
     def save_course_plan(self, course_plan: CoursePlan) -> str:
         """Save course plan to database."""
         with self.db_service.get_session() as session:
-            # Create course
-            course = Course(
-                id=str(uuid.uuid4()),
-                course_title=course_plan.course_title,
-                estimated_duration=course_plan.estimated_duration,
-                difficulty_level=course_plan.difficulty_level,
-                prerequisites=course_plan.prerequisites
-            )
-            session.add(course)
-            
-            # Create modules
-            for module_data in course_plan.modules:
-                module = Module(
-                    id=module_data.id,
-                    course_id=course.id,
-                    title=module_data.title,
-                    description=module_data.description,
-                    learning_objectives=module_data.learning_objectives,
-                    estimated_duration=module_data.estimated_duration,
-                    dependencies=module_data.dependencies
-                )
-                session.add(module)
-            
+            course_id = self._add_course_plan(session, course_plan, str(uuid.uuid4()))
+            session.commit()
+            return course_id
+    
+    def save_course_plans(self, course_plans: List[tuple[str, CoursePlan]]) -> List[str]:
+        """Save many (course_id, course_plan) pairs in a single transaction."""
+        with self.db_service.get_session() as session:
+            course_ids = [
+                self._add_course_plan(session, course_plan, course_id)
+                for course_id, course_plan in course_plans
+            ]
             session.commit()
-            return course.id
+            return course_ids
+    
+    def _add_course_plan(self, session, course_plan: CoursePlan, course_id: str) -> str:
+        """Add a course and its modules to the session without committing."""
+        # Create course
+        course = Course(
+            id=course_id,
+            course_title=course_plan.course_title,
+            estimated_duration=course_plan.estimated_duration,
+            difficulty_level=course_plan.difficulty_level,
+            prerequisites=course_plan.prerequisites,
+            learning_path=LearningPath.build(
+                course_id,
+                [(module.id, module.dependencies) for module in course_plan.modules if not module.is_skipped],
+                {}
+            ).to_dict()
+        )
+        session.add(course)
+        
+        # Create modules
+        for module_data in course_plan.modules:
+            module = Module(
+                id=module_data.id,
+                course_id=course.id,
+                title=module_data.title,
+                description=module_data.description,
+                learning_objectives=module_data.learning_objectives,
+                estimated_duration=module_data.estimated_duration,
+                dependencies=module_data.dependencies,
+                is_skipped=module_data.is_skipped,
+                is_remediation=module_data.is_remediation
+            )
+            session.add(module)
+        
+        return course.id
     
     def get_course(self, course_id: str) -> Optional[Course]:
         """Get course by ID."""
         with self.db_service.get_session() as session:
             return session.query(Course).filter(Course.id == course_id).first()
+    
+    def delete_course(self, course_id: str) -> bool:
+        """Delete a course with everything recorded about it; False if it does not exist.
+
+        Removes its modules and lessons (releasing their lesson bodies), LLM
+        usage, generation traces, learners' progress and events, and the
+        review schedule and mastery of topics learners met only in this course.
+        """
+        self.search_index.ensure_schema()
+        with self.db_service.get_session() as session:
+            if session.get(Course, course_id) is None:
+                return False
+            self._delete_topic_state(session, course_id)
+            for model in (ProgressEvent, LessonProgress, UserModuleProgress, UserCourseProgress, LLMUsage):
+                session.query(model).filter(model.course_id == course_id).delete(synchronize_session=False)
+            traces = select(GenerationTrace.id).where(GenerationTrace.course_id == course_id)
+            session.query(GenerationSpan).filter(GenerationSpan.trace_id.in_(traces)).delete(synchronize_session=False)
+            session.query(GenerationTrace).filter(GenerationTrace.course_id == course_id).delete(synchronize_session=False)
+            self.search_index.unindex_course(session, course_id)
+            release_lesson_bodies(session, Lesson.course_id == course_id)
+            session.query(Lesson).filter(Lesson.course_id == course_id).delete(synchronize_session=False)
+            session.query(Module).filter(Module.course_id == course_id).delete(synchronize_session=False)
+            session.query(Course).filter(Course.id == course_id).delete(synchronize_session=False)
+            session.commit()
+            return True
+    
+    def _delete_topic_state(self, session, course_id: str):
+        """Delete review items and mastery of the course's topics for learners who met them in no other course."""
+        from mentor_app.auditor.analytics import normalize_topic
+
+        def topics(*criteria) -> set:
+            return {
+                normalize_topic(topic)
+                for (key_concepts,) in session.query(Lesson.key_concepts).filter(*criteria)
+                for topic in key_concepts or []
+            }
+
+        course_topics = topics(Lesson.course_id == course_id)
+        if not course_topics:
+            return
+        learners = [user_id for (user_id,) in session.query(ProgressEvent.user_id).filter(
+            ProgressEvent.course_id == course_id
+        ).distinct()]
+        for user_id in learners:
+            other_courses = select(ProgressEvent.course_id).where(
+                ProgressEvent.user_id == user_id, ProgressEvent.course_id != course_id
+            ).distinct()
+            orphaned = course_topics - topics(Lesson.course_id.in_(other_courses))
+            for model in (ReviewItem, TopicMastery):
+                session.query(model).filter(model.user_id == user_id, model.topic.in_(orphaned)).delete(
+                    synchronize_session=False
+                )
+
+    def get_learning_path(self, course_id: str) -> Optional[dict]:
+        """Get a course's precomputed learning path, building it for courses saved before it existed."""
+        with self.db_service.get_session() as session:
+            course = session.get(Course, course_id)
+            if course is None:
+                return None
+            if course.learning_path is None:
+                course.learning_path = build_learning_path(session, course_id).to_dict()
+                session.commit()
+            return course.learning_path
 
 
 class ModuleRepository:
     def __init__(self, db_service: DatabaseService):
         self.db_service = db_service
+        self.search_index = LessonSearchIndex(db_service)
     
     def save_module_content(self, course_id: str, module_id: str, module_content: ModuleContent) -> str:
         """Save detailed module content to database."""
+        self.search_index.ensure_schema()
         with self.db_service.get_session() as session:
+            body_hashes = [lesson_content.body_hash for lesson_content in module_content.lessons if lesson_content.body_hash]
+            stored_bodies = set()
+            if body_hashes:
+                # Take the references on stored bodies before deciding which to reuse: the update
+                # locks their rows, so garbage collection cannot delete a body this module
+                # relies on, and bodies collected before it are stored again below
+                _adjust_references(session, Counter(body_hashes))
+                stored_bodies = {
+                    row.hash for row in session.query(LessonBody.hash).filter(LessonBody.hash.in_(body_hashes))
+                }
 
             # Create lessons with generated content
+            new_bodies, lessons = [], []
             for lesson_content in module_content.lessons:
+                content = {}
+                if lesson_content.body_hash not in stored_bodies:
+                    content_html, toc = render_lesson(lesson_content.content_markdown)
+                    content = {
+                        "content_markdown": lesson_content.content_markdown,
+                        "content_html": content_html,
+                        "toc": toc,
+                        "code_examples": [ex.dict() for ex in lesson_content.code_examples] if lesson_content.code_examples else []
+                    }
+                if lesson_content.body_hash is not None:
+                    # The lesson references the shared body instead of carrying a copy
+                    if content:
+                        new_bodies.append({"hash": lesson_content.body_hash, **content})
+                        stored_bodies.add(lesson_content.body_hash)
+                    content = {}
                 lesson = Lesson(
                     id=lesson_content.id,
                     module_id=module_id,
@@ -66,17 +273,78 @@ class ModuleRepository:
                     type=lesson_content.type,
                     key_concepts=lesson_content.key_concepts,
                     difficulty=lesson_content.difficulty,
-                    content_markdown=lesson_content.content_markdown,
+                    body_hash=lesson_content.body_hash,
+                    **content,
                     estimated_duration=lesson_content.estimated_duration,
-                    code_examples=[ex.dict() for ex in lesson_content.code_examples] if lesson_content.code_examples else [],
                     interactive_elements=[ie.dict() for ie in lesson_content.interactive_elements] if lesson_content.interactive_elements else [],
-                    practice_tasks=[pt.dict() for pt in lesson_content.practice_tasks] if lesson_content.practice_tasks else []
+                    practice_tasks=[pt.dict() for pt in lesson_content.practice_tasks] if lesson_content.practice_tasks else [],
+                    assessment=lesson_content.assessment.dict() if lesson_content.assessment else None
                 )
-                session.add(lesson)
+                lessons.append(lesson)
+            if new_bodies:
+                # Before the lessons referencing them
+                new_hashes = {body["hash"] for body in new_bodies}
+                acquire_lesson_bodies(session, [body_hash for body_hash in body_hashes if body_hash in new_hashes], new_bodies)
+            session.add_all(lessons)
+            self.search_index.index_module(session, course_id, module_id)
+            
+            if module_content.module_assessment is not None:
+                module = session.get(Module, (module_id, course_id))
+                if module is not None:
+                    module.assessment = module_content.module_assessment.dict()
+            
+            # Keep the course's learning path in step with its generated lessons
+            course = session.query(Course).filter(Course.id == course_id).with_for_update().first()
+            if course is not None:
+                lesson_ids = [lesson_content.id for lesson_content in module_content.lessons]
+                if course.learning_path is None:
+                    session.flush()
+                    course.learning_path = build_learning_path(session, course_id).to_dict()
+                else:
+                    course.learning_path = LearningPath.from_dict(
+                        course_id, course.learning_path
+                    ).with_module_lessons(module_id, lesson_ids).to_dict()
             
             session.commit()
             return module_id
     
+    def get_module_content(self, course_id: str, module_id: str) -> Optional[ModuleContent]:
+        """Load previously generated module content, or None if its lessons do not exist yet."""
+        with self.db_service.get_session() as session:
+            module = session.get(Module, (module_id, course_id))
+            if module is None:
+                return None
+            lessons = session.query(Lesson).filter(
+                Lesson.course_id == course_id,
+                Lesson.module_id == module_id
+            ).order_by(Lesson.created_at, Lesson.id).all()
+            if not lessons:
+                return None
+            return ModuleContent(
+                title=module.title,
+                description=module.description,
+                learning_objectives=module.learning_objectives,
+                estimated_duration=module.estimated_duration,
+                lessons=[
+                    LessonContent(
+                        id=lesson.id,
+                        title=lesson.title,
+                        type=lesson.type,
+                        content_markdown=(lesson.body or lesson).content_markdown or "",
+                        key_concepts=lesson.key_concepts,
+                        difficulty=lesson.difficulty,
+                        code_examples=(lesson.body or lesson).code_examples or [],
+                        interactive_elements=lesson.interactive_elements or [],
+                        practice_tasks=lesson.practice_tasks or [],
+                        estimated_duration=lesson.estimated_duration or 0,
+                        assessment=lesson.assessment,
+                        body_hash=lesson.body_hash
+                    )
+                    for lesson in lessons
+                ],
+                module_assessment=module.assessment
+            )
+    
     def get_modules_by_course(self, course_id: str) -> List[Module]:
         """Get all modules for a course."""
         with self.db_service.get_session() as session:
@@ -86,6 +354,17 @@ class ModuleRepository:
         """Get module by ID."""
         with self.db_service.get_session() as session:
             return session.query(Module).filter(Module.id == module_id).first()
+    
+    def get_module_assessment(self, module_id: str, course_id: Optional[str] = None) -> Optional[tuple[str, Optional[Assessment]]]:
+        """Get (course_id, stored assessment with answer keys) for a module, optionally disambiguated by course."""
+        with self.db_service.get_session() as session:
+            query = session.query(Module.course_id, Module.assessment).filter(Module.id == module_id)
+            if course_id:
+                query = query.filter(Module.course_id == course_id)
+            row = query.first()
+            if row is None:
+                return None
+            return row.course_id, Assessment(**row.assessment) if row.assessment else None
 
 
 class LessonRepository:
@@ -97,7 +376,445 @@ class LessonRepository:
         with self.db_service.get_session() as session:
             return session.query(Lesson).filter(Lesson.id == lesson_id).first()
     
+    def get_lesson_location(self, lesson_id: str, course_id: Optional[str] = None) -> Optional[tuple[str, str]]:
+        """Get (course_id, module_id) for a lesson, optionally disambiguated by course."""
+        with self.db_service.get_session() as session:
+            query = session.query(Lesson.course_id, Lesson.module_id).filter(Lesson.id == lesson_id)
+            if course_id:
+                query = query.filter(Lesson.course_id == course_id)
+            row = query.first()
+            return (row.course_id, row.module_id) if row else None
+    
     def get_lessons_by_module(self, module_id: str) -> List[Lesson]:
         """Get all lessons for a module."""
         with self.db_service.get_session() as session:
             return session.query(Lesson).filter(Lesson.module_id == module_id).all()
+    
+    def get_lesson_assessment(self, lesson_id: str, course_id: str, module_id: str) -> Optional[Assessment]:
+        """Get a lesson's stored assessment, including answer keys."""
+        with self.db_service.get_session() as session:
+            assessment = session.query(Lesson.assessment).filter(
+                Lesson.id == lesson_id,
+                Lesson.course_id == course_id,
+                Lesson.module_id == module_id
+            ).scalar()
+            return Assessment(**assessment) if assessment else None
+    
+    def get_practice_tasks(self, lesson_id: str, course_id: str, module_id: str) -> List[PracticeTask]:
+        """Get a lesson's practice tasks, including solutions and test cases."""
+        with self.db_service.get_session() as session:
+            tasks = session.query(Lesson.practice_tasks).filter(
+                Lesson.id == lesson_id,
+                Lesson.course_id == course_id,
+                Lesson.module_id == module_id
+            ).scalar()
+            return [PracticeTask(**task) for task in tasks or []]
+
+
+class LessonBodyRepository:
+    """Content-addressed lesson bodies, shared by every lesson generated from the same outline and context."""
+
+    def __init__(self, db_service: DatabaseService):
+        self.db_service = db_service
+    
+    def get_body(self, body_hash: str) -> Optional[LessonBody]:
+        """Get a stored body by its hash, including bodies no lesson references any more."""
+        with self.db_service.get_session() as session:
+            return session.get(LessonBody, body_hash)
+    
+    def recount(self) -> int:
+        """Recompute every body's reference count from the lessons table, e.g. after a bulk import."""
+        with self.db_service.get_session() as session:
+            bodies = LessonBody.__table__
+            result = session.execute(bodies.update().values(
+                ref_count=select(func.count()).where(Lesson.body_hash == bodies.c.hash).scalar_subquery()
+            ))
+            session.commit()
+            return result.rowcount
+    
+    def collect_garbage(self) -> int:
+        """Delete bodies no lesson references; returns the number deleted."""
+        with self.db_service.get_session() as session:
+            deleted = session.query(LessonBody).filter(
+                LessonBody.ref_count <= 0,
+                ~select(Lesson.body_hash).where(Lesson.body_hash == LessonBody.hash).exists()
+            ).delete(synchronize_session=False)
+            session.commit()
+            return deleted
+
+
+class QuestionBankRepository:
+    def __init__(self, db_service: DatabaseService):
+        self.db_service = db_service
+    
+    def get_questions(self, concepts: List[str], difficulty: str) -> List[QuestionBankItem]:
+        """Get banked questions for normalized concepts at a difficulty, oldest first."""
+        with self.db_service.get_session() as session:
+            return session.query(QuestionBankItem).filter(
+                QuestionBankItem.concept.in_(concepts),
+                QuestionBankItem.difficulty == difficulty
+            ).order_by(QuestionBankItem.created_at, QuestionBankItem.id).all()
+    
+    def save_questions(self, rows: List[dict]) -> int:
+        """Insert question rows; ids are content hashes, so re-banked questions are left as they are."""
+        with self.db_service.get_session() as session:
+            upsert(session, QuestionBankItem, rows, index_elements=["id"])
+            session.commit()
+            return len(rows)
+
+
+class UsageRepository:
+    def __init__(self, db_service: DatabaseService):
+        self.db_service = db_service
+    
+    def record_usage(self, course_id: str, usage: RequestUsage, module_id: str = "") -> int:
+        """Add a request's LLM usage to the course's ("" module) or module's running totals."""
+        now = datetime.utcnow()
+        rows = [
+            {"course_id": course_id, "module_id": module_id, "task": task, **counts, "updated_at": now}
+            for task, counts in usage.by_task.items()
+        ]
+        if not rows:
+            return 0
+        with self.db_service.get_session() as session:
+            upsert(
+                session, LLMUsage, rows,
+                index_elements=["course_id", "module_id", "task"],
+                update_columns=["updated_at"],
+                update=lambda excluded: {
+                    column: getattr(LLMUsage, column) + excluded[column]
+                    for column in ("calls", "prompt_tokens", "completion_tokens", "llm_seconds")
+                }
+            )
+            session.commit()
+            return len(rows)
+    
+    def get_usage(self, course_id: str) -> List[LLMUsage]:
+        """Get a course's usage rows, course-level ("" module) first."""
+        with self.db_service.get_session() as session:
+            return session.query(LLMUsage).filter(
+                LLMUsage.course_id == course_id
+            ).order_by(LLMUsage.module_id, LLMUsage.task).all()
+
+
+class TraceRepository:
+    def __init__(self, db_service: DatabaseService):
+        self.db_service = db_service
+    
+    def save_trace(self, trace: Trace) -> str:
+        """Store a finished trace with its spans in one transaction."""
+        spans = [
+            {
+                "trace_id": trace.id,
+                "span_id": span.span_id,
+                "parent_id": span.parent_id,
+                "name": span.name,
+                "start_offset_seconds": span.offset,
+                "duration_seconds": span.duration,
+                "outcome": span.outcome,
+                "error": span.error,
+                "attributes": span.attributes
+            }
+            for span in trace.finished_spans()
+        ]
+        with self.db_service.get_session() as session:
+            session.add(GenerationTrace(
+                id=trace.id,
+                operation=trace.name,
+                course_id=trace.course_id,
+                module_id=trace.module_id,
+                outcome=trace.outcome,
+                error=trace.error,
+                started_at=trace.started_at,
+                duration_seconds=trace.duration,
+                attributes=trace.attributes,
+                profile=trace.profile,
+                **trace.llm_totals()
+            ))
+            session.flush()
+            if spans:
+                session.execute(insert(GenerationSpan), spans)
+            session.commit()
+        return trace.id
+    
+    def get_trace(self, trace_id: str) -> Optional[GenerationTrace]:
+        """Get a trace with its spans and profile."""
+        with self.db_service.get_session() as session:
+            return session.query(GenerationTrace).options(
+                selectinload(GenerationTrace.spans), undefer(GenerationTrace.profile)
+            ).filter(GenerationTrace.id == trace_id).first()
+    
+    def list_traces(
+        self,
+        course_id: Optional[str] = None,
+        module_id: Optional[str] = None,
+        operation: Optional[str] = None,
+        outcome: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> List[GenerationTrace]:
+        """Get traces matching the filters (without spans or profiles), newest first."""
+        with self.db_service.get_session() as session:
+            query = session.query(GenerationTrace)
+            if course_id is not None:
+                query = query.filter(GenerationTrace.course_id == course_id)
+            if module_id is not None:
+                query = query.filter(GenerationTrace.module_id == module_id)
+            if operation is not None:
+                query = query.filter(GenerationTrace.operation == operation)
+            if outcome is not None:
+                query = query.filter(GenerationTrace.outcome == outcome)
+            return query.order_by(GenerationTrace.started_at.desc(), GenerationTrace.id).offset(offset).limit(limit).all()
+    
+    def prune(self, before: datetime, batch_size: int = 10_000) -> int:
+        """Delete traces started before ``before`` with their spans, a batch per transaction; returns how many."""
+        deleted = 0
+        while True:
+            with self.db_service.get_session() as session:
+                trace_ids = [
+                    trace_id for (trace_id,) in session.query(GenerationTrace.id).filter(
+                        GenerationTrace.started_at < before
+                    ).limit(batch_size)
+                ]
+                if not trace_ids:
+                    return deleted
+                session.query(GenerationSpan).filter(GenerationSpan.trace_id.in_(trace_ids)).delete(synchronize_session=False)
+                session.query(GenerationTrace).filter(GenerationTrace.id.in_(trace_ids)).delete(synchronize_session=False)
+                session.commit()
+            deleted += len(trace_ids)
+
+
+class ProgressRepository:
+    def __init__(self, db_service: DatabaseService):
+        self.db_service = db_service
+    
+    def save_lesson_progress(self, rows: List[dict]) -> int:
+        """Upsert lesson completion rows (user_id, course_id, lesson_id, completed, updated_at) in one statement."""
+        if not rows:
+            return 0
+        with self.db_service.get_session() as session:
+            upsert(
+                session, LessonProgress, rows,
+                index_elements=["user_id", "course_id", "lesson_id"],
+                update_columns=["completed", "updated_at"]
+            )
+            session.commit()
+            return len(rows)
+    
+    def append_events(self, rows: List[dict], after_insert: Optional[Callable] = None) -> int:
+        """Bulk insert progress events in one multi-row statement.
+        
+        ``after_insert(session, rows)`` runs in the same transaction, so derived
+        data (e.g. progress aggregates) commits atomically with the events.
+        """
+        if not rows:
+            return 0
+        with self.db_service.get_session() as session:
+            session.execute(insert(ProgressEvent), rows)
+            if after_insert:
+                after_insert(session, rows)
+            session.commit()
+            return len(rows)
+    
+    def iter_events(self, user_id: Optional[str] = None, batch_size: int = 10_000) -> Iterator[dict]:
+        """Stream raw progress events as dicts in insertion order."""
+        with self.db_service.get_session() as session:
+            query = session.query(ProgressEvent)
+            if user_id:
+                query = query.filter(ProgressEvent.user_id == user_id)
+            for event in query.order_by(ProgressEvent.id).execution_options(stream_results=True).yield_per(batch_size):
+                yield {
+                    "user_id": event.user_id,
+                    "course_id": event.course_id,
+                    "module_id": event.module_id,
+                    "lesson_id": event.lesson_id,
+                    "event_type": event.event_type,
+                    "score": event.score,
+                    "payload": event.payload,
+                    "created_at": event.created_at
+                }
+    
+    def get_course_progress(self, user_id: str, course_id: str) -> Optional[UserCourseProgress]:
+        """Get the materialized progress for a user in a course (primary key lookup)."""
+        with self.db_service.get_session() as session:
+            return session.get(UserCourseProgress, (user_id, course_id))
+    
+    def get_module_progress(self, user_id: str, course_id: str) -> List[UserModuleProgress]:
+        """Get materialized per-module progress for a user in a course."""
+        with self.db_service.get_session() as session:
+            return session.query(UserModuleProgress).filter(
+                UserModuleProgress.user_id == user_id,
+                UserModuleProgress.course_id == course_id
+            ).all()
+    
+    def iter_scored_events(self, user_id: Optional[str] = None, batch_size: int = 10_000) -> Iterator[tuple[str, List[str], int]]:
+        """Stream (user_id, lesson key_concepts, score) for scored events in chronological order."""
+        with self.db_service.get_session() as session:
+            query = session.query(ProgressEvent.user_id, Lesson.key_concepts, ProgressEvent.score).join(
+                Lesson,
+                (Lesson.id == ProgressEvent.lesson_id)
+                & (Lesson.course_id == ProgressEvent.course_id)
+                & (Lesson.module_id == ProgressEvent.module_id)
+            ).filter(ProgressEvent.score.isnot(None))
+            if user_id:
+                query = query.filter(ProgressEvent.user_id == user_id)
+            query = query.order_by(ProgressEvent.created_at, ProgressEvent.id)
+            for row in query.execution_options(stream_results=True).yield_per(batch_size):
+                yield row.user_id, row.key_concepts or [], row.score
+    
+    def get_lesson_progress(self, user_id: str, course_id: str) -> List[LessonProgress]:
+        """Get lesson completion rows for a user in a course."""
+        with self.db_service.get_session() as session:
+            return session.query(LessonProgress).filter(
+                LessonProgress.user_id == user_id,
+                LessonProgress.course_id == course_id
+            ).all()
+
+
+class MasteryRepository:
+    def __init__(self, db_service: DatabaseService):
+        self.db_service = db_service
+    
+    def save_mastery(self, rows: List[dict], batch_size: int = 10_000) -> int:
+        """Upsert (user_id, topic, mastery, observations, updated_at) rows in batches."""
+        with self.db_service.get_session() as session:
+            for start in range(0, len(rows), batch_size):
+                upsert(
+                    session, TopicMastery, rows[start:start + batch_size],
+                    index_elements=["user_id", "topic"],
+                    update_columns=["mastery", "observations", "updated_at"]
+                )
+            session.commit()
+            return len(rows)
+    
+    def get_mastery(self, user_id: str, topic: str) -> Optional[TopicMastery]:
+        """Get stored mastery for a user and topic."""
+        with self.db_service.get_session() as session:
+            return session.query(TopicMastery).filter(
+                TopicMastery.user_id == user_id,
+                TopicMastery.topic == topic
+            ).first()
+    
+    def get_user_mastery(self, user_id: str) -> List[TopicMastery]:
+        """Get stored mastery for every topic a user has evidence on."""
+        with self.db_service.get_session() as session:
+            return session.query(TopicMastery).filter(TopicMastery.user_id == user_id).all()
+
+
+class ReviewRepository:
+    def __init__(self, db_service: DatabaseService):
+        self.db_service = db_service
+    
+    def get_due(self, user_id: str, until: datetime, limit: int) -> List[tuple]:
+        """Get (topic, due_at) for up to ``limit`` of a user's topics due by ``until``, most overdue first."""
+        with self.db_service.get_session() as session:
+            return [
+                tuple(row) for row in session.query(ReviewItem.topic, ReviewItem.due_at).filter(
+                    ReviewItem.user_id == user_id, ReviewItem.due_at <= until
+                ).order_by(ReviewItem.due_at, ReviewItem.topic).limit(limit)
+            ]
+    
+    def iter_due(self, until: datetime, batch_size: int = 10_000) -> Iterator[tuple]:
+        """Stream (user_id, topic, due_at) for all items due before ``until``, grouped by user."""
+        with self.db_service.get_session() as session:
+            query = session.query(ReviewItem.user_id, ReviewItem.topic, ReviewItem.due_at).filter(
+                ReviewItem.due_at <= until
+            ).order_by(ReviewItem.user_id, ReviewItem.due_at)
+            for row in query.execution_options(stream_results=True).yield_per(batch_size):
+                yield tuple(row)
+
+
+class ReportRepository:
+    """Read-side queries for dashboards and cohort reports."""
+    
+    def __init__(self, db_service: DatabaseService):
+        self.db_service = db_service
+    
+    def iter_user_ids(self, batch_size: int = 1000) -> Iterator[List[str]]:
+        """Stream ids of users with course progress, in chunks of ``batch_size``."""
+        with self.db_service.get_session() as session:
+            query = session.query(UserCourseProgress.user_id).distinct().order_by(UserCourseProgress.user_id)
+            chunk = []
+            for (user_id,) in query.execution_options(stream_results=True).yield_per(batch_size):
+                chunk.append(user_id)
+                if len(chunk) == batch_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+    
+    def get_course_ids(self) -> List[str]:
+        """Get ids of courses with at least one learner."""
+        with self.db_service.get_session() as session:
+            return [course_id for (course_id,) in session.query(UserCourseProgress.course_id).distinct()]
+    
+    def get_course_progress_for_users(self, user_ids: List[str]) -> List[tuple]:
+        """Get (user_id, course_id, course_title, completed_lessons, completed_modules, total_modules) rows."""
+        with self.db_service.get_session() as session:
+            module_counts = session.query(
+                Module.course_id, func.count().label("total_modules")
+            ).group_by(Module.course_id).subquery()
+            return session.query(
+                UserCourseProgress.user_id,
+                UserCourseProgress.course_id,
+                Course.course_title,
+                UserCourseProgress.completed_lessons,
+                UserCourseProgress.completed_modules,
+                func.coalesce(module_counts.c.total_modules, 0)
+            ).join(Course, Course.id == UserCourseProgress.course_id).outerjoin(
+                module_counts, module_counts.c.course_id == UserCourseProgress.course_id
+            ).filter(UserCourseProgress.user_id.in_(user_ids)).all()
+    
+    def get_mastery_for_users(self, user_ids: List[str]) -> List[TopicMastery]:
+        """Get stored topic mastery for a set of users."""
+        with self.db_service.get_session() as session:
+            return session.query(TopicMastery).filter(TopicMastery.user_id.in_(user_ids)).all()
+    
+    def get_cohort_modules(self, course_id: str) -> List[tuple]:
+        """Get (module_id, title, learners_started, learners_completed) for a course."""
+        with self.db_service.get_session() as session:
+            return session.query(
+                Module.id,
+                Module.title,
+                func.count(UserModuleProgress.user_id),
+                func.coalesce(func.sum(cast(UserModuleProgress.completed, Integer)), 0)
+            ).outerjoin(
+                UserModuleProgress,
+                (UserModuleProgress.course_id == Module.course_id) & (UserModuleProgress.module_id == Module.id)
+            ).filter(Module.course_id == course_id).group_by(Module.id, Module.title).order_by(Module.id).all()
+    
+    def get_cohort_completion(self, course_id: str) -> List[int]:
+        """Get completed_modules for every learner in a course."""
+        with self.db_service.get_session() as session:
+            return [
+                completed for (completed,) in session.query(UserCourseProgress.completed_modules).filter(
+                    UserCourseProgress.course_id == course_id
+                )
+            ]
+    
+    def iter_cohort_rows(self, course_id: str, batch_size: int = 5000) -> Iterator[tuple]:
+        """Stream per-learner, per-module progress rows for a course using a server-side cursor.
+        
+        Rows are (user_id, module_id, module_title, completed_lessons, total_lessons, completed, updated_at).
+        """
+        with self.db_service.get_session() as session:
+            lesson_counts = session.query(
+                Lesson.module_id, func.count().label("total_lessons")
+            ).filter(Lesson.course_id == course_id).group_by(Lesson.module_id).subquery()
+            query = session.query(
+                UserModuleProgress.user_id,
+                UserModuleProgress.module_id,
+                Module.title,
+                UserModuleProgress.completed_lessons,
+                func.coalesce(lesson_counts.c.total_lessons, 0),
+                UserModuleProgress.completed,
+                UserModuleProgress.updated_at
+            ).join(
+                Module, (Module.course_id == UserModuleProgress.course_id) & (Module.id == UserModuleProgress.module_id)
+            ).outerjoin(
+                lesson_counts, lesson_counts.c.module_id == UserModuleProgress.module_id
+            ).filter(UserModuleProgress.course_id == course_id).order_by(
+                UserModuleProgress.user_id, UserModuleProgress.module_id
+            )
+            for row in query.execution_options(stream_results=True).yield_per(batch_size):
+                yield tuple(row)
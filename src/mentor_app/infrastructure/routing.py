@@ -0,0 +1,341 @@
+"""Per-task model selection and hedged LLM calls."""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+from .metrics import LLM_HEDGES
+from .scheduler import current_request_class, get_generation_scheduler
+from .tokens import current_usage, get_budget, get_token_counter
+from .tracing import annotate, profiled
+
+MIN_LATENCY_SAMPLES = 20  # below this the route's configured hedge_after is used
+LATENCY_WINDOW = 200
+HEDGE_PERCENTILE = 0.95
+
+
+class ModelRoute:
+    """Model and sampling parameters for one task, with an optional hedge.
+
+    When ``hedge_model`` is set and the primary call has not answered by the
+    task's p95 latency (or ``hedge_after`` seconds until enough calls have
+    been seen), the same prompt is sent to the hedge model and the first
+    valid response wins. ``json_output`` marks tasks whose responses must
+    parse as JSON to count as valid.
+    """
+
+    FIELDS = ("model", "temperature", "max_tokens", "hedge_model", "hedge_after", "json_output")
+
+    def __init__(
+        self,
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        hedge_model: Optional[str] = None,
+        hedge_after: Optional[float] = None,
+        json_output: bool = False
+    ):
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.hedge_model = hedge_model
+        self.hedge_after = hedge_after
+        self.json_output = json_output
+
+    def updated(self, overrides: dict) -> "ModelRoute":
+        unknown = set(overrides) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown model route settings: {', '.join(sorted(unknown))}")
+        return ModelRoute(**{**{name: getattr(self, name) for name in self.FIELDS}, **overrides})
+
+    def is_valid(self, response) -> bool:
+        content = (getattr(response, "content", None) or "").strip()
+        if not content:
+            return False
+        if not self.json_output:
+            return True
+        try:
+            json.loads(strip_code_fence(content))
+        except ValueError:
+            return False
+        return True
+
+
+# Keyed by the task label passed to track_llm_call. Structured outputs run
+# cooler than prose; long lesson generations hedge to a faster model.
+DEFAULT_ROUTES: Dict[str, ModelRoute] = {
+    "syllabus": ModelRoute("gpt-5.2", 0.7, hedge_model="gpt-4o", hedge_after=45, json_output=True),
+    "module_structure": ModelRoute("gpt-5.2", 0.4, json_output=True),
+    "bridge_modules": ModelRoute("gpt-5.2", 0.4, json_output=True),
+    "theory": ModelRoute("gpt-4o", 0.7, hedge_model="gpt-4o-mini", hedge_after=60),
+    "practice": ModelRoute("gpt-4o", 0.5, hedge_model="gpt-4o-mini", hedge_after=60),
+    "assessment": ModelRoute("gpt-4o", 0.3),
+    "quiz": ModelRoute("gpt-4o", 0.3, hedge_model="gpt-4o-mini", hedge_after=30, json_output=True),
+}
+DEFAULT_ROUTE = ModelRoute("gpt-4o", 0.7)
+
+
+def strip_code_fence(content: str) -> str:
+    """Remove a surrounding Markdown code fence (```json ... ```) from a response."""
+    content = content.strip()
+    if content.startswith("```json"):
+        content = content[7:]
+    if content.startswith("```"):
+        content = content[3:]
+    if content.endswith("```"):
+        content = content[:-3]
+    return content.strip()
+
+
+def load_routes(path: Optional[str] = None) -> Dict[str, ModelRoute]:
+    """Return the default routes, overridden per task by the JSON file at ``path`` or LLM_ROUTES_FILE.
+
+    The file maps task names (or ``"default"``) to any of the ModelRoute
+    settings, e.g. ``{"theory": {"model": "gpt-4o-mini", "hedge_after": 20}}``.
+    """
+    routes = dict(DEFAULT_ROUTES)
+    routes["default"] = DEFAULT_ROUTE
+    path = path or os.getenv("LLM_ROUTES_FILE")
+    if path:
+        with open(path) as f:
+            overrides = json.load(f)
+        for task, settings in overrides.items():
+            routes[task] = routes.get(task, routes["default"]).updated(settings)
+    return routes
+
+
+def _chat_model(model: str, temperature: float, max_tokens: Optional[int]):
+    from .llm_client import get_llm_client
+
+    return get_llm_client().bind(model, temperature, max_tokens)
+
+
+class ModelRouter:
+    """Chat model facade that picks the model and parameters for each task.
+
+    Services ask for a task's client with ``for_task`` (or ``model_for_task``,
+    which also accepts plain chat models). Clients are built once per model
+    and parameter set by ``client_factory`` (by default bound to the shared
+    multi-provider LLMClient) and shared across tasks. Primary
+    call latencies are kept per task to place the hedge deadline. Primary
+    and hedge calls run on separate pools of ``max_workers`` threads each, so
+    a burst of slow primaries cannot keep the hedges meant to rescue them
+    from starting.
+    """
+
+    def __init__(
+        self,
+        routes: Optional[Dict[str, ModelRoute]] = None,
+        client_factory: Optional[Callable] = None,
+        max_workers: int = 32
+    ):
+        self.routes = routes if routes is not None else load_routes()
+        self.client_factory = client_factory or _chat_model
+        self.max_workers = max_workers
+        self._clients = {}
+        self._latencies: Dict[str, deque] = {}
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._lock = threading.Lock()
+
+    def route(self, task: str) -> ModelRoute:
+        """The task's route; responses are capped at the task's token budget unless it sets ``max_tokens``."""
+        route = self.routes.get(task) or self.routes.get("default") or DEFAULT_ROUTE
+        if route.max_tokens is None:
+            route = route.updated({"max_tokens": get_budget(task).max_response_tokens})
+        return route
+
+    def for_task(self, task: str) -> "RoutedModel":
+        return RoutedModel(self, task)
+
+    def invoke(self, messages: List, task: str = "default"):
+        return self.for_task(task).invoke(messages)
+
+    def hedge_deadline(self, task: str) -> Optional[float]:
+        """Seconds to wait for the primary model before hedging, or None to never hedge."""
+        route = self.route(task)
+        if not route.hedge_model:
+            return None
+        with self._lock:
+            samples = sorted(self._latencies.get(task, ()))
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return route.hedge_after
+        return samples[min(len(samples) - 1, int(len(samples) * HEDGE_PERCENTILE))]
+
+    def record_latency(self, task: str, seconds: float):
+        with self._lock:
+            self._latencies.setdefault(task, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def client(self, model: str, route: ModelRoute):
+        key = (model, route.temperature, route.max_tokens)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self.client_factory(model, route.temperature, route.max_tokens)
+            return self._clients[key]
+
+    def submit(self, role: str, fn, *args):
+        """Run ``fn`` on the pool for ``role`` ("primary" or "hedge")."""
+        with self._lock:
+            if role not in self._executors:
+                self._executors[role] = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"llm-{role}")
+            executor = self._executors[role]
+        # Run in the caller's context so calls stay in its usage scope, trace and profile
+        return executor.submit(contextvars.copy_context().run, profiled, fn, *args)
+
+
+class RoutedModel:
+    """The chat model for one task; ``invoke(messages)`` like a LangChain chat model."""
+
+    def __init__(self, router: ModelRouter, task: str):
+        self.router = router
+        self.task = task
+        self.route = router.route(task)
+
+    def invoke(self, messages: List, **kwargs):
+        deadline = self.router.hedge_deadline(self.task)
+        if deadline is None:
+            return self._call_primary(messages, kwargs)
+        return self._invoke_hedged(messages, kwargs, deadline)
+
+    def _call_primary(self, messages, kwargs, started: Optional[dict] = None):
+        if started is not None:
+            started["primary"] = time.monotonic()
+        start = time.perf_counter()
+        response = self.router.client(self.route.model, self.route).invoke(messages, **kwargs)
+        self.router.record_latency(self.task, time.perf_counter() - start)
+        return response
+
+    def _call_hedge(self, messages, kwargs, settled: threading.Event, started: dict, alongside_primary: bool):
+        # The hedge is a second provider call: it must fit the request's token ceiling
+        # next to the primary still running and waits for a generation slot of its own
+        tokens = prompt_tokens(messages)
+        usage = current_usage()
+        if usage is not None:
+            usage.reserve(self.task, tokens, calls=2 if alongside_primary else 1)
+        request_class = current_request_class()
+        cost = tokens + get_budget(self.task).max_response_tokens
+        with get_generation_scheduler().slot(request_class.priority, request_class.tenant, cost):
+            if settled.is_set():  # the primary answered while the hedge was queued
+                return None
+            started["hedge"] = time.monotonic()
+            return self.router.client(self.route.hedge_model, self.route).invoke(messages, **kwargs)
+
+    def _invoke_hedged(self, messages, kwargs, deadline: float):
+        """Race the primary against a hedge sent at ``deadline`` (or as soon as the primary fails).
+
+        The first valid response wins and the other call is left to finish
+        in the background; a hedge still queued for a slot is not sent. If
+        neither is valid, the last response is returned for the caller to
+        report, or the last error raised. The caller accounts the returned
+        response; every other call that was sent is added to the request's
+        usage here (a call still running is counted with its prompt now and
+        its completion when it finishes).
+        """
+        start = time.monotonic()
+        settled = threading.Event()
+        started: Dict[str, float] = {}  # role -> when its provider call was sent
+        pending = {self.router.submit("primary", self._call_primary, messages, kwargs, started): "primary"}
+        calls = dict(pending)
+        hedged = False
+        response, error, returned = None, None, None
+        try:
+            while pending:
+                timeout = None if hedged else max(0.0, deadline - (time.monotonic() - start))
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    role = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    if self.route.is_valid(result):
+                        if hedged:
+                            LLM_HEDGES.labels(self.task, f"{role}_won").inc()
+                            annotate(hedge_winner=role)
+                        returned = result
+                        return result
+                    response = result
+                if not hedged and (not done or not pending):
+                    hedged = True
+                    LLM_HEDGES.labels(self.task, "sent").inc()
+                    annotate(hedged=True)
+                    future = self.router.submit(
+                        "hedge", self._call_hedge, messages, kwargs, settled, started, bool(pending)
+                    )
+                    pending[future] = calls[future] = "hedge"
+            returned = response
+        finally:
+            settled.set()
+            if hedged:
+                self._account_other_calls(messages, calls, started, returned)
+        if response is not None:
+            return response
+        raise error
+
+    def _account_other_calls(self, messages, calls: dict, started: Dict[str, float], returned):
+        """Add the usage of every call of a hedged invocation other than the ``returned`` one."""
+        usage = current_usage()
+        if usage is None:
+            return
+        estimate = prompt_tokens(messages)
+
+        def record(future, role, prompt_counted):
+            try:
+                result = future.result()
+            except Exception:
+                return  # failed calls are not billed
+            if result is None or result is returned:
+                return
+            prompt, completion = _response_tokens(result, estimate)
+            seconds = time.monotonic() - started.get(role, time.monotonic())
+            usage.record(self.task, 0 if prompt_counted else prompt, completion, seconds, calls=0 if prompt_counted else 1)
+
+        for future, role in calls.items():
+            if future.done():
+                record(future, role, False)
+            elif role in started:
+                # Still running: its prompt is spent already, the completion follows when it answers
+                usage.record(self.task, estimate, 0, 0.0)
+                future.add_done_callback(lambda future, role=role: record(future, role, True))
+            else:
+                future.add_done_callback(lambda future, role=role: record(future, role, False))
+
+
+def _response_tokens(response, prompt_estimate: int) -> tuple:
+    """(prompt, completion) tokens a response reports, estimated when it reports none."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    return prompt_estimate, get_token_counter().count(getattr(response, "content", None))
+
+
+def prompt_tokens(messages: List) -> int:
+    """Tokens in the text of a list of chat messages."""
+    counter = get_token_counter()
+    return sum(counter.count(getattr(message, "content", None)) for message in messages)
+
+
+def model_for_task(llm_client, task: str):
+    """Return the client to call for ``task``: routed for a ModelRouter, otherwise ``llm_client`` itself."""
+    if isinstance(llm_client, ModelRouter):
+        return llm_client.for_task(task)
+    return llm_client
+
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """Return the process-wide router, so latency history is shared by every service."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter(max_workers=int(os.getenv("LLM_HEDGE_WORKERS", "32")))
+    return _router
@@ -0,0 +1,228 @@
+"""Fair-share scheduling of LLM calls across priority classes and tenants."""
+
+import asyncio
+import contextvars
+import itertools
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .metrics import LLM_SCHEDULER_QUEUE_DEPTH, LLM_SCHEDULER_RUNNING, LLM_SCHEDULER_WAIT
+
+# Interactive calls have a learner waiting on them; bulk calls come from batch
+# course creation and prefetch calls generate modules nobody has asked for yet
+DEFAULT_WEIGHTS: Dict[str, float] = {"interactive": 8.0, "bulk": 2.0, "prefetch": 1.0}
+MAX_IDLE_FLOWS = 1024  # finish tags kept for flows without queued calls
+# Threads running generation requests per class (LLM_<PRIORITY>_THREADS); bulk work is
+# kept to its own small pool so it cannot occupy the threads interactive requests need
+DEFAULT_THREADS: Dict[str, int] = {"interactive": 32, "bulk": 8, "prefetch": 4}
+
+
+class RequestClass:
+    """Priority and tenant that the LLM calls of one generation request are scheduled under.
+
+    ``priority`` may be raised while the request runs (e.g. when a learner
+    starts waiting on a prefetch); it applies from the next call on.
+    """
+
+    def __init__(self, priority: str = "interactive", tenant: Optional[str] = None):
+        self.priority = priority
+        self.tenant = tenant
+
+
+_current_class: ContextVar[Optional[RequestClass]] = ContextVar("generation_request_class", default=None)
+
+
+def current_request_class() -> RequestClass:
+    """The class of the current request; unscheduled work counts as interactive without a tenant."""
+    return _current_class.get() or RequestClass()
+
+
+@contextmanager
+def scheduling_scope(request_class: RequestClass) -> Iterator[RequestClass]:
+    """Schedule every LLM call made in this context (and threads started with its copy) under ``request_class``."""
+    token = _current_class.set(request_class)
+    try:
+        yield request_class
+    finally:
+        _current_class.reset(token)
+
+
+class _Ticket:
+    __slots__ = ("priority", "tenant", "start", "seq", "enqueued", "granted")
+
+    def __init__(self, priority: str, tenant: Optional[str], start: float, seq: int):
+        self.priority = priority
+        self.tenant = tenant
+        self.start = start
+        self.seq = seq
+        self.enqueued = time.monotonic()
+        self.granted = threading.Event()
+
+
+class GenerationScheduler:
+    """Hands out LLM call slots in weighted fair order.
+
+    Each (priority, tenant) pair is a flow weighted by its priority's weight
+    times the tenant's weight (default 1). Calls are ordered by start-time
+    fair queuing: a call is tagged ``start = max(virtual time, flow's last
+    finish)`` and ``finish = start + cost / weight``, and a free slot goes to
+    the waiting call with the smallest start tag. A flow that was idle is not
+    owed its unused share, so a learner's next call is served ahead of a
+    tenant's backlog of bulk calls rather than behind it.
+
+    At most ``max_concurrent`` calls run at once, ``reserved_interactive``
+    of them only for interactive calls, and a tenant never has more than
+    ``tenant_max_concurrent`` running; calls without a tenant count as one
+    tenant of their own, so leaving it out does not lift the cap.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 16,
+        tenant_max_concurrent: int = 4,
+        reserved_interactive: int = 2,
+        weights: Optional[Dict[str, float]] = None,
+        tenant_weights: Optional[Dict[str, float]] = None
+    ):
+        if reserved_interactive >= max_concurrent:
+            raise ValueError("reserved_interactive must leave slots for bulk and prefetch calls")
+        self.max_concurrent = max_concurrent
+        self.tenant_max_concurrent = tenant_max_concurrent
+        self.reserved_interactive = reserved_interactive
+        self.weights = weights or DEFAULT_WEIGHTS
+        self.tenant_weights = tenant_weights or {}
+        self._waiting: List[_Ticket] = []
+        self._finish: Dict[tuple, float] = {}
+        self._virtual_time = 0.0
+        self._running = Counter()  # by priority
+        self._running_by_tenant = Counter()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, priority: str = "interactive", tenant: Optional[str] = None, cost: float = 1.0) -> Iterator[float]:
+        """Hold a call slot for the body of the block; yields the seconds spent queued."""
+        ticket = self.acquire(priority, tenant, cost)
+        try:
+            yield time.monotonic() - ticket.enqueued
+        finally:
+            self.release(ticket)
+
+    def acquire(self, priority: str = "interactive", tenant: Optional[str] = None, cost: float = 1.0) -> _Ticket:
+        """Block until the call may start; ``cost`` is its expected size (e.g. tokens)."""
+        if priority not in self.weights:
+            raise ValueError(f"Unknown generation priority '{priority}'")
+        flow = (priority, tenant)
+        weight = self.weights[priority] * self.tenant_weights.get(tenant, 1.0)
+        with self._lock:
+            start = max(self._virtual_time, self._finish.get(flow, 0.0))
+            self._finish[flow] = start + cost / weight
+            if len(self._finish) > MAX_IDLE_FLOWS:
+                self._finish = {f: finish for f, finish in self._finish.items() if finish > self._virtual_time}
+            ticket = _Ticket(priority, tenant, start, next(self._seq))
+            self._waiting.append(ticket)
+            LLM_SCHEDULER_QUEUE_DEPTH.labels(priority).inc()
+            self._dispatch()
+        ticket.granted.wait()
+        LLM_SCHEDULER_WAIT.labels(priority).observe(time.monotonic() - ticket.enqueued)
+        return ticket
+
+    def release(self, ticket: _Ticket):
+        with self._lock:
+            self._running[ticket.priority] -= 1
+            self._running_by_tenant[ticket.tenant] -= 1
+            LLM_SCHEDULER_RUNNING.labels(ticket.priority).dec()
+            self._dispatch()
+
+    def stats(self) -> dict:
+        """Queued and running calls by priority."""
+        with self._lock:
+            return {
+                "queued": dict(Counter(ticket.priority for ticket in self._waiting)),
+                "running": {priority: count for priority, count in self._running.items() if count}
+            }
+
+    def _dispatch(self):
+        """Start waiting calls in start-tag order while slots are free (caller holds the lock)."""
+        while self._waiting and sum(self._running.values()) < self.max_concurrent:
+            eligible = [ticket for ticket in self._waiting if self._may_start(ticket)]
+            if not eligible:
+                return
+            ticket = min(eligible, key=lambda t: (t.start, t.seq))
+            self._waiting.remove(ticket)
+            self._virtual_time = max(self._virtual_time, ticket.start)
+            self._running[ticket.priority] += 1
+            self._running_by_tenant[ticket.tenant] += 1
+            LLM_SCHEDULER_QUEUE_DEPTH.labels(ticket.priority).dec()
+            LLM_SCHEDULER_RUNNING.labels(ticket.priority).inc()
+            ticket.granted.set()
+
+    def _may_start(self, ticket: _Ticket) -> bool:
+        if ticket.priority != "interactive" and sum(self._running.values()) >= self.max_concurrent - self.reserved_interactive:
+            return False
+        return self._running_by_tenant[ticket.tenant] < self.tenant_max_concurrent
+
+
+def _weights_from_env() -> Dict[str, float]:
+    """Priority weights from LLM_PRIORITY_WEIGHTS, e.g. "interactive=8,bulk=2,prefetch=1"."""
+    weights = dict(DEFAULT_WEIGHTS)
+    for item in filter(None, (part.strip() for part in os.getenv("LLM_PRIORITY_WEIGHTS", "").split(","))):
+        priority, _, weight = item.partition("=")
+        if priority.strip() not in weights:
+            raise ValueError(f"Unknown generation priority '{priority.strip()}' in LLM_PRIORITY_WEIGHTS")
+        weights[priority.strip()] = float(weight)
+    return weights
+
+
+_scheduler: Optional[GenerationScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_generation_scheduler() -> GenerationScheduler:
+    """Return the process-wide scheduler, so every service draws on the same LLM capacity."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = GenerationScheduler(
+                    max_concurrent=int(os.getenv("LLM_MAX_CONCURRENT_CALLS", "16")),
+                    tenant_max_concurrent=int(os.getenv("LLM_TENANT_MAX_CONCURRENT_CALLS", "4")),
+                    reserved_interactive=int(os.getenv("LLM_RESERVED_INTERACTIVE_CALLS", "2")),
+                    weights=_weights_from_env()
+                )
+    return _scheduler
+
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def generation_executor(priority: str) -> ThreadPoolExecutor:
+    """Return the process-wide thread pool that runs ``priority``'s generation requests."""
+    if priority not in DEFAULT_THREADS:
+        raise ValueError(f"Unknown generation priority '{priority}'")
+    with _executors_lock:
+        if priority not in _executors:
+            threads = int(os.getenv(f"LLM_{priority.upper()}_THREADS", str(DEFAULT_THREADS[priority])))
+            _executors[priority] = ThreadPoolExecutor(max_workers=threads, thread_name_prefix=f"generation-{priority}")
+        return _executors[priority]
+
+
+async def run_generation(request_class: RequestClass, fn: Callable, *args, **kwargs):
+    """Run a blocking generation call on its class's thread pool, scheduled under ``request_class``.
+
+    Unlike ``asyncio.to_thread``, which shares the event loop's default
+    pool, interactive requests never queue for a thread behind bulk ones.
+    """
+    def call():
+        with scheduling_scope(request_class):
+            return fn(*args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(generation_executor(request_class.priority), contextvars.copy_context().run, call)
@@ -0,0 +1,245 @@
+"""Full-text search over generated lessons (PostgreSQL tsvector or SQLite FTS5)."""
+
+import json
+import re
+from types import SimpleNamespace
+from typing import Iterable, List, Optional
+
+from sqlalchemy import bindparam, text
+
+from .database import DatabaseService
+
+SNIPPET_MARK = "**"  # snippets are markdown, so matches are emphasized the same way
+
+# A lesson's body is its shared lesson_bodies row, or inline for lessons stored without one
+_PG_BODY = "coalesce((SELECT b.content_markdown FROM lesson_bodies b WHERE b.hash = lessons.body_hash), content_markdown, '')"
+# Title matches outrank key concepts, which outrank the body
+_PG_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(CAST(key_concepts AS TEXT), '')), 'B') || "
+    f"setweight(to_tsvector('english', {_PG_BODY}), 'C')"
+)
+# FTS5 entries are keyed by an integer; lessons have a composite key, and their implicit
+# rowid may be renumbered by VACUUM, so each lesson gets a stable INTEGER PRIMARY KEY here
+_SQLITE_KEYS_TABLE = (
+    "CREATE TABLE IF NOT EXISTS lesson_search_keys ("
+    "search_id INTEGER PRIMARY KEY, course_id TEXT NOT NULL, module_id TEXT NOT NULL, lesson_id TEXT NOT NULL, "
+    "UNIQUE (course_id, module_id, lesson_id))"
+)
+_SQLITE_ADD_KEYS = (
+    "INSERT OR IGNORE INTO lesson_search_keys(course_id, module_id, lesson_id) "
+    "SELECT course_id, module_id, id FROM lessons"
+)
+# SQLite indexes this view rather than the lessons table, so shared bodies are searchable
+_SQLITE_DOCUMENTS_VIEW = (
+    "CREATE VIEW IF NOT EXISTS lesson_documents AS "
+    "SELECT k.search_id, l.course_id, l.module_id, l.id, l.title, l.key_concepts, "
+    "coalesce(b.content_markdown, l.content_markdown) AS content_markdown "
+    "FROM lesson_search_keys k "
+    "JOIN lessons l ON l.course_id = k.course_id AND l.module_id = k.module_id AND l.id = k.lesson_id "
+    "LEFT JOIN lesson_bodies b ON b.hash = l.body_hash"
+)
+_SQLITE_WEIGHTS = "10.0, 5.0, 1.0"
+
+
+def _fts5_query(query: str) -> str:
+    """Turn free text into an FTS5 query matching all terms; quoting keeps operators literal."""
+    return " ".join(f'"{term}"' for term in re.findall(r"\w+", query))
+
+
+class LessonSearchIndex:
+    """Ranked full-text search over lesson titles, key concepts and bodies.
+
+    On PostgreSQL, lessons carry a weighted ``search_vector`` column with a GIN
+    index (migration 011). On SQLite, an external-content FTS5 table over the
+    ``lesson_documents`` view (lessons joined with their shared bodies) is
+    created on first use and backfilled from existing lessons; its entries
+    are keyed by ``lesson_search_keys.search_id``, which stays fixed for the
+    life of a lesson. Either way
+    ``index_module`` updates the index in the transaction that saves a
+    module's lessons.
+    """
+
+    def __init__(self, db_service: DatabaseService):
+        self.db_service = db_service
+        self.dialect = db_service.engine.dialect.name
+        self._schema_ready = self.dialect != "sqlite"
+
+    def index_module(self, session, course_id: str, module_id: str):
+        """Index a module's lessons after they are added to ``session``."""
+        self.ensure_schema()
+        session.flush()
+        if self.dialect == "postgresql":
+            session.execute(text(
+                f"UPDATE lessons SET search_vector = {_PG_DOCUMENT} "
+                "WHERE course_id = :course_id AND module_id = :module_id"
+            ), {"course_id": course_id, "module_id": module_id})
+        elif self.dialect == "sqlite":
+            params = {"course_id": course_id, "module_id": module_id}
+            session.execute(text(_SQLITE_ADD_KEYS + " WHERE course_id = :course_id AND module_id = :module_id"), params)
+            session.execute(text(
+                "INSERT INTO lesson_search(rowid, title, key_concepts, content_markdown) "
+                "SELECT search_id, title, key_concepts, content_markdown FROM lesson_documents "
+                "WHERE course_id = :course_id AND module_id = :module_id"
+            ), params)
+
+    def index_courses(self, session, course_ids: Iterable[str], refresh: bool = False):
+        """Index the lessons of ``course_ids`` that are not indexed yet, e.g. after a bulk import.
+
+        ``refresh`` re-indexes the others too, for lessons whose content was
+        overwritten; on SQLite those must have been removed with
+        ``unindex_course`` before the overwrite, while their old content was
+        still there to delete.
+        """
+        course_ids = list(course_ids)
+        if not course_ids:
+            return
+        self.ensure_schema()
+        params = {"course_ids": course_ids}
+        if self.dialect == "postgresql":
+            stale = "" if refresh else "AND search_vector IS NULL"
+            session.execute(text(
+                f"UPDATE lessons SET search_vector = {_PG_DOCUMENT} WHERE course_id IN :course_ids {stale}"
+            ).bindparams(bindparam("course_ids", expanding=True)), params)
+        elif self.dialect == "sqlite":
+            # New keys are numbered after every existing one, so they mark the lessons still to index
+            params["indexed"] = session.execute(text("SELECT coalesce(max(search_id), 0) FROM lesson_search_keys")).scalar()
+            session.execute(text(_SQLITE_ADD_KEYS + " WHERE course_id IN :course_ids").bindparams(
+                bindparam("course_ids", expanding=True)
+            ), params)
+            session.execute(text(
+                "INSERT INTO lesson_search(rowid, title, key_concepts, content_markdown) "
+                "SELECT search_id, title, key_concepts, content_markdown FROM lesson_documents "
+                "WHERE search_id > :indexed AND course_id IN :course_ids"
+            ).bindparams(bindparam("course_ids", expanding=True)), params)
+
+    def unindex_course(self, session, course_id: str):
+        """Remove a course's lessons from the index before they are deleted in ``session``."""
+        self.ensure_schema()
+        if self.dialect == "sqlite":
+            # External-content FTS5 tables need the old values to delete an entry
+            session.execute(text(
+                "INSERT INTO lesson_search(lesson_search, rowid, title, key_concepts, content_markdown) "
+                "SELECT 'delete', search_id, title, key_concepts, content_markdown FROM lesson_documents "
+                "WHERE course_id = :course_id"
+            ), {"course_id": course_id})
+            session.execute(text("DELETE FROM lesson_search_keys WHERE course_id = :course_id"), {"course_id": course_id})
+
+    def search(self, query: str, limit: int = 20, offset: int = 0, course_id: Optional[str] = None) -> tuple[List[dict], bool]:
+        """Return (hits, has_more) for a page of lessons matching every term, best first."""
+        self.ensure_schema()
+        params = {"query": query, "limit": limit + 1, "offset": offset, "course_id": course_id}
+
+        with self.db_service.get_session() as session:
+            if self.dialect == "postgresql":
+                rows = self._search_postgresql(session, params)
+            elif self.dialect == "sqlite":
+                params["query"] = _fts5_query(query)
+                if not params["query"]:
+                    return [], False
+                rows = self._search_sqlite(session, params)
+            else:
+                raise NotImplementedError(f"Search is not supported for dialect '{self.dialect}'")
+
+        hits = [
+            {
+                "course_id": row.course_id,
+                "module_id": row.module_id,
+                "lesson_id": row.id,
+                "title": row.title,
+                "key_concepts": json.loads(row.key_concepts) if isinstance(row.key_concepts, str) else row.key_concepts or [],
+                "snippet": row.snippet,
+                "rank": float(row.rank)
+            }
+            for row in rows[:limit]
+        ]
+        return hits, len(rows) > limit
+
+    def _search_postgresql(self, session, params: dict) -> list:
+        course_filter = "AND l.course_id = :course_id" if params["course_id"] else ""
+        # Headlines are costly, so they are only built for the page being returned
+        return session.execute(text(f"""
+            SELECT course_id, module_id, id, title, key_concepts, rank,
+                   ts_headline('english', coalesce(content_markdown, ''), q,
+                               'StartSel={SNIPPET_MARK}, StopSel={SNIPPET_MARK}, MaxWords=30, MinWords=10') AS snippet
+            FROM (
+                SELECT l.course_id, l.module_id, l.id, l.title, l.key_concepts,
+                       coalesce(b.content_markdown, l.content_markdown) AS content_markdown, q,
+                       ts_rank_cd(l.search_vector, q) AS rank
+                FROM lessons l LEFT JOIN lesson_bodies b ON b.hash = l.body_hash,
+                     websearch_to_tsquery('english', :query) q
+                WHERE l.search_vector @@ q {course_filter}
+                ORDER BY rank DESC, l.id
+                LIMIT :limit OFFSET :offset
+            ) hits
+            ORDER BY rank DESC, id
+        """), params).all()
+
+    def _search_sqlite(self, session, params: dict) -> list:
+        course_filter = (
+            "AND rowid IN (SELECT search_id FROM lesson_search_keys WHERE course_id = :course_id)" if params["course_id"] else ""
+        )
+        # Rank on the FTS table alone, then join lessons and build snippets for the page only
+        ranked = session.execute(text(f"""
+            SELECT rowid, -bm25(lesson_search, {_SQLITE_WEIGHTS}) AS rank
+            FROM lesson_search
+            WHERE lesson_search MATCH :query {course_filter}
+            ORDER BY bm25(lesson_search, {_SQLITE_WEIGHTS}), rowid
+            LIMIT :limit OFFSET :offset
+        """), params).all()
+        if not ranked:
+            return []
+        page = session.execute(text(f"""
+            SELECT k.search_id AS rowid, l.course_id, l.module_id, l.id, l.title, l.key_concepts,
+                   snippet(lesson_search, 2, '{SNIPPET_MARK}', '{SNIPPET_MARK}', '...', 24) AS snippet
+            FROM lesson_search
+            JOIN lesson_search_keys k ON k.search_id = lesson_search.rowid
+            JOIN lessons l ON l.course_id = k.course_id AND l.module_id = k.module_id AND l.id = k.lesson_id
+            WHERE lesson_search MATCH :query AND lesson_search.rowid IN :rowids
+        """).bindparams(bindparam("rowids", expanding=True)), {
+            "query": params["query"], "rowids": [row.rowid for row in ranked]
+        }).all()
+        rows = {row.rowid: row for row in page}
+        return [
+            SimpleNamespace(**rows[hit.rowid]._asdict(), rank=hit.rank)
+            for hit in ranked if hit.rowid in rows
+        ]
+
+    def rebuild(self):
+        """Re-index every lesson, e.g. after lessons were edited in the database by hand."""
+        self.ensure_schema()
+        with self.db_service.get_session() as session:
+            if self.dialect == "postgresql":
+                session.execute(text(f"UPDATE lessons SET search_vector = {_PG_DOCUMENT}"))
+            elif self.dialect == "sqlite":
+                session.execute(text(_SQLITE_ADD_KEYS))
+                session.execute(text(
+                    "DELETE FROM lesson_search_keys WHERE NOT EXISTS (SELECT 1 FROM lessons l WHERE "
+                    "l.course_id = lesson_search_keys.course_id AND l.module_id = lesson_search_keys.module_id "
+                    "AND l.id = lesson_search_keys.lesson_id)"
+                ))
+                session.execute(text("INSERT INTO lesson_search(lesson_search) VALUES ('rebuild')"))
+            session.commit()
+
+    def ensure_schema(self):
+        """Create and backfill the SQLite FTS table once, outside any caller's write transaction."""
+        if self._schema_ready:
+            return
+        with self.db_service.engine.begin() as connection:
+            definition = connection.execute(text(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'lesson_search'"
+            )).scalar()
+            if definition is None or "search_id" not in definition:
+                # Earlier indexes were keyed by the lessons' implicit rowid (or read the lessons table directly)
+                connection.execute(text("DROP TABLE IF EXISTS lesson_search"))
+                connection.execute(text("DROP VIEW IF EXISTS lesson_documents"))
+                connection.execute(text(_SQLITE_KEYS_TABLE))
+                connection.execute(text(_SQLITE_ADD_KEYS))
+                connection.execute(text(_SQLITE_DOCUMENTS_VIEW))
+                connection.execute(text(
+                    "CREATE VIRTUAL TABLE lesson_search USING fts5("
+                    "title, key_concepts, content_markdown, "
+                    "content='lesson_documents', content_rowid='search_id', tokenize='porter unicode61')"
+                ))
+                connection.execute(text("INSERT INTO lesson_search(lesson_search) VALUES ('rebuild')"))
+        self._schema_ready = True
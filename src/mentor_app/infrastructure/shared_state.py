@@ -0,0 +1,199 @@
+"""Shared state backends for caches, session state and locks across worker processes."""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+
+class LockTimeout(Exception):
+    pass
+
+
+class SharedStateBackend(ABC):
+    """Key/value store with TTLs and advisory locks.
+
+    Values must be JSON-serializable so every backend can share them between
+    processes. Keys are plain strings; callers namespace them (``session:<id>``).
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value for ``key`` or None if missing/expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store ``value`` under ``key``, expiring after ``ttl`` seconds if given."""
+
+    @abstractmethod
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Store ``value`` only if ``key`` is absent; return True if stored."""
+
+    @abstractmethod
+    def delete(self, key: str, expected: Any = None) -> bool:
+        """Delete ``key`` (only if it holds ``expected``, when given)."""
+
+    @contextmanager
+    def lock(self, name: str, timeout: float = 10.0, ttl: float = 60.0):
+        """Hold an exclusive lock shared by all processes using this backend.
+
+        ``ttl`` bounds how long a crashed holder can block others.
+        """
+        key, token = f"lock:{name}", uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        delay = 0.005
+        while not self.add(key, token, ttl):
+            if time.monotonic() >= deadline:
+                raise LockTimeout(f"Could not acquire lock '{name}' within {timeout}s")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        try:
+            yield
+        finally:
+            self.delete(key, expected=token)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: Optional[float] = None, lock_timeout: float = 300.0) -> Any:
+        """Return the cached value or compute it once across all workers."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self.lock(key, timeout=lock_timeout, ttl=lock_timeout):
+            value = self.get(key)
+            if value is None:
+                value = compute()
+                self.set(key, value, ttl)
+            return value
+
+
+class InMemoryStateBackend(SharedStateBackend):
+    """Process-local backend for single-worker deployments and tests."""
+
+    def __init__(self):
+        self._data = {}
+        self._mutex = threading.Lock()
+
+    def _live(self, key: str, now: float):
+        entry = self._data.get(key)
+        if entry and entry[1] is not None and entry[1] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._mutex:
+            entry = self._live(key, time.time())
+            return json.loads(entry[0]) if entry else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._mutex:
+            self._data[key] = (json.dumps(value), time.time() + ttl if ttl else None)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        now = time.time()
+        with self._mutex:
+            if self._live(key, now):
+                return False
+            self._data[key] = (json.dumps(value), now + ttl if ttl else None)
+            return True
+
+    def delete(self, key: str, expected: Any = None) -> bool:
+        with self._mutex:
+            entry = self._data.get(key)
+            if not entry or (expected is not None and json.loads(entry[0]) != expected):
+                return False
+            del self._data[key]
+            return True
+
+
+class SQLiteStateBackend(SharedStateBackend):
+    """Backend on a local SQLite file shared by all worker processes on a host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS shared_state ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._connection().execute(
+            "SELECT value FROM shared_state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._connection().execute(
+            "INSERT OR REPLACE INTO shared_state (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + ttl if ttl else None),
+        )
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM shared_state WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO shared_state (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), now + ttl if ttl else None),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def delete(self, key: str, expected: Any = None) -> bool:
+        if expected is None:
+            cursor = self._connection().execute("DELETE FROM shared_state WHERE key = ?", (key,))
+        else:
+            cursor = self._connection().execute(
+                "DELETE FROM shared_state WHERE key = ? AND value = ?", (key, json.dumps(expected))
+            )
+        return cursor.rowcount == 1
+
+    def purge_expired(self) -> int:
+        """Remove expired entries; returns the number deleted."""
+        cursor = self._connection().execute(
+            "DELETE FROM shared_state WHERE expires_at <= ?", (time.time(),)
+        )
+        return cursor.rowcount
+
+
+_backend: Optional[SharedStateBackend] = None
+_backend_lock = threading.Lock()
+
+
+def create_state_backend(url: str) -> SharedStateBackend:
+    """Create a backend from a URL: ``memory://`` or ``sqlite:///path/to/state.db``."""
+    if url.startswith("memory://"):
+        return InMemoryStateBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteStateBackend(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported shared state URL: {url}")
+
+
+def get_state_backend() -> SharedStateBackend:
+    """Return the process-wide backend configured by ``SHARED_STATE_URL``."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_state_backend(os.getenv("SHARED_STATE_URL", "memory://"))
+    return _backend
@@ -0,0 +1,215 @@
+"""Token estimation, prompt budgets and per-request LLM usage accounting."""
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional
+
+DEFAULT_ENCODING = "o200k_base"  # gpt-4o and later
+CHARS_PER_TOKEN = 4  # rough average for English prose and code
+TRUNCATION_MARKER = " ..."
+
+
+class TokenCounter:
+    """Counts tokens offline with tiktoken, or estimates them when it is unavailable.
+
+    tiktoken reads its BPE ranks from ``TIKTOKEN_CACHE_DIR`` and only
+    downloads them when the cache is empty, so hosts without network access
+    need a populated cache. If the package or the encoding cannot be loaded,
+    counts fall back to ``CHARS_PER_TOKEN`` characters per token.
+    """
+
+    def __init__(self, encoding_name: Optional[str] = None):
+        self.encoding_name = encoding_name or os.getenv("TOKEN_ENCODING", DEFAULT_ENCODING)
+        self._encoding = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def exact(self) -> bool:
+        """Whether counts come from the real tokenizer rather than the estimate."""
+        return self._load() is not None
+
+    def count(self, text: Optional[str]) -> int:
+        if not text:
+            return 0
+        encoding = self._load()
+        if encoding is None:
+            return math.ceil(len(text) / CHARS_PER_TOKEN)
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to at most ``max_tokens`` tokens, marking the cut; "" if nothing fits."""
+        if self.count(text) <= max_tokens:
+            return text
+        keep = max_tokens - self.count(TRUNCATION_MARKER)
+        if keep <= 0:
+            return ""
+        encoding = self._load()
+        if encoding is None:
+            head = text[:keep * CHARS_PER_TOKEN]
+        else:
+            head = encoding.decode(encoding.encode(text, disallowed_special=())[:keep])
+        return head.rstrip() + TRUNCATION_MARKER
+
+    def _load(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    try:
+                        import tiktoken
+                        self._encoding = tiktoken.get_encoding(self.encoding_name)
+                    except Exception as e:
+                        print(f"Token counts are estimated, tokenizer '{self.encoding_name}' unavailable: {e}")
+                    self._loaded = True
+        return self._encoding
+
+
+_counter: Optional[TokenCounter] = None
+_counter_lock = threading.Lock()
+
+
+def get_token_counter() -> TokenCounter:
+    """Return the process-wide token counter."""
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                _counter = TokenCounter()
+    return _counter
+
+
+class TokenBudget:
+    """Prompt and expected response size for one kind of LLM call."""
+
+    def __init__(self, max_prompt_tokens: int, max_response_tokens: int):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_response_tokens = max_response_tokens
+
+
+# Keyed by the task label passed to track_llm_call; response sizes follow the prompts' length requirements
+BUDGETS: Dict[str, TokenBudget] = {
+    "syllabus": TokenBudget(1500, 3000),
+    "module_structure": TokenBudget(1500, 2000),
+    "bridge_modules": TokenBudget(1500, 2000),
+    "quiz": TokenBudget(1500, 3000),
+    "theory": TokenBudget(1500, 2500),
+    "practice": TokenBudget(1500, 2500),
+    "assessment": TokenBudget(1500, 2000),
+}
+DEFAULT_BUDGET = TokenBudget(2000, 2500)
+
+
+def get_budget(task: str) -> TokenBudget:
+    return BUDGETS.get(task, DEFAULT_BUDGET)
+
+
+def fit_prompt(task: str, render: Callable[[dict], str], fields: dict, optional: Dict[str, str]) -> str:
+    """Render a prompt, shrinking optional context until it fits the task's prompt budget.
+
+    ``optional`` maps the names of fields that may be shortened, least
+    important first, to the text that replaces them when dropped entirely.
+    Required fields are never touched, so a prompt can still exceed the
+    budget once every optional field is gone.
+    """
+    counter = get_token_counter()
+    limit = get_budget(task).max_prompt_tokens
+    prompt = render(fields)
+    total = counter.count(prompt)
+    fields = dict(fields)
+    for name, replacement in optional.items():
+        if total <= limit:
+            break
+        value = fields[name] or ""
+        size = counter.count(value)
+        if not size:
+            continue
+        shortened = counter.truncate(value, size - (total - limit))
+        fields[name] = shortened or replacement
+        prompt = render(fields)
+        total = counter.count(prompt)
+    return prompt
+
+
+class GenerationBudgetExceeded(Exception):
+    """A request would exceed its token or time ceiling."""
+
+
+class RequestUsage:
+    """LLM usage accumulated while serving one generation request.
+
+    ``max_tokens`` caps prompt plus completion tokens across every call in
+    the request and ``max_seconds`` caps its wall-clock time; either may be
+    None. Each call is checked before it is made against its prompt size and
+    the response size its budget allows, so a call that could overshoot the
+    ceiling is never sent.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, max_seconds: Optional[float] = None):
+        self.max_tokens = max_tokens
+        self.max_seconds = max_seconds
+        self.started = time.monotonic()
+        self.by_task: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(task["prompt_tokens"] + task["completion_tokens"] for task in self.by_task.values())
+
+    @property
+    def calls(self) -> int:
+        return sum(task["calls"] for task in self.by_task.values())
+
+    def reserve(self, task: str, prompt_tokens: int, calls: int = 1):
+        """Raise GenerationBudgetExceeded if ``calls`` calls of this size could break a ceiling."""
+        if self.max_seconds is not None and time.monotonic() - self.started > self.max_seconds:
+            raise GenerationBudgetExceeded(f"Request exceeded its {self.max_seconds:g}s time ceiling")
+        if self.max_tokens is not None:
+            projected = self.total_tokens + calls * (prompt_tokens + get_budget(task).max_response_tokens)
+            if projected > self.max_tokens:
+                raise GenerationBudgetExceeded(
+                    f"A {task} call would bring the request to ~{projected} tokens, over its ceiling of {self.max_tokens}"
+                )
+
+    def record(self, task: str, prompt_tokens: int, completion_tokens: int, seconds: float, calls: int = 1):
+        """Add a call's usage; ``calls=0`` adds to a call already counted (e.g. its late completion)."""
+        with self._lock:
+            usage = self.by_task.setdefault(
+                task, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "llm_seconds": 0.0}
+            )
+            usage["calls"] += calls
+            usage["prompt_tokens"] += prompt_tokens
+            usage["completion_tokens"] += completion_tokens
+            usage["llm_seconds"] += seconds
+
+
+_current_usage: ContextVar[Optional[RequestUsage]] = ContextVar("llm_request_usage", default=None)
+
+
+def current_usage() -> Optional[RequestUsage]:
+    return _current_usage.get()
+
+
+@contextmanager
+def usage_scope(max_tokens: Optional[int] = None, max_seconds: Optional[float] = None) -> Iterator[RequestUsage]:
+    """Account every LLM call made in this context (and threads started with its copy) to a new RequestUsage."""
+    usage = RequestUsage(max_tokens, max_seconds)
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def request_ceilings() -> dict:
+    """Per-request ceilings from LLM_MAX_TOKENS_PER_REQUEST and LLM_MAX_SECONDS_PER_REQUEST (unset: none)."""
+    max_tokens = os.getenv("LLM_MAX_TOKENS_PER_REQUEST")
+    max_seconds = os.getenv("LLM_MAX_SECONDS_PER_REQUEST")
+    return {
+        "max_tokens": int(max_tokens) if max_tokens else None,
+        "max_seconds": float(max_seconds) if max_seconds else None,
+    }
+
@@ -0,0 +1,263 @@
+"""Per-run generation traces with nested stage spans and sampled CPU profiles."""
+
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional
+
+MAX_ERROR_LENGTH = 1000
+
+
+class Span:
+    """One timed stage of a trace, e.g. an LLM call or the database save.
+
+    ``outcome`` is "ok" unless the stage raised ("error") or the code that
+    owns it reports something else (e.g. "slow"). Attributes hold whatever
+    the stage wants to report, such as token counts.
+    """
+
+    def __init__(self, name: str, attributes: dict, span_id: int = 0, parent_id: Optional[int] = None, offset: float = 0.0):
+        self.name = name
+        self.attributes = attributes
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.offset = offset  # seconds from the start of the trace
+        self.duration: Optional[float] = None
+        self.outcome = "ok"
+        self.error: Optional[str] = None
+        self._start = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def fail(self, error: BaseException):
+        self.outcome = "error"
+        self.error = f"{type(error).__name__}: {error}"[:MAX_ERROR_LENGTH]
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._start
+
+
+class Trace(Span):
+    """Root of one generation run: the operation, what it generated and every span inside it."""
+
+    def __init__(self, operation: str, course_id: Optional[str] = None, module_id: Optional[str] = None, **attributes):
+        super().__init__(operation, attributes)
+        self.id = uuid.uuid4().hex
+        self.course_id = course_id
+        self.module_id = module_id
+        self.started_at = datetime.utcnow()
+        self.profile: Optional[str] = None
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def set(self, course_id: Optional[str] = None, module_id: Optional[str] = None, **attributes):
+        if course_id is not None:
+            self.course_id = course_id
+        if module_id is not None:
+            self.module_id = module_id
+        super().set(**attributes)
+
+    def start_span(self, name: str, parent: Optional[Span], attributes: dict) -> Span:
+        # Spans may be opened from hedge threads, so ids are handed out under the lock
+        with self._lock:
+            span = Span(
+                name, attributes, span_id=len(self.spans) + 1,
+                parent_id=parent.span_id if parent is not None and parent is not self else None,
+                offset=time.perf_counter() - self._start
+            )
+            self.spans.append(span)
+        return span
+
+    def finished_spans(self) -> List[Span]:
+        with self._lock:
+            return [span for span in self.spans if span.duration is not None]
+
+    def llm_totals(self) -> dict:
+        """Calls and tokens across the trace's ``llm_call`` spans."""
+        calls = [span for span in self.finished_spans() if span.name == "llm_call"]
+        return {
+            "llm_calls": len(calls),
+            "prompt_tokens": sum(span.attributes.get("prompt_tokens", 0) for span in calls),
+            "completion_tokens": sum(span.attributes.get("completion_tokens", 0) for span in calls),
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("generation_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("generation_span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """Time a stage as a child of the current span; outside a trace the span is simply discarded."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield Span(name, attributes)
+        return
+    current = trace.start_span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.fail(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+
+
+def annotate(**attributes):
+    """Add attributes to the innermost open span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+class CProfileHook:
+    """Profiles the thread running a trace with cProfile.
+
+    Work the run hands to other threads through ``profiled`` (such as LLM
+    calls on the routing pools) is profiled in those threads and merged into
+    the report. ``stop()`` returns the ``limit`` functions with the highest
+    cumulative time as pstats text. Only one profile runs at a time per
+    process; traces that start while another is being profiled are not
+    profiled.
+    """
+
+    _active = threading.Lock()
+
+    def __init__(self, limit: int = 40):
+        self.limit = limit
+        self._profile: Optional[cProfile.Profile] = None
+        self._thread_profiles: List[cProfile.Profile] = []
+        self._token = None
+        self._lock = threading.Lock()
+
+    def start(self) -> bool:
+        if not self._active.acquire(blocking=False):
+            return False
+        self._profile = cProfile.Profile()
+        try:
+            self._profile.enable()
+        except ValueError:  # another profiler is attached to the interpreter
+            self._profile = None
+            self._active.release()
+            return False
+        self._token = _current_profiler.set(self)
+        return True
+
+    def run(self, fn: Callable, *args):
+        """Call ``fn`` with a profile of the current thread that is merged into this one's report."""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # e.g. the interpreter's profiler already covers every thread
+            return fn(*args)
+        try:
+            return fn(*args)
+        finally:
+            profile.disable()
+            with self._lock:
+                if self._profile is not None:  # calls still running when the trace ends are left out
+                    self._thread_profiles.append(profile)
+
+    def stop(self) -> Optional[str]:
+        if self._profile is None:
+            return None
+        self._profile.disable()
+        _current_profiler.reset(self._token)
+        with self._lock:
+            stats = pstats.Stats(self._profile, stream=io.StringIO())
+            for profile in self._thread_profiles:
+                stats.add(profile)
+            self._profile, self._thread_profiles = None, []
+        self._active.release()
+        stats.sort_stats("cumulative").print_stats(self.limit)
+        return stats.stream.getvalue()
+
+
+_current_profiler: ContextVar[Optional[CProfileHook]] = ContextVar("generation_profiler", default=None)
+
+
+def profiled(fn: Callable, *args):
+    """Call ``fn`` under the current run's profiler, if it is being profiled; for work handed to other threads."""
+    profiler = _current_profiler.get()
+    if profiler is None:
+        return fn(*args)
+    return profiler.run(fn, *args)
+
+
+class Tracer:
+    """Records generation runs as traces and hands each finished trace to ``sink``.
+
+    A trace started while another is active becomes a span of the outer one,
+    so nested operations are recorded once. ``profile_rate`` is the fraction
+    of traces (0 to 1) that are CPU-profiled with ``profiler_factory()``,
+    whose text report is stored with the trace. Failures to store a trace are
+    reported and never fail the run itself.
+    """
+
+    def __init__(
+        self,
+        sink: Optional[Callable[[Trace], object]] = None,
+        profile_rate: float = 0.0,
+        profiler_factory: Callable = CProfileHook,
+        enabled: bool = True
+    ):
+        self.sink = sink
+        self.profile_rate = profile_rate
+        self.profiler_factory = profiler_factory
+        self.enabled = enabled
+
+    @contextmanager
+    def trace(self, operation: str, course_id: Optional[str] = None, module_id: Optional[str] = None, **attributes) -> Iterator[Span]:
+        if not self.enabled or _current_trace.get() is not None:
+            with span(operation, course_id=course_id, module_id=module_id, **attributes) as nested:
+                yield nested
+            return
+
+        trace = Trace(operation, course_id, module_id, **attributes)
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(trace)
+        profiler = self.profiler_factory() if self.profile_rate and random.random() < self.profile_rate else None
+        profiling = profiler is not None and profiler.start()
+        try:
+            yield trace
+        except BaseException as e:
+            trace.fail(e)
+            raise
+        finally:
+            if profiling:
+                trace.profile = profiler.stop()
+            trace.finish()
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            self._save(trace)
+
+    def _save(self, trace: Trace):
+        if self.sink is None:
+            return
+        try:
+            self.sink(trace)
+        except Exception as e:
+            print(f"Failed to save generation trace {trace.id}: {e}")
+
+
+def trace_settings() -> dict:
+    """Tracer settings from TRACE_GENERATIONS ("0" disables) and TRACE_PROFILE_RATE (default 0)."""
+    return {
+        "enabled": os.getenv("TRACE_GENERATIONS", "1") != "0",
+        "profile_rate": float(os.getenv("TRACE_PROFILE_RATE", "0")),
+    }
@@ -3,15 +3,47 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from mentor_app.api.catalog import router as catalog_router
 from mentor_app.api.courses import router as courses_router
 from mentor_app.api.modules import router as modules_router
+from mentor_app.api.lessons import router as lessons_router
+from mentor_app.api.navigation import router as navigation_router, coordinator
+from mentor_app.api.progress import router as progress_router, event_writer
+from mentor_app.api.reports import router as reports_router, report_generator
+from mentor_app.api.search import router as search_router
+from mentor_app.api.traces import router as traces_router
+from mentor_app.builder.grader import get_practice_grader
+from mentor_app.builder.sandbox import get_code_sandbox
+from mentor_app.infrastructure.metrics import MetricsMiddleware, render_metrics
 
-app = FastAPI(title="AI Mentor", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    report_generator.start_periodic_refresh()
+    get_practice_grader().start()
+    yield
+    report_generator.stop_periodic_refresh()
+    coordinator.prefetcher.close()
+    get_code_sandbox().close()
+    get_practice_grader().close()
+    coordinator.session_mgr.close()
+    # Write buffered progress events before the worker exits
+    event_writer.close()
+
+app = FastAPI(title="AI Mentor", version="0.1.0", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 # Include API routers
 app.include_router(courses_router)
 app.include_router(modules_router)
+app.include_router(lessons_router)
+app.include_router(navigation_router)
+app.include_router(progress_router)
+app.include_router(reports_router)
+app.include_router(search_router)
+app.include_router(catalog_router)
+app.include_router(traces_router)
 
 @app.get("/")
 async def root():
@@ -20,3 +52,9 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Expose Prometheus metrics."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
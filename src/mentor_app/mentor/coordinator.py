@@ -1,22 +1,150 @@
 """Main coordinator - orchestrates the learning process."""
 
+from typing import Optional
+
 from mentor_app.architect.service import ArchitectService
+from mentor_app.infrastructure.event_writer import ProgressEventWriter
+from mentor_app.infrastructure.repositories import CourseRepository, ProgressRepository
+from mentor_app.mentor.learning_path import LearningPath, LearningPathIndex
+from mentor_app.mentor.prefetch import ModulePrefetcher
+from mentor_app.mentor.session_mgr import SessionManager, SessionState
 
 class MentorCoordinator:
-    def __init__(self, architect: ArchitectService, repo):
+    def __init__(
+        self,
+        architect: ArchitectService,
+        repo: CourseRepository,
+        session_mgr: Optional[SessionManager] = None,
+        progress_repo: Optional[ProgressRepository] = None,
+        path_index: Optional[LearningPathIndex] = None,
+        prefetcher: Optional[ModulePrefetcher] = None,
+        event_writer: Optional[ProgressEventWriter] = None
+    ):
         self.architect = architect
         self.repo = repo
-    
+        self.session_mgr = session_mgr or SessionManager(progress_repo=progress_repo)
+        self.progress_repo = progress_repo
+        self.path_index = path_index or LearningPathIndex(repo)
+        self.prefetcher = prefetcher
+        self.event_writer = event_writer  # records completions as progress events
+
     def start_new_journey(self, user_id: str, topic: str):
         """Initialize a new learning journey for a user."""
         plan = self.architect.create_syllabus(topic)
-        self.repo.save_course(user_id, plan)
+        course_id = self.repo.save_course_plan(plan)
+        self.session_mgr.create_session(user_id, course_id)
         return f"Course for {topic} is ready!"
-    
-    def get_next_lesson(self, user_id: str):
-        """Get the next lesson for the user."""
-        pass
-    
-    def process_user_response(self, user_id: str, response: str):
-        """Process user's answer and determine next action."""
-        pass
+
+    def get_next_lesson(self, user_id: str, course_id: Optional[str] = None) -> Optional[dict]:
+        """Get the next lesson for the user.
+
+        Returns None when the course is finished; ``lesson_id`` is None when
+        the next module's lessons have not been generated yet.
+        """
+        session, path = self._load(user_id, course_id)
+        step = path.next_step(session.completed)
+        if step is None:
+            self.session_mgr.set_state(user_id, "completed")
+            return None
+        module_id, lesson_id = step
+        self.session_mgr.set_state(user_id, "in_lesson" if lesson_id else "awaiting_module", lesson_id, module_id)
+        if self.prefetcher:
+            if lesson_id is None:
+                self.prefetcher.prefetch(path.course_id, module_id, user_id)
+            else:
+                self.prefetcher.on_position(user_id, path, module_id, session.completed)
+        return self._step(path, session, module_id, lesson_id)
+
+    def get_next_module(self, user_id: str, course_id: Optional[str] = None) -> Optional[dict]:
+        """Get the module the user should work on next."""
+        session, path = self._load(user_id, course_id)
+        module_id = path.next_module(session.completed)
+        if module_id is None:
+            return None
+        return {
+            "module_id": module_id,
+            "is_available": path.is_module_unlocked(session.completed, module_id),
+            "prerequisites_met": path.is_module_unlocked(session.completed, module_id),
+            "dependencies_completed": [
+                dep for dep in path.dependencies.get(module_id, [])
+                if path.is_module_completed(session.completed, dep)
+            ]
+        }
+
+    def get_next_lesson_in_module(self, user_id: str, module_id: str, course_id: Optional[str] = None) -> Optional[dict]:
+        """Get the first lesson of a module the user has not completed."""
+        session, path = self._load(user_id, course_id)
+        for lesson_id in path.lesson_ids(module_id):
+            if not path.is_lesson_completed(session.completed, module_id, lesson_id):
+                return self._step(path, session, module_id, lesson_id)
+        return None
+
+    def mark_lesson_completed(self, user_id: str, course_id: str, module_id: str, lesson_id: str):
+        """Set a completed lesson's bit in the user's session, if the session tracks that course."""
+        session = self.session_mgr.get_session_state(user_id)
+        if session is None or session.course_id != course_id or not session.path_version:
+            return
+        # Re-syncs the bitset if the path changed; the stored aggregates may lag this event
+        session, path = self._load(user_id, course_id)
+        completed = path.mark_completed(session.completed, module_id, lesson_id)
+        self.session_mgr.set_completion(user_id, course_id, completed, path.version)
+        if self.prefetcher:
+            self.prefetcher.on_position(user_id, path, module_id, completed)
+
+    def process_user_response(self, user_id: str, response: str) -> dict:
+        """Process user's answer and determine next action.
+
+        The response finishes the current lesson; the learner moves on to the
+        next lesson in the path. The completion is recorded as a progress
+        event, so it reaches the aggregates that sessions are rebuilt from.
+        """
+        session = self.session_mgr.get_session_state(user_id)
+        if session is None or session.course_id is None:
+            raise ValueError(f"No course selected for user '{user_id}'")
+
+        self.session_mgr.add_context(user_id, response)
+        if session.lesson_id and session.module_id:
+            if self.event_writer is not None:
+                self.event_writer.record(
+                    user_id, session.course_id, session.module_id, session.lesson_id, "lesson_completed"
+                )
+            self.mark_lesson_completed(user_id, session.course_id, session.module_id, session.lesson_id)
+
+        next_lesson = self.get_next_lesson(user_id, session.course_id)
+        if next_lesson is None:
+            return {"action": "course_completed", "course_id": session.course_id}
+        action = "next_lesson" if next_lesson["lesson_id"] else "generate_module"
+        return {"action": action, **next_lesson}
+
+    def _load(self, user_id: str, course_id: Optional[str]) -> tuple[SessionState, LearningPath]:
+        """Return the user's session with a completion bitset matching the course's current path."""
+        session = self.session_mgr.get_session_state(user_id) or self.session_mgr.create_session(user_id, course_id)
+        course_id = course_id or session.course_id
+        if course_id is None:
+            raise ValueError(f"No course selected for user '{user_id}'")
+
+        same_course = session.course_id == course_id
+        if not same_course and self.prefetcher:
+            self.prefetcher.release(user_id, keep_course_id=course_id)
+        path = self.path_index.get(course_id, session.path_version if same_course else 0)
+        if path is None:
+            raise LookupError(f"Course with id '{course_id}' not found")
+        if not same_course or session.path_version != path.version:
+            # Bit positions shift when lessons are added, so rebuild from the stored aggregates
+            completed = []
+            if self.progress_repo is not None:
+                completed = [
+                    (row.module_id, lesson_id)
+                    for row in self.progress_repo.get_module_progress(user_id, course_id)
+                    for lesson_id in row.completed_lesson_ids
+                ]
+            session = self.session_mgr.set_completion(user_id, course_id, path.completion_bits(completed), path.version)
+        return session, path
+
+    def _step(self, path: LearningPath, session: SessionState, module_id: str, lesson_id: Optional[str]) -> dict:
+        return {
+            "course_id": path.course_id,
+            "module_id": module_id,
+            "lesson_id": lesson_id,
+            "is_available": lesson_id is not None and path.is_module_unlocked(session.completed, module_id)
+        }
@@ -0,0 +1,212 @@
+"""Precomputed learning-path index: module order, flattened lessons and completion bitsets."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+def topological_order(modules: List[Tuple[str, List[str]]], priority: Optional[Callable[[str], tuple]] = None) -> List[str]:
+    """Order (module_id, dependencies) so every module follows its dependencies.
+
+    Among modules whose dependencies are placed, the lowest ``priority`` goes
+    first; ties keep the syllabus order. Unknown dependencies are ignored and
+    modules caught in a dependency cycle are appended in syllabus order, so a
+    sloppy plan still yields a usable path.
+    """
+    position = {module_id: index for index, (module_id, _) in enumerate(modules)}
+    dependencies = {
+        module_id: {dep for dep in deps or [] if dep in position and dep != module_id}
+        for module_id, deps in modules
+    }
+    order, placed = [], set()
+    while len(order) < len(modules):
+        ready = [m for m, _ in modules if m not in placed and dependencies[m] <= placed]
+        if not ready:
+            order.extend(m for m, _ in modules if m not in placed)
+            break
+        # Place one module at a time so syllabus order breaks ties
+        chosen = min(ready, key=priority) if priority else ready[0]
+        order.append(chosen)
+        placed.add(chosen)
+    return order
+
+
+class LearningPath:
+    """A course's modules in dependency order with their lessons flattened.
+
+    Lesson ``i`` of the flattened path is bit ``i`` of a learner's completion
+    bitset, so the next lesson is the lowest unset bit and a module is
+    unlocked when its prerequisite mask is fully set.
+    """
+
+    __slots__ = ("course_id", "version", "modules", "lessons", "dependencies",
+                 "_lesson_bits", "_module_index", "_module_masks", "_prereq_masks",
+                 "_blocked", "_first_pending", "_full_mask")
+
+    def __init__(self, course_id: str, modules: List[str], lessons: List[Tuple[str, str]],
+                 dependencies: Dict[str, List[str]], version: int = 1):
+        self.course_id = course_id
+        self.version = version
+        self.modules = modules  # module ids in dependency order
+        self.lessons = lessons  # (module_id, lesson_id) in path order
+        self.dependencies = dependencies
+
+        self._module_index = {module_id: index for index, module_id in enumerate(modules)}
+        # Lesson ids are only unique within a module
+        self._lesson_bits = {lesson: 1 << index for index, lesson in enumerate(lessons)}
+        self._module_masks = dict.fromkeys(modules, 0)
+        for (module_id, _), bit in zip(lessons, self._lesson_bits.values()):
+            self._module_masks[module_id] |= bit
+        self._full_mask = (1 << len(lessons)) - 1
+        # First module in path order whose lessons are not generated yet
+        self._first_pending = next(
+            (index for index, module_id in enumerate(modules) if not self._module_masks[module_id]), len(modules)
+        )
+
+        self._prereq_masks = {}
+        self._blocked = set()  # modules depending on a module without lessons
+        for module_id in modules:  # dependencies come first, so their closure is ready
+            mask = 0
+            for dep in dependencies.get(module_id, ()):
+                if dep in self._module_masks:
+                    mask |= self._module_masks[dep] | self._prereq_masks.get(dep, 0)
+                    if not self._module_masks[dep] or dep in self._blocked:
+                        self._blocked.add(module_id)
+            self._prereq_masks[module_id] = mask
+
+    @classmethod
+    def build(cls, course_id: str, modules: List[Tuple[str, List[str]]],
+              lessons_by_module: Dict[str, List[str]], version: int = 1) -> "LearningPath":
+        """Build a path from (module_id, dependencies) pairs and each module's ordered lesson ids."""
+        order = topological_order(modules)
+        return cls(
+            course_id,
+            order,
+            [(module_id, lesson_id) for module_id in order for lesson_id in lessons_by_module.get(module_id, [])],
+            {module_id: list(deps or []) for module_id, deps in modules},
+            version
+        )
+
+    def with_module_lessons(self, module_id: str, lesson_ids: List[str]) -> "LearningPath":
+        """Return a new version of the path with a module's lessons replaced."""
+        lessons_by_module = {}
+        for owner, lesson_id in self.lessons:
+            lessons_by_module.setdefault(owner, []).append(lesson_id)
+        lessons_by_module[module_id] = list(lesson_ids)
+        modules = [(m, self.dependencies.get(m, [])) for m in self.modules]
+        return LearningPath.build(self.course_id, modules, lessons_by_module, self.version + 1)
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "modules": self.modules,
+            "lessons": [list(lesson) for lesson in self.lessons],
+            "dependencies": self.dependencies
+        }
+
+    @classmethod
+    def from_dict(cls, course_id: str, data: dict) -> "LearningPath":
+        return cls(course_id, data["modules"], [tuple(lesson) for lesson in data["lessons"]],
+                   data["dependencies"], data.get("version", 1))
+
+    def completion_bits(self, completed: Iterable[Tuple[str, str]]) -> int:
+        """Pack completed (module_id, lesson_id) pairs into a bitset (unknown lessons are ignored)."""
+        bits = 0
+        for lesson in completed:
+            bits |= self._lesson_bits.get(tuple(lesson), 0)
+        return bits
+
+    def mark_completed(self, bits: int, module_id: str, lesson_id: str) -> int:
+        return bits | self._lesson_bits.get((module_id, lesson_id), 0)
+
+    def is_lesson_completed(self, bits: int, module_id: str, lesson_id: str) -> bool:
+        bit = self._lesson_bits.get((module_id, lesson_id), 0)
+        return bool(bit) and bits & bit == bit
+
+    def is_module_unlocked(self, bits: int, module_id: str) -> bool:
+        """Whether every lesson of the module's (transitive) dependencies is completed."""
+        mask = self._prereq_masks.get(module_id)
+        return mask is not None and bits & mask == mask and module_id not in self._blocked
+
+    def is_module_completed(self, bits: int, module_id: str) -> bool:
+        mask = self._module_masks.get(module_id, 0)
+        return bool(mask) and bits & mask == mask
+
+    def next_step(self, bits: int) -> Optional[Tuple[str, Optional[str]]]:
+        """Next (module_id, lesson_id) for a learner, or None when the course is done.
+
+        ``lesson_id`` is None when the next module has no generated lessons yet.
+        """
+        free = ~bits & self._full_mask
+        lesson_index = (free & -free).bit_length() - 1 if free else len(self.lessons)
+        module_index = self._module_index[self.lessons[lesson_index][0]] if free else len(self.modules)
+        # A module without lessons that comes earlier in the path must be generated first
+        if self._first_pending < module_index:
+            return self.modules[self._first_pending], None
+        if not free:
+            return None
+        return self.lessons[lesson_index]
+
+    def next_module(self, bits: int) -> Optional[str]:
+        step = self.next_step(bits)
+        return step[0] if step else None
+
+    def upcoming_module_without_lessons(self, module_id: str, lookahead: int = 1) -> Optional[str]:
+        """First module within ``lookahead`` places after ``module_id`` whose lessons are not generated."""
+        index = self._module_index.get(module_id)
+        if index is None:
+            return None
+        for upcoming in self.modules[index + 1:index + 1 + lookahead]:
+            if not self._module_masks[upcoming]:
+                return upcoming
+        return None
+
+    def remaining_lessons(self, bits: int, module_id: str) -> int:
+        """Number of the module's lessons the learner has not completed."""
+        mask = self._module_masks.get(module_id, 0)
+        return bin(mask & ~bits).count("1")
+
+    def lesson_ids(self, module_id: str) -> List[str]:
+        return [lesson_id for owner, lesson_id in self.lessons if owner == module_id]
+
+
+class LearningPathIndex:
+    """Process-wide LRU of learning paths loaded from ``courses.learning_path``.
+
+    Cached paths are reused for ``max_age`` seconds; other workers' lesson
+    generation becomes visible after that, or immediately via ``invalidate``
+    or a caller that already knows a newer version.
+    """
+
+    def __init__(self, course_repo, max_courses: int = 1000, max_age: float = 60):
+        self.course_repo = course_repo
+        self.max_courses = max_courses
+        self.max_age = max_age
+        self._paths: "OrderedDict[str, Tuple[LearningPath, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, course_id: str, min_version: int = 0) -> Optional[LearningPath]:
+        """Get a course's path, reloading when the cached copy is stale or older than ``min_version``."""
+        with self._lock:
+            cached = self._paths.get(course_id)
+            if cached is not None:
+                path, loaded_at = cached
+                if path.version >= min_version and time.monotonic() - loaded_at < self.max_age:
+                    self._paths.move_to_end(course_id)
+                    return path
+
+        data = self.course_repo.get_learning_path(course_id)
+        if data is None:
+            return None
+        path = LearningPath.from_dict(course_id, data)
+        with self._lock:
+            self._paths[course_id] = (path, time.monotonic())
+            self._paths.move_to_end(course_id)
+            while len(self._paths) > self.max_courses:
+                self._paths.popitem(last=False)
+        return path
+
+    def invalidate(self, course_id: str):
+        with self._lock:
+            self._paths.pop(course_id, None)
@@ -1,34 +1,137 @@
 """Mentor service that orchestrates architect and builder services with persistence."""
 
-from typing import Optional
-from mentor_app.models import CoursePlan, UserContext, Module, CourseContext
-from mentor_app.builder.models import ModuleContent
+import asyncio
+import threading
+from typing import AsyncIterator, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from mentor_app.models import CoursePlan, UserContext, Module, CourseContext, KnowledgeProfile
+from mentor_app.builder.models import GenerationCancelled, ModuleContent
 from mentor_app.infrastructure.models import Module as DBModule
 from mentor_app.architect.service import ArchitectService
+from mentor_app.architect.adaptive import AdaptiveArchitect
 from mentor_app.builder.service import ContentGenerator
-from mentor_app.infrastructure.repositories import CourseRepository, ModuleRepository
+from mentor_app.infrastructure.repositories import (
+    CourseRepository, LessonBodyRepository, ModuleRepository, QuestionBankRepository, TraceRepository, UsageRepository
+)
 from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.scheduler import RequestClass, run_generation
+from mentor_app.infrastructure.tokens import RequestUsage, request_ceilings, usage_scope
+from mentor_app.infrastructure.tracing import Tracer, span, trace_settings
 
 
 class MentorService:
-    def __init__(self, db_service: Optional[DatabaseService] = None):
+    def __init__(
+        self,
+        db_service: Optional[DatabaseService] = None,
+        ceilings: Optional[dict] = None,
+        tracer: Optional[Tracer] = None,
+        llm_client=None
+    ):
         self.db_service = db_service or DatabaseService()
-        self.architect = ArchitectService()
-        self.builder = ContentGenerator()
+        # One chat model for every generation step (the shared model router by default)
+        self.architect = ArchitectService(llm_client)
+        self.adaptive_architect = AdaptiveArchitect(self.architect)
+        self.builder = ContentGenerator(
+            llm_client,
+            question_bank=QuestionBankRepository(self.db_service),
+            lesson_bodies=LessonBodyRepository(self.db_service)
+        )
         self.course_repo = CourseRepository(self.db_service)
         self.module_repo = ModuleRepository(self.db_service)
+        self.usage_repo = UsageRepository(self.db_service)
+        # Per-request token and time ceilings (max_tokens, max_seconds) for every generation
+        self.ceilings = ceilings if ceilings is not None else request_ceilings()
+        # Every generation run is stored as a trace of its stages (see GET /traces)
+        self.tracer = tracer or Tracer(TraceRepository(self.db_service).save_trace, **trace_settings())
     
     def create_course_syllabus(self, topic: str, user_instructions: Optional[str] = None, user_context: Optional[UserContext] = None) -> tuple[CoursePlan, str]:
         """Create course syllabus using architect and persist it."""
-        course_plan = self.architect.create_syllabus(topic, user_instructions, user_context)
-        course_id = self.course_repo.save_course_plan(course_plan)
+        with self.tracer.trace("create_course", topic=topic) as trace:
+            with usage_scope(**self.ceilings) as usage:
+                course_plan = self.architect.create_syllabus(topic, user_instructions, user_context)
+            with span("persist"):
+                course_id = self.course_repo.save_course_plan(course_plan)
+                self.usage_repo.record_usage(course_id, usage)
+            trace.set(course_id=course_id)
+        return course_plan, course_id
+    
+    def create_adaptive_course(self, profile: KnowledgeProfile) -> tuple[CoursePlan, str]:
+        """Derive a personalized course from the shared template for the profile's skill and persist it."""
+        with self.tracer.trace("create_adaptive_course", topic=profile.target_skill, user_level=profile.user_level) as trace:
+            with usage_scope(**self.ceilings) as usage:
+                course_plan = self.adaptive_architect.derive_course(profile)
+            with span("persist"):
+                course_id = self.course_repo.save_course_plan(course_plan)
+                self.usage_repo.record_usage(course_id, usage)
+            trace.set(course_id=course_id)
         return course_plan, course_id
     
-    def create_module(self, course_id: str, module_id: str, user_context: Optional[UserContext] = None) -> tuple[ModuleContent, str]:
-        """Create module content using builder and persist it."""
+    def save_course_plans(self, created: List[tuple[str, CoursePlan, RequestUsage]]) -> List[str]:
+        """Persist (course_id, course_plan, usage) triples from generate_course_syllabi in one transaction."""
+        course_ids = self.course_repo.save_course_plans([(course_id, course_plan) for course_id, course_plan, _ in created])
+        for course_id, _, usage in created:
+            self.usage_repo.record_usage(course_id, usage)
+        return course_ids
+    
+    async def generate_course_syllabi(self, requests: List, concurrency: int = 8, tenant: Optional[str] = None) -> AsyncIterator[tuple[int, Optional[CoursePlan], Optional[RequestUsage], Optional[Exception]]]:
+        """Generate syllabi for many course requests, yielding (index, plan, usage, error) as each finishes.
+        
+        At most ``concurrency`` architect calls run at once, each under its own
+        request ceilings and scheduled as ``tenant``'s bulk work on the bulk
+        thread pool, so a large batch cannot hold up interactive requests. Nothing is
+        persisted here (see ``save_course_plans``), so their traces carry the
+        topic but no course id.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        def create_syllabus(request) -> tuple[CoursePlan, RequestUsage]:
+            with self.tracer.trace("create_course", topic=request.topic, batch=True), usage_scope(**self.ceilings) as usage:
+                return self.architect.create_syllabus(request.topic, request.user_instructions, request.user_context), usage
+        
+        async def generate(index: int, request) -> tuple[int, Optional[CoursePlan], Optional[RequestUsage], Optional[Exception]]:
+            async with semaphore:
+                try:
+                    course_plan, usage = await run_generation(RequestClass("bulk", tenant), create_syllabus, request)
+                    return index, course_plan, usage, None
+                except Exception as e:
+                    return index, None, None, e
+        
+        tasks = [asyncio.create_task(generate(index, request)) for index, request in enumerate(requests)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def create_module(
+        self,
+        course_id: str,
+        module_id: str,
+        user_context: Optional[UserContext] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> tuple[ModuleContent, str]:
+        """Create module content using builder and persist it.
+        
+        Content that already exists (e.g. generated by a prefetch) is returned as is.
+        """
+        existing = self.module_repo.get_module_content(course_id, module_id)
+        if existing is not None:
+            return existing, module_id
+        with self.tracer.trace("create_module", course_id=course_id, module_id=module_id):
+            return self._generate_module(course_id, module_id, user_context, cancel_event)
+    
+    def _generate_module(
+        self,
+        course_id: str,
+        module_id: str,
+        user_context: Optional[UserContext],
+        cancel_event: Optional[threading.Event]
+    ) -> tuple[ModuleContent, str]:
         # Get the specific module from database
         with self.db_service.get_session() as session:
-            db_module = session.query(DBModule).filter(DBModule.course_id == course_id and DBModule.id == module_id).first()
+            db_module = session.query(DBModule).filter(DBModule.course_id == course_id, DBModule.id == module_id).first()
             if not db_module:
                 raise ValueError(f"Module {module_id} not found")
             
@@ -44,10 +147,30 @@ class MentorService:
             topic_domain="general"  # Default value
         )
 
-        # 1) generate module structure with lessons if not already present
-        db_module = self.architect.generate_module_structure(db_module, course_context)
+        with usage_scope(**self.ceilings) as usage:
+            try:
+                # 1) generate module structure with lessons if not already present
+                with span("module_structure"):
+                    db_module = self.architect.generate_module_structure(db_module, course_context)
+                if cancel_event is not None and cancel_event.is_set():
+                    raise GenerationCancelled(f"Generation of module {module_id} was cancelled")
 
-        # 2) generate module content by the structure generated earlier
-        module_content = self.builder.generate_module_content(db_module, course_context, user_context)
-        content_id = self.module_repo.save_module_content(course_id, module_id, module_content)
+                # 2) generate module content by the structure generated earlier
+                module_content = self.builder.generate_module_content(db_module, course_context, user_context, cancel_event)
+            finally:
+                # Tokens are spent whether or not the module is finished; failing to store
+                # them must not replace the generation's own error
+                try:
+                    self.usage_repo.record_usage(course_id, usage, module_id)
+                except Exception as e:
+                    print(f"Failed to record LLM usage for module {module_id}: {e}")
+        try:
+            with span("persist", lessons=len(module_content.lessons)):
+                content_id = self.module_repo.save_module_content(course_id, module_id, module_content)
+        except IntegrityError:
+            # Generated concurrently elsewhere; keep the copy that was saved first
+            existing = self.module_repo.get_module_content(course_id, module_id)
+            if existing is None:
+                raise
+            return existing, module_id
         return module_content, content_id
@@ -0,0 +1,187 @@
+"""Speculative background generation of the next module on a learner's path."""
+
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from mentor_app.builder.models import GenerationCancelled, ModuleContent
+from mentor_app.infrastructure.metrics import MODULE_PREFETCH
+from mentor_app.infrastructure.scheduler import RequestClass, scheduling_scope
+from mentor_app.infrastructure.shared_state import SharedStateBackend, get_state_backend
+from mentor_app.mentor.learning_path import LearningPath
+
+JobKey = Tuple[str, str]  # (course_id, module_id)
+
+
+class _PrefetchJob:
+    __slots__ = ("future", "cancel_event", "users", "request_class")
+
+    def __init__(self, future: Future, cancel_event: threading.Event, users: Set[str], request_class: RequestClass):
+        self.future = future
+        self.cancel_event = cancel_event
+        self.users = users
+        self.request_class = request_class
+
+
+class ModulePrefetcher:
+    """Generates the module after a learner's current one before they reach it.
+
+    When a learner is positioned in module N, the first module within
+    ``lookahead_modules`` places after N whose lessons are not generated is
+    queued on a small thread pool. Once they are within ``near_end_lessons``
+    lessons of N's end the window reaches one module further, as N+1 is about
+    to become their current module. Generation is bounded by ``max_workers``
+    concurrent jobs, ``max_queued`` waiting jobs and ``max_per_hour`` starts,
+    and a shared-state lease keeps workers from generating the same module
+    twice. A job is cancelled (between LLM calls) once every learner that
+    wanted it has moved to another course.
+    """
+
+    def __init__(
+        self,
+        create_module: Callable[..., Tuple[ModuleContent, str]],
+        state_backend: Optional[SharedStateBackend] = None,
+        on_generated: Optional[Callable[[str], None]] = None,
+        max_workers: int = 2,
+        max_queued: int = 16,
+        max_per_hour: int = 60,
+        lookahead_modules: int = 1,
+        near_end_lessons: int = 1,
+        lease_ttl: float = 900
+    ):
+        self.create_module = create_module  # MentorService.create_module
+        self.state_backend = state_backend or get_state_backend()
+        self.on_generated = on_generated  # called with the course_id after content is saved
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_per_hour = max_per_hour
+        self.lookahead_modules = lookahead_modules
+        self.near_end_lessons = near_end_lessons
+        self.lease_ttl = lease_ttl
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="module-prefetch")
+        self._jobs: Dict[JobKey, _PrefetchJob] = {}
+        self._started = deque()  # monotonic start times within the last hour
+        self._lock = threading.Lock()
+        self._worker_id = uuid.uuid4().hex
+
+    def on_position(self, user_id: str, path: LearningPath, module_id: str, completed: Optional[int] = None) -> Optional[Future]:
+        """Prefetch ahead of a learner who is working in ``module_id``, with ``completed`` lessons (path bitset)."""
+        lookahead = self.lookahead_modules
+        if completed is not None and path.remaining_lessons(completed, module_id) <= self.near_end_lessons:
+            lookahead += 1
+        upcoming = path.upcoming_module_without_lessons(module_id, lookahead)
+        if upcoming is None:
+            return None
+        return self.prefetch(path.course_id, upcoming, user_id)
+
+    def prefetch(self, course_id: str, module_id: str, user_id: Optional[str] = None) -> Optional[Future]:
+        """Queue background generation of a module unless it is in flight or over budget."""
+        key = (course_id, module_id)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                if user_id:
+                    job.users.add(user_id)
+                return job.future
+            if not self._within_budget():
+                MODULE_PREFETCH.labels("over_budget").inc()
+                return None
+            if not self.state_backend.add(self._lease_key(key), self._worker_id, ttl=self.lease_ttl):
+                return None  # another worker is generating it
+
+            cancel_event = threading.Event()
+            request_class = RequestClass("prefetch", user_id)
+            self._started.append(time.monotonic())
+            future = self._executor.submit(self._generate, key, cancel_event, request_class)
+            self._jobs[key] = _PrefetchJob(future, cancel_event, {user_id} if user_id else set(), request_class)
+        MODULE_PREFETCH.labels("started").inc()
+        future.add_done_callback(lambda _: self._finish(key))
+        return future
+
+    def wait(self, course_id: str, module_id: str, timeout: Optional[float] = None) -> bool:
+        """Block until an in-flight prefetch of the module ends; returns whether one was running.
+        
+        Someone is now waiting on the job, so its remaining LLM calls are scheduled as interactive.
+        """
+        with self._lock:
+            job = self._jobs.get((course_id, module_id))
+        if job is None:
+            return False
+        MODULE_PREFETCH.labels("joined").inc()
+        job.request_class.priority = "interactive"
+        try:
+            job.future.result(timeout)
+        except Exception:
+            pass  # the caller generates the module itself
+        return True
+
+    def release(self, user_id: str, keep_course_id: Optional[str] = None):
+        """Drop a learner's interest in prefetches outside ``keep_course_id``; cancel orphaned jobs."""
+        with self._lock:
+            for (course_id, _), job in self._jobs.items():
+                if course_id != keep_course_id and user_id in job.users:
+                    job.users.discard(user_id)
+                    if not job.users:
+                        self._cancel(job)
+
+    def cancel(self, course_id: str, module_id: Optional[str] = None):
+        """Cancel prefetches for a course, or for one of its modules."""
+        with self._lock:
+            for (job_course_id, job_module_id), job in self._jobs.items():
+                if job_course_id == course_id and module_id in (None, job_module_id):
+                    self._cancel(job)
+
+    def close(self):
+        """Cancel all prefetches and wait for running ones to stop."""
+        with self._lock:
+            for job in self._jobs.values():
+                self._cancel(job)
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _generate(self, key: JobKey, cancel_event: threading.Event, request_class: RequestClass):
+        course_id, module_id = key
+        try:
+            if cancel_event.is_set():
+                raise GenerationCancelled(f"Generation of module {module_id} was cancelled")
+            with scheduling_scope(request_class):
+                result = self.create_module(course_id, module_id, cancel_event=cancel_event)
+        except GenerationCancelled:
+            MODULE_PREFETCH.labels("cancelled").inc()
+            raise
+        except Exception as e:
+            MODULE_PREFETCH.labels("failed").inc()
+            print(f"Prefetch of module {module_id} in course {course_id} failed: {e}")
+            raise
+        finally:
+            self.state_backend.delete(self._lease_key(key), expected=self._worker_id)
+        MODULE_PREFETCH.labels("completed").inc()
+        if self.on_generated:
+            self.on_generated(course_id)
+        return result
+
+    def _finish(self, key: JobKey):
+        with self._lock:
+            job = self._jobs.pop(key, None)
+        if job is not None and job.future.cancelled():
+            # Never started, so _generate did not release the lease
+            self.state_backend.delete(self._lease_key(key), expected=self._worker_id)
+            MODULE_PREFETCH.labels("cancelled").inc()
+
+    def _cancel(self, job: _PrefetchJob):
+        """Cancel a queued job outright or signal a running one (caller holds the lock)."""
+        job.cancel_event.set()
+        job.future.cancel()
+
+    def _within_budget(self) -> bool:
+        """Check the concurrency and hourly limits (caller holds the lock)."""
+        cutoff = time.monotonic() - 3600
+        while self._started and self._started[0] < cutoff:
+            self._started.popleft()
+        return len(self._started) < self.max_per_hour and len(self._jobs) < self.max_workers + self.max_queued
+
+    def _lease_key(self, key: JobKey) -> str:
+        return f"prefetch:{key[0]}:{key[1]}"
@@ -1,17 +1,295 @@
 """Session management for user state and conversation."""
 
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Optional
+
+from mentor_app.infrastructure.repositories import ProgressRepository
+from mentor_app.infrastructure.shared_state import SharedStateBackend, get_state_backend
+
+SESSION_TTL = 24 * 3600  # seconds a snapshot survives in the shared backend
+RECENT_CONTEXT_SIZE = 8  # conversation turns kept per session
+SESSION_OVERHEAD_BYTES = 1024  # approximate size of a SessionState apart from its context and bitset
+
+
+class SessionState:
+    """Compact per-user session held in memory."""
+
+    __slots__ = ("user_id", "course_id", "module_id", "lesson_id", "state", "recent_context",
+                 "completed", "path_version", "version", "last_access", "validated_at")
+
+    def __init__(self, user_id: str, course_id: Optional[str] = None, lesson_id: Optional[str] = None,
+                 state: str = "idle", recent_context=(), module_id: Optional[str] = None,
+                 completed: int = 0, path_version: int = 0, version: Optional[str] = None):
+        self.user_id = user_id
+        self.course_id = course_id
+        self.module_id = module_id
+        self.lesson_id = lesson_id
+        self.state = state
+        self.recent_context = deque(recent_context, maxlen=RECENT_CONTEXT_SIZE)
+        # Completion bitset over the course's learning path; 0 version means not loaded
+        self.completed = completed
+        self.path_version = path_version
+        # Token of the snapshot this copy matches, renewed on every snapshot write
+        self.version = version
+        self.last_access = self.validated_at = time.monotonic()
+
+    def footprint(self) -> int:
+        """Approximate bytes held by the session."""
+        return (SESSION_OVERHEAD_BYTES + sum(sys.getsizeof(entry) for entry in self.recent_context)
+                + self.completed.bit_length() // 8)
+
+    def to_dict(self) -> dict:
+        return {
+            "user_id": self.user_id,
+            "course_id": self.course_id,
+            "module_id": self.module_id,
+            "lesson_id": self.lesson_id,
+            "state": self.state,
+            "recent_context": list(self.recent_context),
+            "completed": self.completed,
+            "path_version": self.path_version,
+            "version": self.version
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SessionState":
+        return cls(data["user_id"], data.get("course_id"), data.get("lesson_id"),
+                   data.get("state", "idle"), data.get("recent_context", ()), data.get("module_id"),
+                   data.get("completed", 0), data.get("path_version", 0), data.get("version"))
+
+
 class SessionManager:
-    def __init__(self):
-        self.sessions = {}
-    
-    def create_session(self, user_id: str):
+    """In-memory LRU of active sessions with idle eviction and write-behind persistence.
+
+    Hot sessions are served from ``self.sessions`` without I/O. Changed sessions
+    are snapshotted to the shared state backend, and ``update_progress`` calls
+    are coalesced and upserted into ``lesson_progress`` in batches, once
+    ``flush_batch_size`` updates are pending or ``flush_interval`` seconds pass.
+
+    Another worker may change a session meanwhile, so a local copy older than
+    ``revalidate_interval`` seconds is checked against the snapshot's version
+    and replaced if the snapshot is newer. The LRU holds at most
+    ``max_sessions`` sessions and about ``max_bytes`` of session state.
+    """
+
+    def __init__(
+        self,
+        state_backend: Optional[SharedStateBackend] = None,
+        progress_repo: Optional[ProgressRepository] = None,
+        max_sessions: int = 50_000,
+        max_bytes: int = 256 * 2**20,
+        idle_ttl: float = 1800,
+        revalidate_interval: float = 5.0,
+        flush_batch_size: int = 500,
+        flush_interval: float = 2.0
+    ):
+        self.state_backend = state_backend or get_state_backend()
+        self.progress_repo = progress_repo
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.revalidate_interval = revalidate_interval
+        self.flush_batch_size = flush_batch_size
+        self.flush_interval = flush_interval
+
+        self.sessions: "OrderedDict[str, SessionState]" = OrderedDict()  # least recently used first
+        self._footprints = {}  # user_id -> bytes counted for the cached session
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._pending_progress = {}  # (user_id, course_id, lesson_id) -> row, last write wins
+        self._dirty = {}  # user_id -> SessionState awaiting a snapshot write
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = None
+
+    def create_session(self, user_id: str, course_id: Optional[str] = None) -> SessionState:
         """Create a new learning session."""
-        pass
-    
-    def get_session_state(self, user_id: str):
-        """Get current session state."""
-        pass
-    
-    def update_progress(self, user_id: str, lesson_id: str, completed: bool):
-        """Update user's progress."""
-        pass
+        session = SessionState(user_id, course_id)
+        with self._lock:
+            self._put(session)
+            self._mark_dirty(session)
+        return session
+
+    def get_session_state(self, user_id: str) -> Optional[SessionState]:
+        """Get current session state, loading the shared snapshot on a local miss or once the copy is stale."""
+        with self._lock:
+            session = self._touch(user_id)
+            if session is None and user_id in self._dirty:
+                # Evicted before its snapshot was written; the in-memory copy is newest
+                session = self._dirty[user_id]
+                session.last_access = time.monotonic()
+                self._put(session)
+            if session is not None and (
+                user_id in self._dirty or time.monotonic() - session.validated_at < self.revalidate_interval
+            ):
+                return session
+            cached = session
+
+        snapshot = self.state_backend.get(self._key(user_id))
+        with self._lock:
+            # Another thread may have loaded, created or changed it meanwhile
+            session = self._touch(user_id)
+            if user_id in self._dirty or (session is not None and session is not cached):
+                return session or self._dirty[user_id]
+            if snapshot is None:
+                # Nothing shared (yet, or it expired); keep a local copy
+                if session is not None:
+                    session.validated_at = time.monotonic()
+                return session
+            if session is None or snapshot.get("version") != session.version:
+                session = SessionState.from_dict(snapshot)
+                self._put(session)
+            session.validated_at = time.monotonic()
+        return session
+
+    def set_state(self, user_id: str, state: str, lesson_id: Optional[str] = None,
+                  module_id: Optional[str] = None) -> SessionState:
+        """Move the user's session to a new state-machine state."""
+        session = self.get_session_state(user_id) or self.create_session(user_id)
+        with self._lock:
+            session.state = state
+            if lesson_id is not None:
+                session.lesson_id = lesson_id
+            if module_id is not None:
+                session.module_id = module_id
+            self._mark_dirty(session)
+        return session
+
+    def set_completion(self, user_id: str, course_id: str, completed: int, path_version: int) -> SessionState:
+        """Replace the session's completion bitset for a course's learning path."""
+        session = self.get_session_state(user_id) or self.create_session(user_id, course_id)
+        with self._lock:
+            if session.course_id != course_id:
+                session.module_id = session.lesson_id = None
+            session.course_id = course_id
+            session.completed = completed
+            session.path_version = path_version
+            self._mark_dirty(session)
+            self._resize(session)
+        return session
+
+    def add_context(self, user_id: str, entry: str) -> SessionState:
+        """Append a conversation turn to the session's bounded recent context."""
+        session = self.get_session_state(user_id) or self.create_session(user_id)
+        with self._lock:
+            session.recent_context.append(entry)
+            self._mark_dirty(session)
+            self._resize(session)
+        return session
+
+    def update_progress(self, user_id: str, lesson_id: str, completed: bool, course_id: Optional[str] = None) -> SessionState:
+        """Update user's progress; the database write is batched behind the call."""
+        session = self.get_session_state(user_id) or self.create_session(user_id, course_id)
+        with self._lock:
+            course_id = course_id or session.course_id
+            if course_id is None:
+                raise ValueError(f"No course selected for user '{user_id}'")
+            session.course_id = course_id
+            session.lesson_id = lesson_id
+            self._mark_dirty(session)
+            self._pending_progress[(user_id, course_id, lesson_id)] = {
+                "user_id": user_id,
+                "course_id": course_id,
+                "lesson_id": lesson_id,
+                "completed": completed,
+                "updated_at": datetime.utcnow()
+            }
+            should_flush = len(self._pending_progress) >= self.flush_batch_size
+        if should_flush:
+            self.flush()
+        return session
+
+    def flush(self) -> int:
+        """Write pending progress rows and session snapshots; returns rows written."""
+        with self._flush_lock:
+            with self._lock:
+                rows = list(self._pending_progress.values())
+                dirty = list(self._dirty.values())
+                self._pending_progress = {}
+                self._dirty = {}
+                for session in dirty:
+                    session.version = uuid.uuid4().hex
+                    session.validated_at = time.monotonic()
+                snapshots = [session.to_dict() for session in dirty]
+
+            for snapshot in snapshots:
+                self.state_backend.set(self._key(snapshot["user_id"]), snapshot, ttl=SESSION_TTL)
+            if rows and self.progress_repo is not None:
+                try:
+                    self.progress_repo.save_lesson_progress(rows)
+                except Exception:
+                    # Keep the rows for the next flush unless newer updates replaced them
+                    with self._lock:
+                        for row in rows:
+                            key = (row["user_id"], row["course_id"], row["lesson_id"])
+                            self._pending_progress.setdefault(key, row)
+                    raise
+            return len(rows)
+
+    def close(self):
+        """Stop the background flusher and write everything still pending."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+    def _touch(self, user_id: str) -> Optional[SessionState]:
+        """Return a live local session and mark it most recently used (caller holds the lock)."""
+        session = self.sessions.get(user_id)
+        if session is None:
+            return None
+        now = time.monotonic()
+        if now - session.last_access > self.idle_ttl:
+            self._evict(user_id)
+            return None
+        session.last_access = now
+        self.sessions.move_to_end(user_id)
+        return session
+
+    def _put(self, session: SessionState):
+        """Insert a session and evict idle or surplus ones (caller holds the lock)."""
+        self.sessions[session.user_id] = session
+        self.sessions.move_to_end(session.user_id)
+        self._resize(session)
+
+    def _resize(self, session: SessionState):
+        """Recount a cached session's size and evict idle or surplus sessions (caller holds the lock)."""
+        if self.sessions.get(session.user_id) is session:
+            size = session.footprint()
+            self._bytes += size - self._footprints.get(session.user_id, 0)
+            self._footprints[session.user_id] = size
+
+        # LRU order means idle sessions sit at the front
+        cutoff = time.monotonic() - self.idle_ttl
+        while self.sessions:
+            oldest_id, oldest = next(iter(self.sessions.items()))
+            if len(self.sessions) <= self.max_sessions and self._bytes <= self.max_bytes and oldest.last_access >= cutoff:
+                break
+            self._evict(oldest_id)
+
+    def _evict(self, user_id: str):
+        # A dirty session stays referenced by self._dirty until its snapshot is written
+        self.sessions.pop(user_id, None)
+        self._bytes -= self._footprints.pop(user_id, 0)
+
+    def _mark_dirty(self, session: SessionState):
+        """Queue a session's snapshot for the next flush, starting the flusher if needed (caller holds the lock)."""
+        self._dirty[session.user_id] = session
+        if self._flusher is None and self.flush_interval and not self._stop.is_set():
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Session flush failed: {e}")
+
+    def _key(self, user_id: str) -> str:
+        return f"session:{user_id}"
@@ -0,0 +1,3 @@
+-- Store rendered lesson HTML and heading index alongside the markdown
+ALTER TABLE lessons ADD COLUMN content_html TEXT;
+ALTER TABLE lessons ADD COLUMN toc JSONB;
@@ -0,0 +1,11 @@
+-- Latest completion state per user and lesson (written in batches by SessionManager)
+CREATE TABLE lesson_progress (
+    user_id VARCHAR(255) NOT NULL,
+    course_id VARCHAR(255) NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+    lesson_id VARCHAR(255) NOT NULL,
+    completed BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, course_id, lesson_id)
+);
+
+CREATE INDEX idx_lesson_progress_course ON lesson_progress(course_id);
@@ -0,0 +1,15 @@
+-- Append-only learner progress events (written in bulk by ProgressEventWriter)
+CREATE TABLE progress_events (
+    id BIGSERIAL PRIMARY KEY,
+    user_id VARCHAR(255) NOT NULL,
+    course_id VARCHAR(255) NOT NULL,
+    module_id VARCHAR(255) NOT NULL,
+    lesson_id VARCHAR(255) NOT NULL,
+    event_type VARCHAR(50) NOT NULL,
+    score INTEGER,
+    payload JSONB,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_progress_events_user_course ON progress_events(user_id, course_id);
+CREATE INDEX idx_progress_events_lesson ON progress_events(lesson_id);
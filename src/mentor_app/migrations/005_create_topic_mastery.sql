@@ -0,0 +1,9 @@
+-- Knowledge-tracing mastery estimate per user and topic (recomputed by AnalyticsEngine)
+CREATE TABLE topic_mastery (
+    user_id VARCHAR(255) NOT NULL,
+    topic VARCHAR(255) NOT NULL,
+    mastery DOUBLE PRECISION NOT NULL,
+    observations INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, topic)
+);
@@ -0,0 +1,21 @@
+-- Per-user progress aggregates, updated incrementally as progress events are ingested
+CREATE TABLE user_module_progress (
+    user_id VARCHAR(255) NOT NULL,
+    course_id VARCHAR(255) NOT NULL,
+    module_id VARCHAR(255) NOT NULL,
+    completed_lesson_ids JSONB NOT NULL DEFAULT '[]',
+    completed_lessons INTEGER NOT NULL DEFAULT 0,
+    completed BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, course_id, module_id),
+    FOREIGN KEY (module_id, course_id) REFERENCES modules(id, course_id) ON DELETE CASCADE
+);
+
+CREATE TABLE user_course_progress (
+    user_id VARCHAR(255) NOT NULL,
+    course_id VARCHAR(255) NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+    completed_lessons INTEGER NOT NULL DEFAULT 0,
+    completed_modules INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, course_id)
+);
@@ -0,0 +1,18 @@
+-- Spaced-repetition schedule per user and topic, updated as scored events are ingested
+CREATE TABLE review_items (
+    user_id VARCHAR(255) NOT NULL,
+    topic VARCHAR(255) NOT NULL,
+    easiness DOUBLE PRECISION NOT NULL DEFAULT 2.5,
+    interval_days INTEGER NOT NULL DEFAULT 0,
+    repetitions INTEGER NOT NULL DEFAULT 0,
+    lapses INTEGER NOT NULL DEFAULT 0,
+    due_at TIMESTAMP NOT NULL,
+    last_reviewed_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (user_id, topic)
+);
+
+-- Bulk "due today" scans across all users
+CREATE INDEX idx_review_items_due_at ON review_items(due_at);
+
+-- One user's due topics, most overdue first
+CREATE INDEX idx_review_items_user_due ON review_items(user_id, due_at);
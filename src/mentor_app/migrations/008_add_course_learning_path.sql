@@ -0,0 +1,2 @@
+-- Precomputed module order and flattened lessons used for navigation
+ALTER TABLE courses ADD COLUMN learning_path JSONB;
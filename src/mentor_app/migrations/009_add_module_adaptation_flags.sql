@@ -0,0 +1,3 @@
+-- Per-learner course variants mark modules the learner can skip or needs to reinforce
+ALTER TABLE modules ADD COLUMN is_skipped BOOLEAN NOT NULL DEFAULT FALSE;
+ALTER TABLE modules ADD COLUMN is_remediation BOOLEAN NOT NULL DEFAULT FALSE;
@@ -0,0 +1,19 @@
+-- Generated quiz questions, shared by every quiz on the same concept and difficulty
+CREATE TABLE question_bank (
+    id VARCHAR(255) PRIMARY KEY,
+    concept VARCHAR(255) NOT NULL,
+    difficulty VARCHAR(50) NOT NULL,
+    type VARCHAR(50) NOT NULL,
+    question_text TEXT NOT NULL,
+    options JSONB,
+    correct_answer TEXT NOT NULL,
+    explanation TEXT NOT NULL,
+    points INTEGER NOT NULL DEFAULT 1,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_question_bank_concept_difficulty ON question_bank(concept, difficulty);
+
+-- Assessments with answer keys, stored with the content they belong to
+ALTER TABLE lessons ADD COLUMN assessment JSONB;
+ALTER TABLE modules ADD COLUMN assessment JSONB;
@@ -0,0 +1,9 @@
+-- Weighted full-text document per lesson (title > key concepts > body), kept current by the application
+ALTER TABLE lessons ADD COLUMN search_vector TSVECTOR;
+
+UPDATE lessons SET search_vector =
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(CAST(key_concepts AS TEXT), '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(content_markdown, '')), 'C');
+
+CREATE INDEX idx_lessons_search_vector ON lessons USING GIN (search_vector);
@@ -0,0 +1,12 @@
+-- LLM calls and tokens spent generating each course (module_id '') and module, per task
+CREATE TABLE llm_usage (
+    course_id VARCHAR(255) NOT NULL,
+    module_id VARCHAR(255) NOT NULL,
+    task VARCHAR(50) NOT NULL,
+    calls INTEGER NOT NULL DEFAULT 0,
+    prompt_tokens BIGINT NOT NULL DEFAULT 0,
+    completion_tokens BIGINT NOT NULL DEFAULT 0,
+    llm_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (course_id, module_id, task)
+);
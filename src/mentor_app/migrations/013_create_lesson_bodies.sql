@@ -0,0 +1,16 @@
+-- Generated lesson content stored once per normalized outline and generation context,
+-- shared by every lesson (in any course) generated from the same inputs
+CREATE TABLE lesson_bodies (
+    hash VARCHAR(64) PRIMARY KEY,
+    content_markdown TEXT NOT NULL,
+    content_html TEXT,
+    toc JSONB,
+    code_examples JSONB,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Existing lessons keep their inline content; new ones reference a body instead
+ALTER TABLE lessons ADD COLUMN body_hash VARCHAR(64) REFERENCES lesson_bodies(hash);
+
+CREATE INDEX idx_lessons_body_hash ON lessons(body_hash);
@@ -0,0 +1,32 @@
+-- Generation runs (course syllabus, module content) with per-stage spans
+CREATE TABLE generation_traces (
+    id VARCHAR(32) PRIMARY KEY,
+    operation VARCHAR(50) NOT NULL,
+    course_id VARCHAR(255),
+    module_id VARCHAR(255),
+    outcome VARCHAR(20) NOT NULL,
+    error TEXT,
+    started_at TIMESTAMP NOT NULL,
+    duration_seconds DOUBLE PRECISION NOT NULL,
+    llm_calls INTEGER NOT NULL DEFAULT 0,
+    prompt_tokens BIGINT NOT NULL DEFAULT 0,
+    completion_tokens BIGINT NOT NULL DEFAULT 0,
+    attributes JSONB,
+    profile TEXT
+);
+
+CREATE INDEX idx_generation_traces_course_started ON generation_traces(course_id, started_at);
+CREATE INDEX idx_generation_traces_started ON generation_traces(started_at);
+
+CREATE TABLE generation_spans (
+    trace_id VARCHAR(32) NOT NULL REFERENCES generation_traces(id) ON DELETE CASCADE,
+    span_id INTEGER NOT NULL,
+    parent_id INTEGER,
+    name VARCHAR(50) NOT NULL,
+    start_offset_seconds DOUBLE PRECISION NOT NULL,
+    duration_seconds DOUBLE PRECISION NOT NULL,
+    outcome VARCHAR(20) NOT NULL,
+    error TEXT,
+    attributes JSONB,
+    PRIMARY KEY (trace_id, span_id)
+);
@@ -1,6 +1,6 @@
 """Pydantic models for the AI Mentor application."""
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 
 # User Context Models
@@ -10,6 +10,15 @@ class UserContext(BaseModel):
     time_commitment: int  # hours per week
     prior_knowledge: List[str]  # related topics user already knows
 
+class KnowledgePoint(BaseModel):
+    topic: str
+    confidence: int = Field(..., ge=1, le=5)  # 1 (no idea) to 5 (expert)
+
+class KnowledgeProfile(BaseModel):
+    target_skill: str
+    user_level: str  # "beginner", "intermediate", "advanced"
+    known_topics: List[KnowledgePoint] = []
+
 # Architect Models
 class LessonOutline(BaseModel):
     id: str
@@ -26,6 +35,8 @@ class Module(BaseModel):
     estimated_duration: int  # hours
     dependencies: List[str]  # module IDs this depends on
     lessons: Optional[List[LessonOutline]] = None  # Only populated when detailed structure is generated
+    is_skipped: bool = False  # learner already knows this; only a mastery check is needed
+    is_remediation: bool = False  # weak area or bridge module that needs deeper explanations
 
 class CoursePlan(BaseModel):
     course_title: str
@@ -46,6 +57,7 @@ class CodeExample(BaseModel):
     code: str
     explanation: str
     is_runnable: bool
+    error: Optional[str] = None  # why a Python example failed sandbox validation
 
 class InteractiveElement(BaseModel):
     type: str  # "quiz", "drag_drop", "fill_blank", "code_challenge"
@@ -87,6 +99,7 @@ class Question(BaseModel):
     correct_answer: str
     explanation: str
     points: int
+    concept: Optional[str] = None  # question bank key, with the difficulty of the lesson
 
 class Assessment(BaseModel):
     id: str
@@ -0,0 +1,93 @@
+"""Test suite for adaptive course derivation."""
+
+import pytest
+
+from mentor_app.architect.adaptive import AdaptiveArchitect
+from mentor_app.infrastructure.shared_state import InMemoryStateBackend
+from mentor_app.models import CoursePlan, KnowledgePoint, KnowledgeProfile, Module
+
+
+class FakeArchitect:
+    """Stands in for ArchitectService; counts LLM-backed calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def create_syllabus(self, topic, user_instructions=None, user_context=None):
+        self.calls += 1
+        titles = ["Basic selects", "Joins", "Window functions", "Query tuning"]
+        return CoursePlan(
+            course_title=topic,
+            estimated_duration=20,
+            difficulty_level=user_context.skill_level,
+            prerequisites=[],
+            modules=[
+                Module(
+                    id=f"module_{i}",
+                    title=title,
+                    description=f"{title} in practice",
+                    learning_objectives=[],
+                    estimated_duration=5,
+                    dependencies=["module_1"] if i > 1 else []
+                )
+                for i, title in enumerate(titles, 1)
+            ]
+        )
+
+    def generate_bridge_modules(self, course_plan, gap_topics):
+        self.calls += 1
+        return [
+            Module(id="catch_up", title=topic, description=topic, learning_objectives=[], estimated_duration=2, dependencies=["module_1"])
+            for topic in gap_topics
+        ]
+
+
+@pytest.fixture
+def llm():
+    return FakeArchitect()
+
+
+@pytest.fixture
+def adaptive(llm):
+    return AdaptiveArchitect(llm, InMemoryStateBackend())
+
+
+def profile(*points):
+    return KnowledgeProfile(
+        target_skill="SQL",
+        user_level="intermediate",
+        known_topics=[KnowledgePoint(topic=topic, confidence=confidence) for topic, confidence in points]
+    )
+
+
+def test_template_generated_once(adaptive, llm):
+    first = adaptive.derive_course(profile())
+    second = adaptive.derive_course(profile(("Basic selects", 5)))
+    assert llm.calls == 1
+    assert [m.id for m in first.modules] == ["module_1", "module_2", "module_3", "module_4"]
+    assert second.modules[0].is_skipped and not first.modules[0].is_skipped
+    assert second.estimated_duration == first.estimated_duration - 5
+
+
+def test_remediation_moves_forward_within_dependencies(adaptive):
+    course = adaptive.derive_course(profile(("Window functions", 1), ("Joins", 4), ("SQL selects", 3)))
+    flags = {m.id: (m.is_skipped, m.is_remediation) for m in course.modules}
+    assert flags["module_2"] == (True, False)
+    assert flags["module_3"] == (False, True)
+    assert flags["module_1"] == flags["module_4"] == (False, False)
+    # module_1 is a prerequisite of everything, so it stays first
+    assert [m.id for m in course.modules] == ["module_1", "module_2", "module_3", "module_4"]
+
+    course = adaptive.derive_course(profile(("Query tuning", 2)))
+    assert [m.id for m in course.modules] == ["module_1", "module_4", "module_2", "module_3"]
+
+
+def test_bridge_only_for_uncovered_weak_topics(adaptive, llm):
+    course = adaptive.derive_course(profile(("Relational algebra", 1), ("Query planner internals", 5)))
+    assert llm.calls == 2
+    bridge = course.modules[0]
+    assert bridge.id == "bridge_1" and bridge.is_remediation and bridge.dependencies == []
+    assert len(course.modules) == 5
+
+    adaptive.derive_course(profile(("relational  algebra", 2)))
+    assert llm.calls == 2  # same gap set, served from the bridge cache
@@ -0,0 +1,79 @@
+"""Test suite for mastery analytics."""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from mentor_app.auditor.analytics import AnalyticsEngine
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.models import Lesson
+from mentor_app.infrastructure.repositories import MasteryRepository, ProgressRepository
+
+
+def _reference(engine, events):
+    mastery = {}
+    for user_id, topic, score in zip(*events):
+        prior = mastery.get((user_id, topic), engine.p_init)
+        mastery[(user_id, topic)] = engine._bkt_update(prior, score / 100)
+    return mastery
+
+
+def test_vectorized_scores_match_sequential_updates():
+    rng = np.random.default_rng(7)
+    events = (
+        rng.choice(["u1", "u2", "u3"], 200).astype(object),
+        rng.choice(["joins", "indexes", "window functions"], 200).astype(object),
+        rng.integers(0, 101, 200).astype(float),
+    )
+    engine = AnalyticsEngine()
+
+    table = engine.score_events(events)
+
+    for (user_id, topic), expected in _reference(engine, events).items():
+        assert table.get(user_id, topic) == pytest.approx(expected)
+    assert table.observations.sum() == 200
+
+
+def test_mastery_rises_with_correct_answers_and_falls_with_wrong_ones():
+    engine = AnalyticsEngine()
+    table = engine.score_events((["a"] * 3 + ["b"] * 3, ["sql"] * 6, [100] * 3 + [0] * 3))
+
+    assert table.get("a", "SQL") > engine.p_init > table.get("b", "sql")
+    assert table.get("c", "sql") is None
+
+
+def test_incremental_update_matches_batch():
+    engine = AnalyticsEngine()
+    batch = engine.score_events((["a"], ["joins"], [80]))
+
+    assert engine.update_mastery("a", ["Joins"], 80)["joins"] == pytest.approx(batch.get("a", "joins"))
+
+
+def test_ingested_events_update_stored_mastery(tmp_path):
+    db_service = DatabaseService(f"sqlite:///{tmp_path / 'app.db'}")
+    db_service.create_tables()
+    with db_service.get_session() as session:
+        session.add(Lesson(id="l1", module_id="m1", course_id="c1", title="Joins", type="practice",
+                           key_concepts=["Inner Join", "SQL"], difficulty="easy"))
+        session.commit()
+    progress_repo, mastery_repo = ProgressRepository(db_service), MasteryRepository(db_service)
+    engine = AnalyticsEngine(progress_repo, mastery_repo)
+    events = [
+        {"user_id": "u1", "course_id": "c1", "module_id": "m1", "lesson_id": "l1", "event_type": event_type,
+         "score": score, "payload": None}
+        for event_type, score in [("practice_completed", 90), ("theory_read", None), ("assessment_submitted", 30)]
+    ]
+
+    progress_repo.append_events(events[:2], engine.apply_events)
+    progress_repo.append_events(events[2:], engine.apply_events)
+
+    stored = {row.topic: (row.mastery, row.observations) for row in mastery_repo.get_user_mastery("u1")}
+    expected = engine.score_events((["u1"] * 2, ["sql"] * 2, [90, 30])).get("u1", "sql")
+    assert stored["sql"] == (pytest.approx(expected), 2) and set(stored) == {"inner join", "sql"}
+
+    # A recompute repairs stored mastery from the event log
+    mastery_repo.save_mastery([{"user_id": "u1", "topic": "sql", "mastery": 0.0, "observations": 0,
+                                "updated_at": datetime.utcnow()}])
+    engine.recompute_all()
+    assert mastery_repo.get_mastery("u1", "sql").mastery == pytest.approx(expected)
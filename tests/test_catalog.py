@@ -0,0 +1,127 @@
+"""Test suite for catalog export and import."""
+
+import gzip
+import io
+import json
+
+import pytest
+
+from mentor_app.builder.models import LessonContent, ModuleContent
+from mentor_app.infrastructure.catalog import CatalogTransfer
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.models import Course, Lesson, Module as DBModule
+from mentor_app.infrastructure.repositories import CourseRepository, ModuleRepository
+from mentor_app.infrastructure.search import LessonSearchIndex
+from mentor_app.models import CoursePlan, Module
+
+
+def _database(path):
+    db_service = DatabaseService(f"sqlite:///{path}")
+    db_service.create_tables()
+    return db_service
+
+
+@pytest.fixture
+def source(tmp_path):
+    db_service = _database(tmp_path / "source.db")
+    for title in ("SQL", "Python"):
+        plan = CoursePlan(course_title=title, estimated_duration=10, difficulty_level="beginner", prerequisites=[], modules=[
+            Module(id=f"module_{i}", title=f"{title} {i}", description="", learning_objectives=["x"], estimated_duration=5,
+                   dependencies=[f"module_{i - 1}"] if i > 1 else [])
+            for i in (1, 2)
+        ])
+        course_id = CourseRepository(db_service).save_course_plan(plan)
+        ModuleRepository(db_service).save_module_content(course_id, "module_1", ModuleContent(
+            title=f"{title} 1", description="", learning_objectives=[], estimated_duration=5, lessons=[
+                LessonContent(id=f"lesson_{n}", title=f"{title} lesson {n}", type="theory",
+                              content_markdown=f"# {title}\n\nAll about {title.lower()} part {n}.",
+                              key_concepts=[title.lower()], difficulty="easy", code_examples=[],
+                              interactive_elements=[], practice_tasks=[], estimated_duration=10)
+                for n in (1, 2, 3)
+            ]
+        ))
+    return db_service
+
+
+def _database_with_course(db_service) -> str:
+    plan = CoursePlan(course_title="Go", estimated_duration=10, difficulty_level="beginner", prerequisites=[], modules=[
+        Module(id="module_1", title="Go 1", description="", learning_objectives=["x"], estimated_duration=5, dependencies=[])
+    ])
+    course_id = CourseRepository(db_service).save_course_plan(plan)
+    ModuleRepository(db_service).save_module_content(course_id, "module_1", ModuleContent(
+        title="Go 1", description="", learning_objectives=[], estimated_duration=5, lessons=[
+            LessonContent(id="lesson_1", title="Go lesson", type="theory", content_markdown="Goroutines.",
+                          key_concepts=["go"], difficulty="easy", code_examples=[], interactive_elements=[],
+                          practice_tasks=[], estimated_duration=10)
+        ]
+    ))
+    return course_id
+
+
+def _rows(db_service, model):
+    columns = [column.name for column in model.__table__.columns if column.name != "search_vector"]
+    with db_service.get_session() as session:
+        return sorted(tuple(getattr(row, name) for name in columns) for row in session.query(model))
+
+
+def test_round_trip_preserves_catalog(source, tmp_path):
+    chunks = list(CatalogTransfer(source).export_catalog(batch_size=2))
+    assert len(chunks) > 1  # compressed output is streamed as it is produced
+    lines = gzip.decompress(b"".join(chunks)).decode().splitlines()
+    assert json.loads(lines[0])["format"] == "mentor-catalog"
+    assert [json.loads(line)["type"] for line in lines[1:]] == ["course"] * 2 + ["module"] * 4 + ["lesson"] * 6
+
+    target = _database(tmp_path / "target.db")
+    counts = CatalogTransfer(target).import_catalog(io.BytesIO(b"".join(chunks)), batch_size=2)
+    assert counts == {"course": 2, "module": 4, "lesson_body": 0, "lesson": 6}
+    for model in (Course, DBModule, Lesson):
+        assert _rows(target, model) == _rows(source, model)
+    assert len(LessonSearchIndex(target).search("python")[0]) == 3
+
+
+def test_import_skips_or_replaces_existing(source, tmp_path):
+    export = b"".join(CatalogTransfer(source).export_catalog())
+    with source.get_session() as session:
+        session.query(Lesson).update({Lesson.title: "Edited"})
+        session.commit()
+
+    assert CatalogTransfer(source).import_catalog(io.BytesIO(export))["lesson"] == 0  # skipped rows are not counted
+    assert {row.title for row in source.get_session().query(Lesson)} == {"Edited"}
+
+    assert CatalogTransfer(source).import_catalog(io.BytesIO(export), replace=True)["lesson"] == 6
+    assert "Edited" not in {row.title for row in source.get_session().query(Lesson)}
+    assert [hit["title"] for hit in LessonSearchIndex(source).search("sql lesson 2")[0]] == ["SQL lesson 2"]
+    assert LessonSearchIndex(source).search("edited") == ([], False)
+
+
+def test_import_indexes_only_the_imported_courses(source, tmp_path):
+    sql = [course.id for course in source.get_session().query(Course) if course.course_title == "SQL"]
+    export = b"".join(CatalogTransfer(source).export_catalog(sql))
+    target = _database(tmp_path / "target.db")
+    python = _database_with_course(target)
+
+    class CountingIndex(LessonSearchIndex):
+        rebuilt = False
+
+        def rebuild(self):
+            self.rebuilt = True
+            super().rebuild()
+
+    index = CountingIndex(target)
+    assert CatalogTransfer(target, index).import_catalog(io.BytesIO(export)) == {
+        "course": 1, "module": 2, "lesson_body": 0, "lesson": 3
+    }
+    assert not index.rebuilt
+    assert {hit["course_id"] for hit in index.search("lesson")[0]} == {sql[0], python}
+    assert len(index.search("sql")[0]) == 3
+
+
+def test_export_selected_courses_and_reject_foreign_files(source, tmp_path):
+    course_id = source.get_session().query(Course).filter(Course.course_title == "SQL").one().id
+    export = b"".join(CatalogTransfer(source).export_catalog([course_id]))
+    records = [json.loads(line) for line in gzip.decompress(export).decode().splitlines()[1:]]
+    assert {record["row"]["course_id"] if record["type"] != "course" else record["row"]["id"] for record in records} == {course_id}
+
+    target = CatalogTransfer(_database(tmp_path / "target.db"))
+    with pytest.raises(ValueError):
+        target.import_catalog(io.BytesIO(gzip.compress(b'{"hello": "world"}\n')))
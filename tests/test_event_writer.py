@@ -0,0 +1,119 @@
+"""Test suite for the buffered progress event writer."""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from sqlalchemy.exc import IntegrityError
+
+from mentor_app.infrastructure.event_writer import EventBufferFull, ProgressEventWriter
+
+
+def test_events_are_flushed_in_batches():
+    repo = MagicMock()
+    repo.append_events.side_effect = lambda rows, after_insert=None: len(rows)
+    writer = ProgressEventWriter(repo, max_batch=2, flush_interval=60)
+
+    for lesson in ("l1", "l2", "l3"):
+        writer.record("u1", "c1", "m1", lesson, "practice_completed", score=80)
+    writer.close()
+
+    assert [len(call.args[0]) for call in repo.append_events.call_args_list] == [2, 1]
+
+
+def test_repeated_theory_reads_are_coalesced():
+    repo = MagicMock()
+    repo.append_events.side_effect = lambda rows, after_insert=None: len(rows)
+    writer = ProgressEventWriter(repo, flush_interval=60)
+
+    for _ in range(5):
+        writer.record("u1", "c1", "m1", "l1", "theory_read")
+
+    assert writer.pending() == 1
+    assert writer.flush() == 1
+
+
+def test_failed_flush_keeps_events():
+    repo = MagicMock()
+    repo.append_events.side_effect = RuntimeError("database down")
+    writer = ProgressEventWriter(repo, flush_interval=60)
+    writer.record("u1", "c1", "m1", "l1", "assessment_submitted")
+
+    with pytest.raises(RuntimeError):
+        writer.flush()
+
+    assert writer.pending() == 1
+
+
+def test_retried_idempotent_event_is_not_duplicated_after_a_failed_flush():
+    repo = MagicMock()
+    repo.append_events.side_effect = RuntimeError("database down")
+    writer = ProgressEventWriter(repo, flush_interval=60)
+    writer.record("u1", "c1", "m1", "l1", "theory_read")
+
+    with pytest.raises(RuntimeError):
+        writer.flush()
+    writer.record("u1", "c1", "m1", "l1", "theory_read")
+
+    assert writer.pending() == 1
+
+
+def test_event_that_can_never_be_written_is_dropped_and_the_rest_are_written():
+    repo, written = MagicMock(), []
+
+    def append_events(rows, after_insert=None):
+        if any(row["course_id"] == "deleted" for row in rows):
+            raise IntegrityError("INSERT INTO progress_events", {}, Exception("foreign key constraint failed"))
+        written.extend(row["lesson_id"] for row in rows)
+        return len(rows)
+
+    repo.append_events.side_effect = append_events
+    writer = ProgressEventWriter(repo, flush_interval=60)
+    writer.record("u1", "c1", "m1", "l1", "practice_completed", score=80)
+    writer.record("u1", "deleted", "m1", "l2", "practice_completed", score=80)
+    writer.record("u1", "c1", "m1", "l3", "practice_completed", score=80)
+
+    assert writer.flush() == 2
+    assert written == ["l1", "l3"]
+    assert writer.pending() == 0
+
+
+def test_buffered_events_of_a_deleted_course_are_dropped():
+    repo = MagicMock()
+    repo.append_events.side_effect = lambda rows, after_insert=None: len(rows)
+    writer = ProgressEventWriter(repo, flush_interval=60)
+    writer.record("u1", "deleted", "m1", "l1", "theory_read")
+    writer.record("u1", "c1", "m1", "l2", "theory_read")
+
+    assert writer.discard_course("deleted") == 1
+    assert writer.flush() == 1
+    assert [row["course_id"] for row in repo.append_events.call_args.args[0]] == ["c1"]
+
+
+def test_events_are_shed_while_the_database_is_down_and_written_off_the_caller():
+    repo, down, writers = MagicMock(), threading.Event(), []
+    down.set()
+
+    def append_events(rows, after_insert=None):
+        writers.append(threading.current_thread())
+        if down.is_set():
+            raise RuntimeError("database down")
+        return len(rows)
+
+    repo.append_events.side_effect = append_events
+    writer = ProgressEventWriter(repo, max_batch=1, flush_interval=0.01, max_pending=2)
+    for lesson in ("l1", "l2"):
+        writer.record("u1", "c1", "m1", lesson, "practice_completed", score=80)
+    with pytest.raises(EventBufferFull):
+        writer.record("u1", "c1", "m1", "l3", "practice_completed", score=80)
+
+    down.clear()
+    deadline = time.monotonic() + 5
+    while writer.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.pending() == 0
+    writer.record("u1", "c1", "m1", "l3", "practice_completed", score=80)
+    assert threading.current_thread() not in writers  # recording never waits on the database
+    writer.close()
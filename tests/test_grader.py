@@ -0,0 +1,71 @@
+"""Test suite for practice submission grading."""
+
+import threading
+
+import pytest
+
+from mentor_app.builder.grader import PracticeGrader
+from mentor_app.builder import models
+from mentor_app.builder.models import GradingQueueFull, PracticeTask
+from mentor_app.builder.sandbox import CodeSandbox
+
+TASK = PracticeTask(
+    id="task_1",
+    title="Sum two numbers",
+    description="Read two integers and print their sum",
+    task_type="coding",
+    starter_code=None,
+    solution="a, b = map(int, input().split())\nprint(a + b)",
+    test_cases=[
+        models.TestCase(input_data="1 2", expected_output="3", description="small"),
+        models.TestCase(input_data="-5 5", expected_output="0\n", description="negative"),
+        models.TestCase(input_data="10 20", expected_output="30", description="larger"),
+    ],
+    hints=[]
+)
+
+
+@pytest.fixture
+def grader():
+    grader = PracticeGrader(CodeSandbox(workers=2, timeout=2.0), max_pending=4)
+    grader.start()
+    yield grader
+    grader.close()
+
+
+def test_grades_against_test_cases(grader):
+    result = grader.submit(TASK, TASK.solution).result(10)
+    assert (result["passed"], result["score"]) == (True, 100)
+
+    result = grader.grade(TASK, "a, b = map(int, input().split())\nprint(a + b if a > 0 else 1)")
+    assert (result["passed"], result["score"]) == (False, 67)
+    assert [test["passed"] for test in result["tests"]] == [True, False, True]
+
+    result = grader.grade(TASK, "print(")
+    assert result["score"] == 0 and "SyntaxError" in result["tests"][0]["error"]
+
+
+def test_workers_are_reused(grader):
+    pids = {worker.process.pid for worker in grader.sandbox._all}
+    for _ in range(5):
+        grader.grade(TASK, TASK.solution)
+    assert {worker.process.pid for worker in grader.sandbox._all} == pids
+
+
+def test_backpressure(grader):
+    release = threading.Event()
+    grader.grade = lambda task, code, queued_at=None: release.wait(10)
+    futures = [grader.submit(TASK, TASK.solution) for _ in range(4)]
+    with pytest.raises(GradingQueueFull):
+        grader.submit(TASK, TASK.solution)
+    release.set()
+    for future in futures:
+        future.result(10)
+    grader.submit(TASK, TASK.solution).result(10)
+
+
+def test_submissions_cannot_tamper_with_later_grading(grader):
+    tamper = "import json\njson.dumps = lambda *args, **kwargs: '{\"runs\": []}'\nprint(3)"
+    grader.grade(TASK, tamper)
+    result = grader.grade(TASK, "print(999)")
+    assert (result["passed"], result["score"]) == (False, 0)
@@ -0,0 +1,111 @@
+"""Test suite for the learning-path index and navigation."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from mentor_app.auditor.progress_aggregator import ProgressAggregator
+from mentor_app.builder.models import LessonContent, ModuleContent
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.event_writer import ProgressEventWriter
+from mentor_app.infrastructure.repositories import CourseRepository, ModuleRepository, ProgressRepository
+from mentor_app.infrastructure.shared_state import InMemoryStateBackend
+from mentor_app.mentor.coordinator import MentorCoordinator
+from mentor_app.mentor.learning_path import LearningPath, topological_order
+from mentor_app.mentor.session_mgr import SessionManager
+from mentor_app.models import CoursePlan, Module
+
+
+def test_topological_order_keeps_syllabus_order_and_survives_cycles():
+    assert topological_order([("m3", ["m1"]), ("m1", []), ("m2", ["m1"])]) == ["m1", "m3", "m2"]
+    assert topological_order([("a", ["b"]), ("b", ["a"]), ("c", ["missing"])]) == ["c", "a", "b"]
+
+
+def test_bitset_navigation_and_gating():
+    path = LearningPath.build(
+        "c1",
+        [("m2", ["m1"]), ("m1", []), ("m3", ["m2"])],
+        {"m1": ["lesson_1", "lesson_2"], "m2": ["lesson_1"]}
+    )
+    bits = 0
+    assert path.next_step(bits) == ("m1", "lesson_1")
+    assert not path.is_module_unlocked(bits, "m2")
+
+    bits = path.mark_completed(bits, "m1", "lesson_2")
+    assert path.next_step(bits) == ("m1", "lesson_1")
+    bits = path.mark_completed(bits, "m1", "lesson_1")
+    assert path.is_module_unlocked(bits, "m2") and path.is_module_completed(bits, "m1")
+    assert path.next_step(bits) == ("m2", "lesson_1")
+
+    # m3 has no lessons yet, so it is next once m2 is done and the path ends after it
+    bits = path.mark_completed(bits, "m2", "lesson_1")
+    assert path.next_step(bits) == ("m3", None)
+    assert path.is_module_unlocked(bits, "m3")
+    assert path.with_module_lessons("m3", ["lesson_1"]).next_step(bits) == ("m3", "lesson_1")
+
+
+@pytest.fixture
+def db_service(tmp_path):
+    db_service = DatabaseService(f"sqlite:///{tmp_path / 'app.db'}")
+    db_service.create_tables()
+    return db_service
+
+
+def _lesson(lesson_id):
+    return LessonContent(id=lesson_id, title=lesson_id, type="theory", content_markdown="# Intro",
+                         key_concepts=[], difficulty="easy", code_examples=[], interactive_elements=[],
+                         practice_tasks=[], estimated_duration=10)
+
+
+def test_coordinator_follows_saved_learning_path(db_service):
+    plan = CoursePlan(course_title="SQL", estimated_duration=10, difficulty_level="beginner", prerequisites=[], modules=[
+        Module(id=module_id, title=module_id, description="", learning_objectives=[], estimated_duration=5,
+               dependencies=dependencies)
+        for module_id, dependencies in (("m2", ["m1"]), ("m1", []))
+    ])
+    course_repo = CourseRepository(db_service)
+    course_id = course_repo.save_course_plan(plan)
+    for module_id in ("m1", "m2"):
+        ModuleRepository(db_service).save_module_content(course_id, module_id, ModuleContent(
+            title=module_id, description="", learning_objectives=[], estimated_duration=5,
+            lessons=[_lesson("lesson_1")]
+        ))
+    assert course_repo.get_learning_path(course_id)["version"] == 3
+
+    coordinator = MentorCoordinator(
+        MagicMock(), course_repo,
+        session_mgr=SessionManager(progress_repo=ProgressRepository(db_service), flush_interval=0),
+        progress_repo=ProgressRepository(db_service)
+    )
+    assert coordinator.get_next_lesson("u1", course_id)["module_id"] == "m1"
+    assert coordinator.process_user_response("u1", "done")["module_id"] == "m2"
+    assert coordinator.process_user_response("u1", "done") == {"action": "course_completed", "course_id": course_id}
+
+
+def test_responses_are_recorded_where_sessions_are_rebuilt_from(db_service):
+    plan = CoursePlan(course_title="SQL", estimated_duration=10, difficulty_level="beginner", prerequisites=[], modules=[
+        Module(id=module_id, title=module_id, description="", learning_objectives=[], estimated_duration=5,
+               dependencies=[])
+        for module_id in ("m1", "m2")
+    ])
+    course_repo = CourseRepository(db_service)
+    course_id = course_repo.save_course_plan(plan)
+    for module_id in ("m1", "m2"):
+        ModuleRepository(db_service).save_module_content(course_id, module_id, ModuleContent(
+            title=module_id, description="", learning_objectives=[], estimated_duration=5,
+            lessons=[_lesson("lesson_1")]
+        ))
+    progress_repo = ProgressRepository(db_service)
+    event_writer = ProgressEventWriter(progress_repo, after_insert=ProgressAggregator(db_service).apply_events)
+
+    def coordinator():
+        return MentorCoordinator(MagicMock(), course_repo, session_mgr=SessionManager(InMemoryStateBackend()),
+                                 progress_repo=progress_repo, event_writer=event_writer)
+
+    first = coordinator()
+    first.get_next_lesson("u1", course_id)
+    assert first.process_user_response("u1", "done")["module_id"] == "m2"
+    event_writer.flush()
+
+    # A worker without the session rebuilds it from the progress aggregates
+    assert coordinator().get_next_lesson("u1", course_id)["module_id"] == "m2"
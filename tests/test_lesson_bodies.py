@@ -0,0 +1,169 @@
+"""Test suite for content-addressed lesson bodies."""
+
+import gzip
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from mentor_app.benchmarks.stub_llm import StubChatModel
+from mentor_app.builder.sandbox import CodeSandbox
+from mentor_app.builder.service import ContentGenerator, lesson_body_hash
+from mentor_app.infrastructure.catalog import CatalogTransfer
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.maintenance import main as maintenance
+from mentor_app.infrastructure.models import (
+    GenerationSpan, GenerationTrace, Lesson, LessonBody, LLMUsage, ProgressEvent, ReviewItem, TopicMastery
+)
+from mentor_app.infrastructure.repositories import (
+    CourseRepository, LessonBodyRepository, LessonRepository, ModuleRepository, ProgressRepository
+)
+from mentor_app.infrastructure.search import LessonSearchIndex
+from mentor_app.models import CourseContext, CoursePlan, LessonOutline, Module
+
+
+def _outline(title="Introduction to  JOINs", concepts=("INNER JOIN", "outer join")):
+    return LessonOutline(id="lesson_1", title=title, type="theory", key_concepts=list(concepts), difficulty="easy")
+
+
+def _context(course_title):
+    return CourseContext(course_title=course_title, difficulty_level="beginner", topic_domain="SQL")
+
+
+@pytest.fixture
+def db_service(tmp_path):
+    db_service = DatabaseService(f"sqlite:///{tmp_path / 'app.db'}")
+    db_service.create_tables()
+    return db_service
+
+
+@pytest.fixture
+def sandbox():
+    sandbox = CodeSandbox(workers=1)
+    yield sandbox
+    sandbox.close()
+
+
+def _generate_course(db_service, builder, title, outlines):
+    module = Module(id="module_1", title=title, description="", learning_objectives=["x"], estimated_duration=5,
+                    dependencies=[], lessons=outlines)
+    course_id = CourseRepository(db_service).save_course_plan(CoursePlan(
+        course_title=title, estimated_duration=5, difficulty_level="beginner", prerequisites=[], modules=[module]
+    ))
+    content = builder.generate_module_content(module, _context(title))
+    ModuleRepository(db_service).save_module_content(course_id, "module_1", content)
+    return course_id
+
+
+def test_hash_ignores_course_identity_and_formatting():
+    same = lesson_body_hash(_outline(), _context("SQL for analysts"), None)
+    assert same == lesson_body_hash(
+        _outline("introduction to joins", ("Outer Join", "inner  join")), _context("Databases 101"), None
+    )
+    assert same != lesson_body_hash(_outline(concepts=("INNER JOIN",)), _context("SQL for analysts"), None)
+    assert same != lesson_body_hash(_outline(), CourseContext(
+        course_title="SQL", difficulty_level="beginner", topic_domain="SQL", user_instructions="Use PostgreSQL"
+    ), None)
+
+
+def test_duplicate_lessons_share_one_generated_body(db_service, sandbox):
+    llm = StubChatModel()
+    builder = ContentGenerator(llm, sandbox=sandbox, lesson_bodies=LessonBodyRepository(db_service))
+    first = _generate_course(db_service, builder, "SQL for analysts", [_outline()])
+    calls = llm.calls
+    second = _generate_course(db_service, builder, "Databases 101", [_outline("introduction to joins")])
+    assert llm.calls == calls + 1  # only the module quiz, the lesson body was reused
+
+    with db_service.get_session() as session:
+        body = session.query(LessonBody).one()
+        assert body.ref_count == 2 and body.code_examples[0]["is_runnable"]
+        assert {lesson.content_markdown for lesson in session.query(Lesson)} == {None}
+
+    lesson = LessonRepository(db_service).get_lesson("lesson_1")
+    assert lesson.body.content_html.startswith("<h1") and lesson.body.hash == lesson.body_hash
+    content = ModuleRepository(db_service).get_module_content(second, "module_1")
+    assert content.lessons[0].content_markdown == body.content_markdown
+    assert content.lessons[0].title == "introduction to joins"
+    assert len(LessonSearchIndex(db_service).search("stub lesson content")[0]) == 2
+
+    # Bodies are released with their courses and collected once unreferenced
+    repo = LessonBodyRepository(db_service)
+    assert CourseRepository(db_service).delete_course(first)
+    assert repo.get_body(body.hash).ref_count == 1 and repo.collect_garbage() == 0
+    assert len(LessonSearchIndex(db_service).search("stub lesson content")[0]) == 1
+    assert CourseRepository(db_service).delete_course(second)
+    assert not CourseRepository(db_service).delete_course(second)
+    assert repo.get_body(body.hash).ref_count == 0 and repo.collect_garbage() == 1
+
+
+def test_a_module_reusing_a_collected_body_stores_it_again(db_service, sandbox, tmp_path, monkeypatch):
+    builder = ContentGenerator(StubChatModel(), sandbox=sandbox, lesson_bodies=LessonBodyRepository(db_service))
+    first = _generate_course(db_service, builder, "SQL for analysts", [_outline()])
+    module = Module(id="module_1", title="Databases 101", description="", learning_objectives=["x"],
+                    estimated_duration=5, dependencies=[], lessons=[_outline()])
+    second = CourseRepository(db_service).save_course_plan(CoursePlan(
+        course_title="Databases 101", estimated_duration=5, difficulty_level="beginner", prerequisites=[], modules=[module]
+    ))
+    content = builder.generate_module_content(module, _context("Databases 101"))  # reuses the stored body
+
+    # The body loses its last reference and is collected before the reusing module is saved
+    CourseRepository(db_service).delete_course(first)
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'app.db'}")
+    assert maintenance(["collect-bodies"]) == 0
+    assert LessonBodyRepository(db_service).get_body(content.lessons[0].body_hash) is None
+
+    ModuleRepository(db_service).save_module_content(second, "module_1", content)
+    body = LessonBodyRepository(db_service).get_body(content.lessons[0].body_hash)
+    assert body.ref_count == 1 and body.content_markdown == content.lessons[0].content_markdown
+    assert LessonBodyRepository(db_service).collect_garbage() == 0
+
+
+def test_deleting_a_course_removes_what_was_recorded_about_it(db_service, sandbox):
+    builder = ContentGenerator(StubChatModel(), sandbox=sandbox, lesson_bodies=LessonBodyRepository(db_service))
+    deleted = _generate_course(db_service, builder, "SQL for analysts", [_outline()])
+    kept = _generate_course(db_service, builder, "Databases 101", [_outline(concepts=("INNER JOIN",))])
+    now = datetime.utcnow()
+    with db_service.get_session() as session:
+        for course_id in (deleted, kept):
+            session.add(LLMUsage(course_id=course_id, module_id="", task="syllabus", updated_at=now))
+            session.add(GenerationTrace(id=course_id, operation="create_course", course_id=course_id, outcome="ok",
+                                        started_at=now, duration_seconds=1.0))
+            session.add(GenerationSpan(trace_id=course_id, span_id=1, name="llm_call", start_offset_seconds=0.0,
+                                       duration_seconds=1.0, outcome="ok"))
+        for user_id, topic in (("both", "inner join"), ("both", "outer join"), ("one", "inner join")):
+            session.add(ReviewItem(user_id=user_id, topic=topic, due_at=now, last_reviewed_at=now))
+            session.add(TopicMastery(user_id=user_id, topic=topic, mastery=0.5, observations=1, updated_at=now))
+        session.commit()
+    ProgressRepository(db_service).append_events([
+        {"user_id": user_id, "course_id": course_id, "module_id": "module_1", "lesson_id": "lesson_1",
+         "event_type": "theory_read", "score": None, "payload": None}
+        for user_id, course_id in (("both", deleted), ("both", kept), ("one", deleted))
+    ])
+
+    assert CourseRepository(db_service).delete_course(deleted)
+    with db_service.get_session() as session:
+        for model in (LLMUsage, GenerationTrace, ProgressEvent):
+            assert {row.course_id for row in session.query(model)} == {kept}
+        assert [row.trace_id for row in session.query(GenerationSpan)] == [kept]
+        # Topics a learner also met in another course keep their schedule and mastery
+        for model in (ReviewItem, TopicMastery):
+            assert [(row.user_id, row.topic) for row in session.query(model)] == [("both", "inner join")]
+
+
+def test_catalog_carries_shared_bodies(db_service, sandbox, tmp_path):
+    builder = ContentGenerator(StubChatModel(), sandbox=sandbox, lesson_bodies=LessonBodyRepository(db_service))
+    first = _generate_course(db_service, builder, "SQL for analysts", [_outline()])
+    _generate_course(db_service, builder, "Databases 101", [_outline()])
+
+    export = b"".join(CatalogTransfer(db_service).export_catalog([first]))
+    types = [json.loads(line)["type"] for line in gzip.decompress(export).decode().splitlines()[1:]]
+    assert types == ["course", "module", "lesson_body", "lesson"]
+
+    target = DatabaseService(f"sqlite:///{tmp_path / 'target.db'}")
+    target.create_tables()
+    counts = CatalogTransfer(target).import_catalog(io.BytesIO(export))
+    assert counts == {"course": 1, "module": 1, "lesson_body": 1, "lesson": 1}
+    with target.get_session() as session:
+        assert session.query(LessonBody.ref_count).scalar() == 1
+    assert len(LessonSearchIndex(target).search("stub lesson content")[0]) == 1
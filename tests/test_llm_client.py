@@ -0,0 +1,140 @@
+"""Test suite for the multi-provider LLM client."""
+
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from mentor_app.architect.service import ArchitectService
+from mentor_app.benchmarks.stub_llm import StubChatModel
+from mentor_app.infrastructure.llm_client import (
+    CircuitBreaker, LLMClient, LLMProvider, LLMUnavailableError, providers_from_env
+)
+from mentor_app.infrastructure.routing import ModelRoute, ModelRouter
+
+MESSAGES = [HumanMessage(content="hello")]
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+class BadRequestError(Exception):
+    status_code = 400
+
+
+class StubBackend:
+    """Local provider backend that can be switched between healthy, failing, rate limited and slow."""
+
+    def __init__(self, name):
+        self.name = name
+        self.error = None
+        self.latency = 0.0
+        self.calls = []
+
+    def factory(self, model, temperature, max_tokens):
+        backend = self
+
+        class Client:
+            def invoke(self, messages):
+                backend.calls.append(model)
+                time.sleep(backend.latency)
+                if backend.error is not None:
+                    raise backend.error
+                return AIMessage(content=f"{backend.name}:{model}")
+
+        return Client()
+
+    def provider(self, default_model, prefixes=(), **breaker):
+        return LLMProvider(self.name, self.factory, default_model, prefixes, breaker=CircuitBreaker(**breaker))
+
+
+def test_fails_over_and_skips_a_provider_whose_circuit_is_open():
+    primary, backup = StubBackend("primary"), StubBackend("backup")
+    client = LLMClient([primary.provider("p-large", ("p-",), failure_threshold=2), backup.provider("b-large", ("b-",))])
+    assert client.invoke(MESSAGES, "p-small").content == "primary:p-small"
+
+    primary.error = ServerError("503 Service Unavailable")
+    for _ in range(4):
+        assert client.invoke(MESSAGES, "p-small").content == "backup:b-large"  # foreign model names map to the default
+    assert len(primary.calls) == 3  # one success, then two failures opened the circuit
+    assert client.providers[0].breaker.is_open
+
+
+def test_rate_limit_opens_circuit_until_trial_call_succeeds():
+    primary, backup = StubBackend("primary"), StubBackend("backup")
+    client = LLMClient([primary.provider("p", reset_after=0.1), backup.provider("b")])
+    primary.error = RateLimitError("Too many requests")
+    assert client.invoke(MESSAGES).content == "backup:b"
+    assert client.providers[0].breaker.is_open  # opened by the first rate-limit response
+
+    primary.error = None
+    assert client.invoke(MESSAGES).content == "backup:b"
+    time.sleep(0.15)
+    assert client.invoke(MESSAGES).content == "primary:p"  # trial call closes the circuit
+    assert not client.providers[0].breaker.is_open
+
+
+def test_slow_calls_count_as_failures():
+    primary, backup = StubBackend("primary"), StubBackend("backup")
+    primary.latency = 0.05
+    client = LLMClient([primary.provider("p", failure_threshold=2, slow_call_seconds=0.01), backup.provider("b")])
+    assert [client.invoke(MESSAGES).content for _ in range(3)] == ["primary:p", "primary:p", "backup:b"]
+
+
+def test_raises_when_every_provider_is_down():
+    primary, backup = StubBackend("primary"), StubBackend("backup")
+    primary.error = backup.error = ServerError("down")
+    client = LLMClient([primary.provider("p", failure_threshold=1), backup.provider("b", failure_threshold=1)])
+    with pytest.raises(LLMUnavailableError, match="down"):
+        client.invoke(MESSAGES)
+    with pytest.raises(LLMUnavailableError, match="cooling down"):
+        client.invoke(MESSAGES)
+
+
+def test_rejected_requests_are_raised_without_failing_over():
+    primary, backup = StubBackend("primary"), StubBackend("backup")
+    client = LLMClient([primary.provider("p", failure_threshold=1), backup.provider("b")])
+    primary.error = BadRequestError("context length exceeded")
+    with pytest.raises(BadRequestError):
+        client.invoke(MESSAGES)
+    assert backup.calls == [] and not client.providers[0].breaker.is_open
+
+
+def test_an_interrupted_trial_call_frees_the_trial_slot():
+    primary, backup = StubBackend("primary"), StubBackend("backup")
+    client = LLMClient([primary.provider("p", reset_after=0.01), backup.provider("b")])
+    primary.error = RateLimitError("Too many requests")
+    assert client.invoke(MESSAGES).content == "backup:b"
+    time.sleep(0.02)
+
+    primary.error = KeyboardInterrupt()
+    with pytest.raises(KeyboardInterrupt):
+        client.invoke(MESSAGES)
+    primary.error = None
+    assert client.invoke(MESSAGES).content == "primary:p"  # the next call gets the trial
+
+
+def test_routed_generation_survives_a_provider_outage():
+    primary = StubBackend("primary")
+    primary.error = ConnectionResetError("connection reset")
+    stub = StubChatModel()
+    client = LLMClient([primary.provider("p"), LLMProvider("stub", lambda *args: stub, "stub")])
+    router = ModelRouter({"default": ModelRoute("gpt-4o", json_output=True)}, client_factory=client.bind)
+
+    plan = ArchitectService(router).create_syllabus("SQL")
+    assert plan.course_title == "SQL" and stub.calls == 1 and primary.calls == ["p"]
+
+
+def test_providers_are_configured_from_env(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDERS", "openai, anthropic")
+    assert [provider.name for provider in providers_from_env()] == ["openai", "anthropic"]
+    assert providers_from_env()[1].resolve_model("gpt-4o").startswith("claude-")
+
+    monkeypatch.setenv("LLM_PROVIDERS", "openai,mistral")
+    with pytest.raises(ValueError):
+        providers_from_env()
@@ -1,8 +1,20 @@
 """Test suite for mentor module."""
 
 import pytest
+from mentor_app.benchmarks.stub_llm import StubChatModel
+from mentor_app.infrastructure.database import DatabaseService
 from mentor_app.mentor.coordinator import MentorCoordinator
+from mentor_app.mentor.mentor_service import MentorService
 
 def test_start_new_journey():
     # Test learning journey initialization
     pass
+
+def test_llm_client_reaches_every_generation_step(tmp_path):
+    stub = StubChatModel()
+    mentor = MentorService(DatabaseService(f"sqlite:///{tmp_path / 'app.db'}"), ceilings={}, llm_client=stub)
+    clients = [
+        mentor.architect.llm_client, mentor.adaptive_architect.architect.llm_client, mentor.builder.llm_client,
+        mentor.builder.architect.llm_client, mentor.builder.quiz_factory.llm_client
+    ]
+    assert all(client is stub for client in clients)
@@ -0,0 +1,70 @@
+"""Test suite for metrics instrumentation."""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from mentor_app.infrastructure.metrics import (
+    MetricsMiddleware,
+    instrument_engine,
+    render_metrics,
+    track_llm_call,
+)
+
+
+def _count(name, **labels):
+    return REGISTRY.get_sample_value(f"{name}_count", labels) or 0
+
+
+def test_http_latency_uses_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: str):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    client.get("/items/abc")
+    client.get("/items/def")
+
+    observations = _count(
+        "http_request_duration_seconds", method="GET", route="/items/{item_id}", status="200"
+    )
+    assert observations == 2
+
+
+def test_db_queries_are_timed_by_operation():
+    engine = create_engine("sqlite:///:memory:")
+    instrument_engine(engine)
+    instrument_engine(engine)  # idempotent
+
+    before = _count("db_query_duration_seconds", operation="SELECT")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    after = _count("db_query_duration_seconds", operation="SELECT")
+    assert after == before + 1
+
+
+def test_llm_tokens_are_rendered():
+    class Response:
+        usage_metadata = {"input_tokens": 12, "output_tokens": 30}
+
+    with track_llm_call("builder", "theory") as call:
+        call.record_response(Response())
+
+    body, _ = render_metrics()
+    assert b'llm_tokens_total{kind="completion",service="builder",source="reported",task="theory"}' in body
+
+
+def test_estimated_llm_tokens_are_counted():
+    class Response:
+        content = "SELECT * FROM users"
+
+    with track_llm_call("builder", "estimated", prompt="Explain joins") as call:
+        call.record_response(Response())
+
+    body, _ = render_metrics()
+    assert b'llm_tokens_total{kind="prompt",service="builder",source="estimated",task="estimated"}' in body
+    assert b'llm_tokens_total{kind="completion",service="builder",source="estimated",task="estimated"}' in body
@@ -0,0 +1,76 @@
+"""Test suite for speculative module prefetching."""
+
+import threading
+
+import pytest
+
+from mentor_app.builder.models import GenerationCancelled
+from mentor_app.infrastructure.shared_state import InMemoryStateBackend
+from mentor_app.mentor.learning_path import LearningPath
+from mentor_app.mentor.prefetch import ModulePrefetcher
+
+
+class BlockingGenerator:
+    """Stands in for MentorService.create_module; blocks until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def __call__(self, course_id, module_id, cancel_event=None):
+        self.calls.append(module_id)
+        self.release.wait(5)
+        if cancel_event is not None and cancel_event.is_set():
+            raise GenerationCancelled(module_id)
+        return None, module_id
+
+
+@pytest.fixture
+def path():
+    return LearningPath.build("c1", [("m1", []), ("m2", ["m1"]), ("m3", ["m2"])], {"m1": ["lesson_1"]})
+
+
+def test_prefetches_next_module_once(path):
+    generator = BlockingGenerator()
+    generated = []
+    prefetcher = ModulePrefetcher(generator, InMemoryStateBackend(), on_generated=generated.append)
+
+    future = prefetcher.on_position("u1", path, "m1")
+    assert prefetcher.on_position("u2", path, "m1") is future
+    generator.release.set()
+    assert future.result(5) == (None, "m2")
+    assert generator.calls == ["m2"] and generated == ["c1"]
+    # m3 is two modules ahead of m1, outside the default lookahead
+    assert prefetcher.on_position("u1", path, "m3") is None
+    prefetcher.close()
+
+
+def test_nearing_the_end_of_a_module_looks_one_module_further():
+    generator = BlockingGenerator()
+    path = LearningPath.build(
+        "c1", [("m1", []), ("m2", ["m1"]), ("m3", ["m2"])], {"m1": ["l1", "l2", "l3"], "m2": ["l4"]}
+    )
+    prefetcher = ModulePrefetcher(generator, InMemoryStateBackend())
+
+    assert prefetcher.on_position("u1", path, "m1", 0) is None  # m2 is already generated
+    completed = path.mark_completed(path.mark_completed(0, "m1", "l1"), "m1", "l2")
+    future = prefetcher.on_position("u1", path, "m1", completed)
+    generator.release.set()
+    assert future.result(5) == (None, "m3")
+    prefetcher.close()
+
+
+def test_budget_and_cancellation(path):
+    generator = BlockingGenerator()
+    state = InMemoryStateBackend()
+    prefetcher = ModulePrefetcher(generator, state, max_workers=1, max_queued=0)
+
+    running = prefetcher.prefetch("c1", "m2", "u1")
+    assert prefetcher.prefetch("c1", "m3", "u1") is None  # over the concurrency budget
+
+    prefetcher.release("u1", keep_course_id="c2")
+    generator.release.set()
+    with pytest.raises(GenerationCancelled):
+        running.result(5)
+    assert state.get("prefetch:c1:m2") is None
+    prefetcher.close()
@@ -0,0 +1,81 @@
+"""Test suite for incremental progress aggregates."""
+
+import threading
+
+import pytest
+
+from mentor_app.auditor.progress_aggregator import ProgressAggregator
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.models import Course, Lesson, Module
+from mentor_app.infrastructure.repositories import ProgressRepository
+
+
+@pytest.fixture
+def db_service(tmp_path):
+    db_service = DatabaseService(f"sqlite:///{tmp_path / 'app.db'}")
+    db_service.create_tables()
+    with db_service.get_session() as session:
+        session.add(Course(id="c1", course_title="SQL", estimated_duration=10, difficulty_level="beginner", prerequisites=[]))
+        for module_id in ("m1", "m2"):
+            session.add(Module(id=module_id, course_id="c1", title=module_id, description="", learning_objectives=[],
+                               estimated_duration=5, dependencies=[]))
+        for lesson_id in ("l1", "l2"):
+            session.add(Lesson(id=lesson_id, module_id="m1", course_id="c1", title=lesson_id, type="theory",
+                               key_concepts=[], difficulty="easy"))
+        session.commit()
+    return db_service
+
+
+def _event(lesson_id, event_type="theory_read", payload=None):
+    return {"user_id": "u1", "course_id": "c1", "module_id": "m1", "lesson_id": lesson_id,
+            "event_type": event_type, "score": None, "payload": payload}
+
+
+def test_aggregates_update_incrementally_and_idempotently(db_service):
+    repo = ProgressRepository(db_service)
+    aggregator = ProgressAggregator(db_service)
+
+    repo.append_events([_event("l1"), _event("l1")], aggregator.apply_events)
+    assert repo.get_course_progress("u1", "c1").completed_modules == 0
+
+    repo.append_events([_event("l2", "practice_completed", {"passed": False})], aggregator.apply_events)
+    repo.append_events([_event("l2"), _event("l1")], aggregator.apply_events)
+
+    course = repo.get_course_progress("u1", "c1")
+    assert (course.completed_lessons, course.completed_modules) == (2, 1)
+    assert aggregator.rebuild(apply=False) == []
+
+
+def test_rebuild_repairs_drifted_aggregates(db_service):
+    repo = ProgressRepository(db_service)
+    aggregator = ProgressAggregator(db_service)
+    repo.append_events([_event("l1")])  # ingested without aggregation
+
+    assert len(aggregator.rebuild(apply=False)) == 2
+    aggregator.rebuild()
+    assert repo.get_course_progress("u1", "c1").completed_lessons == 1
+    assert aggregator.rebuild(apply=False) == []
+
+
+def test_concurrent_first_completions_are_counted_once(db_service):
+    repo = ProgressRepository(db_service)
+    barrier = threading.Barrier(2)
+
+    class RacingAggregator(ProgressAggregator):
+        def _lesson_totals(self, session, course_ids):
+            # Hold each batch after reading its module rows so that the two overlap
+            try:
+                barrier.wait(timeout=0.5)
+            except threading.BrokenBarrierError:
+                pass
+            return super()._lesson_totals(session, course_ids)
+
+    aggregator = RacingAggregator(db_service)
+    threads = [threading.Thread(target=repo.append_events, args=([_event("l1")], aggregator.apply_events)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert repo.get_course_progress("u1", "c1").completed_lessons == 1
+    assert aggregator.rebuild(apply=False) == []
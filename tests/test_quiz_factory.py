@@ -0,0 +1,103 @@
+"""Test suite for quiz assembly and local grading."""
+
+import pytest
+
+from mentor_app.benchmarks.stub_llm import StubChatModel
+from mentor_app.builder.models import Assessment, Question
+from mentor_app.builder.quiz_factory import QuizFactory, grade_assessment, without_answers
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.models import Course, Module
+from mentor_app.infrastructure.repositories import ModuleRepository, QuestionBankRepository
+
+
+class InMemoryQuestionBank:
+    """Stands in for QuestionBankRepository."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def get_questions(self, concepts, difficulty):
+        return [
+            Question(**{k: v for k, v in row.items() if k != "difficulty"})
+            for row in self.rows.values()
+            if row["concept"] in concepts and row["difficulty"] == difficulty
+        ]
+
+    def save_questions(self, rows):
+        for row in rows:
+            self.rows.setdefault(row["id"], row)
+        return len(rows)
+
+
+@pytest.fixture
+def llm():
+    return StubChatModel()
+
+
+def test_quiz_assembled_from_bank(llm):
+    factory = QuizFactory(llm, InMemoryQuestionBank())
+
+    first = factory.create_quiz("lesson_3", "Joins", ["Inner Join", "outer  join"], "medium")
+    assert llm.calls == 1
+    assert len(first.questions) == 4
+    assert {q.concept for q in first.questions} == {"inner join", "outer join"}
+
+    # Known concepts come from the bank; only the new one is generated
+    second = factory.create_quiz("module_1_assessment", "Module 1", ["inner join", "self join"], "medium")
+    assert llm.calls == 2
+    assert [q.id for q in second.questions[:2]] == [q.id for q in first.questions[:2]]
+
+    factory.create_quiz("lesson_9", "Joins again", ["self join"], "medium")
+    assert llm.calls == 2
+    factory.create_quiz("lesson_9", "Joins again", ["self join"], "hard")
+    assert llm.calls == 3
+
+
+def test_grading_is_deterministic():
+    assessment = Assessment(
+        id="lesson_3",
+        title="Joins",
+        passing_score=70,
+        questions=[
+            Question(id="q1", type="multiple_choice", question_text="?", options=["LEFT", "INNER", "CROSS", "FULL"],
+                     correct_answer="INNER", explanation="", points=1),
+            Question(id="q2", type="exact", question_text="?", correct_answer="ON", explanation="", points=2),
+            Question(id="q3", type="short_answer", question_text="?", correct_answer="...", explanation="", points=1),
+        ]
+    )
+
+    graded = grade_assessment(assessment, {"q1": "b", "q2": " on. "})
+    assert (graded["score"], graded["passed"]) == (100, True)
+    assert graded["feedback"][2] == {"question_id": "q3", "graded": False}
+
+    graded = grade_assessment(assessment, {"q1": "inner"})
+    assert (graded["score"], graded["passed"]) == (33, False)
+
+    public = without_answers(assessment.dict())
+    assert all("correct_answer" not in q and "explanation" not in q for q in public["questions"])
+
+
+def test_banked_questions_are_kept_and_module_keys_are_stored(tmp_path):
+    db_service = DatabaseService(f"sqlite:///{tmp_path / 'app.db'}")
+    db_service.create_tables()
+    bank = QuestionBankRepository(db_service)
+    row = {"id": "q1", "concept": "inner join", "difficulty": "medium", "type": "exact", "question_text": "?",
+           "options": None, "correct_answer": "ON", "explanation": "first", "points": 1}
+    bank.save_questions([row])
+    bank.save_questions([{**row, "explanation": "second"}])
+    assert [question.explanation for question in bank.get_questions(["inner join"], "medium")] == ["first"]
+
+    assessment = Assessment(id="m1_assessment", title="Joins assessment", passing_score=70, questions=[
+        Question(id="q1", type="exact", question_text="?", correct_answer="ON", explanation="first", points=1)
+    ])
+    with db_service.get_session() as session:
+        session.add(Course(id="c1", course_title="SQL", estimated_duration=10, difficulty_level="beginner", prerequisites=[]))
+        session.add(Module(id="m1", course_id="c1", title="Joins", description="", learning_objectives=[],
+                           estimated_duration=5, dependencies=[], assessment=assessment.dict()))
+        session.add(Module(id="m2", course_id="c1", title="Indexes", description="", learning_objectives=[],
+                           estimated_duration=5, dependencies=[]))
+        session.commit()
+    modules = ModuleRepository(db_service)
+    assert modules.get_module_assessment("m1") == ("c1", assessment)
+    assert modules.get_module_assessment("m2", "c1") == ("c1", None)
+    assert modules.get_module_assessment("m1", "c2") is None
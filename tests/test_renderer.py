@@ -0,0 +1,18 @@
+"""Test suite for lesson HTML rendering."""
+
+from mentor_app.builder.renderer import render_lesson
+
+
+def test_render_builds_toc_with_unique_anchors():
+    html, toc = render_lesson("# Joins\n\n## Inner Joins\n\ntext\n\n## Inner Joins\n")
+
+    assert [entry["anchor"] for entry in toc] == ["joins", "inner-joins", "inner-joins-2"]
+    assert [entry["level"] for entry in toc] == [1, 2, 2]
+    assert '<h2 id="inner-joins-2">Inner Joins</h2>' in html
+
+
+def test_render_escapes_raw_html_and_unsafe_links():
+    html, _ = render_lesson("<script>alert(1)</script>\n\n[click](javascript:alert(1))")
+
+    assert "<script>" not in html
+    assert 'href="javascript:' not in html
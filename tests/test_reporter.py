@@ -0,0 +1,64 @@
+"""Test suite for dashboard snapshots and cohort exports."""
+
+import csv
+import io
+
+import pytest
+
+from mentor_app.auditor.progress_aggregator import ProgressAggregator
+from mentor_app.auditor.reporter import ReportGenerator
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.models import Course, Lesson, Module
+from mentor_app.infrastructure.repositories import MasteryRepository, ProgressRepository
+from mentor_app.infrastructure.shared_state import InMemoryStateBackend
+
+
+@pytest.fixture
+def reporter(tmp_path):
+    db_service = DatabaseService(f"sqlite:///{tmp_path / 'app.db'}")
+    db_service.create_tables()
+    with db_service.get_session() as session:
+        session.add(Course(id="c1", course_title="SQL", estimated_duration=10, difficulty_level="beginner", prerequisites=[]))
+        for module_id in ("m1", "m2"):
+            session.add(Module(id=module_id, course_id="c1", title=module_id.upper(), description="",
+                               learning_objectives=[], estimated_duration=5, dependencies=[]))
+            session.add(Lesson(id=f"{module_id}-l1", module_id=module_id, course_id="c1", title="Lesson",
+                               type="theory", key_concepts=[], difficulty="easy"))
+        session.commit()
+
+    events = [
+        {"user_id": user_id, "course_id": "c1", "module_id": "m1", "lesson_id": "m1-l1",
+         "event_type": "theory_read", "score": None, "payload": None}
+        for user_id in ("u1", "u2")
+    ]
+    ProgressRepository(db_service).append_events(events, ProgressAggregator(db_service).apply_events)
+    MasteryRepository(db_service).save_mastery([
+        {"user_id": "u1", "topic": "joins", "mastery": 0.3, "observations": 2},
+        {"user_id": "u1", "topic": "select", "mastery": 0.9, "observations": 4},
+    ])
+    return ReportGenerator(db_service, state_backend=InMemoryStateBackend())
+
+
+def test_dashboards_are_served_from_snapshots(reporter):
+    assert reporter.refresh_snapshots(batch_size=1) == 2
+
+    dashboard = reporter.state_backend.get("dashboard:u1")
+    assert dashboard["courses"][0]["completion_percentage"] == 50
+    assert dashboard["weakest_topics"][0]["topic"] == "joins"
+    assert dashboard["strongest_topics"][0]["topic"] == "select"
+    assert reporter.get_dashboard_data("u1") == dashboard
+
+    cohort = reporter.get_cohort_dashboard("c1")
+    assert cohort["learners"] == 2
+    assert cohort["modules"][0]["learners_completed"] == 2
+    assert cohort["modules"][1]["learners_started"] == 0
+
+
+def test_cohort_export_streams_csv_and_arrow(reporter):
+    rows = list(csv.reader(io.StringIO(b"".join(reporter.export_cohort_csv("c1")).decode())))
+    assert rows[0][0] == "user_id"
+    assert [row[:2] for row in rows[1:]] == [["u1", "m1"], ["u2", "m1"]]
+
+    pa = pytest.importorskip("pyarrow")
+    table = pa.ipc.open_stream(b"".join(reporter.export_cohort_arrow("c1", batch_size=1))).read_all()
+    assert table.column("user_id").to_pylist() == ["u1", "u2"]
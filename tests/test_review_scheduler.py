@@ -0,0 +1,98 @@
+"""Test suite for spaced-repetition review scheduling."""
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from mentor_app.auditor.review_scheduler import ReviewScheduler, sm2_step
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.models import Course, Lesson, Module
+from mentor_app.infrastructure.repositories import ProgressRepository
+
+START = datetime(2024, 1, 1, 9)
+
+
+@pytest.fixture
+def db_service(tmp_path):
+    db_service = DatabaseService(f"sqlite:///{tmp_path / 'app.db'}")
+    db_service.create_tables()
+    with db_service.get_session() as session:
+        session.add(Course(id="c1", course_title="SQL", estimated_duration=10, difficulty_level="beginner", prerequisites=[]))
+        session.add(Module(id="m1", course_id="c1", title="Joins", description="", learning_objectives=[],
+                           estimated_duration=5, dependencies=[]))
+        session.add(Lesson(id="l1", module_id="m1", course_id="c1", title="Joins", type="practice",
+                           key_concepts=["Inner Join"], difficulty="easy"))
+        session.add(Lesson(id="l2", module_id="m1", course_id="c1", title="Self joins", type="practice",
+                           key_concepts=["Self Join"], difficulty="easy"))
+        session.commit()
+    return db_service
+
+
+def _scored(user_id, lesson_id, score, created_at):
+    return {"user_id": user_id, "course_id": "c1", "module_id": "m1", "lesson_id": lesson_id,
+            "event_type": "practice_completed", "score": score, "payload": None, "created_at": created_at}
+
+
+def test_sm2_intervals_grow_and_reset_on_failure():
+    easiness, interval, repetitions = 2.5, 0, 0
+    intervals = []
+    for quality in (5, 5, 5, 1):
+        easiness, interval, repetitions = sm2_step(easiness, interval, repetitions, quality)
+        intervals.append(interval)
+    assert intervals == [1, 6, 16, 1]
+    assert repetitions == 0
+
+
+def test_due_items_follow_committed_schedule(db_service):
+    repo = ProgressRepository(db_service)
+    scheduler = ReviewScheduler(db_service)
+
+    repo.append_events([_scored("u1", "l1", 100, START), _scored("u1", "l2", 20, START)], scheduler.apply_events)
+    assert scheduler.due_items("u1", now=START) == []
+    assert [item["topic"] for item in scheduler.due_items("u1", now=START + timedelta(days=1))] == ["inner join", "self join"]
+
+    # A later review moves the topic out of today's queue
+    repo.append_events([_scored("u1", "l1", 100, START + timedelta(days=1))], scheduler.apply_events)
+    assert [item["topic"] for item in scheduler.due_items("u1", now=START + timedelta(days=1))] == ["self join"]
+    assert [item["topic"] for item in scheduler.due_items("u1", now=START + timedelta(days=7))] == ["self join", "inner join"]
+
+
+def test_due_today_groups_topics_by_user(db_service):
+    scheduler = ReviewScheduler(db_service)
+    ProgressRepository(db_service).append_events(
+        [_scored("u1", "l1", 100, START), _scored("u2", "l1", 0, START), _scored("u2", "l2", 0, START)],
+        scheduler.apply_events
+    )
+
+    assert list(scheduler.due_today(now=START + timedelta(days=1))) == [
+        ("u1", ["inner join"]), ("u2", ["inner join", "self join"])
+    ]
+
+
+def test_schedulers_in_other_processes_see_new_reviews(db_service):
+    repo = ProgressRepository(db_service)
+    reader, writer = ReviewScheduler(db_service), ReviewScheduler(db_service)
+
+    repo.append_events([_scored("u1", "l1", 0, START)], writer.apply_events)
+    assert [item["topic"] for item in reader.due_items("u1", now=START + timedelta(days=1))] == ["inner join"]
+
+    repo.append_events([_scored("u1", "l1", 100, START + timedelta(days=1))], writer.apply_events)
+    assert reader.due_items("u1", now=START + timedelta(days=1)) == []
+
+
+def test_concurrent_first_reviews_of_a_topic_both_apply(db_service):
+    repo = ProgressRepository(db_service)
+    scheduler = ReviewScheduler(db_service)
+    threads = [
+        threading.Thread(target=repo.append_events, args=([_scored("u1", "l1", 100, START)], scheduler.apply_events))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # The second review builds on the first: due after 6 days, not 1
+    assert scheduler.due_items("u1", now=START + timedelta(days=5)) == []
+    assert [item["topic"] for item in scheduler.due_items("u1", now=START + timedelta(days=6))] == ["inner join"]
@@ -0,0 +1,163 @@
+"""Test suite for per-task model routing and hedged calls."""
+
+import json
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from mentor_app.architect.service import ArchitectService
+from mentor_app.benchmarks.stub_llm import StubChatModel
+from mentor_app.infrastructure.metrics import track_llm_call
+from mentor_app.infrastructure.routing import (
+    LATENCY_WINDOW, MIN_LATENCY_SAMPLES, ModelRoute, ModelRouter, load_routes, model_for_task, strip_code_fence
+)
+from mentor_app.infrastructure.tokens import get_budget, usage_scope
+
+
+class FakeModel:
+    def __init__(self, name, temperature, latency=0.0, content="ok", fail=False):
+        self.name = name
+        self.temperature = temperature
+        self.latency = latency
+        self.content = content
+        self.fail = fail
+        self.calls = 0
+
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError(f"{self.name} is down")
+        return AIMessage(content=self.content)
+
+
+def _router(routes, **models):
+    """Router whose clients are FakeModels configured per model name."""
+    clients = {}
+
+    def factory(model, temperature, max_tokens):
+        clients[model] = FakeModel(model, temperature, **models.get(model, {}))
+        return clients[model]
+
+    return ModelRouter(routes, client_factory=factory), clients
+
+
+def test_each_task_gets_its_model_and_parameters():
+    router, clients = _router({
+        "syllabus": ModelRoute("big", 0.7),
+        "quiz": ModelRoute("small", 0.2),
+        "default": ModelRoute("medium", 0.5),
+    })
+    router.invoke([HumanMessage(content="x")], task="quiz")
+    router.invoke([HumanMessage(content="x")], task="theory")
+    assert {name: client.temperature for name, client in clients.items()} == {"small": 0.2, "medium": 0.5}
+
+    # Responses are capped at the task's token budget, which usage ceilings are checked against
+    bound = []
+    ModelRouter({"default": ModelRoute("m")}, client_factory=lambda *args: bound.append(args) or StubChatModel()).invoke(
+        [HumanMessage(content="x")], task="quiz"
+    )
+    assert bound == [("m", 0.7, get_budget("quiz").max_response_tokens)]
+
+    plain = StubChatModel()
+    assert model_for_task(plain, "quiz") is plain  # injected chat models are used as they are
+
+
+def test_slow_primary_is_hedged_and_fast_result_wins():
+    router, clients = _router(
+        {"theory": ModelRoute("slow", hedge_model="fast", hedge_after=0.1)},
+        slow={"latency": 1.0, "content": "slow"}, fast={"latency": 0.05, "content": "fast"}
+    )
+    start = time.perf_counter()
+    assert router.invoke([HumanMessage(content="x")], task="theory").content == "fast"
+    assert time.perf_counter() - start < 0.5
+
+    router, clients = _router(
+        {"theory": ModelRoute("slow", hedge_model="fast", hedge_after=0.5)},
+        slow={"latency": 0.05, "content": "slow"}
+    )
+    assert router.invoke([HumanMessage(content="x")], task="theory").content == "slow"
+    assert "fast" not in clients  # answered before the deadline, no hedge sent
+
+
+def test_invalid_or_failed_primary_falls_back_to_hedge():
+    route = ModelRoute("primary", hedge_model="backup", hedge_after=30, json_output=True)
+    router, _ = _router({"syllabus": route}, primary={"content": "Sure! Here is"}, backup={"content": '```json\n{"a": 1}\n```'})
+    assert json.loads(strip_code_fence(router.invoke([HumanMessage(content="x")], task="syllabus").content)) == {"a": 1}
+
+    router, _ = _router({"syllabus": route}, primary={"fail": True}, backup={"fail": True})
+    with pytest.raises(RuntimeError):
+        router.invoke([HumanMessage(content="x")], task="syllabus")
+
+
+def test_hedge_deadline_follows_observed_p95():
+    router, _ = _router({"theory": ModelRoute("a", hedge_model="b", hedge_after=60), "quiz": ModelRoute("a")})
+    for i in range(MIN_LATENCY_SAMPLES - 1):
+        router.record_latency("theory", 1.0)
+    assert router.hedge_deadline("theory") == 60  # too few samples for a percentile yet
+    for i in range(LATENCY_WINDOW):
+        router.record_latency("theory", float(i % 100))
+    assert router.hedge_deadline("theory") == 95  # only the latest window counts
+    assert router.hedge_deadline("quiz") is None
+
+
+def test_routes_are_configurable_from_a_file(tmp_path, monkeypatch):
+    path = tmp_path / "routes.json"
+    path.write_text(json.dumps({"theory": {"model": "local", "hedge_model": None}, "summary": {"temperature": 0.1}}))
+    monkeypatch.setenv("LLM_ROUTES_FILE", str(path))
+    routes = load_routes()
+    assert (routes["theory"].model, routes["theory"].hedge_model, routes["theory"].temperature) == ("local", None, 0.7)
+    assert (routes["summary"].model, routes["summary"].temperature) == (routes["default"].model, 0.1)
+
+    path.write_text(json.dumps({"theory": {"modle": "typo"}}))
+    with pytest.raises(ValueError):
+        load_routes()
+
+
+def test_architect_calls_go_through_the_router():
+    stub = StubChatModel()
+    router = ModelRouter({"default": ModelRoute("stub", hedge_model="stub", hedge_after=5, json_output=True)},
+                         client_factory=lambda model, temperature, max_tokens: stub)
+    plan = ArchitectService(router).create_syllabus("SQL")
+    assert plan.course_title == "SQL" and stub.calls == 1
+
+
+def test_hedges_do_not_wait_for_threads_behind_stuck_primaries():
+    release = threading.Event()
+
+    class Stuck(FakeModel):
+        def invoke(self, messages, **kwargs):
+            release.wait(10)
+            return super().invoke(messages, **kwargs)
+
+    models = {"stuck": Stuck("stuck", 0.7), "fast": FakeModel("fast", 0.7, content="fast")}
+    router = ModelRouter({"theory": ModelRoute("stuck", hedge_model="fast", hedge_after=0.05)},
+                         client_factory=lambda model, temperature, max_tokens: models[model], max_workers=1)
+    try:
+        # The second primary queues behind the first on the one primary thread; its hedge still runs
+        for _ in range(2):
+            assert router.invoke([HumanMessage(content="x")], task="theory").content == "fast"
+    finally:
+        release.set()
+
+
+def test_both_calls_of_a_hedge_are_accounted():
+    router, clients = _router(
+        {"theory": ModelRoute("slow", hedge_model="fast", hedge_after=0.05)},
+        slow={"latency": 0.3, "content": "slow answer " * 10}, fast={"content": "fast"}
+    )
+    with usage_scope() as usage:
+        with track_llm_call("builder", "theory", "x") as call:
+            call.record_response(router.invoke([HumanMessage(content="x")], task="theory"))
+        assert usage.calls == 2  # the primary's prompt is counted while it is still running
+        time.sleep(0.5)
+    assert usage.by_task["theory"]["calls"] == 2
+    assert usage.by_task["theory"]["completion_tokens"] > 10  # the losing primary's answer too
+
+    # A hedge that would break the ceiling alongside the running primary is not sent
+    router, clients = _router({"theory": ModelRoute("slow", hedge_model="fast", hedge_after=0.05)}, slow={"latency": 0.2})
+    with usage_scope(max_tokens=4000):
+        assert router.invoke([HumanMessage(content="x")], task="theory").content == "ok"
+    assert "fast" not in clients
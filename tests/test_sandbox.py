@@ -0,0 +1,88 @@
+"""Test suite for code example extraction and sandboxed validation."""
+
+import os
+
+import pytest
+
+from mentor_app.builder.sandbox import CodeSandbox, extract_code_examples
+
+LESSON = """# Loops
+
+A simple loop:
+
+```python
+for i in range(3):
+    print(i)
+```
+
+Joins in SQL:
+
+```sql
+SELECT * FROM users
+```
+
+Broken:
+
+```python
+print(undefined_name)
+```
+"""
+
+
+@pytest.fixture
+def sandbox():
+    sandbox = CodeSandbox(workers=2, timeout=2.0, cpu_seconds=2.0)
+    yield sandbox
+    sandbox.close()
+
+
+def test_extract_code_examples():
+    examples = extract_code_examples(LESSON)
+    assert [(e.language, e.is_runnable) for e in examples] == [("python", True), ("sql", False), ("python", True)]
+    assert examples[0].explanation == "A simple loop:"
+    assert examples[1].code == "SELECT * FROM users\n"
+
+
+def test_validation_flags_broken_examples(sandbox):
+    examples = sandbox.validate_all(extract_code_examples(LESSON))
+    assert examples[0].is_runnable and examples[0].error is None
+    assert not examples[1].is_runnable and examples[1].error is None  # not executed
+    assert not examples[2].is_runnable and "NameError" in examples[2].error
+
+
+def test_timeouts_replace_the_worker(sandbox):
+    (hung,) = extract_code_examples("```python\nwhile True:\n    pass\n```")
+    (ok,) = extract_code_examples("```python\nimport sys\nsys.stdout.write('x' * 10)\n```")
+    hung, ok = sandbox.validate_all([hung, ok])
+    assert not hung.is_runnable and "Timed out" in hung.error
+    assert ok.is_runnable
+    assert "EOFError" in sandbox.validate(ok.copy(update={"code": "input()"})).error  # stdin is empty
+
+
+def test_runs_do_not_share_state(sandbox):
+    patch = "import builtins, json\njson.dumps = lambda *args, **kwargs: 'forged'\nbuiltins.leaked = True\nopen('scratch', 'w').write('x')"
+    assert sandbox.run(patch, [""])[0]["ok"]
+    probe = "import builtins, json, os\nprint(json.dumps(1), hasattr(builtins, 'leaked'), os.path.exists('scratch'))"
+    assert sandbox.run(probe, [""]) == [{"ok": True, "output": "1 False False\n", "error": None}]
+
+
+@pytest.mark.skipif(os.name != "posix" or os.geteuid() != 0, reason="strict isolation needs root")
+def test_strict_isolation(sandbox):
+    probes = {
+        "uid": "import os\nprint(os.getuid())",
+        "environ": f"print(open('/proc/{os.getpid()}/environ').read())",
+        "network": "print([line.split(':')[0].strip() for line in open('/proc/self/net/dev').readlines()[2:]])",
+        "fork": "import os\nos.fork()",
+        "result_fd": "import os\nos.write(3, b'{}')",
+    }
+    runs = {name: sandbox.run(code, [""])[0] for name, code in probes.items()}
+    assert runs["uid"]["output"] == "65534\n"
+    assert "PermissionError" in runs["environ"]["error"]
+    assert runs["network"]["output"] == "['lo']\n"  # an empty network namespace
+    assert "BlockingIOError" in runs["fork"]["error"]
+    assert "Bad file descriptor" in runs["result_fd"]["error"]
+
+
+def test_unknown_isolation_level():
+    with pytest.raises(ValueError):
+        CodeSandbox(isolation="none")
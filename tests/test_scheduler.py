@@ -0,0 +1,192 @@
+"""Test suite for fair-share scheduling of LLM calls."""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from mentor_app.architect.service import ArchitectService
+from mentor_app.benchmarks.stub_llm import StubChatModel
+from mentor_app.infrastructure.routing import ModelRoute, ModelRouter
+from mentor_app.infrastructure.scheduler import (
+    GenerationScheduler, RequestClass, current_request_class, generation_executor, get_generation_scheduler,
+    run_generation, scheduling_scope
+)
+from mentor_app.infrastructure.shared_state import InMemoryStateBackend
+from mentor_app.infrastructure.tracing import Tracer
+from mentor_app.mentor.mentor_service import MentorService
+from mentor_app.mentor.prefetch import ModulePrefetcher
+
+
+def _queue(scheduler, calls, order, release):
+    """Start a thread per (priority, tenant) call that records when it is granted, then holds until ``release``."""
+    threads = []
+    for priority, tenant in calls:
+        def run(priority=priority, tenant=tenant):
+            with scheduler.slot(priority, tenant):
+                order.append((priority, tenant))
+                release.wait()
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        threads.append(thread)
+        while sum(scheduler.stats()["queued"].values()) + sum(scheduler.stats()["running"].values()) < len(threads):
+            time.sleep(0.001)  # queue in a known order
+    return threads
+
+
+def test_interactive_calls_overtake_a_bulk_backlog_and_bulk_tenants_share():
+    scheduler = GenerationScheduler(max_concurrent=2, tenant_max_concurrent=10, reserved_interactive=1)
+    order, release = [], threading.Event()
+    threads = _queue(scheduler, [("bulk", "a")] * 4 + [("bulk", "b")] * 2, order, release)
+    assert scheduler.stats() == {"queued": {"bulk": 5}, "running": {"bulk": 1}}
+
+    threads += _queue(scheduler, [("interactive", "learner")], order, release)
+    assert order[-1] == ("interactive", "learner")  # took the reserved slot ahead of five queued bulk calls
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    # After the first bulk call, tenant b is served before a's backlog rather than after it
+    bulk = [tenant for priority, tenant in order if priority == "bulk"]
+    assert bulk == ["a", "b", "a", "b", "a", "a"]
+
+
+def test_tenant_concurrency_is_capped():
+    scheduler = GenerationScheduler(max_concurrent=8, tenant_max_concurrent=2, reserved_interactive=0)
+    order, release = [], threading.Event()
+    threads = _queue(scheduler, [("bulk", "a")] * 4 + [("bulk", "b")], order, release)
+    assert scheduler.stats() == {"queued": {"bulk": 2}, "running": {"bulk": 3}}
+    assert order == [("bulk", "a"), ("bulk", "a"), ("bulk", "b")]
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert scheduler.stats() == {"queued": {}, "running": {}}
+
+    with pytest.raises(ValueError):
+        scheduler.acquire("urgent")
+
+
+def test_interactive_calls_are_served_while_bulk_tenants_saturate_capacity():
+    scheduler = GenerationScheduler(max_concurrent=4, tenant_max_concurrent=4, reserved_interactive=1)
+    order, release = [], threading.Event()
+    # Twelve bulk tenants take every bulk slot and queue a backlog that never drains
+    threads = _queue(scheduler, [("bulk", f"tenant_{i}") for i in range(12)], order, release)
+    assert scheduler.stats() == {"queued": {"bulk": 9}, "running": {"bulk": 3}}
+
+    for _ in range(20):
+        learner = threading.Thread(target=lambda: scheduler.release(scheduler.acquire("interactive", "learner")), daemon=True)
+        learner.start()
+        learner.join(5)
+        assert not learner.is_alive()  # granted without any bulk call finishing
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+
+def test_interactive_requests_do_not_queue_for_threads_behind_a_batch():
+    release, lock, running = threading.Event(), threading.Lock(), []
+
+    class BlockedArchitect:
+        def create_syllabus(self, topic, user_instructions=None, user_context=None):
+            with lock:
+                running.append(topic)
+            release.wait(10)
+            raise RuntimeError("released")
+
+    mentor = MentorService.__new__(MentorService)
+    mentor.architect, mentor.ceilings, mentor.tracer = BlockedArchitect(), {}, Tracer()
+    requests = [SimpleNamespace(topic=f"topic {i}", user_instructions=None, user_context=None) for i in range(40)]
+
+    async def scenario():
+        async def drain():
+            return [item async for item in mentor.generate_course_syllabi(requests, concurrency=32, tenant="bulk_client")]
+
+        batch = asyncio.create_task(drain())
+        await asyncio.sleep(0.1)  # the batch now holds every bulk thread
+        assert len(running) == generation_executor("bulk")._max_workers
+        priority = await asyncio.wait_for(
+            run_generation(RequestClass("interactive", "learner"), lambda: current_request_class().priority), timeout=5
+        )
+        release.set()
+        return priority, await batch
+
+    try:
+        priority, results = asyncio.run(scenario())
+    finally:
+        release.set()
+    assert priority == "interactive"
+    assert len(results) == 40 and all(error is not None for _, _, _, error in results)
+
+
+def test_llm_calls_are_scheduled_under_the_request_class():
+    seen = []
+
+    class ObservingModel(StubChatModel):
+        def invoke(self, messages, **kwargs):
+            seen.append(get_generation_scheduler().stats()["running"])
+            return super().invoke(messages, **kwargs)
+
+    traces = []
+    with scheduling_scope(RequestClass("bulk", "tenant_a")), Tracer(traces.append).trace("create_course"):
+        ArchitectService(ObservingModel()).create_syllabus("SQL")
+    ArchitectService(ObservingModel()).create_syllabus("SQL")
+    assert seen == [{"bulk": 1}, {"interactive": 1}]
+    assert traces[0].spans[0].attributes["priority"] == "bulk"
+
+
+def test_joining_a_prefetch_raises_its_priority():
+    started, release, classes = threading.Event(), threading.Event(), []
+
+    def create_module(course_id, module_id, cancel_event=None):
+        request_class = current_request_class()
+        classes.append((request_class.priority, request_class.tenant))
+        started.set()
+        release.wait(5)
+        classes.append(request_class.priority)
+        return None, module_id
+
+    prefetcher = ModulePrefetcher(create_module, InMemoryStateBackend())
+    try:
+        prefetcher.prefetch("course_1", "module_2", user_id="learner")
+        started.wait(5)
+        waiter = threading.Thread(target=prefetcher.wait, args=("course_1", "module_2"), daemon=True)
+        waiter.start()
+        while prefetcher._jobs[("course_1", "module_2")].request_class.priority != "interactive":
+            time.sleep(0.001)
+        release.set()
+        waiter.join(5)
+    finally:
+        prefetcher.close()
+    assert classes == [("prefetch", "learner"), "interactive"]
+
+
+def test_requests_without_a_tenant_share_one_cap():
+    scheduler = GenerationScheduler(max_concurrent=8, tenant_max_concurrent=2, reserved_interactive=0)
+    order, release = [], threading.Event()
+    threads = _queue(scheduler, [("bulk", None)] * 3, order, release)
+    assert scheduler.stats() == {"queued": {"bulk": 1}, "running": {"bulk": 2}}
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+
+def test_hedges_take_their_own_slot():
+    seen = []
+
+    class Slow(StubChatModel):
+        def invoke(self, messages, **kwargs):
+            time.sleep(0.5)
+            return super().invoke(messages, **kwargs)
+
+    class Hedge(StubChatModel):
+        def invoke(self, messages, **kwargs):
+            seen.append(get_generation_scheduler().stats()["running"])
+            return super().invoke(messages, **kwargs)
+
+    models = {"primary": Slow(), "hedge": Hedge()}
+    router = ModelRouter({"default": ModelRoute("primary", hedge_model="hedge", hedge_after=0.05)},
+                         client_factory=lambda model, temperature, max_tokens: models[model])
+    with scheduling_scope(RequestClass("bulk", "tenant_a")):
+        ArchitectService(router).create_syllabus("SQL")
+    assert seen == [{"bulk": 2}]  # the primary's call slot and the hedge's
@@ -0,0 +1,89 @@
+"""Test suite for full-text lesson search."""
+
+import pytest
+
+from mentor_app.builder.models import LessonContent, ModuleContent
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.repositories import CourseRepository, ModuleRepository
+from mentor_app.infrastructure.search import LessonSearchIndex
+from mentor_app.models import CoursePlan, Module
+
+
+@pytest.fixture
+def db_service(tmp_path):
+    db_service = DatabaseService(f"sqlite:///{tmp_path / 'app.db'}")
+    db_service.create_tables()
+    return db_service
+
+
+def _lesson(lesson_id, title, body, key_concepts=()):
+    return LessonContent(id=lesson_id, title=title, type="theory", content_markdown=body,
+                         key_concepts=list(key_concepts), difficulty="easy", code_examples=[],
+                         interactive_elements=[], practice_tasks=[], estimated_duration=10)
+
+
+def _save_course(db_service, title, lessons):
+    plan = CoursePlan(course_title=title, estimated_duration=10, difficulty_level="beginner", prerequisites=[], modules=[
+        Module(id="m1", title="Basics", description="", learning_objectives=[], estimated_duration=5, dependencies=[])
+    ])
+    course_id = CourseRepository(db_service).save_course_plan(plan)
+    ModuleRepository(db_service).save_module_content(course_id, "m1", ModuleContent(
+        title="Basics", description="", learning_objectives=[], estimated_duration=5, lessons=lessons
+    ))
+    return course_id
+
+
+def test_lessons_are_indexed_on_save_and_ranked(db_service):
+    python = _save_course(db_service, "Python", [
+        _lesson("lesson_1", "Loops", "A loop can call functions on every item."),
+        _lesson("lesson_2", "Defining a function", "Use def to create one.", ["def", "return values"]),
+        _lesson("lesson_3", "Strings", "Text handling."),
+    ])
+    index = LessonSearchIndex(db_service)
+
+    hits, has_more = index.search("function")
+    assert [hit["lesson_id"] for hit in hits] == ["lesson_2", "lesson_1"]  # title beats body; stemming matches "functions"
+    assert not has_more
+    assert hits[0]["course_id"] == python and hits[0]["key_concepts"] == ["def", "return values"]
+    assert "**functions**" in hits[1]["snippet"]
+
+    assert index.search("function loop")[0][0]["lesson_id"] == "lesson_1"  # every term must match
+    assert index.search("return* (values")[0][0]["lesson_id"] == "lesson_2"  # operators are taken literally
+    assert index.search("  ") == ([], False)
+
+
+def test_pagination_and_course_filter(db_service):
+    first = _save_course(db_service, "SQL", [_lesson(f"lesson_{i}", f"Joins {i}", "Join tables.") for i in range(5)])
+    second = _save_course(db_service, "More SQL", [_lesson("lesson_1", "Self joins", "Join a table to itself.")])
+    index = LessonSearchIndex(db_service)
+
+    page, has_more = index.search("join", limit=4)
+    assert len(page) == 4 and has_more
+    rest, has_more = index.search("join", limit=4, offset=4)
+    assert len(rest) == 2 and not has_more
+    assert len({(hit["course_id"], hit["lesson_id"]) for hit in page + rest}) == 6
+
+    hits, _ = index.search("join", course_id=second)
+    assert [(hit["course_id"], hit["lesson_id"]) for hit in hits] == [(second, "lesson_1")]
+    assert len(index.search("join", course_id=first)[0]) == 5
+
+
+def test_existing_lessons_are_backfilled(db_service):
+    _save_course(db_service, "Python", [_lesson("lesson_1", "Decorators", "Wrap functions.")])
+    with db_service.engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE lesson_search")
+
+    assert [hit["lesson_id"] for hit in LessonSearchIndex(db_service).search("decorators")[0]] == ["lesson_1"]
+
+
+def test_index_survives_renumbered_lesson_rowids(db_service):
+    _save_course(db_service, "Python", [_lesson("lesson_1", "Decorators", "Wrap functions."),
+                                        _lesson("lesson_2", "Generators", "Yield values.")])
+    index = LessonSearchIndex(db_service)
+    index.search("decorators")
+    with db_service.engine.begin() as connection:
+        # What VACUUM may do to a table without an INTEGER PRIMARY KEY
+        connection.exec_driver_sql("UPDATE lessons SET rowid = 3 - rowid + 100")
+
+    assert [hit["lesson_id"] for hit in index.search("decorators")[0]] == ["lesson_1"]
+    assert [hit["lesson_id"] for hit in index.search("yield")[0]] == ["lesson_2"]
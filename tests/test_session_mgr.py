@@ -0,0 +1,109 @@
+"""Test suite for the session manager."""
+
+import time
+
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.repositories import ProgressRepository
+from mentor_app.infrastructure.shared_state import InMemoryStateBackend
+from mentor_app.mentor.session_mgr import SESSION_OVERHEAD_BYTES, SessionManager
+
+
+def _manager(**kwargs):
+    kwargs.setdefault("flush_interval", 0)
+    return SessionManager(InMemoryStateBackend(), **kwargs)
+
+
+def test_lru_cap_evicts_least_recently_used():
+    sessions = _manager(max_sessions=2)
+    for user_id in ("a", "b"):
+        sessions.create_session(user_id)
+    sessions.flush()
+    sessions.get_session_state("a")
+    sessions.create_session("c")
+
+    assert list(sessions.sessions) == ["a", "c"]
+    # The evicted session is reloaded from its shared snapshot
+    assert sessions.get_session_state("b").user_id == "b"
+
+
+def test_idle_sessions_expire_from_memory():
+    sessions = _manager(idle_ttl=0.05)
+    sessions.create_session("a")
+    time.sleep(0.1)
+    sessions.create_session("b")
+
+    assert list(sessions.sessions) == ["b"]
+
+
+def test_evicted_dirty_session_is_not_lost():
+    sessions = _manager(max_sessions=1)
+    sessions.set_state("a", "in_lesson", lesson_id="lesson_1")
+    sessions.create_session("b")
+
+    assert sessions.get_session_state("a").state == "in_lesson"
+
+
+def test_progress_is_written_behind_in_batches(tmp_path):
+    db_service = DatabaseService(f"sqlite:///{tmp_path / 'app.db'}")
+    db_service.create_tables()
+    repo = ProgressRepository(db_service)
+    sessions = _manager(progress_repo=repo, flush_batch_size=3)
+
+    sessions.update_progress("u1", "lesson_1", completed=False, course_id="c1")
+    sessions.update_progress("u1", "lesson_1", completed=True)
+    assert repo.get_lesson_progress("u1", "c1") == []
+
+    sessions.update_progress("u1", "lesson_2", completed=True)
+    sessions.update_progress("u2", "lesson_1", completed=True, course_id="c1")
+
+    rows = repo.get_lesson_progress("u1", "c1")
+    assert sorted((row.lesson_id, row.completed) for row in rows) == [("lesson_1", True), ("lesson_2", True)]
+
+
+def test_cache_is_bounded_by_memory():
+    sessions = _manager(max_bytes=3 * SESSION_OVERHEAD_BYTES + 20_000)
+    for user_id in ("a", "b", "c"):
+        sessions.create_session(user_id)
+    assert list(sessions.sessions) == ["a", "b", "c"]
+
+    sessions.add_context("c", "x" * 20_000)
+    assert list(sessions.sessions) == ["b", "c"]
+    assert sessions.get_session_state("a").user_id == "a"  # still dirty, so not lost
+
+
+def test_changes_made_by_another_worker_are_picked_up():
+    backend = InMemoryStateBackend()
+    worker_a = SessionManager(backend, flush_interval=0, revalidate_interval=0.05)
+    worker_b = SessionManager(backend, flush_interval=0)
+    worker_a.set_state("u1", "in_lesson", lesson_id="lesson_1")
+    worker_a.flush()
+    assert worker_a.get_session_state("u1").lesson_id == "lesson_1"
+
+    worker_b.set_state("u1", "in_lesson", lesson_id="lesson_2")
+    worker_b.flush()
+    assert worker_a.get_session_state("u1").lesson_id == "lesson_1"  # served from memory until revalidated
+    time.sleep(0.1)
+    assert worker_a.get_session_state("u1").lesson_id == "lesson_2"
+
+    # Unchanged snapshots keep the local copy; local changes not yet written win
+    session = worker_a.get_session_state("u1")
+    time.sleep(0.1)
+    assert worker_a.get_session_state("u1") is session
+    worker_a.set_state("u1", "awaiting_module")
+    time.sleep(0.1)
+    assert worker_a.get_session_state("u1").state == "awaiting_module"
+
+
+def test_state_changes_are_flushed_in_the_background_for_other_workers():
+    backend = InMemoryStateBackend()
+    worker_a = SessionManager(backend, max_sessions=10, flush_interval=0.01)
+    worker_b = SessionManager(backend, flush_interval=0)
+    for i in range(100):
+        worker_a.set_state(f"u{i}", "in_lesson", lesson_id="lesson_1")
+
+    deadline = time.monotonic() + 5
+    while worker_a._dirty and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not worker_a._dirty and len(worker_a.sessions) == 10
+    assert worker_b.get_session_state("u0").lesson_id == "lesson_1"
+    worker_a.close()
@@ -0,0 +1,71 @@
+"""Test suite for shared state backends."""
+
+import threading
+import time
+
+import pytest
+
+from mentor_app.infrastructure.shared_state import (
+    InMemoryStateBackend,
+    LockTimeout,
+    SQLiteStateBackend,
+)
+from mentor_app.mentor.session_mgr import SessionManager
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryStateBackend()
+    return SQLiteStateBackend(str(tmp_path / "state.db"))
+
+
+def test_set_get_and_ttl(backend):
+    backend.set("a", {"x": 1})
+    backend.set("b", 1, ttl=0.05)
+    assert backend.get("a") == {"x": 1}
+    time.sleep(0.1)
+    assert backend.get("b") is None
+
+
+def test_add_only_when_absent(backend):
+    assert backend.add("k", 1)
+    assert not backend.add("k", 2)
+    assert backend.get("k") == 1
+
+
+def test_lock_is_exclusive(backend):
+    with backend.lock("job"):
+        with pytest.raises(LockTimeout):
+            with backend.lock("job", timeout=0.05):
+                pass
+    with backend.lock("job", timeout=0.05):
+        pass
+
+
+def test_get_or_compute_runs_once_across_threads(backend):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    threads = [threading.Thread(target=backend.get_or_compute, args=("cached", compute)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+
+
+def test_sqlite_state_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "state.db")
+    worker_a, worker_b = SQLiteStateBackend(path), SQLiteStateBackend(path)
+
+    sessions_a = SessionManager(worker_a, flush_interval=0)
+    sessions_a.update_progress("user_1", "lesson_1", completed=True, course_id="course_1")
+    sessions_a.flush()
+
+    state = SessionManager(worker_b, flush_interval=0).get_session_state("user_1")
+    assert (state.course_id, state.lesson_id) == ("course_1", "lesson_1")
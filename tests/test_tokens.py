@@ -0,0 +1,125 @@
+"""Test suite for token budgets and LLM usage accounting."""
+
+import pytest
+
+from mentor_app.architect.service import ArchitectService
+from mentor_app.benchmarks.stub_llm import StubChatModel
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.metrics import track_llm_call
+from mentor_app.infrastructure.repositories import UsageRepository
+from mentor_app.infrastructure.tokens import (
+    GenerationBudgetExceeded, TokenCounter, fit_prompt, get_budget, get_token_counter, usage_scope
+)
+from mentor_app.mentor.mentor_service import MentorService
+from mentor_app.models import UserContext
+
+
+class RecordingModel(StubChatModel):
+    def invoke(self, messages, **kwargs):
+        self.prompt = messages[-1].content
+        return super().invoke(messages, **kwargs)
+
+
+def test_estimating_counter_counts_and_truncates():
+    counter = TokenCounter("no-such-encoding")
+    assert not counter.exact
+    assert counter.count("") == 0 and counter.count("abcdefgh") == 2
+
+    text = "word " * 100
+    cut = counter.truncate(text, 10)
+    assert counter.count(cut) <= 10 and cut.endswith("...")
+    assert counter.truncate(text, 1) == ""
+    assert counter.truncate("short", 10) == "short"
+
+
+def test_fit_prompt_shrinks_optional_context_least_important_first():
+    counter = get_token_counter()
+    limit = get_budget("syllabus").max_prompt_tokens
+    render = "Topic: {topic}\nKnown: {prior_knowledge}\nInstructions: {user_instructions}".format_map
+    fields = {"topic": "SQL", "prior_knowledge": "joins " * 2000, "user_instructions": "Focus on window functions. " * 50}
+
+    prompt = fit_prompt("syllabus", render, fields, optional={"prior_knowledge": "None", "user_instructions": "None"})
+    assert counter.count(prompt) <= limit
+    assert "Topic: SQL" in prompt
+    assert ("Focus on window functions. " * 50).strip() in prompt  # untouched: shrinking knowledge was enough
+
+    fields["user_instructions"] = "Focus on window functions. " * 2000
+    prompt = fit_prompt("syllabus", render, fields, optional={"prior_knowledge": "None", "user_instructions": "None"})
+    assert counter.count(prompt) <= limit
+    assert "Known: None" in prompt
+
+    small = {"topic": "SQL", "prior_knowledge": "joins", "user_instructions": "none"}
+    assert fit_prompt("syllabus", render, small, optional={"prior_knowledge": "None"}) == render(small)
+
+
+def test_long_user_context_is_compacted_and_usage_recorded():
+    llm = RecordingModel()
+    architect = ArchitectService(llm)
+    context = UserContext(skill_level="beginner", learning_style="visual", time_commitment=5,
+                          prior_knowledge=[f"topic {i}" for i in range(3000)])
+
+    with usage_scope() as usage:
+        architect.create_syllabus("SQL", "Use PostgreSQL examples.", context)
+    assert get_token_counter().count(llm.prompt) <= get_budget("syllabus").max_prompt_tokens
+    assert "Use PostgreSQL examples." in llm.prompt
+    assert usage.calls == 1 and usage.by_task["syllabus"]["prompt_tokens"] == len(llm.prompt) // 4  # reported by the model
+
+
+def test_ceilings_stop_calls_before_they_are_made():
+    with usage_scope(max_tokens=get_budget("theory").max_response_tokens + 50) as usage:
+        with track_llm_call("builder", "theory", "x" * 100) as call:
+            pass
+        assert usage.calls == 1
+
+        with pytest.raises(GenerationBudgetExceeded):
+            with track_llm_call("builder", "theory", "x" * 1000):
+                pytest.fail("call made over the ceiling")
+
+    with usage_scope(max_seconds=0) as usage:
+        with pytest.raises(GenerationBudgetExceeded):
+            with track_llm_call("architect", "syllabus", "prompt"):
+                pass
+
+    # Calls outside a scope, or without a prompt, are never limited
+    with track_llm_call("builder", "theory", "x" * 100_000):
+        pass
+
+
+def test_usage_is_accumulated_per_course_module_and_task(tmp_path):
+    db_service = DatabaseService(f"sqlite:///{tmp_path / 'app.db'}")
+    db_service.create_tables()
+    repo = UsageRepository(db_service)
+
+    for _ in range(2):
+        with usage_scope() as usage:
+            with track_llm_call("builder", "theory", "x" * 400):
+                pass
+            with track_llm_call("builder", "quiz", "x" * 40):
+                pass
+        repo.record_usage("c1", usage, "module_1")
+    with usage_scope() as usage:
+        with track_llm_call("architect", "syllabus", "x" * 40):
+            pass
+    repo.record_usage("c1", usage)
+
+    rows = [(row.module_id, row.task, row.calls, row.prompt_tokens) for row in repo.get_usage("c1")]
+    assert rows == [("", "syllabus", 1, 10), ("module_1", "quiz", 2, 20), ("module_1", "theory", 2, 200)]
+
+
+def test_failing_to_store_usage_does_not_mask_the_generation_error(tmp_path, capsys):
+    db_service = DatabaseService(f"sqlite:///{tmp_path / 'app.db'}")
+    db_service.create_tables()
+    mentor = MentorService(db_service, ceilings={}, llm_client=StubChatModel())
+    _, course_id = mentor.create_course_syllabus("SQL")
+
+    def down(*args, **kwargs):
+        raise ConnectionError("database is down")
+
+    def fail(*args, **kwargs):
+        raise ValueError("malformed module structure")
+
+    mentor.usage_repo.record_usage = down
+    mentor.architect.generate_module_structure = fail
+    with pytest.raises(ValueError, match="malformed module structure"):
+        mentor.create_module(course_id, "module_1")
+    assert "Failed to record LLM usage for module module_1" in capsys.readouterr().out
@@ -0,0 +1,160 @@
+"""Test suite for generation traces and sampled profiling."""
+
+import time
+from datetime import datetime
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from mentor_app.architect.service import ArchitectService
+from mentor_app.benchmarks.stub_llm import StubChatModel
+from mentor_app.builder.sandbox import CodeSandbox
+from mentor_app.builder.service import ContentGenerator
+from mentor_app.infrastructure.database import DatabaseService
+from mentor_app.infrastructure.llm_client import LLMClient, LLMProvider
+from mentor_app.infrastructure.models import GenerationSpan
+from mentor_app.infrastructure.repositories import TraceRepository
+from mentor_app.infrastructure.routing import ModelRoute, ModelRouter
+from mentor_app.infrastructure.tracing import Tracer, span
+from mentor_app.mentor.mentor_service import MentorService
+
+
+class DownModel:
+    def invoke(self, messages, **kwargs):
+        raise ConnectionResetError("connection reset")
+
+
+@pytest.fixture
+def db_service(tmp_path):
+    db_service = DatabaseService(f"sqlite:///{tmp_path / 'app.db'}")
+    db_service.create_tables()
+    return db_service
+
+
+def test_spans_nest_and_carry_tokens_and_outcomes():
+    traces = []
+    tracer = Tracer(traces.append)
+    stub = StubChatModel()
+    client = LLMClient([LLMProvider("down", lambda *args: DownModel(), "d"), LLMProvider("stub", lambda *args: stub, "s")])
+
+    with tracer.trace("create_course", topic="SQL") as trace:
+        ArchitectService(client.bind()).create_syllabus("SQL")
+        with pytest.raises(ValueError):
+            with span("persist"):
+                raise ValueError("disk full")
+        trace.set(course_id="course_1")
+
+    trace = traces[0]
+    spans = {(span.name, span.attributes.get("provider")): span for span in trace.spans}
+    llm_call, parse = spans[("llm_call", None)], spans[("parse", None)]
+    assert llm_call.parent_id is None and llm_call.attributes["prompt_tokens"] > 0
+    assert spans[("llm_provider", "down")].outcome == "error" and spans[("llm_provider", "stub")].outcome == "ok"
+    assert spans[("llm_provider", "stub")].parent_id == llm_call.span_id
+    assert parse.offset >= llm_call.offset + llm_call.duration
+    assert spans[("persist", None)].error == "ValueError: disk full"
+    assert (trace.course_id, trace.outcome) == ("course_1", "ok")
+    assert trace.llm_totals() == {
+        "llm_calls": 1, "prompt_tokens": llm_call.attributes["prompt_tokens"],
+        "completion_tokens": llm_call.attributes["completion_tokens"]
+    }
+
+
+def test_module_generation_is_stored_as_a_trace(db_service):
+    stub = StubChatModel()
+    sandbox = CodeSandbox(workers=1)
+    try:
+        mentor = MentorService(db_service, ceilings={}, tracer=Tracer(TraceRepository(db_service).save_trace))
+        mentor.architect = ArchitectService(stub)
+        mentor.builder = ContentGenerator(stub, sandbox=sandbox)
+        _, course_id = mentor.create_course_syllabus("SQL")
+        mentor.create_module(course_id, "module_1")
+        mentor.create_module(course_id, "module_1")  # already generated: no new trace
+    finally:
+        sandbox.close()
+
+    repo = TraceRepository(db_service)
+    traces = repo.list_traces(course_id=course_id)
+    assert [trace.operation for trace in traces] == ["create_module", "create_course"]
+    assert repo.list_traces(course_id=course_id, operation="create_course", outcome="ok")[0].attributes == {"topic": "SQL"}
+
+    trace = repo.get_trace(traces[0].id)
+    assert (trace.module_id, trace.outcome, trace.llm_calls) == ("module_1", "ok", 6)  # structure, 3 lessons, 2 quizzes
+    assert trace.prompt_tokens > 0 and trace.profile is None
+    names = [span.name for span in trace.spans if span.parent_id is None]
+    assert names == ["module_structure", "lesson", "lesson", "lesson", "validate_examples", "module_quiz", "persist"]
+    lessons = [span for span in trace.spans if span.name == "lesson"]
+    assert {span.attributes["body"] for span in lessons} == {"generated"}
+    children = {span.name for span in trace.spans if span.parent_id == lessons[0].span_id}
+    assert children == {"llm_call", "parse"}
+    assert sum(span.duration_seconds for span in trace.spans if span.parent_id is None) <= trace.duration_seconds
+
+
+def test_failed_runs_are_traced_and_trace_storage_errors_are_contained(capsys):
+    traces = []
+    tracer = Tracer(traces.append)
+    with pytest.raises(ConnectionResetError):
+        with tracer.trace("create_module", course_id="c", module_id="m"):
+            DownModel().invoke([HumanMessage(content="x")])
+    assert (traces[0].outcome, traces[0].error) == ("error", "ConnectionResetError: connection reset")
+
+    def broken_sink(trace):
+        raise ConnectionError("database is down")
+
+    with Tracer(broken_sink).trace("create_course"):
+        pass
+    assert "Failed to save generation trace" in capsys.readouterr().out
+
+
+def test_sampled_traces_carry_a_cpu_profile():
+    traces = []
+    with Tracer(traces.append, profile_rate=1.0).trace("create_course"):
+        sorted(range(10000), key=lambda i: -i)
+    with Tracer(traces.append, profile_rate=0.0).trace("create_course"):
+        pass
+    assert "function calls" in traces[0].profile and "cumulative" in traces[0].profile
+    assert traces[1].profile is None
+
+    outer = Tracer(traces.append)
+    with outer.trace("create_module"):
+        with outer.trace("create_course"):  # nested runs are spans of the outer trace
+            pass
+    assert traces[-1].name == "create_module" and [span.name for span in traces[-1].spans] == ["create_course"]
+
+
+def test_hedged_calls_are_profiled_on_their_threads():
+    class Slow(StubChatModel):
+        def invoke(self, messages, **kwargs):
+            time.sleep(0.2)
+            return super().invoke(messages, **kwargs)
+
+    class Hedge(StubChatModel):
+        def invoke(self, messages, **kwargs):
+            sorted(range(10000), key=_hedge_marker)
+            return super().invoke(messages, **kwargs)
+
+    models = {"primary": Slow(), "hedge": Hedge()}
+    router = ModelRouter({"default": ModelRoute("primary", hedge_model="hedge", hedge_after=0.01)},
+                         client_factory=lambda model, temperature, max_tokens: models[model])
+    traces = []
+    with Tracer(traces.append, profile_rate=1.0).trace("create_course"):
+        ArchitectService(router).create_syllabus("SQL")
+    assert "_hedge_marker" in traces[0].profile
+
+
+def _hedge_marker(i):
+    return -i
+
+
+def test_old_traces_are_pruned(db_service):
+    repo = TraceRepository(db_service)
+    for started_at in (datetime(2024, 1, 1), datetime(2024, 3, 1)):
+        with Tracer().trace("create_module", course_id="c") as trace:
+            with span("persist"):
+                pass
+        trace.started_at = started_at
+        repo.save_trace(trace)
+
+    assert repo.prune(datetime(2024, 2, 1), batch_size=1) == 1
+    assert [trace.started_at for trace in repo.list_traces()] == [datetime(2024, 3, 1)]
+    with db_service.get_session() as session:
+        assert session.query(GenerationSpan).count() == 1